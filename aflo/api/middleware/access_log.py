@@ -14,6 +14,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common import wsgi
+from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
 
 CONF = cfg.CONF
@@ -41,15 +42,27 @@ class AccessLogFilter(wsgi.Middleware):
 
         LOG.debug(decorat % req)
 
+        req.environ['aflo.statement_stats'] = db_api.statement_stats_begin()
+
         return None
 
     def process_response(self, response):
         req = response.request
+        db_api.statement_stats_end()
+        stats = req.environ.get('aflo.statement_stats') or \
+            db_api.StatementStats()
         msg = _("Treatment of aflo has been terminated: %(method)s %(path)s"
-                " Accept: %(accept)s")
+                " Accept: %(accept)s"
+                " DB statements: %(statements)d DB time: %(db_time).1fms")
         args = {'method': req.method, 'path': req.path,
-                'accept': req.accept}
+                'accept': req.accept,
+                'statements': stats.count, 'db_time': stats.time * 1000}
         LOG.info(msg % args)
+        stats.warn_repeated('%s %s' % (req.method, req.path))
+
+        if CONF.debug:
+            response.headers['X-DB-Statements'] = str(stats.count)
+            response.headers['X-DB-Time'] = '%.1f' % (stats.time * 1000)
 
         LOG.debug(decorat % response)
 
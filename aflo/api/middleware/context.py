@@ -13,6 +13,7 @@
 from oslo_config import cfg
 from oslo_log import log as logging
 from oslo_serialization import jsonutils
+from oslo_utils import strutils
 import webob.exc
 
 from aflo.api import policy
@@ -108,6 +109,8 @@ class ContextMiddleware(BaseContextMiddleware):
             'policy_enforcer': self.policy_enforcer,
             'user_name': req.headers.get('X-User-Name'),
             'tenant_name': req.headers.get('X-Tenant-Name'),
+            'read_primary': strutils.bool_from_string(
+                req.headers.get('X-Read-Primary')),
         }
 
         return aflo.context.RequestContext(**kwargs)
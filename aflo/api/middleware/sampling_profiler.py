@@ -0,0 +1,58 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from oslo_config import cfg
+from oslo_utils import strutils
+import webob.dec
+
+from aflo.common import sampling_profiler
+from aflo.common import wsgi
+
+CONF = cfg.CONF
+
+PROFILE_HEADER = 'X-Aflo-Profile'
+
+
+def _route(req):
+    """Get the controller and the action which processed a request."""
+    try:
+        match = req.environ['wsgiorg.routing_args'][1]
+        controller = match['controller'].controller
+        return '%s.%s' % (controller.__class__.__name__, match['action'])
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return '%s %s' % (req.method, req.path)
+
+
+class SamplingProfilerFilter(wsgi.Middleware):
+    """Profile requests by sampling stacks.
+    All requests are profiled when [sampling_profiler] enabled is set,
+    and a request of an admin is profiled with the X-Aflo-Profile header.
+    """
+
+    def _on_demand(self, req):
+        context = getattr(req, 'context', None)
+        return bool(context is not None and context.is_admin and
+                    strutils.bool_from_string(
+                        req.headers.get(PROFILE_HEADER)))
+
+    @webob.dec.wsgify
+    def __call__(self, req):
+        sampler = sampling_profiler.SAMPLER
+        on_demand = self._on_demand(req)
+        if not (CONF.sampling_profiler.enabled or on_demand) or \
+                sampler.active() or not sampler.begin():
+            return req.get_response(self.application)
+
+        try:
+            return req.get_response(self.application)
+        finally:
+            sampler.end(_route(req), flush=on_demand)
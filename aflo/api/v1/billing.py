@@ -0,0 +1,138 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from oslo_log import log as logging
+import webob.exc
+
+from aflo.api import policy
+from aflo.api.v1 import controller
+from aflo.billing import manager
+from aflo.billing import rating
+from aflo.common import datetime_codec
+from aflo.common import exception
+from aflo.common import utils
+from aflo.common import wsgi
+from aflo import i18n
+
+LOG = logging.getLogger(__name__)
+_ = i18n._
+
+
+class Controller(controller.BaseController):
+    """Billing controller class."""
+
+    def __init__(self):
+        self.policy = policy.Enforcer()
+        self.manager = manager.BillingManager()
+
+    def _enforce(self, req, action):
+        """Authorize an action against our policies"""
+        try:
+            self.policy.enforce(req.context, action, {})
+        except exception.Forbidden:
+            raise webob.exc.HTTPForbidden()
+
+    def _get_period(self, values, required=True):
+        """Parse a billing period from 'month',
+        or 'period_start' and 'period_end'.
+        :param values: Request parameters.
+        :param required: Whether the period must be given.
+        :retval Tuple of the start and the end of the period.
+        """
+        month = values.get('month')
+        if month:
+            if not utils.is_year_month_like(month):
+                raise webob.exc.HTTPBadRequest(
+                    _('month must be year and month.'))
+            return rating.month_period(
+                utils.get_datetime_from_year_month(month))
+
+        try:
+            period_start, period_end = [
+                datetime_codec.strptime(values[key])
+                if values.get(key) else None
+                for key in ('period_start', 'period_end')]
+        except (TypeError, ValueError):
+            raise webob.exc.HTTPBadRequest(
+                _('period_start and period_end must be datetime.'))
+
+        if required and not (period_start and period_end):
+            raise webob.exc.HTTPBadRequest(
+                _('month, or period_start and period_end are required.'))
+        if period_start and period_end and period_end <= period_start:
+            msg = _('Invalid billing period,'
+                    ' begin with %(dt_start)s end with %(dt_end)s')
+            params = {'dt_start': period_start, 'dt_end': period_end}
+            raise webob.exc.HTTPBadRequest(msg % params)
+
+        return period_start, period_end
+
+    def create(self, req, body):
+        """Aggregate charges of contracts in a billing period.
+        :param req: Http request.
+        :param body: Request body. The mapping of the following form::
+            {'billing': {'month': <YYYY-MM>}}
+            or
+            {'billing': {'period_start': <period_start>,
+                         'period_end': <period_end>}}
+        :retval The response body is a mapping of the following form::
+            {'billing_summary': [
+                {'project_id': <project_id>,
+                 'region_id': <region_id>,
+                 'catalog_id': <catalog_id>,
+                 'contract_count': <contract_count>,
+                 'amount': <amount>,
+                 ...}, ...]
+            }
+        """
+        self._enforce(req, 'billing_aggregate')
+
+        if not isinstance(body.get('billing'), dict):
+            raise webob.exc.HTTPBadRequest(_('billing is required.'))
+
+        period_start, period_end = self._get_period(body['billing'])
+
+        rows = self.manager.billing_aggregate(req.context,
+                                              period_start, period_end)
+
+        return {'billing_summary': rows}
+
+    def index(self, req):
+        """Get the billing summary.
+        :param req: Http request. Query parameters are 'month',
+            or 'period_start' and 'period_end', and 'project_id'.
+        :retval The response body is a mapping of the following form::
+            {'billing_summary': [
+                {'id': <id>,
+                 'period_start': <period_start>,
+                 'period_end': <period_end>,
+                 'project_id': <project_id>,
+                 ...}, ...]
+            }
+        """
+        self._enforce(req, 'billing_list')
+
+        period_start, period_end = self._get_period(req.params,
+                                                    required=False)
+
+        rows = self.manager.billing_summary_list(
+            req.context, period_start, period_end,
+            req.params.get('project_id'))
+
+        return {'billing_summary': rows}
+
+
+def create_resource():
+    """Billing resource factory method"""
+    deserializer = wsgi.JSONRequestDeserializer()
+    serializer = wsgi.JSONResponseSerializer()
+    return wsgi.Resource(Controller(), deserializer, serializer)
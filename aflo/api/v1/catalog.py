@@ -20,6 +20,7 @@ import webob.exc
 from aflo.api import policy
 from aflo.api.v1 import controller
 from aflo.catalog import manager
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import utils
 from aflo.common import wsgi
@@ -117,15 +118,13 @@ class Controller(controller.BaseController):
         dt_end = None
         if 'lifetime_start' in values and values['lifetime_start']:
             try:
-                dt_start = datetime.strptime(values['lifetime_start'],
-                                             '%Y-%m-%dT%H:%M:%S.%f')
+                dt_start = datetime_codec.strptime(values['lifetime_start'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_start'
                                                  ' must be datetime'))
         if 'lifetime_end' in values and values['lifetime_end']:
             try:
-                dt_end = datetime.strptime(values['lifetime_end'],
-                                           '%Y-%m-%dT%H:%M:%S.%f')
+                dt_end = datetime_codec.strptime(values['lifetime_end'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_end'
                                                  ' must be datetime'))
@@ -262,8 +261,7 @@ class Controller(controller.BaseController):
             if param in SUPPORTED_FILTERS:
                 if param in SUPPORTED_DATE_FILTERS:
                     try:
-                        datetime.strptime(req.params.get(param),
-                                          '%Y-%m-%dT%H:%M:%S.%f')
+                        datetime_codec.strptime(req.params.get(param))
                     except ValueError:
                         mesg = _("Date type of parameter "
                                  "Please specify in the format "
@@ -392,6 +390,9 @@ class Controller(controller.BaseController):
                         'of sort keys')
                 raise webob.exc.HTTPBadRequest(explanation=msg)
 
+        self._check_not_modified(
+            req, self.manager.catalog_fingerprint(req.context))
+
         try:
             rtn = self.manager.catalog_list(req.context,
                                             **params)
@@ -274,6 +274,10 @@ class Controller(controller.BaseController):
             'force_show_deleted': self._get_force_show_deleted(req)
         }
 
+        self._check_not_modified(
+            req, self.manager.catalog_contents_fingerprint(req.context,
+                                                           catalog_id))
+
         try:
             catalog_contents = self.manager.catalog_contents_list(req.context,
                                                                   catalog_id,
@@ -22,10 +22,10 @@ import webob.exc
 from aflo.api import policy
 from aflo.api.v1 import controller
 from aflo.catalog_scope import manager
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import wsgi
 from aflo import i18n
-from datetime import datetime
 
 LOG = logging.getLogger(__name__)
 _ = i18n._
@@ -100,8 +100,7 @@ class Controller(controller.BaseController):
 
             if param in SUPPORTED_DATE_FILTERS:
                 try:
-                    datetime.strptime(req.params.get(param, None),
-                                      '%Y-%m-%dT%H:%M:%S.%f')
+                    datetime_codec.strptime(req.params.get(param, None))
                 except ValueError:
                     raise webob.exc.HTTPBadRequest(_('lifetime must'
                                                      ' be datetime'))
@@ -242,15 +241,13 @@ class Controller(controller.BaseController):
         dt_end = None
         if 'lifetime_start' in values and values['lifetime_start']:
             try:
-                dt_start = datetime.strptime(values['lifetime_start'],
-                                             '%Y-%m-%dT%H:%M:%S.%f')
+                dt_start = datetime_codec.strptime(values['lifetime_start'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_start'
                                                  ' must be datetime'))
         if 'lifetime_end' in values and values['lifetime_end']:
             try:
-                dt_end = datetime.strptime(values['lifetime_end'],
-                                           '%Y-%m-%dT%H:%M:%S.%f')
+                dt_end = datetime_codec.strptime(values['lifetime_end'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_end'
                                                  ' must be datetime'))
@@ -0,0 +1,149 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from oslo_log import log as logging
+from oslo_utils import strutils
+import webob.exc
+
+from aflo.api import policy
+from aflo.api.v1 import controller
+from aflo.catalog import transfer
+from aflo.common import exception
+from aflo.common import utils
+from aflo.common import wsgi
+from aflo import i18n
+
+LOG = logging.getLogger(__name__)
+_ = i18n._
+
+CONTENT_TYPES = {'jsonl': 'application/x-ndjson',
+                 'csv': 'text/csv'}
+
+
+class Controller(controller.BaseController):
+    """Catalog import and export controller class."""
+
+    def __init__(self):
+        self.policy = policy.Enforcer()
+
+    def _enforce(self, req, action):
+        """Authorize an action against our policies"""
+        try:
+            self.policy.enforce(req.context, action, {})
+        except exception.Forbidden:
+            raise webob.exc.HTTPForbidden()
+
+    def _get_format(self, req):
+        """Parse a format query parameter from the request object.
+        Query parameters are read from the URL, so that the request body
+        is not read as a form.
+        """
+        fmt = req.GET.get('format', 'jsonl')
+        if fmt not in transfer.FORMATS:
+            _keys = ', '.join(transfer.FORMATS)
+            msg = _("Unsupported format. Acceptable values: %s") % _keys
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        return fmt
+
+    def _get_record_types(self, req, fmt):
+        """Parse a type query parameter from the request object."""
+        record_type = req.GET.get('type', None)
+        record_types = record_type.split(',') if record_type else []
+        for record_type in record_types:
+            if record_type not in transfer.RECORD_TYPES:
+                _keys = ', '.join(transfer.RECORD_TYPES)
+                msg = _("Unsupported type. Acceptable values: %s") % _keys
+                raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        if fmt == 'csv' and len(record_types) != 1:
+            msg = _("A type is required for CSV.")
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        return record_types
+
+    def _get_dry_run(self, req):
+        """Parse a dry_run query parameter from the request object."""
+        try:
+            return strutils.bool_from_string(
+                req.GET.get('dry_run', 'false'), strict=True)
+        except ValueError:
+            raise webob.exc.HTTPBadRequest(
+                _("dry_run parameter must be an boolean"))
+
+    def import_records(self, req, stream):
+        """Create or update goods, catalogs, catalog contents,
+        catalog scopes and prices from JSON-lines or CSV.
+        :param req: The Request object coming from the wsgi layer.
+            Query parameters are 'format', 'type' and 'dry_run'.
+        :param stream: Request body.
+        :retval The response body is a mapping of the following form::
+            {'result': {'created': <created>,
+                        'updated': <updated>,
+                        'unchanged': <unchanged>}}
+        """
+        self._enforce(req, 'catalog_import')
+
+        fmt = self._get_format(req)
+        record_types = self._get_record_types(req, fmt)
+        dry_run = self._get_dry_run(req)
+
+        if fmt == 'csv':
+            records = transfer.read_csv(stream, record_types[0])
+        else:
+            records = transfer.read_jsonl(stream)
+
+        try:
+            result = transfer.import_records(req.context, records, dry_run)
+        except exception.InvalidRecord as e:
+            raise webob.exc.HTTPBadRequest(
+                explanation=utils.exception_to_str(e))
+
+        return {'result': result}
+
+    def export_records(self, req):
+        """Get goods, catalogs, catalog contents, catalog scopes
+        and prices as JSON-lines or CSV.
+        :param req: The Request object coming from the wsgi layer.
+            Query parameters are 'format' and 'type'.
+        :retval Mapping of the format and the iterator of lines.
+        """
+        self._enforce(req, 'catalog_export')
+
+        fmt = self._get_format(req)
+        record_types = self._get_record_types(req, fmt)
+
+        return {'format': fmt,
+                'lines': transfer.export_records(req.context,
+                                                 record_types, fmt)}
+
+
+class RequestDeserializer(wsgi.JSONRequestDeserializer):
+    """Deserializer which passes the request body as a stream."""
+
+    def import_records(self, request):
+        return {'stream': request.body_file}
+
+
+class ResponseSerializer(wsgi.JSONResponseSerializer):
+    """Serializer which streams exported records."""
+
+    def export_records(self, response, result):
+        response.content_type = CONTENT_TYPES[result['format']]
+        response.app_iter = result['lines']
+
+
+def create_resource():
+    """Catalog import and export resource factory method"""
+    deserializer = RequestDeserializer()
+    serializer = ResponseSerializer()
+    return wsgi.Resource(Controller(), deserializer, serializer)
@@ -11,7 +11,6 @@
 #  under the License.
 
 import copy
-from datetime import datetime
 from oslo_config import cfg
 from oslo_log import log as logging
 import uuid
@@ -19,6 +18,7 @@ import webob.exc
 
 from aflo.api import policy
 from aflo.api.v1 import controller
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import wsgi
 from aflo.contracts import manager
@@ -58,6 +58,13 @@ SUPPORTED_SORT_KEYS = ('contract_id',
 
 SUPPORTED_SORT_DIRS = ('asc', 'desc')
 
+SUPPORTED_SUMMARY_KEYS = ('project_id', 'region_id',
+                          'catalog_id', 'catalog_name',
+                          'ticket_template_id',
+                          'expansion_key1', 'expansion_key2',
+                          'expansion_key3', 'expansion_key4',
+                          'expansion_key5')
+
 
 def from_dict(contract, disabled_fields=None):
     """Change contract format.
@@ -178,8 +185,7 @@ class Controller(controller.BaseController):
             raise webob.exc.HTTPBadRequest(msg_max_len % params)
         if 'application_date' in values and values['application_date']:
             try:
-                datetime.strptime(values['application_date'],
-                                  '%Y-%m-%dT%H:%M:%S.%f')
+                datetime_codec.strptime(values['application_date'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('application_date'
                                                  ' must be datetime'))
@@ -192,15 +198,13 @@ class Controller(controller.BaseController):
         dt_end = None
         if 'lifetime_start' in values and values['lifetime_start']:
             try:
-                dt_start = datetime.strptime(values['lifetime_start'],
-                                             '%Y-%m-%dT%H:%M:%S.%f')
+                dt_start = datetime_codec.strptime(values['lifetime_start'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_start'
                                                  ' must be datetime'))
         if 'lifetime_end' in values and values['lifetime_end']:
             try:
-                dt_end = datetime.strptime(values['lifetime_end'],
-                                           '%Y-%m-%dT%H:%M:%S.%f')
+                dt_end = datetime_codec.strptime(values['lifetime_end'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_end'
                                                  ' must be datetime'))
@@ -319,7 +323,7 @@ class Controller(controller.BaseController):
         """Parse a lifetime query parameter into something usable."""
         try:
             lifetime = req.params.get('lifetime', None)
-            lifetime = datetime.strptime(lifetime, '%Y-%m-%dT%H:%M:%S.%f') \
+            lifetime = datetime_codec.strptime(lifetime) \
                 if lifetime else None
 
         except ValueError:
@@ -331,7 +335,7 @@ class Controller(controller.BaseController):
         """Parse a date in lifetime query parameter into something usable."""
         try:
             lifetime = req.params.get('date_in_lifetime', None)
-            lifetime = datetime.strptime(lifetime, '%Y-%m-%d') \
+            lifetime = datetime_codec.strptime(lifetime, '%Y-%m-%d') \
                 if lifetime else None
 
         except ValueError:
@@ -397,8 +401,7 @@ class Controller(controller.BaseController):
 
         if filter_date:
             try:
-                datetime.strptime(filter_date,
-                                  '%Y-%m-%dT%H:%M:%S.%f')
+                datetime_codec.strptime(filter_date)
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('%s must be datetime')
                                                % filter_name)
@@ -412,7 +415,57 @@ class Controller(controller.BaseController):
         """
         self._enforce(req, 'contract_list')
 
-        params = {
+        params = self._get_filters(req)
+        params.update({
+            'limit': self._get_limit(req),
+            'marker': self._check_contract_id(req.params.get('marker', None)),
+            'sort_key': self._get_sort_key(req),
+            'sort_dir': self._get_sort_dir(req),
+        })
+
+        try:
+            contracts = self.manager.contract_list(req.context, **params)
+        except exception.NotFound:
+            msg = _("Contract not found")
+            LOG.debug(msg)
+            raise webob.exc.HTTPNotFound(msg)
+
+        return {'contract': contracts}
+
+    def _get_group_by(self, req):
+        """Parse a group_by query parameter from the request object."""
+        group_by = req.params.get('group_by', None)
+
+        group_keys = group_by.split(',') if group_by else []
+        for group_key in group_keys:
+            if group_key not in SUPPORTED_SUMMARY_KEYS:
+                _keys = ', '.join(SUPPORTED_SUMMARY_KEYS)
+                msg = _("Unsupported group_by. Acceptable values: %s") % _keys
+                raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        return group_keys
+
+    def summary(self, req):
+        """Get counts of contracts by groups.
+        Contracts are filtered by the same query parameters as list.
+            :param request: Http request.
+            :return Counts of contracts, e.g.
+                {'summary': [{'catalog_id': <catalog_id>,
+                              'count': <count>}, ...],
+                 'total': <count>}
+        """
+        self._enforce(req, 'contract_list')
+
+        summary = self.manager.contract_summary(req.context,
+                                                self._get_group_by(req),
+                                                **self._get_filters(req))
+
+        return {'summary': summary,
+                'total': sum(row['count'] for row in summary)}
+
+    def _get_filters(self, req):
+        """Parse filter query parameters of contracts."""
+        return {
             'project_id': self._get_project_id(req),
             'region_id': req.params.get('region_id', None),
             'project_name': req.params.get('project_name', None),
@@ -435,22 +488,9 @@ class Controller(controller.BaseController):
             'lifetime_end_to': self._get_date(req, 'lifetime_end_to'),
             'lifetime': self._get_lifetime(req),
             'date_in_lifetime': self._get_date_in_lifetime(req),
-            'limit': self._get_limit(req),
-            'marker': self._check_contract_id(req.params.get('marker', None)),
-            'sort_key': self._get_sort_key(req),
-            'sort_dir': self._get_sort_dir(req),
             'force_show_deleted': self._get_force_show_deleted(req)
         }
 
-        try:
-            contracts = self.manager.contract_list(req.context, **params)
-        except exception.NotFound:
-            msg = _("Contract not found")
-            LOG.debug(msg)
-            raise webob.exc.HTTPNotFound(msg)
-
-        return {'contract': contracts}
-
     def delete(self, req, contract_id):
         """Delete one of contract.
             :param request: Http request.
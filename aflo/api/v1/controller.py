@@ -10,8 +10,14 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
-from aflo import i18n
+import hashlib
+
 from oslo_log import log as logging
+from oslo_serialization import jsonutils
+import webob.exc
+
+from aflo.common import wsgi
+from aflo import i18n
 
 
 LOG = logging.getLogger(__name__)
@@ -19,4 +25,22 @@ _ = i18n._
 
 
 class BaseController(object):
-    pass
+
+    def _check_not_modified(self, req, *fingerprints):
+        """Answer a conditional GET before the list query runs.
+        The strong ETag is made from fingerprints of the tables, query
+        params and credentials which the response depends on.
+        :param req: The Request object coming from the wsgi layer
+        :param fingerprints: Fingerprints of the tables.
+        :raises HTTPNotModified if If-None-Match matches the ETag.
+        """
+        ctxt = req.context
+        source = [fingerprints,
+                  sorted(req.params.items()),
+                  ctxt.tenant, sorted(ctxt.roles), ctxt.is_admin]
+        etag = hashlib.sha1(jsonutils.dumps(source)).hexdigest()
+
+        if etag in req.if_none_match:
+            raise webob.exc.HTTPNotModified(headers={'ETag': '"%s"' % etag})
+
+        req.environ[wsgi.ETAG_ENV_KEY] = etag
@@ -11,16 +11,17 @@
 #  under the License.
 
 import copy
-from datetime import datetime
 import re
 import uuid
 
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 import webob.exc
 
 from aflo.api import policy
 from aflo.api.v1 import controller
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import utils
 from aflo.common import wsgi
@@ -114,15 +115,13 @@ class Controller(controller.BaseController):
         dt_end = None
         if 'lifetime_start' in values and values['lifetime_start']:
             try:
-                dt_start = datetime.strptime(values['lifetime_start'],
-                                             '%Y-%m-%dT%H:%M:%S.%f')
+                dt_start = datetime_codec.strptime(values['lifetime_start'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_start'
                                                  ' must be datetime'))
         if 'lifetime_end' in values and values['lifetime_end']:
             try:
-                dt_end = datetime.strptime(values['lifetime_end'],
-                                           '%Y-%m-%dT%H:%M:%S.%f')
+                dt_end = datetime_codec.strptime(values['lifetime_end'])
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime_end'
                                                  ' must be datetime'))
@@ -233,8 +232,7 @@ class Controller(controller.BaseController):
             if param in SUPPORTED_FILTERS:
                 if param in SUPPORTED_DATE_FILTERS:
                     try:
-                        datetime.strptime(req.params.get(param),
-                                          '%Y-%m-%dT%H:%M:%S.%f')
+                        datetime_codec.strptime(req.params.get(param))
                     except ValueError:
                         mesg = _("Date type of parameter "
                                  "Please specify in the format "
@@ -365,6 +363,9 @@ class Controller(controller.BaseController):
                         'of sort keys')
                 raise webob.exc.HTTPBadRequest(explanation=msg)
 
+        self._check_not_modified(
+            req, self.manager.price_fingerprint(req.context, catalog_id))
+
         try:
             rtn = self.manager.price_list(req.context,
                                           catalog_id,
@@ -410,6 +411,41 @@ class Controller(controller.BaseController):
 
         return dict(catalog_price=rtn)
 
+    def effective(self, req, catalog_id):
+        """Return the price which is effective for a scope at a time.
+        The price of 'Default' is returned when the scope has no price.
+        :param req: The Request object coming from the wsgi layer.
+            Query parameters are 'scope' and 'lifetime'.
+        :param catalog_id: The Catalog id.
+        :retval The response body is a mapping of the following form::
+            {'catalog_price':
+                {'catalog_id': <catalog_id>,
+                 'scope': <scope>,
+                 'seq_no': <seq_no>,
+                 'price': <price>,
+                 'valid_from': <valid_from>,
+                 'valid_to': <valid_to>}
+            }
+        """
+        self._enforce(req, 'price_show')
+
+        self._check_catalog_id(catalog_id)
+        scope = self._check_scope(req.params.get('scope', 'Default'))
+        at = self._get_filters(req).get('lifetime', timeutils.utcnow())
+
+        try:
+            rtn = self.manager.price_effective_get(req.context,
+                                                   catalog_id,
+                                                   scope,
+                                                   at)
+
+        except exception.NotFound:
+            msg = _("Price not found")
+            LOG.debug(msg)
+            raise webob.exc.HTTPNotFound(msg)
+
+        return dict(catalog_price=rtn)
+
     def update(self, req, body, catalog_id, scope, seq_no):
         """Update one of price
         :param req: The Request object coming from the wsgi layer
@@ -10,9 +10,11 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+from aflo.api.v1 import billing
 from aflo.api.v1 import catalog
 from aflo.api.v1 import catalog_contents
 from aflo.api.v1 import catalog_scope
+from aflo.api.v1 import catalog_transfer
 from aflo.api.v1 import contracts
 from aflo.api.v1 import goods
 from aflo.api.v1 import price
@@ -34,10 +36,12 @@ class API(wsgi.Router):
         contracts_resource = contracts.create_resource()
         goods_resource = goods.create_resource()
         catalog_resource = catalog.create_resource()
+        catalog_transfer_resource = catalog_transfer.create_resource()
         catalog_contents_resource = catalog_contents.create_resource()
         catalog_scope_resource = catalog_scope.create_resource()
         price_resource = price.create_resource()
         valid_catalog_resource = valid_catalog.create_resource()
+        billing_resource = billing.create_resource()
 
         mapper.connect("/",
                        controller=tickettemplates_resource,
@@ -72,14 +76,26 @@ class API(wsgi.Router):
                        controller=tickets_resource,
                        action='index',
                        conditions={'method': ['GET']})
+        mapper.connect("/tickets/summary",
+                       controller=tickets_resource,
+                       action='summary',
+                       conditions={'method': ['GET']})
         mapper.connect("/tickets/{ticket_id}",
                        controller=tickets_resource,
                        action='show',
                        conditions={'method': ['GET']})
+        mapper.connect("/tickets/{ticket_id}/operations/{operation_id}",
+                       controller=tickets_resource,
+                       action='show_operation',
+                       conditions={'method': ['GET']})
         mapper.connect("/tickets",
                        controller=tickets_resource,
                        action='create',
                        conditions={'method': ['POST']})
+        mapper.connect("/tickets/batch",
+                       controller=tickets_resource,
+                       action='create_batch',
+                       conditions={'method': ['POST']})
         mapper.connect("/tickets/{ticket_id}",
                        controller=tickets_resource,
                        action='update',
@@ -93,6 +109,10 @@ class API(wsgi.Router):
                        controller=contracts_resource,
                        action='create',
                        conditions={'method': ['POST']})
+        mapper.connect("/contract/summary",
+                       controller=contracts_resource,
+                       action='summary',
+                       conditions={'method': ['GET']})
         mapper.connect("/contract/{contract_id}",
                        controller=contracts_resource,
                        action='show',
@@ -131,6 +151,14 @@ class API(wsgi.Router):
                        action='delete',
                        conditions={'method': ['DELETE']})
 
+        mapper.connect("/catalog/import",
+                       controller=catalog_transfer_resource,
+                       action='import_records',
+                       conditions={'method': ['POST']})
+        mapper.connect("/catalog/export",
+                       controller=catalog_transfer_resource,
+                       action='export_records',
+                       conditions={'method': ['GET']})
         mapper.connect("/catalog",
                        controller=catalog_resource,
                        action='create',
@@ -211,6 +239,10 @@ class API(wsgi.Router):
                        controller=price_resource,
                        action='index',
                        conditions={'method': ['GET']})
+        mapper.connect("/catalog/{catalog_id}/effective_price",
+                       controller=price_resource,
+                       action='effective',
+                       conditions={'method': ['GET']})
         mapper.connect("/catalog/{catalog_id}/price/{scope}/seq/{seq_no}",
                        controller=price_resource,
                        action='update',
@@ -220,4 +252,13 @@ class API(wsgi.Router):
                        action='delete',
                        conditions={'method': ['DELETE']})
 
+        mapper.connect("/billing/summary",
+                       controller=billing_resource,
+                       action='create',
+                       conditions={'method': ['POST']})
+        mapper.connect("/billing/summary",
+                       controller=billing_resource,
+                       action='index',
+                       conditions={'method': ['GET']})
+
         super(API, self).__init__(mapper)
@@ -12,10 +12,13 @@
 
 import datetime
 import sys
+import time
 import uuid
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log as logging
+from oslo_utils import timeutils
 import webob.exc
 
 from aflo.api import policy
@@ -49,6 +52,8 @@ SUPPORTED_SORT_KEYS = ('id', 'tenant_id', 'ticket_template_id',
                        'created_at', 'updated_at',
                        'deleted_at', 'deleted')
 SUPPORTED_SORT_DIRS = ('asc', 'desc')
+SUPPORTED_SUMMARY_KEYS = ('ticket_type', 'status_code',
+                          'tenant_id', 'ticket_template_id')
 
 
 class Controller(controller.BaseController):
@@ -168,6 +173,46 @@ class Controller(controller.BaseController):
 
         return sort_dirs
 
+    def _get_wait(self, req):
+        """Parse a wait query param into something usable."""
+        try:
+            wait = float(req.params.get('wait', 0))
+        except ValueError:
+            raise webob.exc.HTTPBadRequest(_("wait param must be a number"))
+
+        if wait < 0:
+            raise webob.exc.HTTPBadRequest(_("wait param must be positive"))
+
+        return min(CONF.ticket_operation_wait_max, wait)
+
+    def _read_primary(self, req):
+        """Read the primary database for the rest of a ticket operation.
+        The flag goes to the rpc server with the context, so that the
+        operation never reads a stale replica.
+        """
+        req.context.read_primary = True
+
+    def _cast_with_operation(self, req, ticket_id, action, *args, **values):
+        """Cast a ticket operation and record it as queued.
+        :param ticket_id: The Ticket id.
+        :param action: Name of the function of 'TicketRpcAPI'.
+        :retval The queued operation.
+        """
+        operation = self.manager.operations_create(req.context,
+                                                   ticket_id, action)
+        try:
+            getattr(self.ticket_rpcapi, action)(
+                req.context, *args, operation_id=operation['id'], **values)
+        except Exception as e:
+            self.manager.operations_update(
+                req.context, operation['id'],
+                status=manager.OPERATION_FAILED,
+                finished_at=timeutils.utcnow(),
+                error_message=utils.exception_to_str(e))
+            raise
+
+        return operation
+
     def _get_ticket_type_filter(self, req):
         """Parse a ticket_type query param from the request object."""
         params = req.params.copy()
@@ -220,6 +265,42 @@ class Controller(controller.BaseController):
 
         return dict(tickets=rtn)
 
+    def _get_group_by(self, req):
+        """Parse a group_by query param from the request object."""
+        group_by = req.params.get('group_by', None)
+
+        group_keys = group_by.split(',') if group_by else []
+        for group_key in group_keys:
+            if group_key not in SUPPORTED_SUMMARY_KEYS:
+                _keys = ', '.join(SUPPORTED_SUMMARY_KEYS)
+                msg = _("Unsupported group_by. "
+                        "Acceptable values: %s") % (_keys,)
+                raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        return group_keys
+
+    def summary(self, req):
+        """Return counts of Tickets by groups
+        Tickets are filtered by the same query params as 'index'.
+        :param req: The Request object coming from the wsgi layer
+        :retval The response body is a mapping of the following form::
+
+            {'summary': [
+                {'ticket_type': <ticket_type>,
+                 'status_code': <status_code of the last workflow>,
+                 'count': <count>},
+                ...],
+             'total': <count>}
+        """
+        self._enforce(req, 'tickets_index')
+
+        rtn = self.manager.tickets_summary(
+            req.context, self._get_group_by(req),
+            filters=self._get_filters(req),
+            force_show_deleted=self._get_force_show_deleted(req))
+
+        return dict(summary=rtn, total=sum(row['count'] for row in rtn))
+
     def show(self, req, ticket_id):
         """Return a Ticket
         Admin user can get a deleted data.
@@ -245,6 +326,60 @@ class Controller(controller.BaseController):
 
         return dict(ticket=rtn)
 
+    def show_operation(self, req, ticket_id, operation_id):
+        """Return an operation to a Ticket
+        With 'wait' query param, the request waits up to the seconds
+        until the status differs from 'If-None-Match' header,
+        or until the operation finishes without the header.
+        The response is '304 Not Modified' if the status
+        does not change from 'If-None-Match' header.
+        :param req: The Request object coming from the wsgi layer
+        :param ticket_id: The Ticket id.
+        :param operation_id: The operation id.
+        :retval The response body is a mapping of the following form::
+            {'operation':
+                {'id': <id>,
+                 'ticket_id': <ticket_id>,
+                 'action': <action>,
+                 'status': <queued/running/succeeded/failed>,
+                 ...}
+            }
+        """
+        self._enforce(req, 'tickets_show')
+
+        wait = self._get_wait(req)
+        has_etag = 'If-None-Match' in req.headers
+        deadline = time.time() + wait
+
+        while True:
+            try:
+                operation = self.manager.operations_get(req.context,
+                                                        operation_id)
+            except exception.NotFound:
+                operation = None
+
+            if not operation or operation['ticket_id'] != ticket_id:
+                msg = _("Ticket operation not found")
+                LOG.debug(msg)
+                raise webob.exc.HTTPNotFound(msg)
+
+            if has_etag:
+                if operation['status'] not in req.if_none_match:
+                    break
+            elif operation['status'] in manager.OPERATION_FINISHED:
+                break
+
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                if has_etag:
+                    raise webob.exc.HTTPNotModified()
+                break
+
+            eventlet.sleep(min(CONF.ticket_operation_poll_interval,
+                               remaining))
+
+        return dict(operation=operation)
+
     def create(self, req, body):
         """Create one of ticket
         :param req: The Request object coming from the wsgi layer
@@ -264,9 +399,99 @@ class Controller(controller.BaseController):
             }
         """
         self._enforce(req, 'tickets_create')
+        self._read_primary(req)
+
+        values = self._prepare_create(req, body['ticket'])
+
+        operation = self._cast_with_operation(req, values['id'],
+                                              'tickets_create', **values)
+
+        # Rturn response.
+        return dict(ticket=self._get_created_ticket(values),
+                    workflow=[], operation=operation)
+
+    def create_batch(self, req, body):
+        """Create tickets at once
+        Each ticket is validated like 'create', and valid tickets are
+        sent to the rpc server in one message.
+        :param req: The Request object coming from the wsgi layer
+        :param body: The request body is a mapping of the following form::
+             {'tickets': [
+                {'ticket_template_id': <ticket_template_id>,
+                 'ticket_detail': <ticket_detail>,
+                 'status_code' : <status_code>},
+                ...]
+            }
+        :retval The response body is a mapping of the following form::
+            {'tickets': [
+                {'index': 0,
+                 'ticket': {'id': "1", ...},
+                 'operation': {'id': "1", 'status': "queued", ...}},
+                {'index': 1,
+                 'error': {'code': 400, 'message': "..."}},
+                ...]
+            }
+        """
+        self._enforce(req, 'tickets_create')
+        self._read_primary(req)
+
+        req_params = body.get('tickets')
+        if not isinstance(req_params, list) or not req_params:
+            msg = _('tickets parameter is required')
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        if len(req_params) > CONF.ticket_batch_max:
+            msg = _('The number of tickets exceeds %s') % \
+                CONF.ticket_batch_max
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        results = []
+        valid_values = []
+        cache = {}
+        for index, req_param in enumerate(req_params):
+            try:
+                values = self._prepare_create(req, req_param, cache)
+            except webob.exc.HTTPError as e:
+                results.append({'index': index,
+                                'error': {'code': e.code,
+                                          'message': unicode(e.detail or
+                                                             e.explanation)}})
+                continue
+
+            results.append({'index': index,
+                            'ticket': self._get_created_ticket(values)})
+            valid_values.append(values)
+
+        if valid_values:
+            operations = self._cast_batch_with_operations(req, valid_values)
+            valid_results = [result for result in results
+                             if 'ticket' in result]
+            for result, operation in zip(valid_results, operations):
+                result['operation'] = operation
+
+        return dict(tickets=results)
+
+    def _prepare_create(self, req, req_param, cache=None):
+        """Make and validate values of a new ticket.
+        :param req: The Request object coming from the wsgi layer
+        :param req_param: 'ticket' of the request body.
+        :param cache: optional, dict to share ticket templates
+            and brokers among tickets of a request.
+        :retval values to send to the rpc server.
+        """
+        if cache is None:
+            cache = {}
+
+        if not isinstance(req_param, dict):
+            msg = _('ticket parameter must be an object')
+            raise webob.exc.HTTPBadRequest(explanation=msg)
+
+        for key in ('ticket_template_id', 'status_code'):
+            if not req_param.get(key):
+                msg = _('%s parameter is required') % key
+                raise webob.exc.HTTPBadRequest(explanation=msg)
 
         values = {}
-        req_param = body['ticket']
         for key in req_param:
             values[key] = req_param[key]
 
@@ -282,24 +507,31 @@ class Controller(controller.BaseController):
         values['roles'] = req.context.roles
         values['after_status_code'] = req_param['status_code']
 
-        try:
-            ticket_template = self.templates_manager.ticket_templates_get(
-                req.context, values['ticket_template_id'])
-
-        except exception.NotFound:
-            raise webob.exc.HTTPNotFound(sys.exc_info()[1])
-
-        template = templates.TicketTemplate.load(
-            ticket_template.template_contents)
-        wf_pattern = ticket_template.workflow_pattern
+        broker_key = (values['ticket_template_id'],
+                      values['after_status_code'])
+        broker = cache.get(broker_key)
+        if broker is None:
+            try:
+                ticket_template = self.templates_manager.\
+                    ticket_templates_get(req.context,
+                                         values['ticket_template_id'])
+
+            except exception.NotFound:
+                raise webob.exc.HTTPNotFound(sys.exc_info()[1])
+
+            template = templates.TicketTemplate.load(
+                ticket_template.template_contents)
+            wf_pattern = ticket_template.workflow_pattern
+
+            # Load broker and validation
+            broker_name = template.get_handler_class()
+            broker = utils.load_class(broker_name)(
+                req.context,
+                template.ticket_template_contents,
+                wf_pattern.wf_pattern_contents,
+                **values)
+            cache[broker_key] = broker
 
-        # Load broker and validation
-        broker_name = template.get_handler_class()
-        broker = utils.load_class(broker_name)(
-            req.context,
-            template.ticket_template_contents,
-            wf_pattern.wf_pattern_contents,
-            **values)
         try:
             # validation
             broker.do_exec_for_api_process(**values)
@@ -313,9 +545,10 @@ class Controller(controller.BaseController):
         except exception.InvalidStatus:
             raise webob.exc.HTTPConflict(sys.exc_info()[1])
 
-        self.ticket_rpcapi.tickets_create(req.context, **values)
+        return values
 
-        # Create response data.
+    def _get_created_ticket(self, values):
+        """Create response data of a new ticket."""
         ret = {}
         ret['id'] = values['id']
         ret['ticket_template_id'] = values['ticket_template_id']
@@ -323,9 +556,30 @@ class Controller(controller.BaseController):
             if hasattr(values, 'ticket_detail') else ""
         ret['owner_id'] = values['owner_id']
         ret['owner_at'] = values['owner_at']
+        return ret
 
-        # Rturn response.
-        return dict(ticket=ret, workflow=[])
+    def _cast_batch_with_operations(self, req, values_list):
+        """Cast new tickets in one message and record them as queued.
+        :param values_list: values of new tickets.
+        :retval The queued operations in the order of values_list.
+        """
+        operations = self.manager.operations_create_many(
+            req.context, [values['id'] for values in values_list],
+            'tickets_create')
+        tickets = [dict(values, operation_id=operation['id'])
+                   for values, operation in zip(values_list, operations)]
+        try:
+            self.ticket_rpcapi.tickets_create_batch(req.context, tickets)
+        except Exception as e:
+            for operation in operations:
+                self.manager.operations_update(
+                    req.context, operation['id'],
+                    status=manager.OPERATION_FAILED,
+                    finished_at=timeutils.utcnow(),
+                    error_message=utils.exception_to_str(e))
+            raise
+
+        return operations
 
     def update(self, req, body, ticket_id):
         """Create one of ticket
@@ -340,6 +594,7 @@ class Controller(controller.BaseController):
             }
         """
         self._enforce(req, 'tickets_update')
+        self._read_primary(req)
 
         values = {}
         req_param = body['ticket']
@@ -404,7 +659,11 @@ class Controller(controller.BaseController):
         except exception.InvalidStatus:
             raise webob.exc.HTTPConflict(sys.exc_info()[1])
 
-        self.ticket_rpcapi.tickets_update(req.context, ticket_id, **values)
+        operation = self._cast_with_operation(req, ticket_id,
+                                              'tickets_update',
+                                              ticket_id, **values)
+
+        return dict(operation=operation)
 
     def delete(self, req, ticket_id):
         """Delete one of ticket
@@ -412,12 +671,23 @@ class Controller(controller.BaseController):
         :param ticket_id: The Ticket id.
         """
         self._enforce(req, 'tickets_delete')
+        self._read_primary(req)
+
+        operation = self._cast_with_operation(req, ticket_id,
+                                              'tickets_delete', ticket_id)
+
+        return dict(operation=operation)
+
+
+class ResponseSerializer(wsgi.JSONResponseSerializer):
 
-        self.ticket_rpcapi.tickets_delete(req.context, ticket_id)
+    def show_operation(self, response, result):
+        self.default(response, result)
+        response.etag = result['operation']['status']
 
 
 def create_resource():
     """Aflo resource factory method"""
     deserializer = wsgi.JSONRequestDeserializer()
-    serializer = wsgi.JSONResponseSerializer()
+    serializer = ResponseSerializer()
     return wsgi.Resource(Controller(), deserializer, serializer)
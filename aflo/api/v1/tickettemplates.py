@@ -208,14 +208,26 @@ class Controller(controller.BaseController):
                         'of sort keys')
                 raise webob.exc.HTTPBadRequest(explanation=msg)
 
+        self._check_not_modified(
+            req, *self.manager.ticket_templates_fingerprint(
+                req.context, self._get_enable_expansion_filters(req)))
+
+        expansion_filters = []
+        for expansion_filter in self._load_expansion_filters(req):
+            query_filters = expansion_filter.query_filters(req)
+            if query_filters is None:
+                expansion_filters.append(expansion_filter)
+            else:
+                params.update(query_filters)
+
         try:
-            rtn = self.manager.ticket_templates_list(req.context, **params)
+            rtn = self._list_page(req, expansion_filters, limit, params)
         except exception.NotFound:
             msg = _("Ticket templates not found")
             LOG.debug(msg)
             raise webob.exc.HTTPNotFound(msg)
 
-        return dict(tickettemplates=self._expansion_filters(req, rtn, limit))
+        return dict(tickettemplates=rtn)
 
     def show(self, req, tickettemplate_id):
         """Return a TicketTemplate
@@ -313,28 +325,54 @@ class Controller(controller.BaseController):
             LOG.error(msg)
             raise webob.exc.HTTPNotFound(msg)
 
-    def _expansion_filters(self, req, ticket_templates, limit):
-        """Filtering ticket template by expansion filters.
+    def _load_expansion_filters(self, req):
+        """Load expansion filters to filter ticket templates.
+        :param req: The Request object coming from the wsgi layer
+        """
+        if not self._get_enable_expansion_filters(req):
+            return []
+
+        expansion_filters = []
+        filters = CONF.ticket_template_expansion_filters.split(',')
+        for filter_name in filters:
+            if not filter_name:
+                continue
+
+            try:
+                expansion_filters.append(
+                    utils.load_class(filter_name.strip())())
+            except (ValueError, TypeError, AttributeError):
+                msg = _("Expansion filter not found")
+                raise webob.exc.HTTPNotFound(msg)
+
+        return expansion_filters
+
+    def _list_page(self, req, expansion_filters, limit, params):
+        """Get a page of ticket templates.
+        Pages of the query are read until the expansion filters leave
+        'limit' ticket templates, or no ticket template remains.
         :param req: The Request object coming from the wsgi layer
-        :param ticket_templates: All ticket templates.
+        :param expansion_filters: Expansion filters run on each page.
         :param limit: Maximum number of items to return.
+        :param params: Parameters of the query.
         """
-        if self._get_enable_expansion_filters(req):
-            filters = CONF.ticket_template_expansion_filters.split(',')
-            for filter_name in filters:
-                if not filter_name:
-                    continue
-
-                try:
-                    filter = utils.load_class(filter_name.strip())()
-                except (ValueError, TypeError, AttributeError):
-                    msg = _("Expansion filter not found")
-                    raise webob.exc.HTTPNotFound(msg)
-
-                filter.do_exec(req, ticket_templates)
-
-        if not ticket_templates:
-            return ticket_templates
+        ticket_templates = []
+        marker = params.pop('marker')
+
+        while len(ticket_templates) < limit:
+            rows = self.manager.ticket_templates_list(
+                req.context, marker=marker, limit=limit, **params)
+            if not rows:
+                break
+            marker = rows[-1].id
+            last_page = len(rows) < limit
+
+            for expansion_filter in expansion_filters:
+                expansion_filter.do_exec(req, rows)
+
+            ticket_templates.extend(rows)
+            if last_page:
+                break
 
         return ticket_templates[:limit]
 
@@ -18,11 +18,11 @@ import webob.exc
 
 from aflo.api import policy
 from aflo.api.v1 import controller
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import wsgi
 from aflo import i18n
 from aflo.valid_catalog import manager
-from datetime import datetime
 
 LOG = logging.getLogger(__name__)
 _ = i18n._
@@ -100,8 +100,7 @@ class Controller(controller.BaseController):
             raise webob.exc.HTTPBadRequest(msg)
         else:
             try:
-                datetime.strptime(req.params.get('lifetime'),
-                                  '%Y-%m-%dT%H:%M:%S.%f')
+                datetime_codec.strptime(req.params.get('lifetime'))
             except ValueError:
                 raise webob.exc.HTTPBadRequest(_('lifetime must be datetime'))
 
@@ -207,6 +206,9 @@ class Controller(controller.BaseController):
                         'of sort keys')
                 raise webob.exc.HTTPBadRequest(explanation=msg)
 
+        self._check_not_modified(
+            req, *self.manager.valid_catalog_fingerprint(req.context))
+
         try:
             rtn = self.manager.valid_catalog_list(req.context, **params)
         except exception.NotFound:
@@ -0,0 +1,68 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import itertools
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from aflo.billing import rating
+from aflo.db.sqlalchemy import api as db_api
+from aflo import i18n
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+_LI = i18n._LI
+
+
+class BillingManager(object):
+
+    def billing_aggregate(self, ctxt, period_start, period_end):
+        """Compute charges of projects in a billing period,
+        and replace the billing summary of the period.
+        Prices are read for batches of catalogs.
+        :param ctxt: Request context.
+        :param period_start: Start of the billing period.
+        :param period_end: End of the billing period (exclusive).
+        """
+        contracts = db_api.billing_contracts(ctxt, period_start, period_end)
+
+        summary = rating.Summary()
+        by_catalog = [(catalog_id, list(group))
+                      for catalog_id, group in itertools.groupby(
+                          contracts, lambda contract: contract['catalog_id'])]
+        batch_size = CONF.billing.batch_size
+        for i in range(0, len(by_catalog), batch_size):
+            batch = by_catalog[i:i + batch_size]
+
+            price_table = rating.PriceTable(db_api.billing_prices(
+                ctxt, [catalog_id for catalog_id, group in batch],
+                period_start, period_end))
+
+            for catalog_id, group in batch:
+                for contract in group:
+                    summary.add(contract, rating.rate_contract(
+                        contract, price_table, period_start, period_end))
+
+        rows = db_api.billing_summary_replace(ctxt, period_start, period_end,
+                                              summary.rows())
+        LOG.info(_LI('Billing summary from %(start)s to %(end)s is made '
+                     'of %(contracts)d contracts.'),
+                 {'start': period_start, 'end': period_end,
+                  'contracts': len(contracts)})
+
+        return rows
+
+    def billing_summary_list(self, ctxt, period_start=None, period_end=None,
+                             project_id=None):
+        return db_api.billing_summary_list(ctxt, period_start, period_end,
+                                           project_id)
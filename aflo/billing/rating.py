@@ -0,0 +1,167 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Rating of contracts for billing.
+
+A contract is charged for each interval of the billing period in which
+it is active. The price of an interval is the price of the scope of the
+contract's project if any, otherwise the price of the 'Default' scope.
+A price is the charge for a whole billing period, and is prorated by the
+length of the interval. Lifetimes of contracts are half-open:
+[start, end). Lifetimes of prices include their lifetime_end as
+price_list does, and the price which starts later is effective when
+lifetimes meet.
+"""
+
+import collections
+import datetime
+import decimal
+
+DEFAULT_SCOPE = 'Default'
+AMOUNT_QUANTUM = decimal.Decimal('0.001')
+RESOLUTION = datetime.timedelta(microseconds=1)
+
+
+def month_period(month):
+    """Get the billing period of a month.
+    :param month: datetime in the month.
+    :retval Tuple of the first moment of the month and of the next month.
+    """
+    period_start = datetime.datetime(month.year, month.month, 1)
+    if month.month == 12:
+        period_end = datetime.datetime(month.year + 1, 1, 1)
+    else:
+        period_end = datetime.datetime(month.year, month.month + 1, 1)
+
+    return period_start, period_end
+
+
+def _microseconds(delta):
+    return (delta.days * 86400 + delta.seconds) * 1000000 + \
+        delta.microseconds
+
+
+class PriceTable(object):
+    """Prices of catalogs by scope."""
+
+    def __init__(self, prices):
+        """
+        :param prices: List of dicts of catalog_id, scope, seq_no, price,
+            lifetime_start and lifetime_end.
+        """
+        self._prices = collections.defaultdict(list)
+        for price in prices:
+            self._prices[(price['catalog_id'], price['scope'])].append(price)
+
+        # A price which starts later overrides the former one.
+        for rows in self._prices.values():
+            rows.sort(key=lambda row: (row['lifetime_start'] or
+                                       datetime.datetime.min,
+                                       row['seq_no']))
+
+    def boundaries(self, catalog_id, scope):
+        """Get times at which a price of the scope starts or ends."""
+        for key in ((catalog_id, scope), (catalog_id, DEFAULT_SCOPE)):
+            for row in self._prices.get(key, []):
+                if row['lifetime_start'] is not None:
+                    yield row['lifetime_start']
+                # The price is effective at its lifetime_end too.
+                if row['lifetime_end'] not in (None, datetime.datetime.max):
+                    yield row['lifetime_end'] + RESOLUTION
+
+    def effective_price(self, catalog_id, scope, at):
+        """Get the price which is effective for the scope at a time.
+        :retval Price, or None if no price is effective.
+        """
+        price = self._find(catalog_id, scope, at)
+        if price is None and scope != DEFAULT_SCOPE:
+            price = self._find(catalog_id, DEFAULT_SCOPE, at)
+
+        return price
+
+    def _find(self, catalog_id, scope, at):
+        effective = None
+        for row in self._prices.get((catalog_id, scope), []):
+            start = row['lifetime_start']
+            if start is not None and at < start:
+                break
+            if row['lifetime_end'] is None or at <= row['lifetime_end']:
+                effective = row['price']
+
+        return effective
+
+
+def rate_contract(contract, price_table, period_start, period_end):
+    """Compute the charge of a contract in a billing period.
+    :param contract: Dict of project_id, catalog_id, num,
+        lifetime_start and lifetime_end.
+    :param price_table: PriceTable which has prices of the catalog.
+    :param period_start: Start of the billing period.
+    :param period_end: End of the billing period (exclusive).
+    :retval Amount which is not rounded.
+    """
+    start = max(contract['lifetime_start'] or period_start, period_start)
+    end = min(contract['lifetime_end'] or period_end, period_end)
+    amount = decimal.Decimal(0)
+    if end <= start:
+        return amount
+
+    points = set([start, end])
+    for at in price_table.boundaries(contract['catalog_id'],
+                                     contract['project_id']):
+        if start < at < end:
+            points.add(at)
+    points = sorted(points)
+
+    num = 1 if contract['num'] is None else contract['num']
+    period = _microseconds(period_end - period_start)
+
+    for interval_start, interval_end in zip(points, points[1:]):
+        price = price_table.effective_price(contract['catalog_id'],
+                                            contract['project_id'],
+                                            interval_start)
+        if price is None:
+            continue
+
+        length = _microseconds(interval_end - interval_start)
+        amount += price * num * length / period
+
+    return amount
+
+
+class Summary(object):
+    """Charges of contracts summed by project, region and catalog."""
+
+    def __init__(self):
+        self._rows = collections.OrderedDict()
+
+    def add(self, contract, amount):
+        key = (contract['project_id'], contract['region_id'],
+               contract['catalog_id'])
+        row = self._rows.get(key)
+        if row is None:
+            row = self._rows[key] = {'project_id': key[0],
+                                     'region_id': key[1],
+                                     'catalog_id': key[2],
+                                     'contract_count': 0,
+                                     'amount': decimal.Decimal(0)}
+
+        row['contract_count'] += 1
+        row['amount'] += amount
+
+    def rows(self):
+        """Get rows of the summary with amounts rounded."""
+        return [dict(row,
+                     amount=row['amount'].quantize(
+                         AMOUNT_QUANTUM, rounding=decimal.ROUND_HALF_UP))
+                for row in self._rows.values()]
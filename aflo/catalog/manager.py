@@ -46,3 +46,9 @@ class CatalogManager(object):
             :param catalog_id: Catalog id.
         """
         db_api.catalog_delete(ctxt, catalog_id)
+
+    def catalog_fingerprint(self, ctxt):
+        """Get a fingerprint of catalogs.
+            :param ctxt: Request context.
+        """
+        return db_api.table_fingerprint(ctxt, 'Catalog')
@@ -0,0 +1,253 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Import and export of goods, catalogs, catalog contents, catalog scopes
+and prices.
+
+Records are JSON-lines, whose 'type' key is a record type, or CSV of a
+record type. A record has all columns of the table but created_at,
+updated_at, deleted_at and deleted. Records are validated and written
+in chunks, and a chunk is written in one transaction. A record creates
+the row of its key, or updates the row when the values differ, so an
+exported file can be imported again any number of times.
+"""
+
+import collections
+import csv
+from datetime import datetime
+import decimal
+import itertools
+import json
+
+from oslo_config import cfg
+import six
+import sqlalchemy
+
+from aflo.common import datetime_codec
+from aflo.common import exception
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models
+
+CONF = cfg.CONF
+
+# Record type: name of the model.
+RECORD_TYPES = collections.OrderedDict([
+    ('goods', 'Goods'),
+    ('catalog', 'Catalog'),
+    ('catalog_contents', 'CatalogContents'),
+    ('catalog_scope', 'CatalogScope'),
+    ('price', 'Price'),
+])
+
+FORMATS = ('jsonl', 'csv')
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+_BASE_COLUMNS = ('created_at', 'updated_at', 'deleted_at', 'deleted')
+
+
+def get_fields(record_type):
+    """Get columns of a record type in the order of the table."""
+    table = getattr(models, RECORD_TYPES[record_type]).__table__
+    return [column for column in table.columns
+            if column.name not in _BASE_COLUMNS]
+
+
+def _to_value(column, value):
+    """Convert a value of a record to the type of the column.
+    :raise ValueError: The value is not valid.
+    """
+    if value is None or value == '':
+        if column.primary_key:
+            raise ValueError('%s is required' % column.name)
+        return None
+
+    column_type = column.type
+    if isinstance(column_type, sqlalchemy.DateTime):
+        return datetime_codec.strptime(value, DATETIME_FORMAT)
+    if isinstance(column_type, sqlalchemy.Integer):
+        if isinstance(value, bool) or \
+                not isinstance(value, six.integer_types + six.string_types):
+            raise ValueError('%s must be integer' % column.name)
+        return int(value)
+    if isinstance(column_type, sqlalchemy.Numeric):
+        value = decimal.Decimal(six.text_type(value))
+        sign, digits, exponent = value.as_tuple()
+        if -exponent > column_type.scale or \
+                len(digits) + exponent > \
+                column_type.precision - column_type.scale:
+            raise ValueError('%s must be Decimal(%d, %d)' % (
+                column.name, column_type.precision, column_type.scale))
+        return value
+
+    value = six.text_type(value)
+    if isinstance(column_type, sqlalchemy.String) and \
+            not isinstance(column_type, sqlalchemy.Text) and \
+            column_type.length < len(value):
+        raise ValueError('Length of %s is over than %d characters' % (
+            column.name, column_type.length))
+    return value
+
+
+def validate(line, record_type, values):
+    """Validate a record and convert it to a row.
+    :param line: Line number of the record.
+    :param record_type: Record type.
+    :param values: Dict of the record.
+    :retval Dict which has all columns of the record type.
+    :raise InvalidRecord: The record is not valid.
+    """
+    if record_type not in RECORD_TYPES:
+        raise exception.InvalidRecord(
+            line=line, reason='Unsupported type: %s' % record_type)
+
+    fields = get_fields(record_type)
+    unknown = set(values) - set(column.name for column in fields)
+    if unknown:
+        raise exception.InvalidRecord(
+            line=line,
+            reason='Unsupported field: %s' % ', '.join(sorted(unknown)))
+
+    row = {}
+    try:
+        for column in fields:
+            row[column.name] = _to_value(column, values.get(column.name))
+    except (TypeError, ValueError, decimal.InvalidOperation) as e:
+        raise exception.InvalidRecord(line=line, reason=six.text_type(e))
+
+    if row.get('lifetime_start') and row.get('lifetime_end') and \
+            row['lifetime_end'] < row['lifetime_start']:
+        raise exception.InvalidRecord(line=line,
+                                      reason='Invalid lifetime period')
+
+    return row
+
+
+def read_jsonl(stream):
+    """Read records of JSON-lines.
+    :retval Iterator of tuples of the line number, the record type
+        and the dict of the record.
+    """
+    for line, text in enumerate(stream, 1):
+        if not text.strip():
+            continue
+        try:
+            values = json.loads(text)
+        except ValueError as e:
+            raise exception.InvalidRecord(line=line,
+                                          reason=six.text_type(e))
+        if not isinstance(values, dict):
+            raise exception.InvalidRecord(line=line,
+                                          reason='Record must be object')
+
+        yield line, values.pop('type', None), values
+
+
+def read_csv(stream, record_type=None):
+    """Read records of CSV with a header line.
+    :param record_type: Record type of records which have no 'type'
+        column.
+    :retval Iterator of tuples of the line number, the record type
+        and the dict of the record.
+    """
+    reader = csv.DictReader(stream)
+    for values in reader:
+        # A short row has None values, and a long row has extra values
+        # under the key None.
+        if None in values or None in values.values():
+            raise exception.InvalidRecord(
+                line=reader.line_num,
+                reason='Number of columns does not match the header')
+        values = dict((key, value.decode('utf-8'))
+                      for key, value in values.items())
+        yield reader.line_num, values.pop('type', record_type), values
+
+
+def import_records(ctxt, records, dry_run=False):
+    """Validate and write records in chunks.
+    :param ctxt: Request context.
+    :param records: Iterator of tuples of the line number,
+        the record type and the dict of the record.
+    :param dry_run: Only validate and count records.
+    :retval Dict of the numbers of created, updated and unchanged rows.
+    """
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records,
+                                      CONF.catalog_transfer.batch_size))
+        if not chunk:
+            break
+
+        rows = collections.OrderedDict(
+            (record_type, []) for record_type in RECORD_TYPES)
+        for line, record_type, values in chunk:
+            row = validate(line, record_type, values)
+            rows[record_type].append(row)
+
+        chunk_counts = db_api.catalog_records_upsert(
+            ctxt,
+            [(RECORD_TYPES[record_type], rows[record_type])
+             for record_type in rows if rows[record_type]],
+            dry_run)
+        for key in counts:
+            counts[key] += chunk_counts[key]
+
+    return counts
+
+
+def _to_text(value):
+    if isinstance(value, datetime):
+        return datetime_codec.strftime(value, DATETIME_FORMAT)
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def export_records(ctxt, record_types=None, fmt='jsonl'):
+    """Write rows as records.
+    :param ctxt: Request context.
+    :param record_types: Record types to export. All types by default.
+        CSV has one record type.
+    :param fmt: 'jsonl' or 'csv'.
+    :retval Iterator of lines.
+    """
+    record_types = record_types or list(RECORD_TYPES)
+
+    if fmt == 'csv':
+        record_type = record_types[0]
+        names = [column.name for column in get_fields(record_type)]
+        yield _csv_line(names)
+        for row in db_api.catalog_records_iter(
+                ctxt, RECORD_TYPES[record_type],
+                CONF.catalog_transfer.batch_size):
+            yield _csv_line([_to_text(row[name]) for name in names])
+        return
+
+    for record_type in record_types:
+        names = [column.name for column in get_fields(record_type)]
+        for row in db_api.catalog_records_iter(
+                ctxt, RECORD_TYPES[record_type],
+                CONF.catalog_transfer.batch_size):
+            values = dict((name, _to_text(row[name])) for name in names)
+            values['type'] = record_type
+            yield json.dumps(values, sort_keys=True) + '\n'
+
+
+def _csv_line(values):
+    stream = six.BytesIO()
+    csv.writer(stream, lineterminator='\n').writerow(
+        ['' if value is None else
+         six.text_type(value).encode('utf-8') for value in values])
+    return stream.getvalue()
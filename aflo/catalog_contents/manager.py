@@ -52,3 +52,11 @@ class CatalogContentsManager(object):
             :param seq_no: Seq no.
         """
         db_api.catalog_contents_delete(ctxt, catalog_id, seq_no)
+
+    def catalog_contents_fingerprint(self, ctxt, catalog_id):
+        """Get a fingerprint of catalog contents.
+            :param ctxt: Request context.
+            :param catalog_id: Catalog id.
+        """
+        return db_api.table_fingerprint(ctxt, 'CatalogContents',
+                                        catalog_id=catalog_id)
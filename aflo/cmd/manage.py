@@ -22,6 +22,8 @@ from __future__ import print_function
 # Perhaps for consistency with Nova, we would then rename aflo-admin ->
 # aflo-manage (or the other way around)
 
+from datetime import datetime
+from datetime import timedelta
 import os
 import sys
 
@@ -39,9 +41,15 @@ from oslo_log import log as logging
 from oslo_utils import encodeutils
 import six
 
+from aflo.billing import manager as billing_manager
+from aflo.billing import rating
+from aflo.catalog import transfer
 from aflo.common import config
+from aflo.common import datetime_codec
 from aflo.common import exception
+from aflo.common import metrics
 from aflo.common import utils
+import aflo.context
 from aflo.db import migration as db_migration
 from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
@@ -60,6 +68,14 @@ def args(*args, **kwargs):
     return _decorator
 
 
+def action_name(name):
+    """Name an action which can not be the name of the method"""
+    def _decorator(func):
+        func.__dict__['action_name'] = name
+        return func
+    return _decorator
+
+
 class DbCommands(object):
     """Class for managing the db"""
 
@@ -109,6 +125,179 @@ class DbCommands(object):
                           db_migration.MIGRATE_REPO_PATH,
                           version)
 
+    @args('--days', metavar='<days>', type=int, default=90,
+          help='Archive tickets closed or deleted more than these days ago')
+    @args('--batch-size', dest='batch_size', metavar='<number>', type=int,
+          default=1000, help='Number of tickets in a transaction')
+    def archive(self, days=90, batch_size=1000):
+        """Move old closed and deleted tickets into the shadow tables"""
+        if days < 0 or batch_size < 1:
+            sys.exit('ERROR: Invalid --days or --batch-size.')
+
+        before = datetime.utcnow() - timedelta(days=days)
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        counts = db_api.tickets_archive(ctxt, before, batch_size)
+        print('%(deleted)d deleted and %(closed)d closed tickets '
+              'are archived.' % counts)
+
+    @args('--batch-size', dest='batch_size', metavar='<number>', type=int,
+          default=1000, help='Number of workflows in a transaction')
+    def compact_workflows(self, batch_size=1000):
+        """Delete workflows of unreached statuses for the sparse storage"""
+        if batch_size < 1:
+            sys.exit('ERROR: Invalid --batch-size.')
+        if CONF.workflow_storage != db_api.WORKFLOW_STORAGE_SPARSE:
+            sys.exit('ERROR: workflow_storage is not sparse.')
+
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        count = db_api.workflows_compact(ctxt, batch_size)
+        print('%d workflows of unreached statuses are deleted.' % count)
+
+    @args('--days', metavar='<days>', type=int, default=365,
+          help='Purge tickets archived more than these days ago')
+    @args('--batch-size', dest='batch_size', metavar='<number>', type=int,
+          default=1000, help='Number of tickets in a transaction')
+    def purge(self, days=365, batch_size=1000):
+        """Delete old tickets out of the shadow tables"""
+        if days < 0 or batch_size < 1:
+            sys.exit('ERROR: Invalid --days or --batch-size.')
+
+        before = datetime.utcnow() - timedelta(days=days)
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        count = db_api.shadow_purge(ctxt, before, batch_size)
+        print('%d archived tickets are purged.' % count)
+
+
+class BillingCommands(object):
+    """Class for aggregating charges of contracts"""
+
+    def __init__(self):
+        pass
+
+    @args('--month', metavar='<YYYY-MM>', help='Billing month')
+    @args('--start', metavar='<YYYY-MM-DDTHH:MM:SS>',
+          help='Start of the billing period')
+    @args('--end', metavar='<YYYY-MM-DDTHH:MM:SS>',
+          help='End of the billing period (exclusive)')
+    def aggregate(self, month=None, start=None, end=None):
+        """Aggregate charges of contracts in a billing period"""
+        try:
+            if month:
+                period_start, period_end = rating.month_period(
+                    datetime_codec.strptime(month, '%Y-%m'))
+            elif start and end:
+                period_start = datetime_codec.strptime(start,
+                                                       '%Y-%m-%dT%H:%M:%S')
+                period_end = datetime_codec.strptime(end, '%Y-%m-%dT%H:%M:%S')
+            else:
+                sys.exit('ERROR: --month, or --start and --end are required.')
+        except ValueError as e:
+            sys.exit('ERROR: %s' % e)
+
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        rows = billing_manager.BillingManager().billing_aggregate(
+            ctxt, period_start, period_end)
+        print('%d rows of the billing summary from %s to %s.'
+              % (len(rows), period_start, period_end))
+
+
+class PriceCommands(object):
+    """Class for managing prices"""
+
+    def __init__(self):
+        pass
+
+    def rebuild_timeline(self):
+        """Make the price timelines of all catalogs again"""
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        count = db_api.price_timeline_rebuild_all(ctxt)
+        print('%d price timelines are made.' % count)
+
+
+class TicketTemplateCommands(object):
+    """Class for managing ticket templates"""
+
+    def __init__(self):
+        pass
+
+    def rebuild_grant_roles(self):
+        """Make the grant roles of all ticket templates again"""
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        count = db_api.ticket_template_grant_roles_rebuild_all(ctxt)
+        print('Grant roles of %d ticket templates are made.' % count)
+
+
+class CatalogCommands(object):
+    """Class for importing and exporting catalogs"""
+
+    def __init__(self):
+        pass
+
+    @action_name('import')
+    @args('--file', metavar='<path>', required=True,
+          help='File to import')
+    @args('--format', metavar='<jsonl|csv>', default='jsonl',
+          choices=transfer.FORMATS, help='Format of the file')
+    @args('--type', metavar='<type>', choices=list(transfer.RECORD_TYPES),
+          help='Type of records of CSV')
+    @args('--dry-run', action='store_true', dest='dry_run',
+          help='Only validate and count records')
+    def import_records(self, file, format='jsonl', type=None,
+                       dry_run=False):
+        """Create or update goods, catalogs and prices from a file"""
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        with open(file, 'rb') as stream:
+            if format == 'csv':
+                records = transfer.read_csv(stream, type)
+            else:
+                records = transfer.read_jsonl(stream)
+            counts = transfer.import_records(ctxt, records, dry_run)
+
+        print('created: %(created)d, updated: %(updated)d, '
+              'unchanged: %(unchanged)d' % counts)
+
+    @action_name('export')
+    @args('--file', metavar='<path>', required=True,
+          help='File to export to')
+    @args('--format', metavar='<jsonl|csv>', default='jsonl',
+          choices=transfer.FORMATS, help='Format of the file')
+    @args('--type', metavar='<type>', choices=list(transfer.RECORD_TYPES),
+          help='Type of records. All types by default, but CSV has '
+               'one type')
+    def export_records(self, file, format='jsonl', type=None):
+        """Write goods, catalogs and prices to a file"""
+        if format == 'csv' and not type:
+            sys.exit('ERROR: --type is required for CSV.')
+
+        ctxt = aflo.context.RequestContext(is_admin=True)
+        with open(file, 'wb') as stream:
+            for line in transfer.export_records(
+                    ctxt, [type] if type else None, format):
+                stream.write(line)
+
+
+class MetricsCommands(object):
+    """Class for reading timing spans of processes"""
+
+    def __init__(self):
+        pass
+
+    def show(self):
+        """Show the totals of timing spans written by processes"""
+        output_dir = CONF.metrics.output_dir
+        if not output_dir or not os.path.isdir(output_dir):
+            sys.exit('ERROR: [metrics] output_dir is not written.')
+
+        print('%-24s %8s %8s %12s %12s  %s' % (
+            'Name', 'Count', 'Errors', 'Avg(ms)', 'Max(ms)', 'Tags'))
+        for entry in metrics.load(output_dir):
+            print('%-24s %8d %8d %12.3f %12.3f  %s' % (
+                entry['name'], entry['count'], entry['errors'],
+                entry['total'] * 1000 / entry['count'],
+                entry['max'] * 1000,
+                ', '.join('%s=%s' % item
+                          for item in sorted(entry['tags'].items()))))
+
 
 class DbLegacyCommands(object):
     """Class for managing the db using legacy commands"""
@@ -163,37 +352,50 @@ def add_legacy_command_parsers(command_object, subparsers):
     parser.set_defaults(action='db_sync')
 
 
+CATEGORIES = {
+    'billing': BillingCommands,
+    'catalog': CatalogCommands,
+    'db': DbCommands,
+    'metrics': MetricsCommands,
+    'price': PriceCommands,
+    'tickettemplate': TicketTemplateCommands,
+}
+
+
 def add_command_parsers(subparsers):
-    command_object = DbCommands()
+    for category in CATEGORIES:
+        command_object = CATEGORIES[category]()
 
-    parser = subparsers.add_parser('db')
-    parser.set_defaults(command_object=command_object)
+        parser = subparsers.add_parser(category)
+        parser.set_defaults(command_object=command_object)
 
-    category_subparsers = parser.add_subparsers(dest='action')
+        category_subparsers = parser.add_subparsers(dest='action')
 
-    for (action, action_fn) in methods_of(command_object):
-        parser = category_subparsers.add_parser(action)
+        for (action, action_fn) in methods_of(command_object):
+            parser = category_subparsers.add_parser(
+                getattr(action_fn, 'action_name', action))
 
-        action_kwargs = []
-        for args, kwargs in getattr(action_fn, 'args', []):
-            # FIXME(basha): hack to assume dest is the arg name without
-            # the leading hyphens if no dest is supplied
-            kwargs.setdefault('dest', args[0][2:])
-            if kwargs['dest'].startswith('action_kwarg_'):
-                action_kwargs.append(
-                    kwargs['dest'][len('action_kwarg_'):])
-            else:
-                action_kwargs.append(kwargs['dest'])
-                kwargs['dest'] = 'action_kwarg_' + kwargs['dest']
+            action_kwargs = []
+            for args, kwargs in getattr(action_fn, 'args', []):
+                # FIXME(basha): hack to assume dest is the arg name without
+                # the leading hyphens if no dest is supplied
+                kwargs.setdefault('dest', args[0][2:])
+                if kwargs['dest'].startswith('action_kwarg_'):
+                    action_kwargs.append(
+                        kwargs['dest'][len('action_kwarg_'):])
+                else:
+                    action_kwargs.append(kwargs['dest'])
+                    kwargs['dest'] = 'action_kwarg_' + kwargs['dest']
 
-            parser.add_argument(*args, **kwargs)
+                parser.add_argument(*args, **kwargs)
 
-        parser.set_defaults(action_fn=action_fn)
-        parser.set_defaults(action_kwargs=action_kwargs)
+            parser.set_defaults(action_fn=action_fn)
+            parser.set_defaults(action_kwargs=action_kwargs)
 
-        parser.add_argument('action_args', nargs='*')
+            parser.add_argument('action_args', nargs='*')
 
-        add_legacy_command_parsers(command_object, subparsers)
+        if category == 'db':
+            add_legacy_command_parsers(command_object, subparsers)
 
 
 command_opt = cfg.SubCommandOpt('command',
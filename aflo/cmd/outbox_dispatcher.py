@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Aflo Outbox Dispatcher
+"""
+
+import os
+import sys
+
+import eventlet
+
+from aflo.common import utils
+from aflo.openstack.common import service
+
+# Monkey patch socket, time, select, threads
+eventlet.patcher.monkey_patch(all=False, socket=True, time=True,
+                              select=True, thread=True, os=True)
+
+# If ../aflo/__init__.py exists, add ../ to Python search path, so that
+# it will override what happens to be installed in /usr/(local/)lib/python...
+possible_topdir = os.path.normpath(os.path.join(os.path.abspath(sys.argv[0]),
+                                   os.pardir,
+                                   os.pardir))
+if os.path.exists(os.path.join(possible_topdir, 'aflo', '__init__.py')):
+    sys.path.insert(0, possible_topdir)
+
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from aflo.common import config
+from aflo.common import outbox
+from aflo.common import wsgi
+
+
+CONF = cfg.CONF
+logging.register_options(CONF)
+
+KNOWN_EXCEPTIONS = (RuntimeError,)
+
+
+def fail(e):
+    global KNOWN_EXCEPTIONS
+    return_code = KNOWN_EXCEPTIONS.index(type(e)) + 1
+    sys.stderr.write("ERROR: %s\n" % utils.exception_to_str(e))
+    sys.exit(return_code)
+
+
+def main():
+    try:
+        config.parse_args()
+        wsgi.set_eventlet_hub()
+        logging.setup(CONF, 'aflo')
+
+        launcher = service.launch(outbox.DispatcherService())
+        launcher.wait()
+
+    except KNOWN_EXCEPTIONS as e:
+        fail(e)
+
+
+if __name__ == '__main__':
+    main()
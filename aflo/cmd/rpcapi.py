@@ -68,7 +68,7 @@ def main():
 
         transport = oslo_messaging.get_transport(cfg.CONF)
         target = oslo_messaging.Target(topic='aflo_topic',
-                                       server='server1',
+                                       server=CONF.rpc_server_name,
                                        version='1.0')
         endpoints = [
             manager.TicketsManager(),
@@ -77,7 +77,7 @@ def main():
             transport,
             target,
             endpoints,
-            executor='blocking')
+            executor=CONF.rpc_executor)
 
         serve(rpc_server, cfg.CONF.rpc_workers)
         wait()
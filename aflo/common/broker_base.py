@@ -15,18 +15,23 @@
 #    under the License.
 
 import json
-import re
 
+from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.exception import BrokerError
 from aflo.common.exception import InvalidParameterValue
 from aflo.common.exception import InvalidRole
 from aflo.common.exception import InvalidStatus
+from aflo.common import metrics
+from aflo.common import outbox
 from aflo.common import utils
 from aflo.db.sqlalchemy import api as db_api
+from aflo.tickets.broker.utils import contract_utils
+from aflo.tickets.broker.utils import utils as broker_utils
 from aflo.tickettemplates import templates
 
+CONF = cfg.CONF
 LOG = logging.getLogger(__name__)
 
 ACTION_BEFORE = 'before'
@@ -60,6 +65,15 @@ class BrokerBase(object):
         self.roles = values.get('roles', None)
         values['status'] = values.get('after_status_code', None)
 
+        self._outbox_session = None
+        self._outbox_key = None
+        self._outbox_seq = 0
+
+        # Contracts and quota changes of broker methods, which are
+        # registered at once at the end of do_exec.
+        self.contracts = []
+        self.quotas = broker_utils.QuotaAggregator()
+
     def do_exec(self, wf_action, session, **values):
         """Main Prcoess.
         :param wf_action: manupirate workflow data function.
@@ -80,20 +94,39 @@ class BrokerBase(object):
                 not isinstance(values['additional_data'], dict):
             values['additional_data'] = json.loads(values['additional_data'])
 
-        self._do_role_check()
+        with self._span('broker.role_check'):
+            self._do_role_check()
 
-        with (session).begin():
-            self._do_before(self.after_status_code, session, **values)
+        with self._span('broker.before'):
+            with (session).begin():
+                self._do_before(self.after_status_code, session, **values)
 
-        with (session).begin():
-            ret = wf_action(self.ctxt, session,
-                            self.template, self.wf_pattern, **values)
+        with self._span('broker.workflow'):
+            with (session).begin():
+                ret = wf_action(self.ctxt, session,
+                                self.template, self.wf_pattern, **values)
 
-        with (session).begin():
-            self._do_after(self.after_status_code, session, **values)
+        with self._span('broker.after'):
+            with (session).begin():
+                self._do_after(self.after_status_code, session, **values)
+                self._flush(session)
 
         return ret
 
+    def _flush(self, session):
+        """Register contracts and update quotas added by broker methods.
+        :param session: DB session of the after process.
+        """
+        contracts, self.contracts = self.contracts, []
+        contract_utils.create_contracts(self.ctxt, contracts,
+                                        session=session)
+
+        try:
+            self.quotas.flush()
+        except Exception as e:
+            raise BrokerError(location='update_quotas',
+                              cause=utils.exception_to_str(e))
+
     def do_exec_for_api_process(self, **values):
         """Main Prcoess for API process.
         :param values: Input data from form.
@@ -109,10 +142,22 @@ class BrokerBase(object):
                 not isinstance(values['additional_data'], dict):
             values['additional_data'] = json.loads(values['additional_data'])
 
-        self._do_role_check()
-        self._do_target_check(**values)
+        with self._span('broker.role_check'):
+            self._do_role_check()
+
+        with self._span('broker.target_check'):
+            self._do_target_check(**values)
+
         self._do_validation_action(self.after_status_code, **values)
 
+    def _span(self, name, **tags):
+        """Time a phase of the broker.
+        :param name: Span name.
+        :param tags: Tags added to the handler class and the status.
+        """
+        return metrics.span(name, handler=self.__class__.__name__,
+                            status=self.after_status_code, **tags)
+
     def _do_role_check(self):
         """Validation role by now status
         """
@@ -238,7 +283,8 @@ class BrokerBase(object):
                 break
 
         if validation:
-            getattr(self, validation)(ctxt=self.ctxt, **values)
+            with self._span('broker.validation', method=validation):
+                getattr(self, validation)(ctxt=self.ctxt, **values)
 
     def _do_broker_action(self, timing, status, session,
                           **values):
@@ -259,9 +305,11 @@ class BrokerBase(object):
                 break
 
         if broker_method:
-            getattr(self, broker_method)(session=session,
-                                         ctxt=self.ctxt,
-                                         **values)
+            with self._span('broker.broker_method', method=broker_method,
+                            timing=timing):
+                getattr(self, broker_method)(session=session,
+                                             ctxt=self.ctxt,
+                                             **values)
 
     def _do_before(self, status, session, **values):
         """Before Process.
@@ -283,135 +331,60 @@ class BrokerBase(object):
         """
         LOG.debug("_do_after Begin")
 
-        self._do_broker_action(ACTION_AFTER, status, session, **values)
+        if CONF.outbox.enabled:
+            # Side effects are added to the outbox in this transaction.
+            self._outbox_session = session
+            self._outbox_key = '%s:%s' % (values.get('id'), status)
+            self._outbox_seq = 0
+
+        try:
+            self._do_broker_action(ACTION_AFTER, status, session, **values)
+        finally:
+            self._outbox_session = None
 
         LOG.debug("_do_after End")
 
+    def add_side_effect(self, action, **payload):
+        """Run a side effect of the broker.
+        In the after process with the outbox enabled, the side effect is
+        added to the outbox and aflo-outbox-dispatcher runs it later.
+        :param action: Action name in 'aflo.common.outbox.ACTIONS'.
+        :param payload: Arguments of the action.
+        """
+        if self._outbox_session is None:
+            return outbox.run(action, **payload)
+
+        self._outbox_seq += 1
+        idempotency_key = '%s:%s:%d' % (self._outbox_key, action,
+                                        self._outbox_seq)
+        outbox.enqueue(self._outbox_session, action, idempotency_key,
+                       **payload)
+
+    def _sendmail(self, to_address, template, data):
+        """Send a mail as a side effect of the broker.
+        :param to_address: Send to address.
+        :param template: Use Template Object.
+        :param data: Replace data for template.
+        """
+        self.add_side_effect('sendmail', to_address=to_address,
+                             template=template.__name__, data=data)
+
     def general_param_check(self, **values):
         """"Check Parameters.
+        All parameters are checked in one pass with the validation plan
+        of the template, and the first error is raised with all errors.
         :param values: input data.
         """
         LOG.debug("param_check Begin")
 
-        value = None
-        parameter_list = self.ticket_template.get_parameters(
+        plan = self.ticket_template.get_validation_plan(
             self.before_status_code)
-
-        for parameter in parameter_list:
-            value = self._get_value(parameter, **values)
-            param_type = self.ticket_template.get_parameter_type(parameter)
-
-            if value:
-                try:
-                    value = str(value)
-                except UnicodeEncodeError:
-                    value = value.encode('utf_8')
-
-            self._check_required(parameter, value)
-            if value is None or value == '':
-                continue
-
-            if param_type == 'number':
-                self._check_number(parameter, value)
-            elif param_type == 'date':
-                self._check_date(parameter, value)
-            elif param_type == 'boolean':
-                self._check_boolean(parameter, value)
-            elif param_type == 'email':
-                self._check_email(parameter, value)
-            else:
-                if self.ticket_template.get_allowed_values(parameter):
-                    self._check_select(parameter, value)
-                else:
-                    self._check_string(parameter, value)
-
-    def _check_number(self, parameter, value):
-        if (not isinstance(value, int)) and (not value.isdigit()):
-            raise InvalidParameterValue(self._create_error_meesage(
-                parameter, value, 'is not number'))
-
-        value_range = self.ticket_template.get_range(parameter)
-        if value_range:
-            value_min = value_range.get('min', None)
-            value_max = value_range.get('max', None)
-
-            if value_min is not None and int(value) < int(value_min):
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is too small'))
-
-            if value_max is not None and int(value) > int(value_max):
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is too large'))
-
-    def _check_date(self, parameter, value):
-        if not utils.is_datetime_like(value):
-            raise InvalidParameterValue(self._create_error_meesage(
-                parameter, value, 'is invalid value'))
-
-    def _check_boolean(self, parameter, value):
-        if value not in ('True', 'False', True, False):
-            raise InvalidParameterValue(self._create_error_meesage(
-                parameter, value, 'is invalid value'))
-
-    def _check_select(self, parameter, value):
-        allowed_values = self.ticket_template.get_allowed_values(parameter)
-
-        for allowed_value in allowed_values:
-            if str(value) == str(allowed_value['value']):
-                return
-
-        raise InvalidParameterValue(self._create_error_meesage(
-            parameter, value, 'is invalid value'))
-
-    def _check_email(self, parameter, value):
-        pattern = '[A-Z0-9a-z._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,4}'
-        if re.match(pattern, value) is None:
-            raise InvalidParameterValue(self._create_error_meesage(
-                parameter, value, 'is invalid email'))
-
-    def _check_string(self, parameter, value):
-        value_string = ""
-        try:
-            value_string = unicode(value, 'utf-8')
-        except TypeError:
-            value_string = value
-
-        value_length = self.ticket_template.get_length(parameter)
-        if value_length:
-            value_min = value_length['min']
-            value_max = value_length['max']
-
-            if len(value_string) < int(value_min):
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is too short'))
-
-            if len(value_string) > int(value_max):
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is too long'))
-
-        pattern = self.ticket_template.get_allowed_pattern(parameter)
-        if pattern:
-            if re.match(pattern, value_string) is None:
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is invalid pattern'))
-
-    def _check_required(self, parameter, value):
-        if self.ticket_template.get_required(parameter):
-            if value is None or value == '':
-                raise InvalidParameterValue(self._create_error_meesage(
-                    parameter, value, 'is None but is required'))
-
-    def _create_error_meesage(self, parameter, value, message):
-        return {'value': value,
-                'param': self.ticket_template.get_label(parameter),
-                'extra_msg': message}
-
-    def _get_value(self, parameter, **values):
         if not self.before_status_code:
             # ticket creating check
-            return values['ticket_detail'].get(
-                self.ticket_template.get_parameter_key(parameter), None)
+            errors = plan.validate(values['ticket_detail'])
         else:
             # ticket updating check
-            return values['additional_data'].get(
-                self.ticket_template.get_parameter_key(parameter), None)
+            errors = plan.validate(values['additional_data'])
+
+        if errors:
+            raise InvalidParameterValue(errors[0], errors=errors)
@@ -0,0 +1,296 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Cache shared by workers.
+
+A Cache has a namespace, and its keys are prefixed with the namespace
+and a generation counter stored in the backend. Invalidating a
+namespace increments the counter, so that all workers miss the old
+entries at once, and the backend expires them.
+
+The "memory" backend is an LRU cache in the process. The "memcached"
+backend talks the memcached text protocol, so that all workers of all
+processes share one warm cache. Values have to be JSON serializable.
+"""
+
+import collections
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+import zlib
+
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import encodeutils
+
+from aflo import i18n
+
+CONF = cfg.CONF
+CONF.import_group("cache", "aflo.common.config")
+LOG = logging.getLogger(__name__)
+
+_LW = i18n._LW
+
+KEY_PREFIX = 'aflo'
+# Keys longer than this or with other characters are hashed.
+KEY_MAX_LENGTH = 250
+_SAFE_KEY = re.compile(r'[\x21-\x7e]+\Z')
+
+
+class MemoryBackend(object):
+    """LRU cache in the process."""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Key: (expiry time or None, value), the least recently used first.
+        self._entries = collections.OrderedDict()
+
+    def _get_entry(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.time():
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _set_entry(self, key, value, ttl):
+        self._entries.pop(key, None)
+        if len(self._entries) >= self.max_size:
+            self._entries.popitem(last=False)
+        self._entries[key] = (time.time() + ttl if ttl else None, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._get_entry(key)
+            return None if entry is None else entry[1]
+
+    def set(self, key, value, ttl=0):
+        with self._lock:
+            self._set_entry(key, value, ttl)
+
+    def add(self, key, value, ttl=0):
+        with self._lock:
+            if self._get_entry(key) is not None:
+                return False
+            self._set_entry(key, value, ttl)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            entry = self._get_entry(key)
+            if entry is None:
+                return None
+            value = entry[1] + 1
+            self._entries[key] = (entry[0], value)
+            return value
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class MemcachedBackend(object):
+    """Client of memcached servers of the text protocol.
+    A key is stored in one of the servers by its hash, and connections
+    to a server are pooled. A server which fails is skipped for
+    dead_retry seconds, so that calls of it miss at once instead of
+    waiting for the timeout again.
+    """
+
+    def __init__(self, servers, socket_timeout=3.0, dead_retry=30.0):
+        self.servers = [self._parse_server(server) for server in servers]
+        self.socket_timeout = socket_timeout
+        self.dead_retry = dead_retry
+        self._lock = threading.Lock()
+        self._pools = dict((server, []) for server in self.servers)
+        # Server: time until which the server is skipped.
+        self._dead_until = {}
+
+    @staticmethod
+    def _parse_server(server):
+        host, _, port = server.rpartition(':')
+        return (host or 'localhost', int(port))
+
+    def _server(self, key):
+        return self.servers[zlib.crc32(key) % len(self.servers)]
+
+    def _call(self, key, command, data=None):
+        """Send a command and read the response.
+        :param key: Key which chooses the server.
+        :param command: Command line without the line break.
+        :param data: optional, data block of a storage command.
+        :retval Tuple of the response line and the data block of a value,
+            or None when the server is unavailable.
+        """
+        server = self._server(key)
+        with self._lock:
+            if self._dead_until.get(server, 0) > time.time():
+                return None
+            pool = self._pools[server]
+            conn = pool.pop() if pool else None
+        try:
+            if conn is None:
+                conn = socket.create_connection(server, self.socket_timeout)
+                conn = (conn, conn.makefile('rb'))
+            sock, reader = conn
+            request = command + '\r\n'
+            if data is not None:
+                request += data + '\r\n'
+            sock.sendall(request)
+            line = reader.readline().rstrip('\r\n')
+            block = None
+            if line.startswith('VALUE '):
+                length = int(line.split()[3])
+                block = reader.read(length + 2)[:length]
+                end = reader.readline().rstrip('\r\n')
+                if end != 'END':
+                    raise IOError('Unexpected response: %s' % end)
+        except (IOError, OSError, ValueError, IndexError) as e:
+            if conn is not None:
+                conn[0].close()
+            with self._lock:
+                self._dead_until[server] = time.time() + self.dead_retry
+                # Pooled connections to the server are likely broken too.
+                for sock, reader in self._pools[server]:
+                    sock.close()
+                self._pools[server] = []
+            LOG.warn(_LW('Memcached server %(server)s is unavailable: '
+                         '%(error)s'),
+                     {'server': '%s:%d' % server, 'error': e})
+            return None
+
+        with self._lock:
+            self._pools[server].append(conn)
+        return line, block
+
+    def get(self, key):
+        response = self._call(key, 'get %s' % key)
+        if response is None or response[1] is None:
+            return None
+        return json.loads(response[1])
+
+    def _store(self, command, key, value, ttl):
+        data = json.dumps(value)
+        response = self._call(key, '%s %s 0 %d %d' % (
+            command, key, int(ttl or 0), len(data)), data)
+        return response is not None and response[0] == 'STORED'
+
+    def set(self, key, value, ttl=0):
+        self._store('set', key, value, ttl)
+
+    def add(self, key, value, ttl=0):
+        return self._store('add', key, value, ttl)
+
+    def incr(self, key):
+        response = self._call(key, 'incr %s 1' % key)
+        if response is None or not response[0].isdigit():
+            return None
+        return int(response[0])
+
+    def delete(self, key):
+        self._call(key, 'delete %s' % key)
+
+
+_backend = None
+
+
+def get_backend():
+    """Get the backend of [cache] backend, which caches share."""
+    global _backend
+    if _backend is None:
+        if CONF.cache.backend == 'memcached':
+            _backend = MemcachedBackend(CONF.cache.memcache_servers,
+                                        CONF.cache.socket_timeout,
+                                        CONF.cache.dead_retry)
+        else:
+            _backend = MemoryBackend(CONF.cache.max_size)
+    return _backend
+
+
+def reset_backend():
+    """Make a backend again by the config, e.g. in tests."""
+    global _backend
+    _backend = None
+
+
+class Cache(object):
+    """Cache of a namespace."""
+
+    def __init__(self, namespace, backend=None):
+        """
+        :param namespace: Namespace of keys, e.g. 'keystone_names'.
+        :param backend: optional, the backend instead of get_backend().
+        """
+        self.namespace = namespace
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _generation_key(self):
+        return '%s:%s:generation' % (KEY_PREFIX, self.namespace)
+
+    def _generation(self):
+        key = self._generation_key()
+        generation = self.backend.get(key)
+        if generation is None:
+            # Start at a random number, so that entries of a lost
+            # counter are not used again.
+            generation = random.SystemRandom().getrandbits(48)
+            if not self.backend.add(key, generation):
+                generation = self.backend.get(key) or generation
+        return generation
+
+    def _key(self, key):
+        full_key = encodeutils.safe_encode('%s:%s:%s:%s' % (
+            KEY_PREFIX, self.namespace, self._generation(), key))
+        if len(full_key) > KEY_MAX_LENGTH or not _SAFE_KEY.match(full_key):
+            full_key = '%s:%s:%s' % (KEY_PREFIX, self.namespace,
+                                     hashlib.sha1(full_key).hexdigest())
+        return full_key
+
+    def get(self, key):
+        """Get a value, or None if the key is not cached."""
+        return self.backend.get(self._key(key))
+
+    def set(self, key, value, ttl=0):
+        """Cache a value.
+        :param ttl: Seconds to keep the value. 0 keeps it until evicted.
+        """
+        self.backend.set(self._key(key), value, ttl)
+
+    def delete(self, key):
+        self.backend.delete(self._key(key))
+
+    def get_or_create(self, key, creator, ttl=0):
+        """Get a value, or create it by creator() and cache it."""
+        # Read the generation once for both the get and the set.
+        full_key = self._key(key)
+        value = self.backend.get(full_key)
+        if value is None:
+            value = creator()
+            if value is not None:
+                self.backend.set(full_key, value, ttl)
+        return value
+
+    def invalidate(self):
+        """Invalidate all keys of the namespace in all workers."""
+        if self.backend.incr(self._generation_key()) is None:
+            self.backend.delete(self._generation_key())
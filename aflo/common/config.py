@@ -23,6 +23,7 @@ import logging
 import logging.config
 import logging.handlers
 import os
+import socket
 import tempfile
 
 from oslo_concurrency import lockutils
@@ -57,6 +58,30 @@ common_opts = [
                       'returned by a request')),
     cfg.BoolOpt('enable_v1_api', default=True,
                 help=_("Deploy the v1 OpenStack API.")),
+    cfg.IntOpt('ticket_batch_max', default=100,
+               help=_('Maximum number of tickets in a request to create '
+                      'tickets at once')),
+    cfg.IntOpt('ticket_operation_wait_max', default=30,
+               help=_('Maximum seconds a request to a ticket operation '
+                      'waits for the status to change')),
+    cfg.FloatOpt('ticket_operation_poll_interval', default=0.5,
+                 help=_('Seconds between checks of the status of a ticket '
+                        'operation while a request waits')),
+    cfg.IntOpt('db_statement_repeat_warning', default=3,
+               help=_('Warn when a request or an RPC message executes the '
+                      'same SQL statement this many times or more, which '
+                      'is likely N+1 queries. 0 disables the warning')),
+    cfg.StrOpt('workflow_storage', default='full',
+               choices=('full', 'sparse'),
+               help=_('How workflows of a ticket are stored. "full" stores '
+                      'a workflow for every status of the workflow pattern '
+                      'when a ticket is created. "sparse" stores only '
+                      'workflows of reached statuses, and the others are '
+                      'derived from the workflow pattern when a ticket is '
+                      'read. Only new tickets follow this option, and '
+                      'tickets stored in either way are read and updated '
+                      'after changing it back. Run "aflo-manage db '
+                      'compact_workflows" after changing to "sparse"')),
     cfg.StrOpt('pydev_worker_debug_host',
                help=_('The hostname/IP of the pydev process listening for '
                       'debug connections')),
@@ -131,6 +156,22 @@ rpc_opts = [
                default='1',
                help='The number of child process workers that will be'
                     'created to RPCservices. The default is 1.'),
+    cfg.StrOpt('rpc_executor',
+               default='blocking',
+               choices=('blocking', 'eventlet', 'threading'),
+               help='Executor of the RPC server. With eventlet or '
+                    'threading, a worker processes messages of different '
+                    'tickets concurrently, up to executor_thread_pool_size. '
+                    'Messages of the same ticket are processed one by one, '
+                    'in the order of arrival in a worker. Workers of a host '
+                    'share file locks in [oslo_concurrency] lock_path, and '
+                    'hosts wait for a lock of the ticket in the database.'),
+    cfg.StrOpt('rpc_server_name',
+               default=socket.gethostname(),
+               sample_default='<host name>',
+               help='Name of the RPC server. It has to be unique among '
+                    'the hosts running aflo-rpcapi. The default is the '
+                    'host name.'),
 ]
 
 mail = [
@@ -251,6 +292,18 @@ announcement = [
     cfg.BoolOpt('ssl_verify',
                 default=True,
                 help='SSL authentication occurs when to True.'),
+    cfg.IntOpt('session_ttl',
+               default=600,
+               help='Seconds to reuse a login of the announcement system. '
+                    '0 makes a login for each ticket.'),
+    cfg.IntOpt('taxonomy_cache_ttl',
+               default=300,
+               help='Seconds to cache taxonomy ids of '
+                    'the announcement system. 0 disables the cache.'),
+    cfg.IntOpt('pool_maxsize',
+               default=10,
+               help='The number of connections to '
+                    'the announcement system to keep alive.'),
 ]
 
 quotas = [
@@ -277,6 +330,130 @@ ost_contract = [
                      "like nova, cinder."),
 ]
 
+broker = [
+    cfg.IntOpt('remote_call_timeout',
+               default=60,
+               help='Seconds in which remote calls a broker runs '
+                    'concurrently have to finish. 0 means no limit.'),
+    cfg.IntOpt('remote_call_pool_size',
+               default=8,
+               help='The number of remote calls a broker runs '
+                    'concurrently.'),
+    cfg.IntOpt('name_cache_ttl',
+               default=10,
+               help='Seconds to cache that a user name or a project '
+                    'name is used on keystone. Unused names are not '
+                    'cached. 0 disables the cache.'),
+]
+
+outbox = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Whether brokers add side effects like sending mails '
+                     'to the outbox in the transaction of the ticket '
+                     'update instead of running them at once. '
+                     'aflo-outbox-dispatcher runs the side effects.'),
+    cfg.IntOpt('poll_interval',
+               default=5,
+               help='Seconds the dispatcher waits when the outbox is '
+                    'empty.'),
+    cfg.IntOpt('batch_size',
+               default=100,
+               help='The number of side effects the dispatcher claims '
+                    'at once.'),
+    cfg.IntOpt('pool_size',
+               default=8,
+               help='The number of side effects the dispatcher runs '
+                    'concurrently.'),
+    cfg.IntOpt('max_attempts',
+               default=5,
+               help='The number of times a side effect is tried before it '
+                    'is regarded as failed.'),
+    cfg.IntOpt('retry_interval',
+               default=30,
+               help='Seconds to wait before the first retry of a side '
+                    'effect. The interval doubles on every retry.'),
+    cfg.IntOpt('running_timeout',
+               default=600,
+               help='Seconds after which a running side effect is '
+                    'regarded as abandoned and is claimed again.'),
+]
+
+metrics = [
+    cfg.BoolOpt('notifications',
+                default=False,
+                help='Whether timing spans, e.g. of broker phases, are '
+                     'sent as notifications. They are recorded in the '
+                     'local registry anyway.'),
+    cfg.StrOpt('output_dir',
+               help='Directory which each process writes the totals of '
+                    'its timing spans to, which "aflo-manage metrics '
+                    'show" sums up. Totals are not written by default.'),
+    cfg.IntOpt('flush_interval',
+               default=60,
+               help='Seconds between writes of the totals of timing '
+                    'spans.'),
+]
+
+cache = [
+    cfg.StrOpt('backend',
+               default='memory',
+               choices=('memory', 'memcached'),
+               help='Backend of caches, e.g. of names on keystone. '
+                    '"memory" caches in each worker, and "memcached" '
+                    'shares a cache among all workers.'),
+    cfg.ListOpt('memcache_servers',
+                default=['localhost:11211'],
+                help='Memcached servers as host:port, used with the '
+                     '"memcached" backend.'),
+    cfg.FloatOpt('socket_timeout',
+                 default=3.0,
+                 help='Seconds to wait for a memcached server.'),
+    cfg.FloatOpt('dead_retry',
+                 default=30.0,
+                 help='Seconds to skip a memcached server after it '
+                      'fails. The cache misses meanwhile.'),
+    cfg.IntOpt('max_size',
+               default=1024,
+               help='The number of entries the "memory" backend keeps.'),
+]
+
+sampling_profiler = [
+    cfg.BoolOpt('enabled',
+                default=False,
+                help='Whether all requests and RPC messages are profiled '
+                     'by sampling stacks. An admin can profile a request '
+                     'with the header "X-Aflo-Profile: true" anyway.'),
+    cfg.FloatOpt('interval',
+                 default=0.005,
+                 help='Seconds of CPU time between samples of stacks.'),
+    cfg.StrOpt('output_dir',
+               default='/var/lib/aflo/profiles',
+               help='Directory which collapsed-stack files for flame '
+                    'graphs are written to, one file per route or RPC '
+                    'method and process.'),
+    cfg.IntOpt('flush_interval',
+               default=60,
+               help='Seconds between writes of collapsed-stack files. '
+                    'A request profiled by the header is written at '
+                    'once.'),
+]
+
+billing = [
+    cfg.IntOpt('batch_size',
+               default=500,
+               help='The number of catalogs whose prices are read in one '
+                    'query, and the number of billing summary rows which '
+                    'are written in one statement.'),
+]
+
+catalog_transfer = [
+    cfg.IntOpt('batch_size',
+               default=1000,
+               help='The number of records which are validated and '
+                    'written in one transaction by the catalog import.'),
+]
+
 CONF = cfg.CONF
 CONF.register_opts(paste_deploy_opts, group='paste_deploy')
 CONF.register_opts(common_opts)
@@ -290,6 +467,13 @@ CONF.register_opts(cinder_client, group='cinder_client')
 CONF.register_opts(announcement, group='announcement')
 CONF.register_opts(quotas, group='quotas')
 CONF.register_opts(ost_contract, group='ost_contract')
+CONF.register_opts(broker, group='broker')
+CONF.register_opts(outbox, group='outbox')
+CONF.register_opts(metrics, group='metrics')
+CONF.register_opts(cache, group='cache')
+CONF.register_opts(sampling_profiler, group='sampling_profiler')
+CONF.register_opts(billing, group='billing')
+CONF.register_opts(catalog_transfer, group='catalog_transfer')
 # CONF.register_opts(debug_opts)
 
 
@@ -0,0 +1,140 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Codec of datetime strings of API parameters, DB filters and brokers.
+
+A string is matched with one compiled pattern, which tells its format
+at once, instead of trying strptime with each supported format and
+catching errors. Recently parsed strings are memoized, because the same
+values come again and again, e.g. filters of list pages.
+"""
+
+import datetime
+import re
+
+import six
+
+DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+DATE_FORMAT = '%Y-%m-%d'
+YEAR_MONTH_FORMAT = '%Y-%m'
+
+# Number of parsed strings to memoize.
+CACHE_SIZE = 1024
+
+_PATTERN = re.compile(r'(\d{4})-(\d{1,2})'
+                      r'(?:-(\d{1,2})'
+                      r'(?:[Tt](\d{1,2}):(\d{1,2})'
+                      r'(?::(\d{1,2})(?:\.(\d{1,6}))?)?)?)?\Z')
+
+# Format by the groups matched: day, hour and minute, second, fraction.
+_MATCHED_FORMATS = {
+    (False, False, False, False): YEAR_MONTH_FORMAT,
+    (True, False, False, False): DATE_FORMAT,
+    (True, True, False, False): '%Y-%m-%dT%H:%M',
+    (True, True, True, False): '%Y-%m-%dT%H:%M:%S',
+    (True, True, True, True): DATETIME_FORMAT,
+}
+_PARSED_FORMATS = frozenset(_MATCHED_FORMATS.values())
+
+# Format: separator of isoformat and length of the formatted string.
+_ISOFORMATS = {
+    DATETIME_FORMAT: ('T', 26),
+    '%Y-%m-%dT%H:%M:%S': ('T', 19),
+    '%Y-%m-%dT%H:%M': ('T', 16),
+    '%Y-%m-%d %H:%M:%S': (' ', 19),
+    DATE_FORMAT: ('T', 10),
+    YEAR_MONTH_FORMAT: ('T', 7),
+}
+
+_INVALID = (None, None)
+
+_cache = {}
+
+
+def _decode(value):
+    """Get the format and the datetime of a string.
+    :retval Tuple of the format and the datetime, or of Nones when
+        the string is not in a supported format.
+    """
+    if not isinstance(value, six.string_types):
+        return _INVALID
+
+    result = _cache.get(value)
+    if result is not None:
+        return result
+
+    match = _PATTERN.match(value)
+    if match is None:
+        result = _INVALID
+    else:
+        year, month, day, hour, minute, second, fraction = match.groups()
+        fmt = _MATCHED_FORMATS[(day is not None, hour is not None,
+                                second is not None, fraction is not None)]
+        try:
+            result = (fmt, datetime.datetime(
+                int(year), int(month), int(day or 1),
+                int(hour or 0), int(minute or 0), int(second or 0),
+                int(fraction.ljust(6, '0')) if fraction else 0))
+        except ValueError:
+            # Out of range, e.g. the 13th month.
+            result = _INVALID
+
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[value] = result
+    return result
+
+
+def parse(value, formats):
+    """Parse a string in one of formats.
+    :param value: String to parse.
+    :param formats: Formats to accept, e.g. SUPPORTED_DATETIME_FORMAT.
+    :retval Datetime, or None if the string is not in the formats.
+    """
+    fmt, parsed = _decode(value)
+    if fmt in formats:
+        return parsed
+    return None
+
+
+def strptime(value, fmt=DATETIME_FORMAT):
+    """Parse a string like datetime.strptime(value, fmt).
+    :raise TypeError: The value is not a string.
+    :raise ValueError: The string does not match the format.
+    """
+    if fmt not in _PARSED_FORMATS:
+        return datetime.datetime.strptime(value, fmt)
+    if not isinstance(value, six.string_types):
+        raise TypeError('strptime() argument 1 must be string, not %s'
+                        % type(value).__name__)
+
+    matched_fmt, parsed = _decode(value)
+    if matched_fmt != fmt:
+        raise ValueError('time data %r does not match format %r'
+                         % (value, fmt))
+    return parsed
+
+
+def strftime(value, fmt=DATETIME_FORMAT):
+    """Format a datetime like value.strftime(fmt)."""
+    isoformat = _ISOFORMATS.get(fmt)
+    if isoformat is None or not isinstance(value, datetime.datetime) or \
+            value.tzinfo is not None:
+        return value.strftime(fmt)
+
+    sep, length = isoformat
+    formatted = value.isoformat(sep)
+    if length == 26 and not value.microsecond:
+        # isoformat omits zero microseconds.
+        return formatted + '.000000'
+    return formatted[:length]
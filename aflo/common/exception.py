@@ -273,6 +273,11 @@ class InvalidParameterValue(Invalid):
     message = _("Invalid value '%(value)s' for parameter '%(param)s': "
                 "%(extra_msg)s")
 
+    def __init__(self, *args, **kwargs):
+        # Errors of all parameters, the first of which is the message.
+        self.errors = kwargs.pop('errors', [])
+        super(InvalidParameterValue, self).__init__(*args, **kwargs)
+
 
 class InvalidVersion(Invalid):
     message = _("Version is invalid: %(reason)s")
@@ -328,3 +333,11 @@ class DuringContract(ApiAppException):
 
 class CancellationNGState(ApiAppException):
     message = _("Could not accept the request, it is in resource use.")
+
+
+class RemoteCallTimeout(ApiAppException):
+    message = _("Remote calls did not finish within %(timeout)s seconds.")
+
+
+class InvalidRecord(Invalid):
+    message = _("Record at line %(line)s is invalid: %(reason)s")
@@ -0,0 +1,37 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Modules which are imported on first use.
+
+Clients of other services take long to import and use much memory, and
+most workers never call them, e.g. API workers which only list tickets.
+"""
+
+from oslo_utils import importutils
+
+
+class LazyModule(object):
+    """Module which is imported when an attribute is got first."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Called only for attributes which this object does not have.
+        if self._module is None:
+            self._module = importutils.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return '<LazyModule %s>' % self._name
@@ -0,0 +1,182 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Timing spans of the processes which aflo runs, e.g. broker phases.
+
+A span is recorded in the local registry of this process. With
+[metrics] output_dir set, each process writes the totals of the registry
+to the directory, and "aflo-manage metrics show" sums them up. With
+[metrics] notifications enabled it is sent as a notification through
+aflo.notifier, and with [profiler] enabled it is traced by osprofiler.
+"""
+
+import contextlib
+import json
+import os
+import threading
+import time
+
+from oslo_config import cfg
+from oslo_log import log as logging
+import osprofiler.profiler
+
+from aflo import i18n
+from aflo import notifier
+
+CONF = cfg.CONF
+CONF.import_group("metrics", "aflo.common.config")
+CONF.import_group("profiler", "aflo.common.wsgi")
+LOG = logging.getLogger(__name__)
+
+_LE = i18n._LE
+_LW = i18n._LW
+
+RESULT_SUCCESS = 'success'
+RESULT_ERROR = 'error'
+
+
+class Registry(object):
+    """Totals of spans by name and tags."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def record(self, name, elapsed, result, tags):
+        """Add a span to the totals.
+        :param name: Span name.
+        :param elapsed: Seconds the span took.
+        :param result: RESULT_SUCCESS or RESULT_ERROR.
+        :param tags: Dict of tags, e.g. the handler class.
+        """
+        key = (name, tuple(sorted(tags.items())))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'count': 0, 'errors': 0, 'total': 0.0, 'max': 0.0}
+            entry['count'] += 1
+            if result == RESULT_ERROR:
+                entry['errors'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+
+    def snapshot(self):
+        """Get the totals.
+        :retval List of dicts of name, tags, count, errors, total and max,
+            where times are in seconds.
+        """
+        with self._lock:
+            return [dict(entry, name=name, tags=dict(tags))
+                    for (name, tags), entry in self._entries.items()]
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+
+REGISTRY = Registry()
+
+_last_flush = time.time()
+_notifier = None
+
+
+def _key(entry):
+    return entry['name'], tuple(sorted(entry['tags'].items()))
+
+
+def flush():
+    """Write the totals of this process to [metrics] output_dir."""
+    global _last_flush
+    _last_flush = time.time()
+    output_dir = CONF.metrics.output_dir
+    try:
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+        path = os.path.join(output_dir, 'metrics.%d.json' % os.getpid())
+        with open(path + '.tmp', 'w') as f:
+            json.dump(REGISTRY.snapshot(), f)
+        os.rename(path + '.tmp', path)
+    except (IOError, OSError) as e:
+        LOG.warn(_LW('Failed to write metrics to %(dir)s: %(error)s'),
+                 {'dir': output_dir, 'error': e})
+
+
+def load(output_dir):
+    """Sum up the totals written by processes.
+    :param output_dir: Directory which processes write the totals to.
+    :retval List of dicts like Registry.snapshot, sorted by name and tags.
+    """
+    totals = {}
+    for file_name in sorted(os.listdir(output_dir)):
+        if not (file_name.startswith('metrics.') and
+                file_name.endswith('.json')):
+            continue
+        with open(os.path.join(output_dir, file_name)) as f:
+            entries = json.load(f)
+        for entry in entries:
+            total = totals.get(_key(entry))
+            if total is None:
+                totals[_key(entry)] = dict(entry)
+                continue
+            for k in ('count', 'errors', 'total'):
+                total[k] += entry[k]
+            total['max'] = max(total['max'], entry['max'])
+
+    return [totals[key] for key in sorted(totals)]
+
+
+def _get_notifier():
+    global _notifier
+    if _notifier is None:
+        _notifier = notifier.Notifier()
+    return _notifier
+
+
+def _notify(name, payload):
+    try:
+        notifier._send_notification(_get_notifier().info, name, payload)
+    except Exception:
+        LOG.exception(_LE('Failed to send the span %s.'), name)
+
+
+@contextlib.contextmanager
+def span(name, **tags):
+    """Time the block as a span.
+    :param name: Span name, e.g. 'broker.before'.
+    :param tags: Tags of the span, e.g. handler='ContractHandler'.
+        The result of the block, RESULT_SUCCESS or RESULT_ERROR, and
+        the elapsed milliseconds are added to the notification.
+    """
+    profiled = CONF.profiler.enabled
+    if profiled:
+        osprofiler.profiler.start(name, info=tags)
+
+    result = RESULT_SUCCESS
+    start = time.time()
+    try:
+        yield
+    except Exception:
+        result = RESULT_ERROR
+        raise
+    finally:
+        elapsed = time.time() - start
+        REGISTRY.record(name, elapsed, result, tags)
+        if CONF.metrics.output_dir and time.time() - _last_flush >= \
+                CONF.metrics.flush_interval:
+            flush()
+        if profiled:
+            osprofiler.profiler.stop(info={'result': result})
+        if CONF.metrics.notifications:
+            _notify(name, dict(tags, result=result,
+                               elapsed=round(elapsed * 1000, 3)))
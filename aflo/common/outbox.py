@@ -0,0 +1,175 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+"""
+Outbox of side effects of brokers.
+
+Brokers add side effects to the outbox in the transaction of the ticket
+update, and aflo-outbox-dispatcher runs them later. A side effect runs
+at least once, so actions have to allow to be run again.
+
+Mails and Keystone role grants and revokes go through the outbox.
+Quota updates read the current quotas and write new values, so they
+run in the broker, as a delayed write would lose a change of the next
+ticket. Posts to the announcement CMS create contents, and running
+them again would create them twice.
+"""
+
+from datetime import timedelta
+
+import eventlet
+from oslo_config import cfg
+from oslo_log import log as logging
+from oslo_utils import importutils
+from oslo_utils import timeutils
+
+from aflo.common import mail
+from aflo.common import utils
+from aflo.db.sqlalchemy import api as db_api
+from aflo import i18n
+from aflo.openstack.common import service
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+_LE = i18n._LE
+_LW = i18n._LW
+
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# Action name: path of the function which runs the action.
+ACTIONS = {
+    'add_roles': 'aflo.tickets.broker.utils.utils.add_roles',
+    'revoke_roles': 'aflo.tickets.broker.utils.utils.revoke_roles',
+    'sendmail': 'aflo.common.outbox.sendmail',
+}
+
+LAST_ERROR_MAX_LENGTH = 4000
+
+
+def sendmail(to_address, template, data):
+    """Send a mail.
+    :param to_address: Send to address.
+    :param template: Module name of the mail template.
+    :param data: Replace data for template.
+    """
+    mail.sendmail(to_address, importutils.import_module(template), data)
+
+
+def run(action, **payload):
+    """Run a side effect.
+    :param action: Action name in ACTIONS.
+    :param payload: Arguments of the action.
+    """
+    return utils.load_class(ACTIONS[action])(**payload)
+
+
+def enqueue(session, action, idempotency_key, **payload):
+    """Add a side effect to the outbox.
+    :param session: DB session of the transaction of the ticket update.
+    :param action: Action name in ACTIONS.
+    :param idempotency_key: Key which identifies the side effect.
+    :param payload: Arguments of the action.
+    """
+    if action not in ACTIONS:
+        raise KeyError(action)
+
+    return db_api.outbox_enqueue(session, action, idempotency_key, payload)
+
+
+class Dispatcher(object):
+    """Run side effects in the outbox."""
+
+    def __init__(self, ctxt=None):
+        self.ctxt = ctxt
+
+    def dispatch(self):
+        """Claim side effects and run them concurrently.
+        :return the number of claimed side effects.
+        """
+        records = db_api.outbox_claim(self.ctxt, CONF.outbox.batch_size,
+                                      CONF.outbox.running_timeout)
+
+        pool = eventlet.GreenPool(size=CONF.outbox.pool_size)
+        for record in records:
+            pool.spawn_n(self._run, record)
+        pool.waitall()
+
+        return len(records)
+
+    def _run(self, record):
+        try:
+            run(record['action'], **record['payload'])
+        except Exception as e:
+            self._retry_later(record, e)
+            return
+
+        db_api.outbox_update(self.ctxt, record['id'], status=STATUS_DONE,
+                             last_error=None)
+
+    def _retry_later(self, record, error):
+        last_error = utils.exception_to_str(error)[:LAST_ERROR_MAX_LENGTH]
+
+        if record['attempts'] >= CONF.outbox.max_attempts:
+            LOG.error(_LE('Side effect %(action)s of %(key)s failed: '
+                          '%(error)s'),
+                      {'action': record['action'],
+                       'key': record['idempotency_key'],
+                       'error': last_error})
+            db_api.outbox_update(self.ctxt, record['id'],
+                                 status=STATUS_FAILED,
+                                 last_error=last_error)
+            return
+
+        interval = CONF.outbox.retry_interval * \
+            2 ** (record['attempts'] - 1)
+        LOG.warning(_LW('Side effect %(action)s of %(key)s will be retried '
+                        'in %(interval)s seconds: %(error)s'),
+                    {'action': record['action'],
+                     'key': record['idempotency_key'],
+                     'interval': interval,
+                     'error': last_error})
+        db_api.outbox_update(
+            self.ctxt, record['id'], status=STATUS_PENDING,
+            next_run_at=timeutils.utcnow() + timedelta(seconds=interval),
+            last_error=last_error)
+
+
+class DispatcherService(service.Service):
+    """Service which keeps running side effects in the outbox."""
+
+    def __init__(self, ctxt=None):
+        super(DispatcherService, self).__init__()
+        self.dispatcher = Dispatcher(ctxt)
+
+    def start(self):
+        super(DispatcherService, self).start()
+        self.tg.add_dynamic_timer(
+            self._dispatch,
+            periodic_interval_max=CONF.outbox.poll_interval)
+
+    def _dispatch(self):
+        """Dispatch side effects.
+        :return seconds to wait before the next dispatch.
+        """
+        try:
+            if self.dispatcher.dispatch():
+                return 0
+        except Exception:
+            LOG.exception(_LE('Failed to dispatch side effects.'))
+
+        return CONF.outbox.poll_interval
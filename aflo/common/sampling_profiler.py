@@ -0,0 +1,161 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Sampling profiler of requests and RPC messages.
+
+While a profiled request is processed, SIGPROF interrupts the process
+every [sampling_profiler] interval seconds of CPU time, and the stack of
+the running green thread is counted for the request. Stacks are summed
+up per route or RPC method, and written to the output directory as
+collapsed-stack files, which flamegraph.pl takes as they are.
+"""
+
+import collections
+import functools
+import os
+import re
+import signal
+import time
+
+from eventlet import greenthread
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from aflo import i18n
+
+CONF = cfg.CONF
+CONF.import_group("sampling_profiler", "aflo.common.config")
+LOG = logging.getLogger(__name__)
+
+_LW = i18n._LW
+
+# Frames of a stack deeper than this are cut off.
+MAX_DEPTH = 128
+
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def _collapse(frame):
+    """Get a stack as a line of a collapsed-stack file."""
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append('%s (%s)' % (code.co_name, code.co_filename))
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class Sampler(object):
+    """Samples stacks of profiled green threads."""
+
+    def __init__(self):
+        # Green thread: counts of stacks sampled in the thread.
+        self._active = {}
+        # Route or RPC method: counts of stacks.
+        self._totals = collections.defaultdict(collections.Counter)
+        self._last_flush = time.time()
+        self._available = True
+
+    def active(self):
+        """Whether the current green thread is profiled."""
+        return greenthread.getcurrent() in self._active
+
+    def begin(self):
+        """Start profiling the current green thread.
+        :retval False if the profiler is not available in this process.
+        """
+        if not self._available:
+            return False
+
+        if not self._active and not self._start_timer():
+            return False
+
+        self._active[greenthread.getcurrent()] = collections.Counter()
+        return True
+
+    def end(self, key, flush=False):
+        """Stop profiling the current green thread.
+        :param key: Route or RPC method which the samples are summed up by.
+        :param flush: Whether to write the files at once.
+        """
+        samples = self._active.pop(greenthread.getcurrent(), None)
+        if not self._active:
+            self._stop_timer()
+        if samples is None:
+            return
+
+        self._totals[key].update(samples)
+        if flush or time.time() - self._last_flush >= \
+                CONF.sampling_profiler.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write collapsed-stack files of each route or RPC method."""
+        self._last_flush = time.time()
+        output_dir = CONF.sampling_profiler.output_dir
+        try:
+            if not os.path.isdir(output_dir):
+                os.makedirs(output_dir)
+            for key, stacks in self._totals.items():
+                path = os.path.join(output_dir, '%s.%d.folded' % (
+                    _UNSAFE_CHARS.sub('_', key), os.getpid()))
+                with open(path + '.tmp', 'w') as f:
+                    for stack, count in sorted(stacks.items()):
+                        f.write('%s %d\n' % (stack, count))
+                os.rename(path + '.tmp', path)
+        except (IOError, OSError) as e:
+            LOG.warn(_LW('Failed to write profiles to %(dir)s: %(error)s'),
+                     {'dir': output_dir, 'error': e})
+
+    def _sample(self, signum, frame):
+        samples = self._active.get(greenthread.getcurrent())
+        if samples is not None:
+            samples[_collapse(frame)] += 1
+
+    def _start_timer(self):
+        try:
+            signal.signal(signal.SIGPROF, self._sample)
+            # Do not interrupt system calls, e.g. reads of sockets.
+            signal.siginterrupt(signal.SIGPROF, False)
+            interval = CONF.sampling_profiler.interval
+            signal.setitimer(signal.ITIMER_PROF, interval, interval)
+        except (AttributeError, ValueError) as e:
+            # Not on a POSIX system, or not in the main thread.
+            LOG.warn(_LW('The sampling profiler is not available: '
+                         '%s'), e)
+            self._available = False
+            return False
+        return True
+
+    def _stop_timer(self):
+        if self._available:
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+
+SAMPLER = Sampler()
+
+
+def profiled(f):
+    """Profile processing an RPC message, if enabled by config."""
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not CONF.sampling_profiler.enabled or \
+                SAMPLER.active() or \
+                not SAMPLER.begin():
+            return f(*args, **kwargs)
+
+        try:
+            return f(*args, **kwargs)
+        finally:
+            SAMPLER.end('rpc.%s' % f.__name__)
+    return wrapper
@@ -25,3 +25,12 @@ class TicketTemplateExpansionFilterBase(object):
     @abstractmethod
     def do_exec(self, req, ticket_templates):
         raise NotImplementedError()
+
+    def query_filters(self, req):
+        """Get conditions which the ticket template query applies
+        instead of do_exec, so that pages are filtered in SQL.
+        :param req: HTTP request.
+        :retval Dict of arguments of ticket_templates_list,
+            or None to run do_exec.
+        """
+        return None
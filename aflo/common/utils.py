@@ -22,8 +22,6 @@ System-level utilities and helper functions.
 
 import errno
 
-import datetime
-
 from eventlet.green import socket
 
 import functools
@@ -44,6 +42,7 @@ from oslo_utils import netutils
 import six
 from webob import exc
 
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo import i18n
 
@@ -252,11 +251,8 @@ def is_date_like(val):
     Date format is as follows:
     yyyy-MM-dd
     """
-    try:
-        datetime.datetime.strptime(val, "%Y-%m-%d")
-        return True
-    except (TypeError, ValueError, AttributeError):
-        return False
+    return datetime_codec.parse(val, [datetime_codec.DATE_FORMAT]) \
+        is not None
 
 
 def is_year_month_like(val):
@@ -264,17 +260,7 @@ def is_year_month_like(val):
     The format of the object is
     defined in the "SUPPORTED_YEAR_MONTH_FORMAT".
     """
-    def check_format(val, supported_format):
-        try:
-            datetime.datetime.strptime(val, supported_format)
-            return True
-        except (TypeError, ValueError, AttributeError):
-            return False
-
-    for supported_format in SUPPORTED_YEAR_MONTH_FORMAT:
-        if check_format(val, supported_format):
-            return True
-    return False
+    return get_datetime_from_year_month(val) is not None
 
 
 def get_datetime_from_year_month(val):
@@ -284,20 +270,7 @@ def get_datetime_from_year_month(val):
     The format of the object is
     defined in the "SUPPORTED_YEAR_MONTH_FORMAT".
     """
-    def convert_val(val, supported_format):
-        try:
-            return datetime.datetime.strptime(val, supported_format)
-        except (TypeError, ValueError, AttributeError):
-            return None
-
-    for supported_format in SUPPORTED_YEAR_MONTH_FORMAT:
-
-        convertVal = convert_val(val, supported_format)
-
-        if convertVal:
-            return convertVal
-
-    return None
+    return datetime_codec.parse(val, SUPPORTED_YEAR_MONTH_FORMAT)
 
 
 def is_datetime_like(val):
@@ -305,17 +278,7 @@ def is_datetime_like(val):
     The format of the object is
     defined in the "SUPPORTED_DATETIME_FORMAT".
     """
-    def check_format(val, supported_format):
-        try:
-            datetime.datetime.strptime(val, supported_format)
-            return True
-        except (TypeError, ValueError, AttributeError):
-            return False
-
-    for supported_format in SUPPORTED_DATETIME_FORMAT:
-        if check_format(val, supported_format):
-            return True
-    return False
+    return get_datetime_from_param(val) is not None
 
 
 def get_datetime_from_param(val):
@@ -325,20 +288,7 @@ def get_datetime_from_param(val):
     The format of the object is
     defined in the "SUPPORTED_DATETIME_FORMAT".
     """
-    def convert_val(val, supported_format):
-        try:
-            return datetime.datetime.strptime(val, supported_format)
-        except (TypeError, ValueError, AttributeError):
-            return None
-
-    for supported_format in SUPPORTED_DATETIME_FORMAT:
-
-        convertVal = convert_val(val, supported_format)
-
-        if convertVal:
-            return convertVal
-
-    return None
+    return datetime_codec.parse(val, SUPPORTED_DATETIME_FORMAT)
 
 
 def is_uuid_like(val):
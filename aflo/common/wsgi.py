@@ -776,6 +776,11 @@ class JSONRequestDeserializer(object):
             return {}
 
 
+# Key of the request environment in which a controller leaves the ETag
+# of the response.
+ETAG_ENV_KEY = 'aflo.etag'
+
+
 class JSONResponseSerializer(object):
 
     def _sanitizer(self, obj):
@@ -793,6 +798,10 @@ class JSONResponseSerializer(object):
         response.content_type = 'application/json'
         response.body = self.to_json(result)
 
+        request = getattr(response, 'request', None)
+        if request is not None and ETAG_ENV_KEY in request.environ:
+            response.etag = request.environ[ETAG_ENV_KEY]
+
 
 def translate_exception(req, e):
     """Translates all translatable elements of the given exception."""
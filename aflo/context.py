@@ -25,13 +25,16 @@ class RequestContext(context.RequestContext):
 
     def __init__(self, roles=None, service_catalog=None,
                  policy_enforcer=None, user_name=None,
-                 tenant_name=None, **kwargs):
+                 tenant_name=None, read_primary=False, **kwargs):
         super(RequestContext, self).__init__(**kwargs)
         self.roles = roles or []
         self.service_catalog = service_catalog
         self.policy_enforcer = policy_enforcer or policy.Enforcer()
         self.user_name = user_name
         self.tenant_name = tenant_name
+        # Read-only queries go to the primary database, not to the
+        # slave_connection one, to read own writes.
+        self.read_primary = read_primary
         if not self.is_admin:
             self.is_admin = self.policy_enforcer.check_is_admin(self)
 
@@ -41,7 +44,8 @@ class RequestContext(context.RequestContext):
             'roles': self.roles,
             'service_catalog': self.service_catalog,
             'user_name': self.user_name,
-            'tenant_name': self.tenant_name
+            'tenant_name': self.tenant_name,
+            'read_primary': self.read_primary
         })
         return d
 
@@ -52,6 +56,7 @@ class RequestContext(context.RequestContext):
         c.service_catalog = values['service_catalog']
         c.user_name = values['user_name']
         c.tenant_name = values['tenant_name']
+        c.read_primary = values.get('read_primary', False)
         return c
 
     @property
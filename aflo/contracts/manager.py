@@ -90,3 +90,10 @@ class ContractManager(object):
                                     lifetime_end_from, lifetime_end_to,
                                     limit, marker, sort_key, sort_dir,
                                     force_show_deleted)
+
+    def contract_summary(self, ctxt, group_by, **filters):
+        """Count contracts that match zero or more filters by groups.
+        :param group_by: List of contract attributes to group by.
+        :param filters: Filters which are the same as contract_list.
+        """
+        return db_api.contract_summary(ctxt, group_by, **filters)
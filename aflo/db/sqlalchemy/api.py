@@ -11,22 +11,28 @@
 #  under the License.
 
 """Defines interface for DB access."""
+import collections
 from datetime import datetime
+from datetime import timedelta
 import json
 import sys
 import threading
+import time
 import uuid
 
 from oslo_config import cfg
 from oslo_db import exception as db_exception
 from oslo_db.sqlalchemy import session
 from oslo_log import log as logging
+from oslo_utils import encodeutils
+from oslo_utils import timeutils
 import osprofiler.sqlalchemy
 import sqlalchemy
 import sqlalchemy.orm as sa_orm
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import false
 
+from aflo.common import datetime_codec
 from aflo.common import exception
 from aflo.common import utils as common_utils
 from aflo.db.sqlalchemy import models
@@ -44,15 +50,33 @@ _LW = i18n._LW
 
 CONF = cfg.CONF
 CONF.import_group("profiler", "aflo.common.wsgi")
+CONF.import_group("billing", "aflo.common.config")
+CONF.import_opt("db_statement_repeat_warning", "aflo.common.config")
+CONF.import_opt("workflow_storage", "aflo.common.config")
 
 _FACADE = None
 _LOCK = threading.Lock()
 
+# Statements of the current WSGI request or RPC message.
+_STATEMENT_STATS = threading.local()
+
+# Statements which are not counted as repeated, e.g. pings to check
+# pooled connections.
+_IGNORED_REPEATED_STATEMENTS = frozenset(['SELECT 1'])
+
+# Bounds of the price timeline for prices without lifetime.
+TIMELINE_MIN = datetime(1000, 1, 1)
+TIMELINE_MAX = datetime(9999, 12, 31, 23, 59, 59)
+
 _WF_START_STARTUS_CODE = 'none'
 _WF_STATUS_NON_ACTIVE = 0
 _WF_STATUS_ACTIVE = 1
 _WF_STATUS_END = 2
 
+WORKFLOW_STORAGE_SPARSE = 'sparse'
+# Namespace of IDs of workflows in the sparse storage.
+_WF_ID_NAMESPACE = uuid.UUID('5d3c1e2a-8f7b-4c1e-9a3d-6b2f0e4c7a19')
+
 _VALID_CATALOG_SORTKEY = {
     'catalog_id': ['catalog', 'catalog_id'],
     'scope': ['catalog_scope', 'scope'],
@@ -89,6 +113,13 @@ def _create_facade_lazily():
                     osprofiler.sqlalchemy.add_tracing(sqlalchemy,
                                                       _FACADE.get_engine(),
                                                       "db")
+
+                for engine in set([_FACADE.get_engine(),
+                                   _FACADE.get_engine(use_slave=True)]):
+                    sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                            _before_cursor_execute)
+                    sqlalchemy.event.listen(engine, 'after_cursor_execute',
+                                            _after_cursor_execute)
     return _FACADE
 
 
@@ -97,10 +128,20 @@ def get_engine():
     return facade.get_engine()
 
 
-def get_session(autocommit=True, expire_on_commit=False):
+def get_session(autocommit=True, expire_on_commit=False, use_slave=False):
     facade = _create_facade_lazily()
     return facade.get_session(autocommit=autocommit,
-                              expire_on_commit=expire_on_commit)
+                              expire_on_commit=expire_on_commit,
+                              use_slave=use_slave)
+
+
+def _get_read_session(context):
+    """Get a session for read-only queries.
+    Queries go to the slave_connection database, if it is set, unless
+    the request has to read its own writes.
+    :param context: Request context.
+    """
+    return get_session(use_slave=not getattr(context, 'read_primary', False))
 
 
 def clear_db_env():
@@ -111,6 +152,81 @@ def clear_db_env():
     _FACADE = None
 
 
+class StatementStats(object):
+    """SQL statements executed in a WSGI request or an RPC message."""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = collections.Counter()
+
+    def add(self, statement, elapsed):
+        self.count += 1
+        self.time += elapsed
+        self.statements[statement] += 1
+
+    def repeated(self):
+        """Get statements executed as many times as
+        'db_statement_repeat_warning' or more.
+        :retval List of tuples of the statement and the times.
+        """
+        threshold = CONF.db_statement_repeat_warning
+        if threshold <= 0:
+            return []
+        return [(statement, times)
+                for statement, times in self.statements.most_common()
+                if times >= threshold and
+                statement not in _IGNORED_REPEATED_STATEMENTS]
+
+    def warn_repeated(self, name):
+        """Warn of repeated statements, which are likely N+1 queries.
+        :param name: Name of the request or the RPC message.
+        """
+        for statement, times in self.repeated():
+            LOG.warn(_LW("%(name)s executed a statement %(times)d times: "
+                         "%(statement)s"),
+                     {'name': name, 'times': times,
+                      'statement': ' '.join(statement.split())})
+
+
+def statement_stats_begin():
+    """Start counting SQL statements in the current thread.
+    :retval StatementStats to be counted.
+    """
+    stats = StatementStats()
+    _STATEMENT_STATS.current = stats
+    return stats
+
+
+def statement_stats_end():
+    """Stop counting SQL statements in the current thread.
+    :retval StatementStats counted, or None if not started.
+    """
+    stats = statement_stats_current()
+    _STATEMENT_STATS.current = None
+    return stats
+
+
+def statement_stats_current():
+    """Get StatementStats being counted in the current thread, or None."""
+    return getattr(_STATEMENT_STATS, 'current', None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters,
+                           context, executemany):
+    if statement_stats_current() is not None:
+        conn.info.setdefault('statement_started_at', []).append(time.time())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters,
+                          context, executemany):
+    stats = statement_stats_current()
+    started_at = conn.info.get('statement_started_at')
+    if stats is None or not started_at:
+        return
+    stats.add(statement, time.time() - started_at.pop())
+
+
 def _ticket_templates_get(context, ticket_template_id,
                           session=None, force_show_deleted=False):
     session = session or get_session()
@@ -188,14 +304,71 @@ def ticket_templates_create(context, **values):
 
         data.save(session=se)
 
+        _ticket_template_grant_roles_rebuild(se, data)
+
     return data
 
 
+def workflow_pattern_grant_roles(wf_pattern_contents):
+    """Get roles granted the first actions of a workflow pattern.
+    :param wf_pattern_contents: Contents of the workflow pattern.
+    """
+    start_status = [status
+                    for status in wf_pattern_contents['status_list']
+                    if status['status_code'] == 'none'][0]
+    all_role = []
+
+    for status in start_status.get('next_status'):
+        grant_role = status.get('grant_role', [])
+        if not isinstance(grant_role, list):
+            grant_role = [grant_role]
+
+        all_role.extend(grant_role)
+
+    return all_role
+
+
+def _ticket_template_grant_roles_rebuild(session, ticket_template):
+    """Make the grant roles of a ticket template again
+    in the transaction of the ticket template.
+    :param session: DB session of the transaction.
+    :param ticket_template: Ticket template.
+    """
+    session.query(models.TicketTemplateGrantRole)\
+        .filter_by(ticket_template_id=ticket_template.id)\
+        .delete(synchronize_session=False)
+
+    workflow_pattern = session.query(models.WorkflowPattern)\
+        .filter_by(id=ticket_template.workflow_pattern_id)\
+        .one()
+
+    for role in set(workflow_pattern_grant_roles(
+            workflow_pattern.wf_pattern_contents)):
+        grant_role = models.TicketTemplateGrantRole()
+        grant_role.ticket_template_id = ticket_template.id
+        grant_role.role = role
+        session.add(grant_role)
+    session.flush()
+
+
+def ticket_template_grant_roles_rebuild_all(context):
+    """Make the grant roles of all ticket templates again."""
+    se = get_session()
+    with se.begin():
+        ticket_templates = se.query(models.TicketTemplate).all()
+
+        for ticket_template in ticket_templates:
+            _ticket_template_grant_roles_rebuild(se, ticket_template)
+
+    return len(ticket_templates)
+
+
 def ticket_templates_list(context, marker=None, limit=None,
                           sort_key=None, sort_dir=None,
                           force_show_deleted=False,
                           ticket_type=None,
-                          filters=None):
+                          filters=None,
+                          roles=None):
     """
     Get all objects that match zero or more filters.
 
@@ -209,14 +382,17 @@ def ticket_templates_list(context, marker=None, limit=None,
                         the ticket_type condition of the SQL
                         is connected in 'OR'.
     :param filters: other filtering option.
+    :param roles: filter tickettemplate which one of the roles
+                  is granted the first action of.
     """
-    session = get_session()
+    session = _get_read_session(context)
 
     if sort_key is not None and 0 == len(sort_key):
         sort_key = None
     if sort_key is not None and sort_key[0] is None:
         sort_key = None
-    sort_key = ['created_at'] if not sort_key else sort_key
+    # Copy the lists, not to change them of the caller.
+    sort_key = ['created_at'] if not sort_key else list(sort_key)
     default_sort_dir = 'desc'
 
     if not sort_dir or sort_dir is None or 0 == len(sort_dir) \
@@ -224,7 +400,9 @@ def ticket_templates_list(context, marker=None, limit=None,
         sort_dir = [default_sort_dir] * len(sort_key)
     elif len(sort_dir) == 1:
         default_sort_dir = sort_dir[0]
-        sort_dir *= len(sort_key)
+        sort_dir = sort_dir * len(sort_key)
+    else:
+        sort_dir = list(sort_dir)
 
     ticket_template = models.TicketTemplate
     query = session.query(ticket_template)
@@ -256,6 +434,15 @@ def ticket_templates_list(context, marker=None, limit=None,
         query = query.filter(
             ticket_template.ticket_type.in_(ticket_type.split(",")))
 
+    if roles is not None:
+        if roles:
+            grant_role = models.TicketTemplateGrantRole
+            query = query.filter(ticket_template.id.in_(
+                session.query(grant_role.ticket_template_id)
+                .filter(grant_role.role.in_(roles))))
+        else:
+            query = query.filter(false())
+
     query = db_api_utils.paginate_query(query, ticket_template,
                                         limit, sort_key,
                                         marker=marker_obj,
@@ -274,7 +461,7 @@ def ticket_templates_get(context, tickettemplate_id, force_show_deleted=False):
     :param tickettemplate_id: Get the tickete template id.
     :param force_show_deleted: View the deleted deterministic
     """
-    session = get_session()
+    session = _get_read_session(context)
     rtn = _ticket_templates_get(context, tickettemplate_id,
                                 session=session,
                                 force_show_deleted=force_show_deleted)
@@ -305,7 +492,7 @@ def workflow_patterns_list(context, force_show_deleted=False):
     """List workflow pattern.
     :param force_show_deleted: View the deleted deterministic.
     """
-    session = get_session()
+    session = _get_read_session(context)
     query = session.query(models.WorkflowPattern)
 
     # filter out deleted if context disallows it
@@ -324,7 +511,7 @@ def workflow_patterns_get(context,
     :param workflow_pattern_code: Get the workflow pattern code.
     :param force_show_deleted: View the deleted deterministic.
     """
-    session = get_session()
+    session = _get_read_session(context)
     rtn = _workflow_pattern_get(context,
                                 workflow_pattern_id,
                                 workflow_pattern_code,
@@ -394,13 +581,27 @@ def _get_ticket_craete_data(template_contents, **values):
     return ticket
 
 
+def _workflow_id(ticket_id, status_code):
+    """Get the ID of the workflow of a status of a ticket in the sparse
+    storage. The ID of a status which is not reached yet is the same as
+    the ID of the workflow stored when the status is reached.
+    :param ticket_id: ID of a ticket.
+    :param status_code: Status code in the workflow pattern.
+    """
+    name = encodeutils.safe_encode('%s:%s' % (ticket_id, status_code))
+    return str(uuid.uuid5(_WF_ID_NAMESPACE, name))
+
+
 def _get_workflow_craete_data(ticket_id, wf_pattern_contents, **values):
     """Create new workflow data.
+    In the sparse storage, only the workflow of the start entry row is
+    created.
     :param ticket_id: ID of a new ticket.
     :param wf_pattern_contents: Work flow pattern from ticket template.
     :param values: Entry ticket and workflow data.
     """
     workflows = []
+    sparse = CONF.workflow_storage == WORKFLOW_STORAGE_SPARSE
 
     # For database start row, Search start status in workflow pattern contents.
     start_status = filter(lambda status:
@@ -414,10 +615,13 @@ def _get_workflow_craete_data(ticket_id, wf_pattern_contents, **values):
         # Don't entry Database.
         if status["status_code"] == _WF_START_STARTUS_CODE:
             continue
+        if sparse and status["status_code"] != status_of_start_entry_row:
+            continue
 
         workflow = models.Workflow()
 
-        workflow.id = str(uuid.uuid4())
+        workflow.id = _workflow_id(ticket_id, status["status_code"]) \
+            if sparse else str(uuid.uuid4())
         workflow.ticket_id = ticket_id
         workflow.status = _WF_STATUS_ACTIVE \
             if status["status_code"] == status_of_start_entry_row else \
@@ -440,6 +644,42 @@ def _get_workflow_craete_data(ticket_id, wf_pattern_contents, **values):
     return workflows
 
 
+def _get_unreached_workflows(ticket, workflows):
+    """Derive workflows of statuses which are not stored, as in the sparse
+    storage, from the workflow pattern. They are not added to a session.
+    Tickets created in the full storage have no such statuses.
+    :param ticket: Ticket.
+    :param workflows: Stored workflows of the ticket.
+    """
+    wf_pattern_contents = \
+        ticket.ticket_template.workflow_pattern.wf_pattern_contents
+    stored_status_codes = set(wf.status_code for wf in workflows)
+
+    unreached = []
+    for status in wf_pattern_contents['status_list']:
+        if status["status_code"] == _WF_START_STARTUS_CODE or \
+                status["status_code"] in stored_status_codes:
+            continue
+
+        unreached.append(models.Workflow(
+            id=_workflow_id(ticket.id, status["status_code"]),
+            ticket_id=ticket.id,
+            status=_WF_STATUS_NON_ACTIVE,
+            status_code=status["status_code"],
+            status_detail=status,
+            target_role="none",
+            confirmer_id=None,
+            confirmer_name=None,
+            confirmed_at=None,
+            additional_data="",
+            created_at=ticket.created_at,
+            updated_at=ticket.created_at,
+            deleted_at=None,
+            deleted=ticket.deleted))
+
+    return unreached
+
+
 def _ticket_craete(ctxt, se, template_contents, wf_pattern_contents, **values):
     """Create ticket data.
     This is between broker-before-action and broker^after-action.
@@ -465,20 +705,43 @@ def _ticket_craete(ctxt, se, template_contents, wf_pattern_contents, **values):
         raise exception.Duplicate("ID %s already exists!" % id)
 
 
-def tickets_create(context, **values):
+def _ticket_template_load(context, ticket_template_id, se):
+    """Load a ticket template and its workflow pattern.
+    :param ticket_template_id: ID of Ticket Template.
+    :param se: DB session.
+    """
+    ticket_template = _ticket_templates_get(context, ticket_template_id, se)
+    wf_pattern = _workflow_pattern_get(
+        context, ticket_template.workflow_pattern_id, None, se)
+
+    template = templates.TicketTemplate.load(
+        ticket_template.template_contents)
+
+    return template, wf_pattern
+
+
+def ticket_template_load(context, ticket_template_id):
+    """Load a ticket template and its workflow pattern
+    to create tickets of the template.
+    :param ticket_template_id: ID of Ticket Template.
+    """
+    return _ticket_template_load(context, ticket_template_id, get_session())
+
+
+def tickets_create(context, loaded_template=None, **values):
     """Create a ticket from the values dictionary.
+    :param loaded_template: optional, the result of 'ticket_template_load'
+        to share a loaded ticket template among tickets.
     :param values: Entry ticket and workflow data.
     """
     se = get_session()
 
     try:
-        ticket_template = _ticket_templates_get(
-            context, values.get('ticket_template_id'), se)
-        wf_pattern = _workflow_pattern_get(
-            context, ticket_template.workflow_pattern_id, None, se)
-
-        template = templates.TicketTemplate.load(
-            ticket_template.template_contents)
+        if loaded_template:
+            template, wf_pattern = loaded_template
+        else:
+            template, wf_pattern = _ticket_template_load(
+                context, values.get('ticket_template_id'), se)
 
         # Load broker
         broker_name = template.get_handler_class()
@@ -518,13 +781,21 @@ def _ticket_update(ctxt, se, template_contents, wf_pattern_contents, **values):
     :param wf_pattern_contents: json dumpd workflow pattern contents.
     :param values: Entry ticket and workflow data.
     """
+    # Lock the ticket, so that an update of the ticket by another host
+    # waits for this one, and then finds its last status closed.
+    _ticket_lock(se, values.get('ticket_id'))
+
     # Close last status
     last_wf = _workflow_get(ctxt, values.get('last_workflow_id'), se)
+    if last_wf.status != 1:
+        raise exception.InvalidStatus(
+            before_status=values.get('last_status_code'),
+            after_status=values.get('next_status_code'))
     last_wf.status = 2
     last_wf.save(se)
 
     # Activated the next status
-    next_wf = _workflow_get(ctxt, values.get('next_workflow_id'), se)
+    next_wf = _next_workflow_get(ctxt, se, wf_pattern_contents, **values)
     next_wf.status = 1
     next_wf.confirmer_id = values.get('confirmer_id')
     next_wf.confirmer_name = values.get('confirmer_name')
@@ -533,12 +804,71 @@ def _ticket_update(ctxt, se, template_contents, wf_pattern_contents, **values):
     next_wf.save(se)
 
 
+def _last_workflow_check(ctxt, ticket_id, se, **values):
+    """Make sure that the last workflow of the values is the current
+    status of the ticket.
+    :param ticket_id: Ticket ID.
+    :param se: DB session.
+    :param values: Entry ticket and workflow data.
+    """
+    query = se.query(models.Workflow.id).\
+        filter_by(id=values.get('last_workflow_id')).\
+        filter_by(ticket_id=ticket_id).\
+        filter_by(status=1)
+    if query.first() is None:
+        raise exception.InvalidStatus(
+            before_status=values.get('last_status_code'),
+            after_status=values.get('next_status_code'))
+
+
+def _ticket_lock(se, ticket_id):
+    """Lock the row of a ticket until the end of the transaction.
+    :param se: DB session in a transaction.
+    :param ticket_id: Ticket ID.
+    """
+    se.query(models.Ticket.id).filter_by(id=ticket_id).\
+        with_for_update().first()
+
+
+def _next_workflow_get(ctxt, se, wf_pattern_contents, **values):
+    """Get the workflow of the next status.
+    A workflow which is not stored, as in the sparse storage, is created
+    when the status is reached first, whatever the current storage is.
+    :param se: DB session.
+    :param wf_pattern_contents: json dumpd workflow pattern contents.
+    :param values: Entry ticket and workflow data.
+    """
+    workflow_id = values.get('next_workflow_id')
+    try:
+        return _workflow_get(ctxt, workflow_id, se)
+    except exception.NotFound:
+        status_code = values.get('after_status_code')
+        status = [status for status in wf_pattern_contents['status_list']
+                  if status["status_code"] == status_code]
+        if not status or \
+                workflow_id != _workflow_id(values.get('ticket_id'),
+                                            status_code):
+            raise
+
+    workflow = models.Workflow()
+    workflow.id = workflow_id
+    workflow.ticket_id = values.get('ticket_id')
+    workflow.status_code = status_code
+    workflow.status_detail = status[0]
+    workflow.target_role = "none"
+    return workflow
+
+
 def tickets_update(context, ticket_id, **values):
     """Create a ticket from the values dictionary.
     :param values: Entry ticket and workflow data.
     """
     se = get_session()
 
+    # A message sent twice, or after another update of the ticket,
+    # does not run the broker again.
+    _last_workflow_check(context, ticket_id, se, **values)
+
     try:
         LOG.debug("=====tickets_update======")
 
@@ -680,7 +1010,7 @@ def tickets_list(context, marker=None, limit=None,
                 is connected in 'OR'.
     """
     objs = []
-    session = get_session()
+    session = _get_read_session(context)
 
     if sort_key is not None and 0 == len(sort_key):
         sort_key = None
@@ -696,7 +1026,67 @@ def tickets_list(context, marker=None, limit=None,
         default_sort_dir = sort_dir[0]
         sort_dir *= len(sort_key)
 
-    # create SQL
+    query, last_wf = _tickets_query(context, session, filters,
+                                    force_show_deleted)
+    if query is None:
+        return objs
+
+    marker_obj = None
+    if marker is not None:
+        marker_obj = \
+            _ticket_get(context, marker,
+                        session=session,
+                        force_show_deleted=force_show_deleted)
+
+    for key in ['created_at', 'id']:
+        if key not in sort_key:
+            sort_key.append(key)
+            sort_dir.append(default_sort_dir)
+
+    query = db_api_utils.paginate_query(query, models.Ticket,
+                                        limit, sort_key,
+                                        marker=marker_obj,
+                                        sort_dir=None,
+                                        sort_dirs=sort_dir)
+
+    for obj_t, obj_lw in query.all():
+        obj_t.last_workflow = obj_lw
+        objs.append(obj_t)
+
+    return objs
+
+
+def tickets_summary(context, group_by, filters=None,
+                    force_show_deleted=False):
+    """Count tickets that match zero or more filters by groups.
+    :param group_by: List of ticket_type, status_code (of the last
+        workflow), tenant_id or ticket_template_id.
+    :param filters: Filtering option which is the same as tickets_list.
+    :param force_show_deleted: view the deleted deterministic
+    :retval List of dicts of group values and 'count'.
+    """
+    session = _get_read_session(context)
+
+    query, last_wf = _tickets_query(context, session, filters or {},
+                                    force_show_deleted)
+    if query is None:
+        return []
+
+    columns = {'ticket_type': models.Ticket.ticket_type,
+               'status_code': last_wf.status_code,
+               'tenant_id': models.Ticket.tenant_id,
+               'ticket_template_id': models.Ticket.ticket_template_id}
+
+    return _summary(query, [(key, columns[key]) for key in group_by])
+
+
+def _tickets_query(context, session, filters, force_show_deleted=False):
+    """Make a query of tickets and their last workflows that match
+    zero or more filters.
+    Parameters are the same as tickets_list.
+    :retval The query and the alias of the last workflow,
+        or (None, None) if no ticket template matches.
+    """
     m_Workflow = models.Workflow
     m_Ticket = models.Ticket
 
@@ -781,36 +1171,14 @@ def tickets_list(context, marker=None, limit=None,
         if 0 < len(template_id):
             query = query.filter(m_Ticket.ticket_template_id.in_(template_id))
         else:
-            return objs
-
-    marker_obj = None
-    if marker is not None:
-        marker_obj = \
-            _ticket_get(context, marker,
-                        session=session,
-                        force_show_deleted=force_show_deleted)
-
-    for key in ['created_at', 'id']:
-        if key not in sort_key:
-            sort_key.append(key)
-            sort_dir.append(default_sort_dir)
+            return None, None
 
     # filter out deleted if context disallows it
     if not force_show_deleted\
             or not context.can_see_deleted:
         query = query.filter(models.Ticket.deleted == False)
 
-    query = db_api_utils.paginate_query(query, models.Ticket,
-                                        limit, sort_key,
-                                        marker=marker_obj,
-                                        sort_dir=None,
-                                        sort_dirs=sort_dir)
-
-    for obj_t, obj_lw in query.all():
-        obj_t.last_workflow = obj_lw
-        objs.append(obj_t)
-
-    return objs
+    return query, last_wf
 
 
 def _get_template_id_from_filter(ticket_template_name,
@@ -870,8 +1238,12 @@ def tickets_get(context, ticket_id, force_show_deleted=False):
     :param ticket_id: Get the tickete id.
     :param force_show_deleted: View the deleted deterministic
     """
+    session = _get_read_session(context)
     ticket = _ticket_get(context, ticket_id,
+                         session=session,
                          force_show_deleted=force_show_deleted)
+    ticket.workflow = ticket.workflow + \
+        _get_unreached_workflows(ticket, ticket.workflow)
     ticket.roles = context.roles
     return ticket
 
@@ -884,6 +1256,7 @@ def tickets_delete(context, ticket_id):
     """
     session = get_session()
     with session.begin():
+        _ticket_lock(session, ticket_id)
         ticket = _ticket_get(context, ticket_id, session=session,
                              force_show_deleted=False)
         workflows = workflow_list(context, ticket_id, session=session)
@@ -903,7 +1276,7 @@ def _get_contract_create_data(**values):
     for key in values:
         if key in ('lifetime_start', 'lifetime_end',
                    'application_date') and values[key]:
-            val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+            val = datetime_codec.strptime(values[key])
         else:
             val = values[key]
 
@@ -940,6 +1313,39 @@ def contract_create(ctxt, **values):
         return _contract_get(ctxt, values['contract_id'], se).to_dict()
 
 
+def contract_create_many(ctxt, values_list, session=None):
+    """Create contracts in a single transaction.
+        :param values_list: List of contract values.
+        :param session: optional, DB session in a transaction to join.
+        :return List of contract.
+    """
+    se = session or get_session()
+
+    with se.begin(subtransactions=True):
+        contracts = [_get_contract_create_data(**values)
+                     for values in values_list]
+        if not contracts:
+            return []
+
+        try:
+            se.add_all(contracts)
+            se.flush()
+
+        except db_exception.DBDuplicateEntry:
+            raise exception.Duplicate("Contract is already exist,"
+                                      "contract_id=%s." %
+                                      ','.join([contract.contract_id
+                                                for contract in contracts]))
+
+        contract_ids = [contract.contract_id for contract in contracts]
+        query = se.query(models.Contract)\
+            .filter(models.Contract.contract_id.in_(contract_ids))
+        contract_dict = dict([(contract.contract_id, contract.to_dict())
+                              for contract in query.all()])
+
+        return [contract_dict[contract_id] for contract_id in contract_ids]
+
+
 def _contract_update(contract, **values):
     """Update contract.
         :param contract: Contract object.
@@ -949,7 +1355,7 @@ def _contract_update(contract, **values):
     for key in values:
         if key in ('lifetime_start', 'lifetime_end',
                    'application_date') and values[key]:
-            val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+            val = datetime_codec.strptime(values[key])
         else:
             val = values[key]
         setattr(contract, key, val)
@@ -995,7 +1401,8 @@ def contract_get(context, contract_id):
     :param contract_id: Get the contract id.
     :param force_show_deleted: View the deleted deterministic
     """
-    contractobj = _contract_get(context, contract_id)
+    contractobj = _contract_get(context, contract_id,
+                                session=_get_read_session(context))
 
     contract = {}
     contract['contract_id'] = contractobj.contract_id
@@ -1084,9 +1491,7 @@ def contract_list(ctxt, project_id=None, region_id=None,
         :param sort_dir: dict in which results should be sorted (asc, desc).
         :param force_show_deleted: view the deleted deterministic.
     """
-    se = get_session()
-
-    Contract = models.Contract
+    se = _get_read_session(ctxt)
 
     default_sort_key = 'created_at'
     default_sort_dir = 'desc'
@@ -1109,91 +1514,25 @@ def contract_list(ctxt, project_id=None, region_id=None,
         if marker:
             marker_obj = _contract_get(ctxt, marker, se)
 
-        # main query
-        query = se.query(models.Contract)
-
-        # non- admin is adding a condition to get
-        # the price data of a common price data + own tenant in default
-        if not ctxt.is_admin:
-            query = query.filter(Contract.project_id == ctxt.tenant)
-        else:
-            if project_id:
-                query = query.filter(Contract.project_id == project_id)
-
-        # key query
-        if not force_show_deleted or not ctxt.is_admin:
-            query = query.filter(Contract.deleted == false())
-        if region_id:
-            query = query.filter(Contract.region_id == region_id)
-        if project_name:
-            query = query.filter(Contract.project_name == project_name)
-        if catalog_name:
-            query = query.filter(Contract.catalog_name == catalog_name)
-        if application_id:
-            query = query.filter(Contract.application_id == application_id)
-        if ticket_template_name:
-            query = query.filter(Contract.ticket_template_name ==
-                                 ticket_template_name)
-        if application_kinds_name:
-            query = query.filter(Contract.application_kinds_name ==
-                                 application_kinds_name)
-        if application_name:
-            query = query.filter(Contract.application_name ==
-                                 application_name)
-        if parent_contract_id:
-            query = query.filter(Contract.parent_contract_id ==
-                                 parent_contract_id)
-        if application_date_from:
-            query = query.filter(
-                sqlalchemy.or_(Contract.application_date.is_(None),
-                               Contract.application_date >=
-                               datetime.strptime(application_date_from,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if application_date_to:
-            query = query.filter(
-                sqlalchemy.or_(Contract.application_date.is_(None),
-                               Contract.application_date <=
-                               datetime.strptime(application_date_to,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if lifetime_start_from:
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_start.is_(None),
-                               Contract.lifetime_start >=
-                               datetime.strptime(lifetime_start_from,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if lifetime_start_to:
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_start.is_(None),
-                               Contract.lifetime_start <=
-                               datetime.strptime(lifetime_start_to,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if lifetime_end_from:
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_end.is_(None),
-                               Contract.lifetime_end >=
-                               datetime.strptime(lifetime_end_from,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if lifetime_end_to:
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_end.is_(None),
-                               Contract.lifetime_end <=
-                               datetime.strptime(lifetime_end_to,
-                                                 '%Y-%m-%dT%H:%M:%S.%f')))
-        if lifetime:
-            query = query.filter(Contract.lifetime_start <= lifetime)
-            query = query.filter(Contract.lifetime_end >= lifetime)
-        if date_in_lifetime:
-            lt_s = date_in_lifetime.replace(hour=23, minute=59, second=59,
-                                            microsecond=999999)
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_start.is_(None),
-                               Contract.lifetime_start <= lt_s))
-
-            lt_e = date_in_lifetime.replace(hour=0, minute=0, second=0,
-                                            microsecond=0)
-            query = query.filter(
-                sqlalchemy.or_(Contract.lifetime_end.is_(None),
-                               Contract.lifetime_end >= lt_e))
+        query = _contract_query(ctxt, se,
+                                project_id=project_id,
+                                region_id=region_id,
+                                project_name=project_name,
+                                catalog_name=catalog_name,
+                                application_id=application_id,
+                                lifetime=lifetime,
+                                date_in_lifetime=date_in_lifetime,
+                                ticket_template_name=ticket_template_name,
+                                application_kinds_name=application_kinds_name,
+                                application_name=application_name,
+                                parent_contract_id=parent_contract_id,
+                                application_date_from=application_date_from,
+                                application_date_to=application_date_to,
+                                lifetime_start_from=lifetime_start_from,
+                                lifetime_start_to=lifetime_start_to,
+                                lifetime_end_from=lifetime_end_from,
+                                lifetime_end_to=lifetime_end_to,
+                                force_show_deleted=force_show_deleted)
 
         for key in ['created_at', 'contract_id']:
             if key not in sort_key:
@@ -1220,6 +1559,140 @@ def contract_list(ctxt, project_id=None, region_id=None,
     return contracts
 
 
+def _contract_query(ctxt, se, project_id=None, region_id=None,
+                    project_name=None, catalog_name=None,
+                    application_id=None, lifetime=None,
+                    date_in_lifetime=None,
+                    ticket_template_name=None, application_kinds_name=None,
+                    application_name=None, parent_contract_id=None,
+                    application_date_from=None, application_date_to=None,
+                    lifetime_start_from=None, lifetime_start_to=None,
+                    lifetime_end_from=None, lifetime_end_to=None,
+                    force_show_deleted=False):
+    """Make a query of contracts that match zero or more filters.
+    Parameters are the same as contract_list.
+    """
+    Contract = models.Contract
+
+    # main query
+    query = se.query(models.Contract)
+
+    # non- admin is adding a condition to get
+    # the price data of a common price data + own tenant in default
+    if not ctxt.is_admin:
+        query = query.filter(Contract.project_id == ctxt.tenant)
+    else:
+        if project_id:
+            query = query.filter(Contract.project_id == project_id)
+
+    # key query
+    if not force_show_deleted or not ctxt.is_admin:
+        query = query.filter(Contract.deleted == false())
+    if region_id:
+        query = query.filter(Contract.region_id == region_id)
+    if project_name:
+        query = query.filter(Contract.project_name == project_name)
+    if catalog_name:
+        query = query.filter(Contract.catalog_name == catalog_name)
+    if application_id:
+        query = query.filter(Contract.application_id == application_id)
+    if ticket_template_name:
+        query = query.filter(Contract.ticket_template_name ==
+                             ticket_template_name)
+    if application_kinds_name:
+        query = query.filter(Contract.application_kinds_name ==
+                             application_kinds_name)
+    if application_name:
+        query = query.filter(Contract.application_name ==
+                             application_name)
+    if parent_contract_id:
+        query = query.filter(Contract.parent_contract_id ==
+                             parent_contract_id)
+    if application_date_from:
+        query = query.filter(
+            sqlalchemy.or_(Contract.application_date.is_(None),
+                           Contract.application_date >=
+                           datetime_codec.strptime(application_date_from)))
+    if application_date_to:
+        query = query.filter(
+            sqlalchemy.or_(Contract.application_date.is_(None),
+                           Contract.application_date <=
+                           datetime_codec.strptime(application_date_to)))
+    if lifetime_start_from:
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_start.is_(None),
+                           Contract.lifetime_start >=
+                           datetime_codec.strptime(lifetime_start_from)))
+    if lifetime_start_to:
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_start.is_(None),
+                           Contract.lifetime_start <=
+                           datetime_codec.strptime(lifetime_start_to)))
+    if lifetime_end_from:
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_end.is_(None),
+                           Contract.lifetime_end >=
+                           datetime_codec.strptime(lifetime_end_from)))
+    if lifetime_end_to:
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_end.is_(None),
+                           Contract.lifetime_end <=
+                           datetime_codec.strptime(lifetime_end_to)))
+    if lifetime:
+        query = query.filter(Contract.lifetime_start <= lifetime)
+        query = query.filter(Contract.lifetime_end >= lifetime)
+    if date_in_lifetime:
+        lt_s = date_in_lifetime.replace(hour=23, minute=59, second=59,
+                                        microsecond=999999)
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_start.is_(None),
+                           Contract.lifetime_start <= lt_s))
+
+        lt_e = date_in_lifetime.replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+        query = query.filter(
+            sqlalchemy.or_(Contract.lifetime_end.is_(None),
+                           Contract.lifetime_end >= lt_e))
+
+    return query
+
+
+def contract_summary(ctxt, group_by, **filters):
+    """Count contracts that match zero or more filters by groups.
+    :param group_by: List of contract attributes, e.g. catalog_id.
+    :param filters: Filtering option which is the same as contract_list.
+    :retval List of dicts of group values and 'count'.
+    """
+    se = _get_read_session(ctxt)
+
+    query = _contract_query(ctxt, se, **filters)
+
+    return _summary(query, [(key, getattr(models.Contract, key))
+                            for key in group_by])
+
+
+def _summary(query, group_columns):
+    """Count rows of a query by groups in SQL.
+    :param query: Query of rows to count.
+    :param group_columns: List of pairs of a group key and its column.
+    :retval List of dicts of group values and 'count'.
+    """
+    keys = [key for key, column in group_columns]
+    columns = [column for key, column in group_columns]
+
+    query = query.with_entities(*(columns + [sqlalchemy.func.count()]))
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+
+    summary = []
+    for row in query.all():
+        group = dict(zip(keys, row[:-1]))
+        group['count'] = row[-1]
+        summary.append(group)
+
+    return summary
+
+
 def goods_create(context, **values):
     """Create a goods from the values dictionary.
     :param values: Entry goods data.
@@ -1280,7 +1753,7 @@ def goods_list(context, marker=None, limit=None,
     :param force_show_deleted: view the deleted deterministic
     :param region_id: filter
     """
-    session = get_session()
+    session = _get_read_session(context)
 
     if sort_key is not None and len(sort_key) == 0:
         sort_key = None
@@ -1351,7 +1824,8 @@ def goods_get(context, goods_id):
     """Get a goods that match zero or more filters.
     :param goods_id: Get the goods id.
     """
-    goodsobj = _goods_get(context, goods_id)
+    goodsobj = _goods_get(context, goods_id,
+                          session=_get_read_session(context))
 
     return goodsobj.to_dict()
 
@@ -1378,7 +1852,7 @@ def catalog_create(context, **values):
 
         for key in values:
             if key in ('lifetime_start', 'lifetime_end') and values[key]:
-                val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+                val = datetime_codec.strptime(values[key])
             else:
                 val = values[key]
             setattr(catalog, key, val)
@@ -1400,7 +1874,7 @@ def _catalog_update(catalog, **values):
     """
     for key in values:
         if key in ('lifetime_start', 'lifetime_end') and values[key]:
-            val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+            val = datetime_codec.strptime(values[key])
         else:
             val = values[key]
         setattr(catalog, key, val)
@@ -1443,7 +1917,8 @@ def catalog_get(context, catalog_id):
     Get a catalog that match zero or more filters.
     :param catalog_id: Get the catalog id.
     """
-    catalogobj = _catalog_get(context, catalog_id)
+    catalogobj = _catalog_get(context, catalog_id,
+                              session=_get_read_session(context))
 
     catalog = {}
     catalog['catalog_id'] = catalogobj.catalog_id
@@ -1499,7 +1974,7 @@ def catalog_list(context, marker=None, limit=None,
     :param sort_dir: direction in which results should be sorted (asc, desc)
     :param force_show_deleted: view the deleted deterministic
     """
-    session = get_session()
+    session = _get_read_session(context)
 
     if sort_key is not None and len(sort_key) == 0:
         sort_key = None
@@ -1629,7 +2104,7 @@ def catalog_contents_list(ctxt, catalog_id,
         :param sort_dir: dict in which results should be sorted (asc, desc).
         :param force_show_deleted: view the deleted deterministic.
     """
-    se = get_session()
+    se = _get_read_session(ctxt)
 
     CatalogContents = models.CatalogContents
 
@@ -1733,7 +2208,8 @@ def catalog_contents_get(ctxt, catalog_id, seq_no):
     :param catalog_id: Get the catalog id.
     :param seq_no: Get the seq_no.
     """
-    catalog_contents = _catalog_contents_get(ctxt, catalog_id, seq_no)
+    catalog_contents = _catalog_contents_get(
+        ctxt, catalog_id, seq_no, session=_get_read_session(ctxt))
 
     return catalog_contents.to_dict()
 
@@ -1783,7 +2259,7 @@ def catalog_scope_create(ctxt, **values):
 
         for key in values:
             if key in ('lifetime_start', 'lifetime_end') and values[key]:
-                val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+                val = datetime_codec.strptime(values[key])
             else:
                 val = values[key]
             setattr(catalog_scope, key, val)
@@ -1820,7 +2296,8 @@ def catalog_scope_get(ctxt, catalog_scope_id):
     """Get the data for the specified id from catalog scope.
     :param catalog_scope_id: Get the catalog scope id.
     """
-    catalog_scope = _catalog_scope_get(ctxt, catalog_scope_id)
+    catalog_scope = _catalog_scope_get(
+        ctxt, catalog_scope_id, session=_get_read_session(ctxt))
 
     return catalog_scope.to_dict()
 
@@ -1836,7 +2313,7 @@ def catalog_scope_list(ctxt, marker=None, limit=None,
     :param force_show_deleted: view the deleted deterministic
     :param filters: option to search a list
     """
-    session = get_session()
+    session = _get_read_session(ctxt)
 
     if sort_key is not None and len(sort_key) == 0:
         sort_key = None
@@ -1863,8 +2340,7 @@ def catalog_scope_list(ctxt, marker=None, limit=None,
         query = query.filter(
             models.CatalogScope.catalog_id == filters.get('catalog_id'))
     if 'lifetime' in filters:
-        lifetime = datetime.strptime(filters.get('lifetime'),
-                                     '%Y-%m-%dT%H:%M:%S.%f')
+        lifetime = datetime_codec.strptime(filters.get('lifetime'))
         query = query.filter(models.CatalogScope.lifetime_start <= lifetime)
         query = query.filter(models.CatalogScope.lifetime_end >= lifetime)
 
@@ -1905,7 +2381,7 @@ def catalog_scope_update(ctxt, catalog_scope_id, **values):
 
         for key in values:
             if key in ('lifetime_start', 'lifetime_end') and values[key]:
-                val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+                val = datetime_codec.strptime(values[key])
             else:
                 val = values[key]
             setattr(update_scope, key, val)
@@ -1960,8 +2436,7 @@ def _valid_filters_add(query, ctxt, filters, refine_flg):
             models.Catalog.catalog_name == filters.get('catalog_name'))
 
     if 'lifetime' in filters:
-        lifetime = datetime.strptime(filters.get('lifetime'),
-                                     '%Y-%m-%dT%H:%M:%S.%f')
+        lifetime = datetime_codec.strptime(filters.get('lifetime'))
         query = query.filter(models.Catalog.lifetime_start <= lifetime)
         query = query.filter(models.Catalog.lifetime_end >= lifetime)
         query = query.filter(models.CatalogScope.lifetime_start <= lifetime)
@@ -2039,7 +2514,7 @@ def valid_catalog_list(ctxt, marker=None, limit=None,
     :param refine_flg: Whether the flag to merge the default data.
     :param filters: option to search a list.
     """
-    session = get_session()
+    session = _get_read_session(ctxt)
 
     # Check sort_key and sort_dir.
     sort_key, sort_dir = _valid_sort_key_check(sort_key, sort_dir)
@@ -2149,12 +2624,13 @@ def price_create(context, **values):
 
         for key in values:
             if key in ('lifetime_start', 'lifetime_end') and values[key]:
-                val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+                val = datetime_codec.strptime(values[key])
             else:
                 val = values[key]
             price[key] = val
 
         price.save(session=se)
+        _price_timeline_rebuild(se, price['catalog_id'], price['scope'])
 
     repkey = (price['catalog_id'], price['scope'], price['seq_no'])
     return se.query(models.Price).get(repkey).to_dict()
@@ -2172,7 +2648,7 @@ def price_list(context, catalog_id, marker=None, limit=None,
     :param sort_dir: direction in which results should be sorted (asc, desc)
     :param force_show_deleted: view the deleted deterministic
     """
-    session = get_session()
+    session = _get_read_session(context)
 
     if sort_key is not None and len(sort_key) == 0:
         sort_key = None
@@ -2326,7 +2802,8 @@ def price_get(context, catalog_id, scope, seq_no):
     :param scope: Get the scope.
     :param seq_no: Get the seq_no.
     """
-    catalogobj = _price_get(context, catalog_id, scope, seq_no)
+    catalogobj = _price_get(context, catalog_id, scope, seq_no,
+                            session=_get_read_session(context))
 
     catalogobj['price'] = str(catalogobj['price'])
 
@@ -2343,11 +2820,16 @@ def price_update(context, catalog_id, scope, seq_no, **values):
         update_price = _price_get(context, catalog_id, scope, seq_no, se)
         for key in values:
             if key in ('lifetime_start', 'lifetime_end') and values[key]:
-                val = datetime.strptime(values[key], '%Y-%m-%dT%H:%M:%S.%f')
+                val = datetime_codec.strptime(values[key])
             else:
                 val = values[key]
             update_price[key] = val
         update_price.save(se)
+        _price_timeline_rebuild(se, catalog_id, scope)
+        if (update_price['catalog_id'], update_price['scope']) != \
+                (catalog_id, scope):
+            _price_timeline_rebuild(se, update_price['catalog_id'],
+                                    update_price['scope'])
 
     priceobj = _price_get(context, catalog_id, scope, seq_no, se)
 
@@ -2368,3 +2850,717 @@ def price_delete(ctxt, catalog_id, scope, seq_no):
     with se.begin():
         price = _price_get(ctxt, catalog_id, scope, seq_no, se)
         se.delete(price)
+        se.flush()
+        _price_timeline_rebuild(se, catalog_id, scope)
+
+
+def _price_timeline_intervals(prices):
+    """Make non-overlapping intervals of effective prices.
+    Where prices overlap, the price which starts later is effective,
+    and the larger seq_no wins among prices which start at once.
+    :param prices: Prices of a scope of a catalog.
+    :retval List of tuples of valid_from, valid_to and the price.
+    """
+    def lifetime(price):
+        return (price.lifetime_start or TIMELINE_MIN,
+                price.lifetime_end or TIMELINE_MAX)
+
+    points = sorted(set(at for price in prices for at in lifetime(price)))
+
+    intervals = []
+    for valid_from, valid_to in zip(points, points[1:]):
+        covering = [price for price in prices
+                    if lifetime(price)[0] <= valid_from <
+                    lifetime(price)[1]]
+        if not covering:
+            continue
+        effective = max(covering,
+                        key=lambda price: (lifetime(price)[0], price.seq_no))
+
+        # Join the interval to the former one of the same price.
+        if intervals and intervals[-1][1] == valid_from and \
+                intervals[-1][2] is effective:
+            intervals[-1] = (intervals[-1][0], valid_to, effective)
+        else:
+            intervals.append((valid_from, valid_to, effective))
+
+    return intervals
+
+
+def _price_timeline_rebuild(session, catalog_id, scope):
+    """Make the price timeline of a scope of a catalog again
+    in the transaction of the price update.
+    :param session: DB session of the transaction.
+    :param catalog_id: Catalog id.
+    :param scope: Scope.
+    """
+    session.query(models.PriceTimeline)\
+        .filter_by(catalog_id=catalog_id, scope=scope)\
+        .delete(synchronize_session=False)
+
+    prices = session.query(models.Price)\
+        .filter_by(catalog_id=catalog_id, scope=scope, deleted=False)\
+        .all()
+
+    for valid_from, valid_to, price in _price_timeline_intervals(prices):
+        timeline = models.PriceTimeline()
+        timeline.catalog_id = catalog_id
+        timeline.scope = scope
+        timeline.valid_from = valid_from
+        timeline.valid_to = valid_to
+        timeline.seq_no = price.seq_no
+        timeline.price = price.price
+        session.add(timeline)
+    session.flush()
+
+
+def price_timeline_rebuild_all(context):
+    """Make price timelines of all scopes of all catalogs again."""
+    se = get_session()
+    with se.begin():
+        keys = se.query(models.Price.catalog_id, models.Price.scope)\
+            .distinct().all()
+        keys = set(keys) | set(
+            se.query(models.PriceTimeline.catalog_id,
+                     models.PriceTimeline.scope).distinct().all())
+
+        for catalog_id, scope in keys:
+            _price_timeline_rebuild(se, catalog_id, scope)
+
+    return len(keys)
+
+
+def _price_timeline_find(session, catalog_id, scope, at):
+    """Seek the interval of the price timeline which contains a time.
+    Intervals are half-open, but the lifetime of a price includes its
+    lifetime_end as price_list does. So the interval which ends at the
+    time is effective too, if its price starts later than the price of
+    the interval which starts at the time.
+    """
+    PriceTimeline = models.PriceTimeline
+    query = session.query(PriceTimeline)\
+        .filter_by(catalog_id=catalog_id, scope=scope)
+    timeline = query.filter(PriceTimeline.valid_from <= at)\
+        .order_by(PriceTimeline.valid_from.desc())\
+        .first()
+
+    if timeline is None or timeline.valid_to < at:
+        return None
+
+    if timeline.valid_from == at:
+        previous = query.filter(PriceTimeline.valid_to == at).first()
+        if previous is not None:
+            starts = dict(session.query(models.Price.seq_no,
+                                        models.Price.lifetime_start)
+                          .filter_by(catalog_id=catalog_id, scope=scope,
+                                     deleted=False)
+                          .filter(models.Price.seq_no.in_(
+                              [previous.seq_no, timeline.seq_no])))
+            timeline = max(
+                (previous, timeline),
+                key=lambda row: (starts.get(row.seq_no) or TIMELINE_MIN,
+                                 row.seq_no))
+
+    return timeline
+
+
+def price_effective_get(context, catalog_id, scope, at):
+    """Get the price which is effective for a scope at a time.
+    The price of 'Default' is effective when the scope has no price.
+    Non-admin users get the price of their own project.
+    :param catalog_id: Catalog id.
+    :param scope: Scope, which is a project id or 'Default'.
+    :param at: Time.
+    """
+    if not context.is_admin:
+        scope = context.tenant
+
+    se = _get_read_session(context)
+    timeline = None
+    if scope and scope != 'Default':
+        timeline = _price_timeline_find(se, catalog_id, scope, at)
+    if timeline is None:
+        timeline = _price_timeline_find(se, catalog_id, 'Default', at)
+
+    if timeline is None:
+        msg = (_("No effective price found"))
+        LOG.debug(msg)
+        raise exception.NotFound(msg)
+
+    return {'catalog_id': timeline.catalog_id,
+            'scope': timeline.scope,
+            'seq_no': timeline.seq_no,
+            'price': str(timeline.price),
+            'valid_from': timeline.valid_from,
+            'valid_to': timeline.valid_to}
+
+
+def outbox_enqueue(session, action, idempotency_key, payload):
+    """Add a side effect to the outbox in the transaction of the caller.
+    Nothing is added when the idempotency key has already been added.
+    :param session: DB session of the transaction to add the side effect in.
+    :param action: Action name of the side effect.
+    :param idempotency_key: Key which identifies the side effect.
+    :param payload: Arguments of the action.
+    """
+    query = session.query(models.Outbox)\
+        .filter_by(idempotency_key=idempotency_key)
+    if query.first():
+        return False
+
+    outbox = models.Outbox()
+    outbox.id = str(uuid.uuid4())
+    outbox.idempotency_key = idempotency_key
+    outbox.action = action
+    outbox.payload = payload
+    outbox.status = 'pending'
+    outbox.attempts = 0
+    outbox.next_run_at = timeutils.utcnow()
+    session.add(outbox)
+
+    return True
+
+
+def outbox_claim(context, limit, running_timeout=None):
+    """Claim side effects to run.
+    A side effect is claimed by one dispatcher only,
+    a running side effect is claimed again after running_timeout.
+    :param limit: The max number of side effects to claim.
+    :param running_timeout: Seconds after which a running side effect
+        is regarded as abandoned.
+    """
+    se = get_session()
+    now = timeutils.utcnow()
+
+    conditions = [sqlalchemy.and_(models.Outbox.status == 'pending',
+                                  models.Outbox.next_run_at <= now)]
+    if running_timeout:
+        conditions.append(sqlalchemy.and_(
+            models.Outbox.status == 'running',
+            models.Outbox.updated_at <=
+            now - timedelta(seconds=running_timeout)))
+
+    candidates = se.query(models.Outbox.id, models.Outbox.status,
+                          models.Outbox.updated_at)\
+        .filter(sqlalchemy.or_(*conditions))\
+        .filter_by(deleted=False)\
+        .order_by(models.Outbox.next_run_at)\
+        .limit(limit).all()
+
+    claimed_ids = []
+    for outbox_id, status, updated_at in candidates:
+        with se.begin():
+            # Update only when nobody has claimed it in the meantime.
+            count = se.query(models.Outbox)\
+                .filter_by(id=outbox_id, status=status,
+                           updated_at=updated_at)\
+                .update({'status': 'running',
+                         'attempts': models.Outbox.attempts + 1,
+                         'updated_at': now},
+                        synchronize_session=False)
+        if count:
+            claimed_ids.append(outbox_id)
+
+    if not claimed_ids:
+        return []
+
+    return [outbox.to_dict() for outbox in
+            se.query(models.Outbox)
+            .filter(models.Outbox.id.in_(claimed_ids))
+            .order_by(models.Outbox.next_run_at).all()]
+
+
+def outbox_update(context, outbox_id, **values):
+    """Update a side effect in the outbox.
+    :param outbox_id: ID of the side effect.
+    :param values: Values to update, e.g. status, next_run_at, last_error.
+    """
+    se = get_session()
+
+    with se.begin():
+        count = se.query(models.Outbox)\
+            .filter_by(id=outbox_id, deleted=False)\
+            .update(values, synchronize_session=False)
+
+    if not count:
+        msg = (_("No Outbox found with ID %s") % outbox_id)
+        LOG.debug(msg)
+        raise exception.NotFound(msg)
+
+
+def outbox_list(context, status=None):
+    """Get side effects in the outbox.
+    :param status: Status of side effects to get.
+    """
+    se = get_session()
+
+    query = se.query(models.Outbox).filter_by(deleted=False)
+    if status:
+        query = query.filter_by(status=status)
+
+    return [outbox.to_dict() for outbox in
+            query.order_by(models.Outbox.created_at).all()]
+
+
+def ticket_operation_create(context, **values):
+    """Create a ticket operation from the values dictionary.
+    :param values: Entry ticket operation data.
+    """
+    se = get_session()
+
+    with se.begin():
+        operation = models.TicketOperation()
+        operation.id = values.get('id') or str(uuid.uuid4())
+        operation.ticket_id = values['ticket_id']
+        operation.action = values['action']
+        operation.status = values.get('status', 'queued')
+        operation.save(session=se)
+
+    return operation.to_dict()
+
+
+def ticket_operation_create_many(context, values_list):
+    """Create ticket operations in one transaction.
+    :param values_list: List of entry ticket operation data.
+    """
+    se = get_session()
+
+    operations = []
+    with se.begin():
+        for values in values_list:
+            operation = models.TicketOperation()
+            operation.id = values.get('id') or str(uuid.uuid4())
+            operation.ticket_id = values['ticket_id']
+            operation.action = values['action']
+            operation.status = values.get('status', 'queued')
+            operations.append(operation)
+        se.add_all(operations)
+
+    return [op.to_dict() for op in operations]
+
+
+def ticket_operation_get(context, operation_id):
+    """Get a ticket operation.
+    :param operation_id: ID of the ticket operation.
+    """
+    se = get_session()
+
+    try:
+        operation = se.query(models.TicketOperation)\
+            .filter_by(id=operation_id, deleted=False).one()
+    except sa_orm.exc.NoResultFound:
+        msg = (_("No TicketOperation found with ID %s") % operation_id)
+        LOG.debug(msg)
+        raise exception.NotFound(msg)
+
+    return operation.to_dict()
+
+
+def ticket_operation_update(context, operation_id, **values):
+    """Update a ticket operation.
+    :param operation_id: ID of the ticket operation.
+    :param values: Values to update, e.g. status, started_at.
+    """
+    se = get_session()
+
+    with se.begin():
+        count = se.query(models.TicketOperation)\
+            .filter_by(id=operation_id, deleted=False)\
+            .update(values, synchronize_session=False)
+
+    if not count:
+        msg = (_("No TicketOperation found with ID %s") % operation_id)
+        LOG.debug(msg)
+        raise exception.NotFound(msg)
+
+
+# Hot table, shadow table and the column of the ticket ID,
+# in the order of moving rows.
+_ARCHIVE_TABLES = (
+    (models.TicketOperation, models.ShadowTicketOperation, 'ticket_id'),
+    (models.Workflow, models.ShadowWorkflow, 'ticket_id'),
+    (models.Ticket, models.ShadowTicket, 'id'),
+)
+
+
+def _is_terminal_status(status_detail):
+    """A status is terminal when it has no next status."""
+    next_status = (status_detail or {}).get('next_status') or []
+    return not any(status.get('next_status_code') for status in next_status)
+
+
+def _deleted_tickets_to_archive(before, batch_size):
+    """Get IDs of tickets which are deleted before a time, in batches."""
+    marker = None
+    while True:
+        se = get_session()
+        query = se.query(models.Ticket.id)\
+            .filter(models.Ticket.deleted == sqlalchemy.true())\
+            .filter(models.Ticket.deleted_at < before)
+        if marker:
+            query = query.filter(models.Ticket.id > marker)
+        ticket_ids = [row.id for row in
+                      query.order_by(models.Ticket.id).limit(batch_size)]
+        if not ticket_ids:
+            return
+        marker = ticket_ids[-1]
+        yield ticket_ids
+
+
+def _closed_tickets_to_archive(before, batch_size):
+    """Get IDs of tickets which are in a terminal status since before
+    a time, in batches.
+    Active workflows are read page by page, and terminal statuses are
+    picked out of a page. Application tickets of live contracts are
+    left, because brokers read their workflows, e.g. to cancel.
+    """
+    Workflow = models.Workflow
+    Ticket = models.Ticket
+    Contract = models.Contract
+    now = timeutils.utcnow()
+    live_contract = sqlalchemy.exists().where(sqlalchemy.and_(
+        Contract.application_id == Ticket.id,
+        Contract.deleted == false(),
+        sqlalchemy.or_(Contract.lifetime_end.is_(None),
+                       Contract.lifetime_end >= now)))
+    marker = None
+    while True:
+        se = get_session()
+        query = se.query(Workflow.id, Workflow.ticket_id,
+                         Workflow.status_detail)\
+            .join(Ticket, Ticket.id == Workflow.ticket_id)\
+            .filter(Workflow.status == _WF_STATUS_ACTIVE)\
+            .filter(Ticket.deleted == false())\
+            .filter(~live_contract)\
+            .filter(sqlalchemy.func.coalesce(Workflow.updated_at,
+                                             Workflow.created_at) < before)
+        if marker:
+            query = query.filter(Workflow.id > marker)
+        rows = query.order_by(Workflow.id).limit(batch_size).all()
+        if not rows:
+            return
+        marker = rows[-1].id
+
+        ticket_ids = sorted(set(row.ticket_id for row in rows
+                                if _is_terminal_status(row.status_detail)))
+        if ticket_ids:
+            yield ticket_ids
+
+
+def _tickets_move_to_shadow(session, ticket_ids, archived_at):
+    """Copy rows of tickets into the shadow tables and delete them."""
+    for model, shadow, key in _ARCHIVE_TABLES:
+        table = model.__table__
+        names = [column.name for column in table.columns]
+        rows = sqlalchemy.select(
+            [table.c[name] for name in names] +
+            [sqlalchemy.literal(archived_at, sqlalchemy.DateTime)])\
+            .where(table.c[key].in_(ticket_ids))
+        session.execute(shadow.__table__.insert().from_select(
+            names + ['archived_at'], rows))
+        session.execute(table.delete().where(table.c[key].in_(ticket_ids)))
+
+
+def tickets_archive(context, before, batch_size=1000):
+    """Move tickets into the shadow tables with their workflows and
+    operations.
+    Tickets which are deleted before a time, and tickets whose active
+    workflow is in a terminal status since before the time are moved,
+    except application tickets of live contracts.
+    A batch of tickets is moved in one transaction, so that rows are
+    not locked long.
+    :param before: Tickets closed after this time are left.
+    :param batch_size: Number of tickets in a transaction.
+    :retval Dict of the numbers of archived deleted and closed tickets.
+    """
+    archived_at = timeutils.utcnow()
+    counts = {'deleted': 0, 'closed': 0}
+
+    for key, batches in (('deleted', _deleted_tickets_to_archive),
+                         ('closed', _closed_tickets_to_archive)):
+        for ticket_ids in batches(before, batch_size):
+            se = get_session()
+            with se.begin():
+                _tickets_move_to_shadow(se, ticket_ids, archived_at)
+            counts[key] += len(ticket_ids)
+
+    return counts
+
+
+def workflows_compact(context, batch_size=1000):
+    """Delete workflows of statuses which are not reached yet, which
+    the sparse storage derives from the workflow pattern instead.
+    :param batch_size: Number of workflows in a transaction.
+    :retval Number of deleted workflows.
+    """
+    count = 0
+    while True:
+        se = get_session()
+        with se.begin():
+            workflow_ids = [row.id for row in
+                            se.query(models.Workflow.id)
+                            .filter(models.Workflow.status ==
+                                    _WF_STATUS_NON_ACTIVE)
+                            .limit(batch_size)]
+            if not workflow_ids:
+                return count
+            table = models.Workflow.__table__
+            se.execute(table.delete().where(
+                table.c.id.in_(workflow_ids)))
+        count += len(workflow_ids)
+
+
+def shadow_purge(context, before, batch_size=1000):
+    """Delete tickets archived before a time out of the shadow tables,
+    with their workflows and operations.
+    :param before: Tickets archived after this time are left.
+    :param batch_size: Number of tickets in a transaction.
+    :retval Number of purged tickets.
+    """
+    count = 0
+    while True:
+        se = get_session()
+        with se.begin():
+            ticket_ids = [row.id for row in
+                          se.query(models.ShadowTicket.id)
+                          .filter(models.ShadowTicket.archived_at < before)
+                          .limit(batch_size)]
+            if not ticket_ids:
+                return count
+            for model, shadow, key in _ARCHIVE_TABLES:
+                table = shadow.__table__
+                se.execute(table.delete().where(
+                    table.c[key].in_(ticket_ids)))
+        count += len(ticket_ids)
+
+
+def table_fingerprint(context, model_name, **filters):
+    """Get a fingerprint of the rows of a table.
+    It changes when a row is created, updated or deleted, and when the
+    lifetime of a row starts or ends.
+    :param model_name: Class name of the model, e.g. 'Catalog'.
+    :param filters: Column values to narrow the rows, e.g. catalog_id.
+    :retval List of the count of rows and the latest timestamps.
+    """
+    model = getattr(models, model_name)
+    func = sqlalchemy.func
+
+    columns = [func.count(),
+               func.max(model.created_at),
+               func.max(model.updated_at),
+               func.max(model.deleted_at)]
+
+    if hasattr(model, 'lifetime_start'):
+        now = timeutils.utcnow()
+        columns.append(func.sum(sqlalchemy.case(
+            [(model.lifetime_start <= now, 1)], else_=0)))
+        columns.append(func.sum(sqlalchemy.case(
+            [(model.lifetime_end < now, 1)], else_=0)))
+
+    se = _get_read_session(context)
+    query = se.query(*columns)
+    for key, value in filters.iteritems():
+        query = query.filter(getattr(model, key) == value)
+
+    return list(query.one())
+
+
+def billing_contracts(context, period_start, period_end):
+    """Get contracts which are active in a billing period.
+    Only the columns for billing are read, ordered by catalog_id.
+    :param period_start: Start of the billing period.
+    :param period_end: End of the billing period (exclusive).
+    """
+    se = get_session()
+    Contract = models.Contract
+
+    query = se.query(Contract.contract_id, Contract.project_id,
+                     Contract.region_id, Contract.catalog_id,
+                     Contract.num,
+                     Contract.lifetime_start, Contract.lifetime_end)\
+        .filter(Contract.deleted == false())\
+        .filter(sqlalchemy.or_(Contract.lifetime_start.is_(None),
+                               Contract.lifetime_start < period_end))\
+        .filter(sqlalchemy.or_(Contract.lifetime_end.is_(None),
+                               Contract.lifetime_end > period_start))\
+        .order_by(Contract.catalog_id)
+
+    return [row._asdict() for row in query.all()]
+
+
+def billing_prices(context, catalog_ids, period_start, period_end):
+    """Get intervals of the price timelines of catalogs
+    which overlap a billing period. Intervals of all scopes are read.
+    :param catalog_ids: List of catalog ids.
+    :param period_start: Start of the billing period.
+    :param period_end: End of the billing period (exclusive).
+    """
+    se = get_session()
+    PriceTimeline = models.PriceTimeline
+
+    query = se.query(PriceTimeline.catalog_id, PriceTimeline.scope,
+                     PriceTimeline.seq_no, PriceTimeline.price,
+                     PriceTimeline.valid_from.label('lifetime_start'),
+                     PriceTimeline.valid_to.label('lifetime_end'))\
+        .filter(PriceTimeline.catalog_id.in_(catalog_ids))\
+        .filter(PriceTimeline.valid_from < period_end)\
+        .filter(PriceTimeline.valid_to > period_start)
+
+    return [row._asdict() for row in query.all()]
+
+
+def billing_summary_replace(context, period_start, period_end, rows):
+    """Replace the billing summary of a period in one transaction.
+    :param period_start: Start of the billing period.
+    :param period_end: End of the billing period (exclusive).
+    :param rows: List of dicts of project_id, region_id, catalog_id,
+        contract_count and amount.
+    """
+    table = models.BillingSummary.__table__
+    values_list = [dict(row, id=str(uuid.uuid4()),
+                        period_start=period_start,
+                        period_end=period_end)
+                   for row in rows]
+
+    se = get_session()
+    with se.begin():
+        se.query(models.BillingSummary)\
+            .filter_by(period_start=period_start, period_end=period_end)\
+            .delete(synchronize_session=False)
+
+        batch_size = CONF.billing.batch_size
+        for i in range(0, len(values_list), batch_size):
+            se.execute(table.insert(), values_list[i:i + batch_size])
+
+    return [dict(values, amount=str(values['amount']))
+            for values in values_list]
+
+
+def billing_summary_list(context, period_start=None, period_end=None,
+                         project_id=None):
+    """Get the billing summary.
+    Non-admin users get the summary of their own project.
+    :param period_start: Start of the billing period.
+    :param period_end: End of the billing period.
+    :param project_id: Project id.
+    """
+    se = get_session()
+    BillingSummary = models.BillingSummary
+
+    query = se.query(BillingSummary).filter_by(deleted=False)
+
+    if not context.is_admin:
+        project_id = context.tenant
+    if project_id:
+        query = query.filter_by(project_id=project_id)
+    if period_start:
+        query = query.filter_by(period_start=period_start)
+    if period_end:
+        query = query.filter_by(period_end=period_end)
+
+    query = query.order_by(BillingSummary.period_start,
+                           BillingSummary.project_id,
+                           BillingSummary.region_id,
+                           BillingSummary.catalog_id)
+
+    return [dict(row.to_dict(), amount=str(row['amount']))
+            for row in query.all()]
+
+
+def catalog_records_iter(context, model_name, batch_size=1000):
+    """Iterate rows of a catalog table ordered by the primary key.
+    Deleted rows are not read.
+    :param model_name: Name of the model.
+    :param batch_size: The number of rows fetched at once.
+    """
+    se = get_session()
+    model = getattr(models, model_name)
+    table = model.__table__
+
+    query = se.query(table)\
+        .filter(table.c.deleted == false())\
+        .order_by(*table.primary_key.columns)\
+        .yield_per(batch_size)
+
+    for row in query:
+        yield row._asdict()
+
+
+def catalog_records_upsert(context, records, dry_run=False):
+    """Create or update rows of catalog tables in one transaction.
+    Rows are written with one statement for each table and kind,
+    and rows which have the same values are left as they are.
+    :param records: List of tuples of the name of the model and
+        the list of rows. A row has all columns of the model except
+        created_at, updated_at, deleted_at and deleted.
+    :param dry_run: Only count rows without writing them.
+    :retval Dict of the numbers of created, updated and unchanged rows.
+    """
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+    timelines = set()
+    now = timeutils.utcnow()
+
+    se = get_session()
+    with se.begin():
+        for model_name, rows in records:
+            table = getattr(models, model_name).__table__
+            keys = [column.name for column in table.primary_key.columns]
+
+            # The last row wins among rows of the same key.
+            rows = collections.OrderedDict(
+                (tuple(row[key] for key in keys), row) for row in rows)
+
+            existing = {}
+            first_keys = list(set(key[0] for key in rows))
+            for i in range(0, len(first_keys), 500):
+                query = se.query(table).filter(
+                    table.c[keys[0]].in_(first_keys[i:i + 500]))
+                for row in query:
+                    row = row._asdict()
+                    key = tuple(row[k] for k in keys)
+                    if key in rows:
+                        existing[key] = row
+
+            inserts = []
+            updates = []
+            for key, row in rows.items():
+                current = existing.get(key)
+                if current is None:
+                    inserts.append(dict(row, created_at=now, updated_at=now,
+                                        deleted_at=None, deleted=False))
+                elif current['deleted'] or \
+                        any(current[k] != v for k, v in row.items()):
+                    values = dict(row, updated_at=now,
+                                  deleted_at=None, deleted=False)
+                    values.update(('b_' + k, row[k]) for k in keys)
+                    updates.append(values)
+                else:
+                    counts['unchanged'] += 1
+                    continue
+
+                if model_name == 'Price':
+                    timelines.add((row['catalog_id'], row['scope']))
+
+            counts['created'] += len(inserts)
+            counts['updated'] += len(updates)
+            if dry_run:
+                continue
+
+            if inserts:
+                se.execute(table.insert(), inserts)
+            if updates:
+                columns = [column for column in updates[0]
+                           if not column.startswith('b_')]
+                statement = table.update()\
+                    .where(sqlalchemy.and_(
+                        *[table.c[k] == sqlalchemy.bindparam('b_' + k)
+                          for k in keys]))\
+                    .values(dict((column, sqlalchemy.bindparam(column))
+                                 for column in columns))
+                se.execute(statement, updates)
+
+        if not dry_run:
+            for catalog_id, scope in timelines:
+                _price_timeline_rebuild(se, catalog_id, scope)
+
+    return counts
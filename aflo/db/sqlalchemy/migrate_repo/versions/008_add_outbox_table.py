@@ -0,0 +1,61 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+from aflo.db.sqlalchemy.migrate_repo.schema import (
+    Boolean, DateTime, Integer, String, TextContract, create_tables,
+    drop_tables)  # noqa
+from aflo.db.sqlalchemy import models
+from sqlalchemy.schema import (
+    Column, Index, MetaData, Table, UniqueConstraint)
+
+
+def define_outbox_table(meta):
+    table = Table('outbox',
+                  meta,
+                  Column('id', String(36), primary_key=True),
+                  Column('idempotency_key', String(255), nullable=False),
+                  Column('action', String(64), nullable=False),
+                  Column('payload', models.JSONEncodedDict()),
+                  Column('status', String(16), nullable=False),
+                  Column('attempts', Integer(), nullable=False),
+                  Column('next_run_at', DateTime()),
+                  Column('last_error', TextContract()),
+                  Column('created_at', DateTime(), nullable=False),
+                  Column('updated_at', DateTime()),
+                  Column('deleted_at', DateTime()),
+                  Column('deleted', Boolean(), nullable=False,
+                         default=False, index=True),
+                  UniqueConstraint('idempotency_key',
+                                   name='uniq_outbox0idempotency_key'),
+                  mysql_engine='InnoDB',
+                  extend_existing=True)
+
+    Index('ix_outbox_status_next_run_at',
+          table.c.status, table.c.next_run_at)
+
+    return table
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_outbox_table(meta)]
+    create_tables(tables)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_outbox_table(meta)]
+    drop_tables(tables)
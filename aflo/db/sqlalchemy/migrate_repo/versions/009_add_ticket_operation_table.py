@@ -0,0 +1,55 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+from aflo.db.sqlalchemy.migrate_repo.schema import (
+    Boolean, DateTime, String, TextContract, create_tables,
+    drop_tables)  # noqa
+from sqlalchemy.schema import (
+    Column, MetaData, Table)
+
+
+def define_ticket_operation_table(meta):
+    table = Table('ticket_operation',
+                  meta,
+                  Column('id', String(36), primary_key=True),
+                  Column('ticket_id', String(36), nullable=False,
+                         index=True),
+                  Column('action', String(32), nullable=False),
+                  Column('status', String(16), nullable=False),
+                  Column('started_at', DateTime()),
+                  Column('finished_at', DateTime()),
+                  Column('error_message', TextContract()),
+                  Column('created_at', DateTime(), nullable=False),
+                  Column('updated_at', DateTime()),
+                  Column('deleted_at', DateTime()),
+                  Column('deleted', Boolean(), nullable=False,
+                         default=False, index=True),
+                  mysql_engine='InnoDB',
+                  extend_existing=True)
+
+    return table
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_ticket_operation_table(meta)]
+    create_tables(tables)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_ticket_operation_table(meta)]
+    drop_tables(tables)
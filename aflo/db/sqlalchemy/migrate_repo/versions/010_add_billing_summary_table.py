@@ -0,0 +1,58 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+from aflo.db.sqlalchemy.migrate_repo.schema import (
+    Boolean, DateTime, Integer, Numeric, String, create_tables,
+    drop_tables)  # noqa
+from sqlalchemy.schema import (
+    Column, Index, MetaData, Table)
+
+
+def define_billing_summary_table(meta):
+    table = Table('billing_summary',
+                  meta,
+                  Column('id', String(36), primary_key=True),
+                  Column('period_start', DateTime(), nullable=False),
+                  Column('period_end', DateTime(), nullable=False),
+                  Column('project_id', String(64), index=True),
+                  Column('region_id', String(255)),
+                  Column('catalog_id', String(64)),
+                  Column('contract_count', Integer(), nullable=False),
+                  Column('amount', Numeric(15, 3), nullable=False),
+                  Column('created_at', DateTime(), nullable=False),
+                  Column('updated_at', DateTime()),
+                  Column('deleted_at', DateTime()),
+                  Column('deleted', Boolean(), nullable=False,
+                         default=False, index=True),
+                  mysql_engine='InnoDB',
+                  extend_existing=True)
+
+    Index('ix_billing_summary_period',
+          table.c.period_start, table.c.period_end)
+
+    return table
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_billing_summary_table(meta)]
+    create_tables(tables)
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_billing_summary_table(meta)]
+    drop_tables(tables)
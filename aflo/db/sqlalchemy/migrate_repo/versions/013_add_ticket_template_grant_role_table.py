@@ -0,0 +1,85 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
+import sqlalchemy
+
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy.migrate_repo.schema import (
+    Boolean, DateTime, String, create_tables, drop_tables)  # noqa
+from sqlalchemy.schema import (
+    Column, ForeignKey, MetaData, Table)
+
+
+def define_ticket_template_grant_role_table(meta):
+    # Load the referenced table for the foreign key.
+    Table('ticket_template', meta, autoload=True)
+
+    table = Table('ticket_template_grant_role',
+                  meta,
+                  Column('ticket_template_id', String(36),
+                         ForeignKey('ticket_template.id'),
+                         primary_key=True),
+                  Column('role', String(255), primary_key=True,
+                         index=True),
+                  Column('created_at', DateTime(), nullable=False),
+                  Column('updated_at', DateTime()),
+                  Column('deleted_at', DateTime()),
+                  Column('deleted', Boolean(), nullable=False,
+                         default=False, index=True),
+                  mysql_engine='InnoDB',
+                  extend_existing=True)
+
+    return table
+
+
+def fill_ticket_template_grant_role(meta, table):
+    """Make the grant roles of existing ticket templates."""
+    ticket_template = Table('ticket_template', meta, autoload=True)
+    workflow_pattern = Table('workflow_pattern', meta, autoload=True)
+    rows = sqlalchemy.select(
+        [ticket_template.c.id, workflow_pattern.c.wf_pattern_contents])\
+        .where(ticket_template.c.workflow_pattern_id ==
+               workflow_pattern.c.id)\
+        .execute()
+
+    now = timeutils.utcnow()
+    values = []
+    for ticket_template_id, wf_pattern_contents in rows:
+        roles = db_api.workflow_pattern_grant_roles(
+            jsonutils.loads(wf_pattern_contents))
+        values.extend({'ticket_template_id': ticket_template_id,
+                       'role': role,
+                       'created_at': now,
+                       'deleted': False}
+                      for role in set(roles))
+
+    if values:
+        table.insert().execute(values)
+
+
+def upgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_ticket_template_grant_role_table(meta)]
+    create_tables(tables)
+    fill_ticket_template_grant_role(meta, tables[0])
+
+
+def downgrade(migrate_engine):
+    meta = MetaData()
+    meta.bind = migrate_engine
+    tables = [define_ticket_template_grant_role_table(meta)]
+    drop_tables(tables)
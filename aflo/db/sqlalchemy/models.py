@@ -27,6 +27,7 @@ from sqlalchemy import String
 from sqlalchemy.orm import backref, relationship
 from sqlalchemy import Text
 from sqlalchemy.types import TypeDecorator
+from sqlalchemy import UniqueConstraint
 
 BASE = declarative_base()
 
@@ -71,6 +72,22 @@ class TicketTemplate(BASE, base_models.AfloBase):
                                     backref=backref('workflow_pattern_id'))
 
 
+class TicketTemplateGrantRole(BASE, base_models.AfloBase):
+    """Roles granted the first actions of the workflow pattern of
+    a ticket template, so that ticket templates are filtered by roles
+    in SQL.
+    """
+    __tablename__ = 'ticket_template_grant_role'
+    __table_args__ = (Index('ix_ticket_template_grant_role_role', 'role'),
+                      Index('ix_ticket_template_grant_role_deleted',
+                            'deleted'),)
+
+    ticket_template_id = Column(String(36),
+                                ForeignKey('ticket_template.id'),
+                                primary_key=True)
+    role = Column(String(255), primary_key=True)
+
+
 class Ticket(BASE, base_models.AfloBase):
     __tablename__ = 'ticket'
     __table_args__ = (Index('ix_ticket_deleted', 'deleted'),)
@@ -328,6 +345,132 @@ class Price(BASE, base_models.AfloBase):
         return d
 
 
+class Outbox(BASE, base_models.AfloBase):
+    """Side effects of brokers which a dispatcher runs later."""
+    __tablename__ = 'outbox'
+    __table_args__ = (UniqueConstraint('idempotency_key',
+                                       name='uniq_outbox0idempotency_key'),
+                      Index('ix_outbox_status_next_run_at',
+                            'status', 'next_run_at'),
+                      Index('ix_outbox_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    idempotency_key = Column(String(255), nullable=False)
+    action = Column(String(64), nullable=False)
+    payload = Column(JSONEncodedDict(), default={})
+    status = Column(String(16), nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_run_at = Column(DateTime())
+    last_error = Column(Text())
+
+
+class TicketOperation(BASE, base_models.AfloBase):
+    """Status of an operation to a ticket which aflo-rpcapi runs."""
+    __tablename__ = 'ticket_operation'
+    __table_args__ = (Index('ix_ticket_operation_ticket_id', 'ticket_id'),
+                      Index('ix_ticket_operation_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    ticket_id = Column(String(36), nullable=False)
+    action = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False)
+    started_at = Column(DateTime())
+    finished_at = Column(DateTime())
+    error_message = Column(Text())
+
+
+class BillingSummary(BASE, base_models.AfloBase):
+    """Charges of a project for a catalog in a billing period."""
+    __tablename__ = 'billing_summary'
+    __table_args__ = (Index('ix_billing_summary_period',
+                            'period_start', 'period_end'),
+                      Index('ix_billing_summary_project_id', 'project_id'),
+                      Index('ix_billing_summary_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    period_start = Column(DateTime(), nullable=False)
+    period_end = Column(DateTime(), nullable=False)
+    project_id = Column(String(64))
+    region_id = Column(String(255))
+    catalog_id = Column(String(64))
+    contract_count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(15, 3), nullable=False)
+
+
+class PriceTimeline(BASE, base_models.AfloBase):
+    """Non-overlapping intervals of the price which is effective
+    for a scope of a catalog. Intervals are [valid_from, valid_to).
+    """
+    __tablename__ = 'price_timeline'
+    __table_args__ = (Index('ix_price_timeline_deleted', 'deleted'),)
+
+    catalog_id = Column(String(64), primary_key=True)
+    scope = Column(String(64), primary_key=True)
+    valid_from = Column(DateTime(), primary_key=True)
+    valid_to = Column(DateTime(), nullable=False)
+    seq_no = Column(String(64), nullable=False)
+    price = Column(Numeric(12, 3), nullable=False)
+
+
+class ShadowTicket(BASE, base_models.AfloBase):
+    """Ticket which is moved out of the ticket table by the archive."""
+    __tablename__ = 'shadow_ticket'
+    __table_args__ = (Index('ix_shadow_ticket_archived_at', 'archived_at'),
+                      Index('ix_shadow_ticket_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    ticket_template_id = Column(String(36), nullable=False)
+    ticket_type = Column(String(64), nullable=False)
+    target_id = Column(JSONEncodedDict(), default={})
+    tenant_id = Column(String(36), nullable=False)
+    tenant_name = Column(String(255))
+    owner_id = Column(String(255))
+    owner_name = Column(String(255))
+    owner_at = Column(DateTime())
+    ticket_detail = Column(JSONEncodedDict(), default={})
+    action_detail = Column(JSONEncodedDict(), default={})
+    archived_at = Column(DateTime(), nullable=False)
+
+
+class ShadowWorkflow(BASE, base_models.AfloBase):
+    """Workflow which is moved out of the workflow table by the archive."""
+    __tablename__ = 'shadow_workflow'
+    __table_args__ = (Index('ix_shadow_workflow_ticket_id', 'ticket_id'),
+                      Index('ix_shadow_workflow_archived_at', 'archived_at'),
+                      Index('ix_shadow_workflow_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    ticket_id = Column(String(36), nullable=False)
+    status = Column(Integer(), nullable=False)
+    status_code = Column(String(64), nullable=False)
+    status_detail = Column(JSONEncodedDict(), default={})
+    target_role = Column(String(512))
+    confirmer_id = Column(String(255))
+    confirmer_name = Column(String(255))
+    confirmed_at = Column(DateTime())
+    additional_data = Column(JSONEncodedDict(), default={})
+    archived_at = Column(DateTime(), nullable=False)
+
+
+class ShadowTicketOperation(BASE, base_models.AfloBase):
+    """Ticket operation which is moved out by the archive."""
+    __tablename__ = 'shadow_ticket_operation'
+    __table_args__ = (Index('ix_shadow_ticket_operation_ticket_id',
+                            'ticket_id'),
+                      Index('ix_shadow_ticket_operation_archived_at',
+                            'archived_at'),
+                      Index('ix_shadow_ticket_operation_deleted', 'deleted'),)
+
+    id = Column(String(36), primary_key=True)
+    ticket_id = Column(String(36), nullable=False)
+    action = Column(String(32), nullable=False)
+    status = Column(String(16), nullable=False)
+    started_at = Column(DateTime())
+    finished_at = Column(DateTime())
+    error_message = Column(Text())
+    archived_at = Column(DateTime(), nullable=False)
+
+
 def register_models(engine):
     """Create database tables for all models with the given engine."""
     BASE.metadata.create_all(engine)
@@ -42,3 +42,19 @@ class PriceManager(object):
             :param seq_no: Seq no.
         """
         db_api.price_delete(ctxt, catalog_id, scope, seq_no)
+
+    def price_fingerprint(self, ctxt, catalog_id):
+        """Get a fingerprint of prices.
+            :param ctxt: Request context.
+            :param catalog_id: Catalog id.
+        """
+        return db_api.table_fingerprint(ctxt, 'Price', catalog_id=catalog_id)
+
+    def price_effective_get(self, ctxt, catalog_id, scope, at):
+        """Get the price which is effective for a scope at a time.
+            :param ctxt: Request context.
+            :param catalog_id: Catalog id.
+            :param scope: Scope.
+            :param at: Time.
+        """
+        return db_api.price_effective_get(ctxt, catalog_id, scope, at)
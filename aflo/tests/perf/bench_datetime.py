@@ -0,0 +1,91 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Benchmark of the datetime codec.
+
+For each sample value, this times parsing with the supported formats by
+trying datetime.strptime one by one, and by the codec with and without
+memoized values. Formatting is timed as well.
+
+    $ python -m aflo.tests.perf.bench_datetime [--number N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import timeit
+
+from aflo.common import datetime_codec
+from aflo.common import utils
+
+SAMPLE_VALUES = [
+    '2016-06-27T12:34:56.123456',
+    '2016-06-27T12:34:56',
+    '2016-06-27T12:34',
+    '2016-06-27',
+    'invalid',
+]
+
+
+def _strptime_loop(value):
+    """Parse a value like the former utils.get_datetime_from_param."""
+    for supported_format in utils.SUPPORTED_DATETIME_FORMAT:
+        try:
+            return datetime.datetime.strptime(value, supported_format)
+        except (TypeError, ValueError, AttributeError):
+            pass
+    return None
+
+
+def _codec_uncached(value):
+    datetime_codec._cache.clear()
+    return datetime_codec.parse(value, utils.SUPPORTED_DATETIME_FORMAT)
+
+
+def _codec_cached(value):
+    return datetime_codec.parse(value, utils.SUPPORTED_DATETIME_FORMAT)
+
+
+def _time(func, number):
+    """Get the mean time of a call in microseconds."""
+    return timeit.timeit(func, number=number) / number * 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the datetime codec.')
+    parser.add_argument('--number', type=int, default=20000,
+                        help='Number of calls to time')
+    args = parser.parse_args()
+
+    print('%-30s %12s %12s %12s' % (
+        'value', 'strptime(us)', 'codec(us)', 'cached(us)'))
+    for value in SAMPLE_VALUES:
+        assert _strptime_loop(value) == _codec_uncached(value), value
+        print('%-30s %12.2f %12.2f %12.2f' % (
+            value,
+            _time(lambda: _strptime_loop(value), args.number),
+            _time(lambda: _codec_uncached(value), args.number),
+            _time(lambda: _codec_cached(value), args.number)))
+
+    value = datetime.datetime(2016, 6, 27, 12, 34, 56, 123456)
+    print('%-30s %12.2f %12.2f' % (
+        'strftime',
+        _time(lambda: value.strftime(datetime_codec.DATETIME_FORMAT),
+              args.number),
+        _time(lambda: datetime_codec.strftime(value), args.number)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Benchmark of the DB API with seeded volumes.
+
+This seeds a database with tickets and their workflows, contracts,
+catalogs, catalog scopes and prices of many tenants, then times DB API
+functions and the broker path of creating a ticket. For each case, it
+reports p50 and p99 in milliseconds and SQL statements per call.
+
+With --baseline, results are compared to a stored baseline, and the
+run fails when a p50 is slower than the baseline by more than the
+threshold, or a case runs more statements than the baseline.
+
+    $ python -m aflo.tests.perf.bench_db_api \\
+        [--connection URL] [--no-seed] [--tickets N] [--workflows N] \\
+        [--contracts N] [--catalogs N] [--prices N] [--tenants N] \\
+        [--number N] [--baseline FILE [--save-baseline]] [--threshold R]
+
+The default volumes are 100k tickets, 1M workflows and 50k prices of
+1k tenants. The default database is a SQLite file, and --connection
+takes e.g. a MySQL URL.
+"""
+
+from __future__ import print_function
+
+import argparse
+import datetime
+import json
+import sys
+import time
+import uuid
+
+from oslo_config import cfg
+from oslo_db import options
+import sqlalchemy
+
+import aflo.context
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+
+CONF = cfg.CONF
+
+DEFAULT_CONNECTION = 'sqlite:////tmp/aflo_bench_db_api.sqlite'
+
+TEMPLATE_ID = 'bench-ticket-template'
+WF_PATTERN_ID = 'bench-workflow-pattern'
+
+# Rows in an INSERT statement at seeding.
+CHUNK_SIZE = 5000
+
+NOW = datetime.datetime(2016, 6, 27)
+LIFETIME_START = datetime.datetime(2016, 1, 1)
+LIFETIME_END = datetime.datetime(2099, 12, 31)
+
+
+class _Enforcer(object):
+    """Policy enforcer of contexts, without policy files."""
+
+    def __init__(self, is_admin):
+        self.is_admin = is_admin
+
+    def check_is_admin(self, context):
+        return self.is_admin
+
+
+def _tenant_id(index):
+    return 'tenant-%04d' % index
+
+
+def _insert(engine, model, rows):
+    """Insert rows in chunks in a transaction.
+    :param rows: Iterator of dicts of columns.
+    """
+    table = model.__table__
+    with engine.begin() as connection:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= CHUNK_SIZE:
+                connection.execute(table.insert(), chunk)
+                chunk = []
+        if chunk:
+            connection.execute(table.insert(), chunk)
+
+
+def _ticket_rows(args, template_contents):
+    for i in range(args.tickets):
+        yield {'id': 'ticket-%08d' % i,
+               'ticket_template_id': TEMPLATE_ID,
+               'ticket_type': template_contents['ticket_type'],
+               'target_id': template_contents['target_id'],
+               'tenant_id': _tenant_id(i % args.tenants),
+               'tenant_name': _tenant_id(i % args.tenants),
+               'owner_id': 'user-%04d' % (i % args.tenants),
+               'owner_name': 'user-%04d' % (i % args.tenants),
+               'owner_at': NOW,
+               'ticket_detail': {'num': i, 'description': 'ticket %d' % i},
+               'action_detail': {},
+               'created_at': NOW + datetime.timedelta(seconds=i)}
+
+
+def _workflow_rows(args, wf_pattern_contents):
+    statuses = [status for status in wf_pattern_contents['status_list']
+                if status['status_code'] != 'none']
+    per_ticket = max(args.workflows // max(args.tickets, 1), 1)
+    for i in range(args.tickets):
+        active = i % min(per_ticket, len(statuses))
+        for j in range(per_ticket):
+            status = statuses[j % len(statuses)]
+            yield {'id': 'workflow-%08d-%04d' % (i, j),
+                   'ticket_id': 'ticket-%08d' % i,
+                   'status': 1 if j == active else 0,
+                   'status_code': status['status_code'],
+                   'status_detail': status,
+                   'target_role': 'none',
+                   'confirmer_id': 'user-%04d' % (i % args.tenants),
+                   'confirmed_at': NOW if j <= active else None,
+                   'additional_data': {}}
+
+
+def _contract_rows(args):
+    for i in range(args.contracts):
+        yield {'contract_id': 'contract-%08d' % i,
+               'region_id': 'region-1',
+               'project_id': _tenant_id(i % args.tenants),
+               'project_name': _tenant_id(i % args.tenants),
+               'catalog_id': 'catalog-%04d' % (i % args.catalogs),
+               'catalog_name': 'catalog %d' % (i % args.catalogs),
+               'num': 1,
+               'ticket_template_id': TEMPLATE_ID,
+               'application_id': 'ticket-%08d' % i,
+               'application_date': NOW,
+               'lifetime_start': LIFETIME_START,
+               'lifetime_end': LIFETIME_END,
+               'created_at': NOW + datetime.timedelta(seconds=i)}
+
+
+def _catalog_rows(args):
+    for i in range(args.catalogs):
+        yield {'catalog_id': 'catalog-%04d' % i,
+               'region_id': 'region-1',
+               'catalog_name': 'catalog %d' % i,
+               'lifetime_start': LIFETIME_START,
+               'lifetime_end': LIFETIME_END,
+               'created_at': NOW + datetime.timedelta(seconds=i)}
+
+
+def _price_scopes(args):
+    """Get (catalog ID, scope, seq_no) of prices.
+    Each catalog has a 'Default' price, and the other prices are
+    spread over tenants and catalogs.
+    """
+    prices = [('catalog-%04d' % i, 'Default', 'default')
+              for i in range(args.catalogs)]
+    for i in range(max(args.prices - args.catalogs, 0)):
+        prices.append(('catalog-%04d' % ((i // args.tenants) % args.catalogs),
+                       _tenant_id(i % args.tenants),
+                       'seq-%08d' % i))
+    return prices
+
+
+def _catalog_scope_rows(prices):
+    scopes = set()
+    for catalog_id, scope, seq_no in prices:
+        if (catalog_id, scope) in scopes:
+            continue
+        scopes.add((catalog_id, scope))
+        yield {'id': str(uuid.uuid4()),
+               'catalog_id': catalog_id,
+               'scope': scope,
+               'lifetime_start': LIFETIME_START,
+               'lifetime_end': LIFETIME_END}
+
+
+def _price_rows(prices):
+    for i, (catalog_id, scope, seq_no) in enumerate(prices):
+        yield {'catalog_id': catalog_id,
+               'scope': scope,
+               'seq_no': seq_no,
+               'price': '%d.000' % (100 + i % 900),
+               'lifetime_start': LIFETIME_START,
+               'lifetime_end': LIFETIME_END}
+
+
+def seed(args):
+    """Re-create tables and insert rows of the volumes of args."""
+    engine = db_api.get_engine()
+    models.unregister_models(engine)
+    models.register_models(engine)
+
+    wf_pattern_contents = tickets_utils.get_dict_contents(
+        'wf_pattern_contents_001')
+    template_contents = tickets_utils.get_dict_contents(
+        'template_contents_001', '20160627')
+
+    _insert(engine, models.WorkflowPattern,
+            [{'id': WF_PATTERN_ID, 'code': 'bench',
+              'wf_pattern_contents': wf_pattern_contents}])
+    _insert(engine, models.TicketTemplate,
+            [{'id': TEMPLATE_ID,
+              'ticket_type': template_contents['ticket_type'],
+              'template_contents': template_contents,
+              'workflow_pattern_id': WF_PATTERN_ID}])
+
+    prices = _price_scopes(args)
+    for name, model, rows in [
+            ('tickets', models.Ticket,
+             _ticket_rows(args, template_contents)),
+            ('workflows', models.Workflow,
+             _workflow_rows(args, wf_pattern_contents)),
+            ('contracts', models.Contract, _contract_rows(args)),
+            ('catalogs', models.Catalog, _catalog_rows(args)),
+            ('catalog scopes', models.CatalogScope,
+             _catalog_scope_rows(prices)),
+            ('prices', models.Price, _price_rows(prices))]:
+        start = time.time()
+        _insert(engine, model, rows)
+        print('seeded %s in %.1fs' % (name, time.time() - start),
+              file=sys.stderr)
+
+
+class StatementCounter(object):
+    """Count SQL statements executed by the engine."""
+
+    def __init__(self, engine):
+        self.count = 0
+        sqlalchemy.event.listen(engine, 'before_cursor_execute',
+                                self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def _percentile(samples, percent):
+    """Get a percentile of sorted samples by the nearest rank."""
+    index = int(round(percent / 100.0 * (len(samples) - 1)))
+    return samples[index]
+
+
+def _ticket_values():
+    return {'id': str(uuid.uuid4()),
+            'ticket_template_id': TEMPLATE_ID,
+            'ticket_detail': {'num': 2, 'description': 'bench'},
+            'status_code': 'applied_1st',
+            'after_status_code': 'applied_1st',
+            'tenant_id': _tenant_id(0),
+            'tenant_name': _tenant_id(0),
+            'owner_id': 'user-0000',
+            'owner_name': 'user-0000',
+            'owner_at': datetime.datetime.utcnow(),
+            'roles': ['__member__']}
+
+
+def get_cases():
+    """Get cases to time.
+    :retval List of tuples of the name and the function to call.
+    """
+    admin = aflo.context.RequestContext(is_admin=True,
+                                        policy_enforcer=_Enforcer(True))
+    tenant = aflo.context.RequestContext(
+        tenant=_tenant_id(0), user='user-0000', roles=['__member__'],
+        policy_enforcer=_Enforcer(False))
+    lifetime = '2016-06-27T00:00:00.000000'
+
+    return [
+        ('tickets_list(admin)',
+         lambda: db_api.tickets_list(admin, limit=50, filters={})),
+        ('tickets_list(tenant)',
+         lambda: db_api.tickets_list(tenant, limit=50, filters={})),
+        ('tickets_list(last_status_code)',
+         lambda: db_api.tickets_list(
+             admin, limit=50, filters={'last_status_code': 'applied_2nd'})),
+        ('tickets_summary(status_code)',
+         lambda: db_api.tickets_summary(admin, ['status_code'])),
+        ('contract_list(project_id)',
+         lambda: db_api.contract_list(admin, project_id=_tenant_id(0),
+                                      limit=50)),
+        ('contract_list(lifetime)',
+         lambda: db_api.contract_list(admin, lifetime=lifetime, limit=50)),
+        ('catalog_list',
+         lambda: db_api.catalog_list(admin, limit=50, filters={})),
+        ('price_list',
+         lambda: db_api.price_list(admin, 'catalog-0000', limit=50,
+                                   filters={})),
+        ('valid_catalog_list(tenant)',
+         lambda: db_api.valid_catalog_list(
+             tenant, limit=50, filters={'lifetime': lifetime})),
+        ('tickets_create',
+         lambda: db_api.tickets_create(admin, **_ticket_values())),
+    ]
+
+
+def bench(cases, counter, number):
+    """Time cases.
+    :retval Dict of names of cases and dicts of 'p50', 'p99' and
+        'queries'.
+    """
+    results = {}
+    for name, func in cases:
+        func()
+
+        samples = []
+        statements = counter.count
+        for i in range(number):
+            start = time.time()
+            func()
+            samples.append((time.time() - start) * 1000)
+        samples.sort()
+
+        results[name] = {
+            'p50': _percentile(samples, 50),
+            'p99': _percentile(samples, 99),
+            'queries': (counter.count - statements) / float(number)}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Compare results with a baseline.
+    :retval List of messages of regressions.
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        result = results[name]
+        base = baseline[name]
+        if result['p50'] > base['p50'] * (1 + threshold):
+            regressions.append('%s: p50 %.2fms > baseline %.2fms' % (
+                name, result['p50'], base['p50']))
+        if result['queries'] > base['queries']:
+            regressions.append('%s: %.1f queries > baseline %.1f' % (
+                name, result['queries'], base['queries']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the DB API with seeded volumes.')
+    parser.add_argument('--connection', default=DEFAULT_CONNECTION,
+                        help='Database URL')
+    parser.add_argument('--no-seed', action='store_true',
+                        help='Use the database seeded by a former run')
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--workflows', type=int, default=1000000)
+    parser.add_argument('--contracts', type=int, default=100000)
+    parser.add_argument('--catalogs', type=int, default=100)
+    parser.add_argument('--prices', type=int, default=50000)
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--number', type=int, default=100,
+                        help='Number of calls to time per case')
+    parser.add_argument('--baseline',
+                        help='JSON file of results to compare with')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Write the results to the baseline file')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed ratio of regression of p50')
+    args = parser.parse_args()
+
+    options.set_defaults(CONF, connection=args.connection)
+    if not args.no_seed:
+        seed(args)
+
+    counter = StatementCounter(db_api.get_engine())
+    results = bench(get_cases(), counter, args.number)
+
+    print('%-36s %10s %10s %8s' % ('case', 'p50(ms)', 'p99(ms)', 'queries'))
+    for name, func in get_cases():
+        result = results[name]
+        print('%-36s %10.2f %10.2f %8.1f' % (
+            name, result['p50'], result['p99'], result['queries']))
+
+    if not args.baseline:
+        return
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for regression in regressions:
+        print('REGRESSION: %s' % regression)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Benchmark of the startup cost of entry points.
+
+For each entry point, this imports the modules a worker loads at startup
+in a new interpreter, and reports the median import time, the resident
+memory and the number of modules. It also shows which clients of other
+services, which are imported on first use, were imported anyway.
+The last row is an rpc worker which has loaded all the brokers, as it
+does on the first tickets of each template.
+
+    $ python -m aflo.tests.perf.bench_import [--number N] \\
+        [--entry-point NAME ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import pkgutil
+import subprocess
+import sys
+
+import aflo.tickets.broker
+
+# Entry point: modules loaded at startup, including the application
+# which aflo-api loads from the paste config.
+ENTRY_POINTS = [
+    ('aflo-api', ['aflo.cmd.api', 'aflo.api.v1.router']),
+    ('aflo-rpcapi', ['aflo.cmd.rpcapi']),
+    ('aflo-manage', ['aflo.cmd.manage']),
+]
+
+# Row of an rpc worker which has loaded the brokers.
+BROKERS = 'brokers'
+
+LAZY_MODULES = ['keystoneclient', 'novaclient', 'cinderclient']
+
+_SCRIPT = """
+import json
+import resource
+import sys
+import time
+
+start = time.time()
+for name in %(modules)r:
+    __import__(name)
+elapsed = time.time() - start
+
+print(json.dumps({
+    'time': elapsed,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+    'lazy': [name for name in %(lazy)r if name in sys.modules],
+}))
+"""
+
+
+def _broker_modules():
+    path = os.path.dirname(aflo.tickets.broker.__file__)
+    return ['aflo.tickets.broker.%s' % name
+            for _, name, is_package in pkgutil.iter_modules([path])
+            if not is_package]
+
+
+def measure(modules):
+    """Import modules in a new interpreter.
+    :retval Dict of the time in seconds, the max RSS in KB, the number
+        of modules and the lazy modules which were imported.
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c',
+         _SCRIPT % {'modules': modules, 'lazy': LAZY_MODULES}])
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the startup cost of entry points.')
+    parser.add_argument('--number', type=int, default=5,
+                        help='Number of interpreters to time per entry '
+                             'point')
+    parser.add_argument('--entry-point', action='append',
+                        choices=[name for name, modules in ENTRY_POINTS] +
+                        [BROKERS],
+                        help='Entry point to time, all by default')
+    args = parser.parse_args()
+
+    entry_points = ENTRY_POINTS + [
+        (BROKERS, ['aflo.cmd.rpcapi'] + _broker_modules())]
+
+    print('%-14s %10s %10s %8s  %s' % (
+        'entry point', 'import(ms)', 'rss(MB)', 'modules', 'lazy imported'))
+    for name, modules in entry_points:
+        if args.entry_point and name not in args.entry_point:
+            continue
+        results = [measure(modules) for i in range(args.number)]
+        times = sorted(result['time'] for result in results)
+        last = results[-1]
+        print('%-14s %10.1f %10.1f %8d  %s' % (
+            name, times[len(times) // 2] * 1000, last['rss'] / 1024.0,
+            last['modules'], ', '.join(last['lazy']) or '-'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Benchmark of the parameter check of ticket templates.
+
+For each sample template, this times compiling the validation plan and
+checking the parameters of a ticket with the compiled plan, at creating
+and at updating.
+
+    $ python -m aflo.tests.perf.bench_param_check [--number N] [DIR ...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import glob
+import json
+import os
+import timeit
+
+from aflo.tickettemplates import templates
+
+TEMPLATE_DIRS = [
+    'contrib/tempest/tempest/api/aflo/operation_definition_files',
+    'aflo/tests/unit/v1/tickets/broker/operation_definition_files',
+]
+
+
+def _sample_value(ticket_template, parameter):
+    """Make a valid value of a parameter."""
+    param_type = ticket_template.get_parameter_type(parameter)
+    if param_type == 'number':
+        value_range = ticket_template.get_range(parameter) or {}
+        return str(value_range.get('min', 1))
+    if param_type == 'date':
+        return '2016-06-27T00:00:00.000000'
+    if param_type == 'boolean':
+        return 'True'
+    if param_type == 'email':
+        return 'user@example.com'
+
+    allowed_values = ticket_template.get_allowed_values(parameter)
+    if allowed_values:
+        return allowed_values[0]['value']
+    value_length = ticket_template.get_length(parameter) or {}
+    return 'x' * max(int(value_length.get('min', 0)), 1)
+
+
+def _sample_data(ticket_template, parameters):
+    return dict((ticket_template.get_parameter_key(parameter),
+                 _sample_value(ticket_template, parameter))
+                for parameter in parameters)
+
+
+def _time(func, number):
+    """Get the mean time of a call in microseconds."""
+    return timeit.timeit(func, number=number) / number * 1000000
+
+
+def bench_template(name, contents, number):
+    """Time the parameter check of a template.
+    :retval List of rows of the name, the status, the number of
+        parameters, the compile time and the check time.
+    """
+    rows = []
+    ticket_template = templates.TicketTemplate.load(contents)
+    statuses = [None] + sorted(set(
+        ticket_template.get_parameter_status(parameter, None)
+        for parameter in contents.get('update', {}).get('parameters', []))
+        - set([None]))
+    if contents.get('update', {}).get('parameters') and len(statuses) == 1:
+        statuses.append('applied')
+
+    for status in statuses:
+        parameters = ticket_template.get_parameters(status)
+        data = _sample_data(ticket_template, parameters)
+        plan = ticket_template.get_validation_plan(status)
+        assert not plan.validate(data), (name, plan.validate(data))
+
+        compile_time = _time(
+            lambda: templates.TicketTemplate.load(
+                contents).get_validation_plan(status), number)
+        check_time = _time(lambda: plan.validate(data), number)
+        rows.append((name, status or '(create)', len(parameters),
+                     compile_time, check_time))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark of the parameter check of ticket templates.')
+    parser.add_argument('dirs', nargs='*', default=TEMPLATE_DIRS,
+                        help='Directories of template contents files')
+    parser.add_argument('--number', type=int, default=2000,
+                        help='Number of calls to time')
+    args = parser.parse_args()
+
+    rows = []
+    for template_dir in args.dirs:
+        for path in sorted(glob.glob(os.path.join(template_dir,
+                                                  '*template_contents*'))):
+            with open(path) as f:
+                contents = json.load(f)
+            name = os.path.splitext(os.path.basename(path))[0]
+            rows.extend(bench_template(name, contents, args.number))
+
+    print('%-64s %-14s %6s %12s %12s' % (
+        'template', 'status', 'params', 'compile(us)', 'check(us)'))
+    for row in rows:
+        print('%-64s %-14s %6d %12.1f %12.1f' % row)
+    if rows:
+        print('%-64s %-14s %6s %12.1f %12.1f' % (
+            'mean', '', '',
+            sum(row[3] for row in rows) / len(rows),
+            sum(row[4] for row in rows) / len(rows)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,292 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import socket
+import threading
+import time
+
+from six.moves import socketserver
+
+from aflo.common import cache
+from aflo.tests import utils
+
+
+class FakeMemcachedHandler(socketserver.StreamRequestHandler):
+    """Stand-in of a memcached server of the text protocol."""
+
+    def handle(self):
+        data = self.server.data
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = line.split()
+            command = args[0]
+            if command == 'get':
+                if args[1] in data:
+                    value = data[args[1]]
+                    self.wfile.write('VALUE %s 0 %d\r\n%s\r\n' % (
+                        args[1], len(value), value))
+                self.wfile.write('END\r\n')
+            elif command in ('set', 'add'):
+                value = self.rfile.read(int(args[4]) + 2)[:-2]
+                if command == 'add' and args[1] in data:
+                    self.wfile.write('NOT_STORED\r\n')
+                else:
+                    data[args[1]] = value
+                    self.wfile.write('STORED\r\n')
+            elif command == 'incr':
+                if args[1] in data:
+                    data[args[1]] = str(int(data[args[1]]) + int(args[2]))
+                    self.wfile.write('%s\r\n' % data[args[1]])
+                else:
+                    self.wfile.write('NOT_FOUND\r\n')
+            elif command == 'delete':
+                self.wfile.write(
+                    'DELETED\r\n' if data.pop(args[1], None) is not None
+                    else 'NOT_FOUND\r\n')
+            else:
+                self.wfile.write('ERROR\r\n')
+
+
+class FakeMemcachedServer(socketserver.ThreadingMixIn,
+                          socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        socketserver.TCPServer.__init__(self, ('127.0.0.1', 0),
+                                        FakeMemcachedHandler)
+        self.data = {}
+
+
+class TestMemoryBackend(utils.BaseTestCase):
+    """Do a test of the LRU backend"""
+
+    def test_get_set_delete(self):
+        backend = cache.MemoryBackend()
+
+        self.assertIsNone(backend.get('key'))
+        backend.set('key', {'a': 1})
+        self.assertEqual({'a': 1}, backend.get('key'))
+        backend.delete('key')
+        self.assertIsNone(backend.get('key'))
+
+    def test_evict_least_recently_used(self):
+        backend = cache.MemoryBackend(max_size=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+
+        self.assertEqual(1, backend.get('a'))
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(3, backend.get('c'))
+
+    def test_ttl(self):
+        backend = cache.MemoryBackend()
+        now = time.time()
+        self.stubs.Set(time, 'time', lambda: now)
+        backend.set('key', 'value', ttl=1)
+        backend.set('forever', 'value')
+
+        self.stubs.Set(time, 'time', lambda: now + 2)
+        self.assertIsNone(backend.get('key'))
+        self.assertEqual('value', backend.get('forever'))
+
+    def test_add_and_incr(self):
+        backend = cache.MemoryBackend()
+
+        self.assertIsNone(backend.incr('counter'))
+        self.assertTrue(backend.add('counter', 1))
+        self.assertFalse(backend.add('counter', 5))
+        self.assertEqual(2, backend.incr('counter'))
+        self.assertEqual(2, backend.get('counter'))
+
+
+class TestCache(utils.BaseTestCase):
+    """Do a test of namespaces and invalidation"""
+
+    def setUp(self):
+        super(TestCache, self).setUp()
+        self.backend = cache.MemoryBackend()
+
+    def test_namespaces(self):
+        users = cache.Cache('users', self.backend)
+        projects = cache.Cache('projects', self.backend)
+        users.set('name', True)
+
+        self.assertTrue(users.get('name'))
+        self.assertIsNone(projects.get('name'))
+
+    def test_invalidate(self):
+        users = cache.Cache('users', self.backend)
+        projects = cache.Cache('projects', self.backend)
+        users.set('name', True)
+        projects.set('name', False)
+
+        # Another worker shares the backend.
+        cache.Cache('users', self.backend).invalidate()
+
+        self.assertIsNone(users.get('name'))
+        self.assertFalse(projects.get('name'))
+
+    def test_invalidate_lost_generation(self):
+        users = cache.Cache('users', self.backend)
+        users.set('name', True)
+        self.backend.delete(users._generation_key())
+
+        users.invalidate()
+
+        self.assertIsNone(users.get('name'))
+
+    def test_get_or_create(self):
+        users = cache.Cache('users', self.backend)
+        calls = []
+
+        def creator():
+            calls.append(1)
+            return 'value'
+
+        self.assertEqual('value', users.get_or_create('key', creator))
+        self.assertEqual('value', users.get_or_create('key', creator))
+        self.assertEqual(1, len(calls))
+
+    def test_get_or_create_reads_generation_once(self):
+        users = cache.Cache('users', self.backend)
+        users.set('other', 1)
+        backend_get = self.backend.get
+        keys = []
+
+        def fake_get(key):
+            keys.append(key)
+            return backend_get(key)
+
+        self.stubs.Set(self.backend, 'get', fake_get)
+        users.get_or_create('key', lambda: 'value')
+
+        self.assertEqual(1, keys.count(users._generation_key()))
+
+    def test_long_and_unsafe_keys(self):
+        users = cache.Cache('users', self.backend)
+        long_key = 'x' * 300
+        unsafe_key = u'name with spaces \u3042'
+        users.set(long_key, 1)
+        users.set(unsafe_key, 2)
+
+        self.assertEqual(1, users.get(long_key))
+        self.assertEqual(2, users.get(unsafe_key))
+        for key in self.backend._entries:
+            self.assertTrue(len(key) <= cache.KEY_MAX_LENGTH)
+            self.assertTrue(cache._SAFE_KEY.match(key))
+
+    def test_backend_by_config(self):
+        cache.reset_backend()
+        self.addCleanup(cache.reset_backend)
+        self.config(backend='memcached', memcache_servers=['host:11211'],
+                    group='cache')
+
+        backend = cache.get_backend()
+
+        self.assertIsInstance(backend, cache.MemcachedBackend)
+        self.assertEqual([('host', 11211)], backend.servers)
+        self.assertIs(backend, cache.get_backend())
+
+
+class TestMemcachedBackend(utils.BaseTestCase):
+    """Do a test of the memcached backend against a local stand-in"""
+
+    def setUp(self):
+        super(TestMemcachedBackend, self).setUp()
+        self.server = FakeMemcachedServer()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.backend = cache.MemcachedBackend(
+            ['127.0.0.1:%d' % self.server.server_address[1]],
+            socket_timeout=1.0)
+
+    def test_get_set_delete(self):
+        self.assertIsNone(self.backend.get('key'))
+        self.backend.set('key', {'a': [1, 2]})
+        self.assertEqual({'a': [1, 2]}, self.backend.get('key'))
+        self.backend.delete('key')
+        self.assertIsNone(self.backend.get('key'))
+
+    def test_add_and_incr(self):
+        self.assertIsNone(self.backend.incr('counter'))
+        self.assertTrue(self.backend.add('counter', 1))
+        self.assertFalse(self.backend.add('counter', 5))
+        self.assertEqual(2, self.backend.incr('counter'))
+
+    def test_shared_by_workers(self):
+        other = cache.MemcachedBackend(
+            ['127.0.0.1:%d' % self.server.server_address[1]])
+        users = cache.Cache('users', self.backend)
+        users.set('name', True, ttl=60)
+
+        self.assertTrue(cache.Cache('users', other).get('name'))
+
+        cache.Cache('users', other).invalidate()
+
+        self.assertIsNone(users.get('name'))
+
+    def test_server_unavailable(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        backend = cache.MemcachedBackend(['127.0.0.1:%d' % port],
+                                         socket_timeout=0.1)
+        users = cache.Cache('users', backend)
+
+        users.set('name', True)
+        self.assertIsNone(users.get('name'))
+        users.invalidate()
+
+    def test_server_dead_retry(self):
+        sock = socket.socket()
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        backend = cache.MemcachedBackend(['127.0.0.1:%d' % port],
+                                         socket_timeout=0.1, dead_retry=30)
+        users = cache.Cache('users', backend)
+        create_connection = socket.create_connection
+        calls = []
+
+        def fake_create_connection(*args):
+            calls.append(args)
+            return create_connection(*args)
+
+        self.stubs.Set(socket, 'create_connection', fake_create_connection)
+        now = time.time()
+        self.stubs.Set(time, 'time', lambda: now)
+
+        # Only the first call waits for the server.
+        users.set('name', True)
+        self.assertIsNone(users.get('name'))
+        users.invalidate()
+        self.assertEqual(1, len(calls))
+
+        # The server is tried again after dead_retry.
+        self.stubs.Set(time, 'time', lambda: now + 31)
+        self.assertIsNone(users.get('name'))
+        self.assertEqual(2, len(calls))
+
+    def test_server_recovered(self):
+        self.backend._dead_until[self.backend.servers[0]] = time.time() - 1
+
+        self.backend.set('key', 1)
+        self.assertEqual(1, self.backend.get('key'))
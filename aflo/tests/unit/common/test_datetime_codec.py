@@ -0,0 +1,119 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import datetime
+
+from aflo.common import datetime_codec
+from aflo.common import utils
+from aflo.tests import utils as test_utils
+
+FORMATS = ['%Y-%m-%dT%H:%M:%S.%f',
+           '%Y-%m-%dT%H:%M:%S',
+           '%Y-%m-%dT%H:%M',
+           '%Y-%m-%d',
+           '%Y-%m']
+
+VALUES = ['2016-06-27T12:34:56.123456',
+          '2016-06-27T12:34:56.5',
+          '2016-06-27t12:34:56.000000',
+          '2016-06-27T12:34:56',
+          '2016-06-27T12:34',
+          '2016-6-7T1:2:3',
+          '2016-06-27',
+          '2016-06',
+          '2016-02-30T00:00:00.000000',
+          '2016-13-01',
+          '2016-06-27T24:00:00',
+          '2016-06-27T12:34:56.1234567',
+          '2016-06-27T12:34:56Z',
+          '2016-06-27 12:34:56',
+          '2016-06-27T12:34:56\n',
+          '16-06-27',
+          'abc',
+          '']
+
+
+class TestDatetimeCodec(test_utils.BaseTestCase):
+    """Test routines in aflo.common.datetime_codec"""
+
+    def setUp(self):
+        super(TestDatetimeCodec, self).setUp()
+        datetime_codec._cache.clear()
+
+    def _strptime(self, value, fmt):
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            return ValueError
+
+    def _codec_strptime(self, value, fmt):
+        try:
+            return datetime_codec.strptime(value, fmt)
+        except ValueError:
+            return ValueError
+
+    def test_strptime_same_as_datetime(self):
+        for value in VALUES:
+            for fmt in FORMATS:
+                # Twice, for the memoized value.
+                for i in range(2):
+                    self.assertEqual(self._strptime(value, fmt),
+                                     self._codec_strptime(value, fmt),
+                                     (value, fmt))
+
+    def test_strptime_default_format(self):
+        self.assertEqual(datetime.datetime(2016, 6, 27, 12, 34, 56, 500000),
+                         datetime_codec.strptime('2016-06-27T12:34:56.5'))
+        self.assertRaises(ValueError,
+                          datetime_codec.strptime, '2016-06-27T12:34:56')
+
+    def test_strptime_not_string(self):
+        self.assertRaises(TypeError, datetime_codec.strptime, None)
+        self.assertRaises(TypeError, datetime_codec.strptime, 20160627)
+
+    def test_strptime_other_format(self):
+        self.assertEqual(datetime.datetime(2016, 6, 27),
+                         datetime_codec.strptime('27/06/2016', '%d/%m/%Y'))
+
+    def test_parse(self):
+        self.assertEqual(
+            datetime.datetime(2016, 6, 27, 12, 34),
+            datetime_codec.parse('2016-06-27T12:34',
+                                 utils.SUPPORTED_DATETIME_FORMAT))
+        self.assertIsNone(datetime_codec.parse(
+            '2016-06-27', utils.SUPPORTED_DATETIME_FORMAT))
+        self.assertIsNone(datetime_codec.parse(
+            None, utils.SUPPORTED_DATETIME_FORMAT))
+
+    def test_cache_is_bounded(self):
+        self.stubs.Set(datetime_codec, 'CACHE_SIZE', 2)
+        for day in range(1, 6):
+            datetime_codec.strptime('2016-06-%02d' % day, '%Y-%m-%d')
+            self.assertTrue(len(datetime_codec._cache) <= 2)
+
+    def test_strftime(self):
+        value = datetime.datetime(2016, 6, 7, 1, 2, 3, 4500)
+        for fmt in FORMATS + ['%Y-%m-%d %H:%M:%S', '%d/%m/%Y']:
+            self.assertEqual(value.strftime(fmt),
+                             datetime_codec.strftime(value, fmt))
+        self.assertEqual('2016-06-07T01:02:03.004500',
+                         datetime_codec.strftime(value))
+
+    def test_strftime_date(self):
+        self.assertEqual('2016-06-07',
+                         datetime_codec.strftime(datetime.date(2016, 6, 7),
+                                                 '%Y-%m-%d'))
+
+    def test_strftime_before_1900(self):
+        self.assertEqual('0999-01-02T00:00:00.000000',
+                         datetime_codec.strftime(
+                             datetime.datetime(999, 1, 2)))
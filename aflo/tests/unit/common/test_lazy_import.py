@@ -0,0 +1,44 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import json
+
+import mock
+from oslo_utils import importutils
+
+from aflo.common import lazy_import
+from aflo.tests import utils as test_utils
+
+
+class TestLazyModule(test_utils.BaseTestCase):
+    """Test routines in aflo.common.lazy_import"""
+
+    def test_imported_on_first_use(self):
+        with mock.patch.object(importutils, 'import_module',
+                               return_value=json) as import_module:
+            module = lazy_import.LazyModule('json')
+            self.assertFalse(import_module.called)
+
+            self.assertEqual('[]', module.dumps([]))
+            self.assertIs(json.loads, module.loads)
+
+        import_module.assert_called_once_with('json')
+
+    def test_missing_attribute(self):
+        module = lazy_import.LazyModule('json')
+
+        self.assertRaises(AttributeError, getattr, module, 'missing')
+
+    def test_missing_module(self):
+        module = lazy_import.LazyModule('aflo.missing_module')
+
+        self.assertRaises(ImportError, getattr, module, 'Client')
@@ -0,0 +1,123 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import os
+
+import fixtures
+import mock
+import osprofiler.profiler
+
+from aflo.common import metrics
+from aflo.tests import utils as test_utils
+
+
+class TestMetrics(test_utils.BaseTestCase):
+    """Test routines in aflo.common.metrics"""
+
+    def setUp(self):
+        super(TestMetrics, self).setUp()
+        metrics.REGISTRY.reset()
+        self.addCleanup(metrics.REGISTRY.reset)
+
+    def _entries(self):
+        return dict(((entry['name'], tuple(sorted(entry['tags'].items()))),
+                     entry) for entry in metrics.REGISTRY.snapshot())
+
+    def test_span(self):
+        for i in range(2):
+            with metrics.span('broker.before', handler='FakeBroker'):
+                pass
+        with metrics.span('broker.before', handler='OtherBroker'):
+            pass
+
+        entries = self._entries()
+        self.assertEqual(2, len(entries))
+        entry = entries[('broker.before', (('handler', 'FakeBroker'),))]
+        self.assertEqual(2, entry['count'])
+        self.assertEqual(0, entry['errors'])
+        self.assertTrue(entry['total'] >= entry['max'] >= 0)
+
+    def test_span_error(self):
+        def fail():
+            with metrics.span('broker.after', handler='FakeBroker'):
+                raise ValueError()
+        self.assertRaises(ValueError, fail)
+
+        entry = self._entries()[('broker.after',
+                                 (('handler', 'FakeBroker'),))]
+        self.assertEqual(1, entry['count'])
+        self.assertEqual(1, entry['errors'])
+
+    def test_flush_and_load(self):
+        output_dir = self.useFixture(fixtures.TempDir()).path
+        self.config(output_dir=output_dir, group='metrics')
+
+        for pid in (100, 101):
+            with metrics.span('broker.before', handler='FakeBroker'):
+                pass
+            with mock.patch.object(os, 'getpid', return_value=pid):
+                metrics.flush()
+
+        entries = metrics.load(output_dir)
+        self.assertEqual(1, len(entries))
+        self.assertEqual('broker.before', entries[0]['name'])
+        self.assertEqual({'handler': 'FakeBroker'}, entries[0]['tags'])
+        # The first process wrote 1 span, and the second one 2 spans.
+        self.assertEqual(3, entries[0]['count'])
+
+    def test_flush_interval(self):
+        output_dir = self.useFixture(fixtures.TempDir()).path
+        self.config(output_dir=output_dir, flush_interval=0,
+                    group='metrics')
+
+        with metrics.span('broker.before', handler='FakeBroker'):
+            pass
+
+        self.assertEqual(['metrics.%d.json' % os.getpid()],
+                         os.listdir(output_dir))
+
+    def test_notification(self):
+        self.config(notifications=True, group='metrics')
+        notifier = mock.Mock()
+        self.stubs.Set(metrics, '_notifier', notifier)
+
+        with metrics.span('broker.before', handler='FakeBroker'):
+            pass
+
+        name, payload = notifier.info.call_args[0]
+        self.assertEqual('broker.before', name)
+        self.assertEqual('FakeBroker', payload['handler'])
+        self.assertEqual(metrics.RESULT_SUCCESS, payload['result'])
+        self.assertIn('elapsed', payload)
+
+    def test_notification_disabled(self):
+        self.config(notifications=True, group='metrics')
+        self.config(disabled_notifications=['broker'])
+        notifier = mock.Mock()
+        self.stubs.Set(metrics, '_notifier', notifier)
+
+        with metrics.span('broker.before', handler='FakeBroker'):
+            pass
+
+        self.assertFalse(notifier.info.called)
+
+    def test_profiler(self):
+        self.config(enabled=True, group='profiler')
+        with mock.patch.object(osprofiler.profiler, 'start') as start, \
+                mock.patch.object(osprofiler.profiler, 'stop') as stop:
+            with metrics.span('broker.before', handler='FakeBroker'):
+                pass
+
+        start.assert_called_once_with('broker.before',
+                                      info={'handler': 'FakeBroker'})
+        stop.assert_called_once_with(
+            info={'result': metrics.RESULT_SUCCESS})
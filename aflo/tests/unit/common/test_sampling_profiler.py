@@ -0,0 +1,99 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import os
+import time
+
+from aflo.common import sampling_profiler
+from aflo.tests import utils as test_utils
+
+
+def busy(seconds=0.05):
+    """Use CPU time, which the profiler samples."""
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class TestSampler(test_utils.BaseTestCase):
+    """Test routines in aflo.common.sampling_profiler"""
+
+    def setUp(self):
+        super(TestSampler, self).setUp()
+        self.config(interval=0.001, output_dir=self.test_dir,
+                    group='sampling_profiler')
+        self.sampler = sampling_profiler.Sampler()
+        self.stubs.Set(sampling_profiler, 'SAMPLER', self.sampler)
+
+    def _read(self, key):
+        path = os.path.join(self.test_dir, '%s.%d.folded' % (key,
+                                                             os.getpid()))
+        with open(path) as f:
+            return f.read().splitlines()
+
+    def test_sample(self):
+        self.assertTrue(self.sampler.begin())
+        self.assertTrue(self.sampler.active())
+        busy()
+        self.sampler.end('Controller.index', flush=True)
+
+        self.assertFalse(self.sampler.active())
+        lines = self._read('Controller.index')
+        self.assertTrue(lines)
+        stacks = [line.rsplit(' ', 1)[0] for line in lines]
+        self.assertTrue(any('busy (' in stack for stack in stacks))
+        for line in lines:
+            self.assertTrue(int(line.rsplit(' ', 1)[1]) > 0)
+
+    def test_not_flushed_in_interval(self):
+        self.config(flush_interval=60, group='sampling_profiler')
+        self.sampler.begin()
+        busy()
+        self.sampler.end('Controller.index')
+
+        self.assertFalse([name for name in os.listdir(self.test_dir)
+                          if name.endswith('.folded')])
+
+    def test_key_sanitized(self):
+        self.sampler.begin()
+        busy()
+        self.sampler.end('GET /v1/tickets', flush=True)
+
+        self.assertTrue(self._read('GET_v1_tickets'))
+
+    def test_not_sampled_after_end(self):
+        self.sampler.begin()
+        self.sampler.end('Controller.index')
+        busy()
+
+        self.assertEqual(0, sum(self.sampler._totals['Controller.index']
+                                .values()))
+
+    def test_profiled(self):
+        self.config(enabled=True, group='sampling_profiler')
+        self.config(flush_interval=0, group='sampling_profiler')
+
+        @sampling_profiler.profiled
+        def tickets_update():
+            self.assertTrue(self.sampler.active())
+            busy()
+            return 'updated'
+
+        self.assertEqual('updated', tickets_update())
+        self.assertTrue(self._read('rpc.tickets_update'))
+
+    def test_profiled_disabled(self):
+        @sampling_profiler.profiled
+        def tickets_update():
+            self.assertFalse(self.sampler.active())
+
+        tickets_update()
@@ -0,0 +1,71 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import mock
+import webob
+import webob.dec
+
+from aflo.api.middleware import access_log
+from aflo.db.sqlalchemy import api as db_api
+from aflo.tests.unit import base
+
+
+class TestAccessLogMiddleware(base.WorkflowUnitTest):
+    """Do a test of counting SQL statements of a request"""
+
+    def _build_middleware(self, times):
+        @webob.dec.wsgify
+        def app(req):
+            for i in range(times):
+                db_api.workflow_patterns_list(self.context)
+            return webob.Response()
+        return access_log.AccessLogFilter(app)
+
+    def test_count_statements(self):
+        self.config(debug=True)
+        res = webob.Request.blank('/').get_response(
+            self._build_middleware(2))
+
+        self.assertEqual(200, res.status_int)
+        self.assertTrue(int(res.headers['X-DB-Statements']) >= 2)
+        self.assertIn('X-DB-Time', res.headers)
+        self.assertIsNone(db_api.statement_stats_current())
+
+    def test_no_headers_without_debug(self):
+        res = webob.Request.blank('/').get_response(
+            self._build_middleware(1))
+
+        self.assertNotIn('X-DB-Statements', res.headers)
+        self.assertNotIn('X-DB-Time', res.headers)
+
+    def test_warn_repeated_statements(self):
+        self.config(db_statement_repeat_warning=3)
+        with mock.patch.object(db_api.LOG, 'warn') as warn:
+            webob.Request.blank('/').get_response(self._build_middleware(3))
+
+        self.assertEqual(1, warn.call_count)
+        self.assertEqual(3, warn.call_args[0][1]['times'])
+        self.assertEqual('GET /', warn.call_args[0][1]['name'])
+
+    def test_no_warning_under_threshold(self):
+        self.config(db_statement_repeat_warning=3)
+        with mock.patch.object(db_api.LOG, 'warn') as warn:
+            webob.Request.blank('/').get_response(self._build_middleware(2))
+
+        self.assertFalse(warn.called)
+
+    def test_warning_disabled(self):
+        self.config(db_statement_repeat_warning=0)
+        with mock.patch.object(db_api.LOG, 'warn') as warn:
+            webob.Request.blank('/').get_response(self._build_middleware(5))
+
+        self.assertFalse(warn.called)
@@ -39,16 +39,19 @@ class TestContext(base.IsolatedUnitTest):
                                               user=user,
                                               tenant=tenant,
                                               user_name=user_name,
-                                              tenant_name=tenant_name)
+                                              tenant_name=tenant_name,
+                                              read_primary=True)
 
         ctx_dict = context.to_dict()
         self.assertEqual(user, ctx_dict['user'])
         self.assertEqual(tenant, ctx_dict['tenant'])
         self.assertEqual(user_name, ctx_dict['user_name'])
         self.assertEqual(tenant_name, ctx_dict['tenant_name'])
+        self.assertTrue(ctx_dict['read_primary'])
 
         ctx_cls = aflo.context.RequestContext.from_dict(ctx_dict)
         self.assertEqual(user, ctx_cls.user)
         self.assertEqual(tenant, ctx_cls.tenant)
         self.assertEqual(user_name, ctx_cls.user_name)
         self.assertEqual(tenant_name, ctx_cls.tenant_name)
+        self.assertTrue(ctx_cls.read_primary)
@@ -47,6 +47,16 @@ class TestContextMiddleware(base.IsolatedUnitTest):
         self.assertEqual('user1_name', req.context.user_name)
         self.assertEqual('tenant1_name', req.context.tenant_name)
 
+    def test_read_primary_header(self):
+        req = self._build_request()
+        self._build_middleware().process_request(req)
+        self.assertFalse(req.context.read_primary)
+
+        req = self._build_request()
+        req.headers['x-read-primary'] = 'true'
+        self._build_middleware().process_request(req)
+        self.assertTrue(req.context.read_primary)
+
     def test_is_admin_flag(self):
         # is_admin check should look for 'admin' role by default
         req = self._build_request(roles=['admin', 'role2'])
@@ -10,12 +10,16 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import os
+
 import fixtures
 import mock
 from oslo_db.sqlalchemy import migration
+import six
 import testtools
 
 from aflo.cmd import manage
+from aflo.common import metrics
 from aflo.db import migration as db_migration
 from aflo.db.sqlalchemy import api as db_api
 
@@ -149,3 +153,78 @@ class TestManage(TestManageBase):
                                migration.db_sync,
                                db_api.get_engine(),
                                db_migration.MIGRATE_REPO_PATH, '20')
+
+    @mock.patch.object(db_api, 'tickets_archive',
+                       return_value={'deleted': 0, 'closed': 0})
+    def test_db_archive(self, tickets_archive):
+        self._main_test_helper(['aflo.cmd.manage', 'db', 'archive',
+                                '--days', '30', '--batch-size', '10'],
+                               db_api.tickets_archive,
+                               mock.ANY, mock.ANY, 10)
+
+    @mock.patch.object(db_api, 'workflows_compact', return_value=0)
+    def test_db_compact_workflows(self, workflows_compact):
+        manage.CONF.set_override('workflow_storage', 'sparse')
+        self._main_test_helper(['aflo.cmd.manage', 'db', 'compact_workflows',
+                                '--batch-size', '10'],
+                               db_api.workflows_compact,
+                               mock.ANY, 10)
+
+    @mock.patch.object(db_api, 'workflows_compact', return_value=0)
+    def test_db_compact_workflows_full_storage(self, workflows_compact):
+        self.useFixture(fixtures.MonkeyPatch(
+            'sys.argv', ['aflo.cmd.manage', 'db', 'compact_workflows']))
+        self.useFixture(fixtures.MonkeyPatch('oslo_log.setup',
+                                             lambda *args, **kwargs: None))
+
+        self.assertRaises(SystemExit, manage.main)
+        self.assertFalse(workflows_compact.called)
+
+    @mock.patch.object(db_api, 'catalog_records_upsert')
+    def test_catalog_import_csv_ragged_row(self, catalog_records_upsert):
+        path = os.path.join(self.useFixture(fixtures.TempDir()).path,
+                            'price.csv')
+        with open(path, 'w') as f:
+            f.write('catalog_id,scope,seq_no,price\n'
+                    'catalog0,Default,1\n')
+        self.useFixture(fixtures.MonkeyPatch(
+            'sys.argv', ['aflo.cmd.manage', 'catalog', 'import',
+                         '--file', path, '--format', 'csv',
+                         '--type', 'price']))
+        self.useFixture(fixtures.MonkeyPatch('oslo_log.setup',
+                                             lambda *args, **kwargs: None))
+
+        e = self.assertRaises(SystemExit, manage.main)
+        self.assertIn('line 2', six.text_type(e.code))
+        self.assertFalse(catalog_records_upsert.called)
+
+    @mock.patch.object(db_api, 'shadow_purge', return_value=0)
+    def test_db_purge(self, shadow_purge):
+        self._main_test_helper(['aflo.cmd.manage', 'db', 'purge'],
+                               db_api.shadow_purge,
+                               mock.ANY, mock.ANY, 1000)
+
+    @mock.patch.object(metrics, 'load', return_value=[])
+    def test_metrics_show(self, load):
+        output_dir = self.useFixture(fixtures.TempDir()).path
+        manage.CONF.set_override('output_dir', output_dir, group='metrics')
+        self._main_test_helper(['aflo.cmd.manage', 'metrics', 'show'],
+                               metrics.load, output_dir)
+
+    @mock.patch.object(metrics, 'load', return_value=[])
+    def test_metrics_show_without_output_dir(self, load):
+        self.useFixture(fixtures.MonkeyPatch(
+            'sys.argv', ['aflo.cmd.manage', 'metrics', 'show']))
+        self.useFixture(fixtures.MonkeyPatch('oslo_log.setup',
+                                             lambda *args, **kwargs: None))
+
+        self.assertRaises(SystemExit, manage.main)
+        self.assertFalse(load.called)
+
+    @mock.patch.object(db_api, 'ticket_template_grant_roles_rebuild_all',
+                       return_value=0)
+    def test_tickettemplate_rebuild_grant_roles(self, rebuild_all):
+        self._main_test_helper(['aflo.cmd.manage', 'tickettemplate',
+                                'rebuild_grant_roles'],
+                               db_api.ticket_template_grant_roles_rebuild_all,
+                               mock.ANY)
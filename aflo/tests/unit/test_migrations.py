@@ -24,11 +24,15 @@ from __future__ import print_function
 from oslo_config import cfg
 from oslo_db.sqlalchemy import test_base
 from oslo_db.sqlalchemy import test_migrations
+from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 # NOTE(jokke): simplified transition to py3, behaves like py2 xrange
 import sqlalchemy
 
 from aflo.db import migration
+from aflo.db.sqlalchemy import api as db_api
 from aflo.db.sqlalchemy import models
+from aflo.tests.unit.v1.tickettemplates import utils as tickettemplate_utils
 
 from aflo import i18n
 
@@ -76,7 +80,36 @@ class TestPostgresqlMigrations(test_base.PostgreSQLOpportunisticTestCase):
 
 
 class TestSqliteMigrations(test_base.DbTestCase):
-    pass
+
+    def test_upgrade_013_fill_grant_roles(self):
+        migration.db_sync(version='12', engine=self.engine)
+        meta = sqlalchemy.MetaData(bind=self.engine)
+        workflow_pattern = sqlalchemy.Table('workflow_pattern', meta,
+                                            autoload=True)
+        ticket_template = sqlalchemy.Table('ticket_template', meta,
+                                           autoload=True)
+        contents = tickettemplate_utils.get_dict_contents(
+            tickettemplate_utils.WORKFLOW_PATTERN_DIR,
+            'workflow_pattern_contents')
+        now = timeutils.utcnow()
+        workflow_pattern.insert().execute(
+            id='wf', code='wf', created_at=now, deleted=False,
+            wf_pattern_contents=jsonutils.dumps(contents))
+        ticket_template.insert().execute(
+            id='tt', ticket_type='test', workflow_pattern_id='wf',
+            created_at=now, deleted=False, template_contents='{}')
+
+        migration.db_sync(version='13', engine=self.engine)
+
+        grant_role = sqlalchemy.Table('ticket_template_grant_role', meta,
+                                      autoload=True)
+        rows = grant_role.select().execute().fetchall()
+        self.assertTrue(rows)
+        self.assertEqual(
+            sorted(set(db_api.workflow_pattern_grant_roles(contents))),
+            sorted(row.role for row in rows))
+        self.assertEqual(set(['tt']),
+                         set(row.ticket_template_id for row in rows))
 
 
 class ModelsMigrationSyncMixin(object):
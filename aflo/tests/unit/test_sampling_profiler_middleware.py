@@ -0,0 +1,86 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import webob
+import webob.dec
+
+from aflo.api.middleware import sampling_profiler as middleware
+from aflo.common import sampling_profiler
+from aflo.tests.unit import base
+from aflo.tests.unit import utils as unit_test_utils
+
+
+class FakeController(object):
+    pass
+
+
+class FakeResource(object):
+    controller = FakeController()
+
+
+class TestSamplingProfilerMiddleware(base.WorkflowUnitTest):
+    """Do a test of profiling requests by sampling stacks"""
+
+    def setUp(self):
+        super(TestSamplingProfilerMiddleware, self).setUp()
+        self.config(interval=0.001, flush_interval=60,
+                    group='sampling_profiler')
+        self.sampler = sampling_profiler.Sampler()
+        self.stubs.Set(sampling_profiler, 'SAMPLER', self.sampler)
+        self.profiled = []
+
+        @webob.dec.wsgify
+        def app(req):
+            self.profiled.append(self.sampler.active())
+            req.environ['wsgiorg.routing_args'] = (
+                (), {'controller': FakeResource(), 'action': 'index'})
+            return webob.Response()
+        self.middleware = middleware.SamplingProfilerFilter(app)
+
+    def _request(self, is_admin, header=None):
+        req = unit_test_utils.get_fake_request(method='GET',
+                                               is_admin=is_admin)
+        if header is not None:
+            req.headers[middleware.PROFILE_HEADER] = header
+        return req.get_response(self.middleware)
+
+    def test_not_profiled(self):
+        self._request(is_admin=True)
+
+        self.assertEqual([False], self.profiled)
+        self.assertFalse(self.sampler._totals)
+
+    def test_profiled_by_admin_header(self):
+        self.stubs.Set(self.sampler, 'flush', lambda: None)
+        res = self._request(is_admin=True, header='true')
+
+        self.assertEqual(200, res.status_int)
+        self.assertEqual([True], self.profiled)
+        self.assertEqual(['FakeController.index'],
+                         list(self.sampler._totals))
+        self.assertFalse(self.sampler.active())
+
+    def test_header_ignored_for_member(self):
+        self._request(is_admin=False, header='true')
+
+        self.assertEqual([False], self.profiled)
+
+    def test_profiled_by_config(self):
+        self.config(enabled=True, group='sampling_profiler')
+        self._request(is_admin=False)
+
+        self.assertEqual([True], self.profiled)
+
+    def test_route_without_routing_args(self):
+        req = webob.Request.blank('/v1/tickets')
+
+        self.assertEqual('GET /v1/tickets', middleware._route(req))
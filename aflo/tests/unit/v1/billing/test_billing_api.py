@@ -0,0 +1,221 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import datetime
+import uuid
+
+from oslo_serialization import jsonutils
+
+from aflo.billing import rating
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+import aflo.tests.unit.utils as unit_test_utils
+from aflo.tests.unit.v1.price import utils as price_utils
+
+CT_UUID1 = 'ea0a4146-fd07-414b-aa5e-dedbeef00001'
+CT_UUID2 = 'ea0a4146-fd07-414b-aa5e-dedbeef00002'
+
+TENANT1 = 'tenant1'
+TENANT2 = 'tenant2'
+
+LIFETIME_END = datetime.datetime(9999, 12, 31, 23, 59, 59, 999999)
+
+
+class TestBillingAPI(base.WorkflowUnitTest):
+    """Do a test of 'Aggregate charges of contracts'"""
+
+    def create_fixtures(self):
+        super(TestBillingAPI, self).create_fixtures()
+
+        # Catalog 1 has a price of tenant1 which overrides the default.
+        self._create_price(CT_UUID1, 'Default', 1, 310,
+                           datetime.datetime(2015, 1, 1), LIFETIME_END)
+        self._create_price(CT_UUID1, TENANT1, 2, 62,
+                           datetime.datetime(2015, 1, 1), LIFETIME_END)
+        # The price of catalog 2 changes on 2016-01-11.
+        self._create_price(CT_UUID2, 'Default', 1, 310,
+                           datetime.datetime(2015, 1, 1),
+                           datetime.datetime(2016, 1, 11))
+        self._create_price(CT_UUID2, 'Default', 2, 620,
+                           datetime.datetime(2016, 1, 11), LIFETIME_END)
+
+        self._create_contract(TENANT1, CT_UUID1, 1,
+                              datetime.datetime(2015, 6, 1))
+        self._create_contract(TENANT2, CT_UUID1, 2,
+                              datetime.datetime(2015, 6, 1))
+        self._create_contract(TENANT2, CT_UUID1, 1,
+                              datetime.datetime(2016, 1, 21))
+        self._create_contract(TENANT2, CT_UUID2, 1,
+                              datetime.datetime(2015, 6, 1))
+        # Contracts which are not charged.
+        self._create_contract(TENANT2, CT_UUID2, 1,
+                              datetime.datetime(2015, 6, 1),
+                              datetime.datetime(2016, 1, 1))
+        self._create_contract(TENANT2, CT_UUID2, 1,
+                              datetime.datetime(2015, 6, 1),
+                              deleted=True)
+
+        db_api.price_timeline_rebuild_all(self.context)
+
+    def _create_price(self, catalog_id, scope, seq_no, price,
+                      lifetime_start, lifetime_end):
+        price_utils.create_testdata(db_models, catalog_id, scope, seq_no,
+                                    price, lifetime_start, lifetime_end,
+                                    datetime.datetime(2015, 1, 1), seq_no)
+
+    def _create_contract(self, project_id, catalog_id, num,
+                         lifetime_start, lifetime_end=LIFETIME_END,
+                         deleted=False):
+        db_models.Contract(contract_id=str(uuid.uuid4()),
+                           region_id='region1',
+                           project_id=project_id,
+                           catalog_id=catalog_id,
+                           num=num,
+                           lifetime_start=lifetime_start,
+                           lifetime_end=lifetime_end,
+                           deleted=deleted).save()
+
+    def _get_request(self, path, method='GET', role='admin',
+                     tenant=TENANT1):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        req.headers['x-auth-token'] = 'user:%s:%s' % (tenant, role)
+        return req
+
+    def _aggregate(self, billing):
+        req = self._get_request('/billing/summary', method='POST')
+        req.body = jsonutils.dumps({'billing': billing})
+        return req.get_response(self.api)
+
+    def _amounts(self, rows):
+        return sorted((row['project_id'], row['catalog_id'],
+                       row['contract_count'], float(row['amount']))
+                      for row in rows)
+
+    def test_aggregate_month(self):
+        res = self._aggregate({'month': '2016-01'})
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual([(TENANT1, CT_UUID1, 1, 62.0),
+                          (TENANT2, CT_UUID1, 2, 730.0),
+                          (TENANT2, CT_UUID2, 1, 520.0)],
+                         self._amounts(
+                             jsonutils.loads(res.body)['billing_summary']))
+
+    def test_aggregate_replace(self):
+        self._aggregate({'month': '2016-01'})
+        self._create_contract(TENANT1, CT_UUID2, 1,
+                              datetime.datetime(2015, 6, 1))
+        self._aggregate({'month': '2016-01'})
+
+        rows = db_api.billing_summary_list(self.context)
+        self.assertEqual([(TENANT1, CT_UUID1, 1, 62.0),
+                          (TENANT1, CT_UUID2, 1, 520.0),
+                          (TENANT2, CT_UUID1, 2, 730.0),
+                          (TENANT2, CT_UUID2, 1, 520.0)],
+                         self._amounts(rows))
+
+    def test_aggregate_batch(self):
+        self.config(batch_size=1, group='billing')
+        calls = []
+        org_prices = db_api.billing_prices
+
+        def fake_billing_prices(ctxt, catalog_ids, *args):
+            calls.append(catalog_ids)
+            return org_prices(ctxt, catalog_ids, *args)
+
+        self.stubs.Set(db_api, 'billing_prices', fake_billing_prices)
+
+        res = self._aggregate({'period_start': '2016-01-01T00:00:00.000000',
+                               'period_end': '2016-02-01T00:00:00.000000'})
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual([[CT_UUID1], [CT_UUID2]], calls)
+        self.assertEqual(3, len(db_api.billing_summary_list(self.context)))
+
+    def test_aggregate_invalid_period(self):
+        for billing in ({'month': '2016-13'},
+                        {'period_start': '2016-01-01T00:00:00.000000'},
+                        {'period_start': '2016-02-01T00:00:00.000000',
+                         'period_end': '2016-01-01T00:00:00.000000'}):
+            self.assertEqual(400, self._aggregate(billing).status_int)
+
+    def test_aggregate_not_admin(self):
+        req = self._get_request('/billing/summary', method='POST',
+                                role='__member__')
+        req.body = jsonutils.dumps({'billing': {'month': '2016-01'}})
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 403)
+
+    def test_list(self):
+        self._aggregate({'month': '2016-01'})
+
+        res = self._get_request('/billing/summary?month=2016-01&'
+                                'project_id=%s' % TENANT2).get_response(
+                                    self.api)
+
+        self.assertEqual(res.status_int, 200)
+        rows = jsonutils.loads(res.body)['billing_summary']
+        self.assertEqual([(TENANT2, CT_UUID1, 2, 730.0),
+                          (TENANT2, CT_UUID2, 1, 520.0)],
+                         self._amounts(rows))
+
+        res = self._get_request('/billing/summary?month=2016-02')\
+            .get_response(self.api)
+        self.assertEqual([], jsonutils.loads(res.body)['billing_summary'])
+
+    def test_list_not_admin(self):
+        self._aggregate({'month': '2016-01'})
+
+        res = self._get_request('/billing/summary?project_id=%s' % TENANT2,
+                                role='__member__').get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        rows = jsonutils.loads(res.body)['billing_summary']
+        self.assertEqual([(TENANT1, CT_UUID1, 1, 62.0)], self._amounts(rows))
+
+
+class TestRating(base.IsolatedUnitTest):
+    """Do a test of 'aflo.billing.rating'"""
+
+    def test_month_period(self):
+        self.assertEqual((datetime.datetime(2016, 12, 1),
+                          datetime.datetime(2017, 1, 1)),
+                         rating.month_period(datetime.datetime(2016, 12, 15)))
+
+    def test_effective_price_at_lifetime_end(self):
+        at = datetime.datetime(2016, 1, 11)
+        price_table = rating.PriceTable([
+            {'catalog_id': CT_UUID1, 'scope': 'Default', 'seq_no': 1,
+             'price': 310, 'lifetime_start': None, 'lifetime_end': at},
+            {'catalog_id': CT_UUID2, 'scope': 'Default', 'seq_no': 1,
+             'price': 310, 'lifetime_start': None, 'lifetime_end': at},
+            {'catalog_id': CT_UUID2, 'scope': 'Default', 'seq_no': 2,
+             'price': 620, 'lifetime_start': at, 'lifetime_end': None}])
+
+        self.assertEqual(310, price_table.effective_price(
+            CT_UUID1, TENANT1, at))
+        self.assertIsNone(price_table.effective_price(
+            CT_UUID1, TENANT1, at + rating.RESOLUTION))
+        self.assertEqual(620, price_table.effective_price(
+            CT_UUID2, TENANT1, at))
+
+    def test_rate_contract_without_price(self):
+        period_start, period_end = rating.month_period(
+            datetime.datetime(2016, 1, 1))
+        contract = {'project_id': TENANT1, 'catalog_id': CT_UUID1,
+                    'num': None, 'lifetime_start': None,
+                    'lifetime_end': None}
+
+        self.assertEqual(0, rating.rate_contract(
+            contract, rating.PriceTable([]), period_start, period_end))
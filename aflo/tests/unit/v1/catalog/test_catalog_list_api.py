@@ -13,6 +13,7 @@
 import datetime
 from oslo_config import cfg
 from oslo_serialization import jsonutils
+from oslo_utils import timeutils
 import routes
 
 from aflo.api.v1 import router
@@ -718,3 +719,64 @@ class TestCatalogIndexAPI(base.WorkflowUnitTest):
 
         # Examination of response
         self.assertEqual(res.status_int, 400)
+
+    def _get_index_request(self, path='/catalog', etag=None):
+        req = unit_test_utils.get_fake_request(method='GET', path=path)
+        req.headers['x-auth-token'] = 'user:tenant:admin'
+        if etag:
+            req.headers['If-None-Match'] = etag
+        return req
+
+    def test_index_api_not_modified(self):
+        """Test 'List Search of catalog'
+        Test a conditional request which is answered before the list query.
+        """
+        res = self._get_index_request().get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        etag = res.headers['ETag']
+
+        def fake_catalog_list(*args, **kwargs):
+            self.fail('catalog_list must not be called.')
+
+        self.stubs.Set(db_api, 'catalog_list', fake_catalog_list)
+
+        res = self._get_index_request(etag=etag).get_response(self.api)
+
+        self.assertEqual(res.status_int, 304)
+        self.assertEqual(etag, res.headers['ETag'])
+
+    def test_index_api_modified(self):
+        """Test 'List Search of catalog'
+        Test a conditional request after the catalog is changed.
+        """
+        res = self._get_index_request().get_response(self.api)
+        etag = res.headers['ETag']
+
+        # Other query params make other ETag.
+        res = self._get_index_request(path='/catalog?limit=1',
+                                      etag=etag).get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        self.assertNotEqual(etag, res.headers['ETag'])
+
+        db_api.catalog_delete(self.context, CT_UUID1)
+
+        res = self._get_index_request(etag=etag).get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        self.assertNotEqual(etag, res.headers['ETag'])
+        self.assertEqual(7, len(jsonutils.loads(res.body)['catalog']))
+
+    def test_index_api_modified_by_lifetime(self):
+        """Test 'List Search of catalog'
+        Test a conditional request after the lifetime of a catalog ends.
+        """
+        self.stubs.Set(timeutils, 'utcnow',
+                       lambda: datetime.datetime(2015, 12, 31, 9, 0, 0))
+        res = self._get_index_request().get_response(self.api)
+        etag = res.headers['ETag']
+
+        self.stubs.Set(timeutils, 'utcnow',
+                       lambda: datetime.datetime(2015, 12, 31, 11, 0, 0))
+        res = self._get_index_request(etag=etag).get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertNotEqual(etag, res.headers['ETag'])
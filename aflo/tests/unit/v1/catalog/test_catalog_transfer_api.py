@@ -0,0 +1,201 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import datetime
+import json
+
+from oslo_serialization import jsonutils
+
+from aflo.db.sqlalchemy import api as db_api
+from aflo.tests.unit import base
+import aflo.tests.unit.utils as unit_test_utils
+
+CT_UUID1 = 'ea0a4146-fd07-414b-aa5e-dedbeef00001'
+CT_UUID2 = 'ea0a4146-fd07-414b-aa5e-dedbeef00002'
+GOODS_UUID1 = 'ea0a4146-fd07-414b-aa5e-dedbeef02001'
+SCOPE_UUID1 = 'ea0a4146-fd07-414b-aa5e-dedbeef03001'
+
+RECORDS = [
+    {'type': 'goods', 'goods_id': GOODS_UUID1, 'region_id': 'region1',
+     'goods_name': 'goods1'},
+    {'type': 'catalog', 'catalog_id': CT_UUID1, 'region_id': 'region1',
+     'catalog_name': 'catalog1',
+     'lifetime_start': '2016-01-01T00:00:00.000000',
+     'lifetime_end': '9999-12-31T23:59:59.999999'},
+    {'type': 'catalog_contents', 'catalog_id': CT_UUID1, 'seq_no': '1',
+     'goods_id': GOODS_UUID1, 'goods_num': 2},
+    {'type': 'catalog_scope', 'id': SCOPE_UUID1, 'catalog_id': CT_UUID1,
+     'scope': 'Default',
+     'lifetime_start': '2016-01-01T00:00:00.000000',
+     'lifetime_end': '9999-12-31T23:59:59.999999'},
+    {'type': 'price', 'catalog_id': CT_UUID1, 'scope': 'Default',
+     'seq_no': '1', 'price': '100.5',
+     'lifetime_start': '2016-01-01T00:00:00.000000',
+     'lifetime_end': '9999-12-31T23:59:59.999999'},
+]
+
+
+class TestCatalogTransferAPI(base.WorkflowUnitTest):
+    """Do a test of 'Import and export catalogs'"""
+
+    def _get_request(self, path, method='GET', role='admin'):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        req.headers['x-auth-token'] = 'user:tenant:%s' % role
+        return req
+
+    def _import(self, body, query='', role='admin'):
+        req = self._get_request('/catalog/import%s' % query,
+                                method='POST', role=role)
+        req.body = body
+        return req.get_response(self.api)
+
+    def _jsonl(self, records):
+        return ''.join(json.dumps(record) + '\n' for record in records)
+
+    def test_import_jsonl(self):
+        res = self._import(self._jsonl(RECORDS))
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual({'created': 5, 'updated': 0, 'unchanged': 0},
+                         jsonutils.loads(res.body)['result'])
+
+        price = db_api.price_get(self.context, CT_UUID1, 'Default', '1')
+        self.assertEqual('100.500', price['price'])
+        self.assertEqual(2, db_api.catalog_contents_get(
+            self.context, CT_UUID1, '1')['goods_num'])
+
+        # The price timeline is made as well.
+        self.assertEqual('100.500', db_api.price_effective_get(
+            self.context, CT_UUID1, 'Default',
+            datetime.datetime(2016, 6, 1))['price'])
+
+    def test_import_idempotent(self):
+        self._import(self._jsonl(RECORDS))
+
+        records = [dict(record) for record in RECORDS]
+        records[4]['price'] = '200'
+        res = self._import(self._jsonl(records))
+
+        self.assertEqual({'created': 0, 'updated': 1, 'unchanged': 4},
+                         jsonutils.loads(res.body)['result'])
+        self.assertEqual('200.000', db_api.price_get(
+            self.context, CT_UUID1, 'Default', '1')['price'])
+
+    def test_import_chunked(self):
+        self.config(batch_size=2, group='catalog_transfer')
+        calls = []
+        org_upsert = db_api.catalog_records_upsert
+
+        def fake_upsert(ctxt, records, dry_run=False):
+            calls.append([model_name for model_name, rows in records])
+            return org_upsert(ctxt, records, dry_run)
+
+        self.stubs.Set(db_api, 'catalog_records_upsert', fake_upsert)
+
+        res = self._import(self._jsonl(RECORDS))
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual([['Goods', 'Catalog'],
+                          ['CatalogContents', 'CatalogScope'],
+                          ['Price']], calls)
+
+    def test_import_dry_run(self):
+        res = self._import(self._jsonl(RECORDS), '?dry_run=true')
+
+        self.assertEqual({'created': 5, 'updated': 0, 'unchanged': 0},
+                         jsonutils.loads(res.body)['result'])
+        self.assertEqual([], list(db_api.catalog_records_iter(
+            self.context, 'Price')))
+
+    def test_import_csv(self):
+        body = ('catalog_id,scope,seq_no,price,lifetime_start,lifetime_end\n'
+                '%s,Default,1,100,2016-01-01T00:00:00.000000,\n'
+                '%s,Default,1,300,,\n' % (CT_UUID1, CT_UUID2))
+        res = self._import(body, '?format=csv&type=price')
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual({'created': 2, 'updated': 0, 'unchanged': 0},
+                         jsonutils.loads(res.body)['result'])
+        price = db_api.price_get(self.context, CT_UUID2, 'Default', '1')
+        self.assertEqual('300.000', price['price'])
+        self.assertIsNone(price['lifetime_start'])
+
+    def test_import_csv_ragged_row(self):
+        header = 'catalog_id,scope,seq_no,price,lifetime_start,lifetime_end\n'
+        for row in ('%s,Default,1,100\n' % CT_UUID1,
+                    '%s,Default,1,100,,,extra\n' % CT_UUID1):
+            res = self._import(header + row, '?format=csv&type=price')
+
+            self.assertEqual(res.status_int, 400)
+            self.assertIn('line 2', res.body)
+        self.assertEqual([], list(db_api.catalog_records_iter(
+            self.context, 'Price')))
+
+    def test_import_invalid(self):
+        for record in ({'type': 'price', 'catalog_id': CT_UUID1,
+                        'scope': 'Default', 'seq_no': '1',
+                        'price': '1000000000'},
+                       {'type': 'price', 'catalog_id': CT_UUID1,
+                        'scope': 'Default', 'price': '1'},
+                       {'type': 'catalog', 'catalog_id': CT_UUID1,
+                        'lifetime_start': '2016-01-01'},
+                       {'type': 'catalog', 'catalog_id': CT_UUID1,
+                        'unknown': '1'},
+                       {'type': 'unknown'}):
+            res = self._import(self._jsonl([RECORDS[0], record]))
+            self.assertEqual(res.status_int, 400)
+            self.assertIn('line 2', res.body)
+
+        self.assertEqual(400, self._import('{', '').status_int)
+        self.assertEqual(400, self._import('', '?format=csv').status_int)
+        self.assertEqual(400, self._import('', '?format=xml').status_int)
+
+    def test_import_not_admin(self):
+        res = self._import(self._jsonl(RECORDS), role='__member__')
+
+        self.assertEqual(res.status_int, 403)
+
+    def test_export(self):
+        self._import(self._jsonl(RECORDS))
+
+        res = self._get_request('/catalog/export').get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('application/x-ndjson', res.content_type)
+        records = [json.loads(line) for line in res.body.splitlines()]
+        self.assertEqual([record['type'] for record in RECORDS],
+                         [record['type'] for record in records])
+        self.assertEqual('100.500', records[4]['price'])
+
+        # The export can be imported again without changes.
+        res = self._import(res.body)
+        self.assertEqual({'created': 0, 'updated': 0, 'unchanged': 5},
+                         jsonutils.loads(res.body)['result'])
+
+    def test_export_csv(self):
+        self._import(self._jsonl(RECORDS))
+
+        res = self._get_request('/catalog/export?format=csv&type=price')\
+            .get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('text/csv', res.content_type)
+        lines = res.body.splitlines()
+        self.assertEqual('catalog_id,scope,seq_no,price,lifetime_start,'
+                         'lifetime_end,expansion_key1,expansion_key2,'
+                         'expansion_key3,expansion_key4,expansion_key5,'
+                         'expansion_text', lines[0])
+        self.assertEqual(2, len(lines))
+
+        res = self._import(res.body, '?format=csv&type=price')
+        self.assertEqual({'created': 0, 'updated': 0, 'unchanged': 1},
+                         jsonutils.loads(res.body)['result'])
@@ -1220,3 +1220,55 @@ class TestAPI(base.IsolatedUnitTest):
 
         # Examination of response
         self.assertEqual(res.status_int, 400)
+
+    def _get_summary(self, path, role='admin'):
+        req = unit_test_utils.get_fake_request(method='GET', path=path)
+        req.headers['x-auth-token'] = 'user:tenant:%s' % role
+        return req.get_response(self.api)
+
+    def test_summary_api(self):
+        """Test summary api.
+        Test with group_by of region_id.
+        """
+        res = self._get_summary('/contract/summary?group_by=region_id')
+
+        self.assertEqual(res.status_int, 200)
+        body = jsonutils.loads(res.body)
+        self.assertEqual(7, body['total'])
+        self.assertEqual([{'region_id': 'region_id_101', 'count': 4},
+                          {'region_id': 'region_id_102', 'count': 3}],
+                         body['summary'])
+
+    def test_summary_api_with_filters(self):
+        """Test summary api.
+        Test with group_by of catalog_id and filters of the list.
+        """
+        res = self._get_summary('/contract/summary'
+                                '?group_by=project_id,catalog_id'
+                                '&project_id=project_id_102'
+                                '&force_show_deleted=true')
+
+        self.assertEqual(res.status_int, 200)
+        body = jsonutils.loads(res.body)
+        self.assertEqual(4, body['total'])
+        self.assertEqual(['catalog_id_105', 'catalog_id_106',
+                          'catalog_id_107', 'catalog_id_108'],
+                         [row['catalog_id'] for row in body['summary']])
+        self.assertEqual(set(['project_id_102']),
+                         set(row['project_id'] for row in body['summary']))
+
+    def test_summary_api_not_supported_group_by(self):
+        """Test summary api.
+        Test with group_by which is not supported.
+        """
+        res = self._get_summary('/contract/summary?group_by=num')
+
+        self.assertEqual(res.status_int, 400)
+
+    def test_summary_api_no_authority(self):
+        """Test summary api.
+        Test cases run unauthorized.
+        """
+        res = self._get_summary('/contract/summary', role='no_auth')
+
+        self.assertEqual(res.status_int, 403)
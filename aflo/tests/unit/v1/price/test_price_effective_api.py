@@ -0,0 +1,196 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import datetime
+
+from oslo_serialization import jsonutils
+
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+import aflo.tests.unit.utils as unit_test_utils
+from aflo.tests.unit.v1.price import utils as price_utils
+
+CT_UUID1 = 'ea0a4146-fd07-414b-aa5e-dedbeef00001'
+
+TENANT1 = 'tenant1'
+
+
+class TestPriceEffectiveAPI(base.WorkflowUnitTest):
+    """Do a test of 'Get the effective price'"""
+
+    def _get_request(self, path, method='GET', role='admin',
+                     body=None):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        req.headers['x-auth-token'] = 'user:%s:%s' % (TENANT1, role)
+        if body is not None:
+            req.body = jsonutils.dumps(body)
+        return req
+
+    def _create_price(self, scope, price, lifetime_start, lifetime_end):
+        path = '/catalog/%s/price/%s' % (CT_UUID1, scope)
+        body = {'catalog_price': {'price': price,
+                                  'lifetime_start': lifetime_start,
+                                  'lifetime_end': lifetime_end}}
+        res = self._get_request(path, method='POST',
+                                body=body).get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        return jsonutils.loads(res.body)['catalog_price']
+
+    def _get_effective(self, scope, lifetime, role='admin'):
+        path = '/catalog/%s/effective_price?scope=%s&lifetime=%s' % (
+            CT_UUID1, scope, lifetime)
+        return self._get_request(path, role=role).get_response(self.api)
+
+    def _timeline(self, scope):
+        return [(row.valid_from, row.valid_to, row.seq_no)
+                for row in db_api.get_session()
+                .query(db_models.PriceTimeline)
+                .filter_by(catalog_id=CT_UUID1, scope=scope)
+                .order_by(db_models.PriceTimeline.valid_from)]
+
+    def test_timeline_overlap(self):
+        price1 = self._create_price('Default', 100,
+                                    '2016-01-01T00:00:00.000000',
+                                    '2016-12-31T00:00:00.000000')
+        price2 = self._create_price('Default', 200,
+                                    '2016-04-01T00:00:00.000000',
+                                    '2016-07-01T00:00:00.000000')
+
+        self.assertEqual(
+            [(datetime.datetime(2016, 1, 1), datetime.datetime(2016, 4, 1),
+              price1['seq_no']),
+             (datetime.datetime(2016, 4, 1), datetime.datetime(2016, 7, 1),
+              price2['seq_no']),
+             (datetime.datetime(2016, 7, 1), datetime.datetime(2016, 12, 31),
+              price1['seq_no'])],
+            self._timeline('Default'))
+
+        res = self._get_effective('Default', '2016-05-01T00:00:00.000000')
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('200.000',
+                         jsonutils.loads(res.body)['catalog_price']['price'])
+
+        # The price which starts later is effective at its lifetime_end.
+        res = self._get_effective('Default', '2016-07-01T00:00:00.000000')
+        self.assertEqual('200.000',
+                         jsonutils.loads(res.body)['catalog_price']['price'])
+
+        res = self._get_effective('Default', '2016-07-01T00:00:00.000001')
+        self.assertEqual('100.000',
+                         jsonutils.loads(res.body)['catalog_price']['price'])
+
+    def test_timeline_update_delete(self):
+        price1 = self._create_price('Default', 100,
+                                    '2016-01-01T00:00:00.000000',
+                                    '2016-12-31T00:00:00.000000')
+        price2 = self._create_price('Default', 200,
+                                    '2016-04-01T00:00:00.000000',
+                                    '2016-07-01T00:00:00.000000')
+        path = '/catalog/%s/price/Default/seq/%s' % (CT_UUID1,
+                                                     price2['seq_no'])
+
+        body = {'catalog_price': {
+            'lifetime_end': '2016-12-31T00:00:00.000000'}}
+        res = self._get_request(path, method='PATCH',
+                                body=body).get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(
+            [(datetime.datetime(2016, 1, 1), datetime.datetime(2016, 4, 1),
+              price1['seq_no']),
+             (datetime.datetime(2016, 4, 1), datetime.datetime(2016, 12, 31),
+              price2['seq_no'])],
+            self._timeline('Default'))
+
+        res = self._get_request(path,
+                                method='DELETE').get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(
+            [(datetime.datetime(2016, 1, 1), datetime.datetime(2016, 12, 31),
+              price1['seq_no'])],
+            self._timeline('Default'))
+
+    def test_effective_scope(self):
+        self._create_price('Default', 100,
+                           '2016-01-01T00:00:00.000000',
+                           '2016-12-31T00:00:00.000000')
+        self._create_price(TENANT1, 50,
+                           '2016-04-01T00:00:00.000000',
+                           '2016-07-01T00:00:00.000000')
+
+        res = self._get_effective(TENANT1, '2016-05-01T00:00:00.000000')
+        price = jsonutils.loads(res.body)['catalog_price']
+        self.assertEqual((TENANT1, '50.000'), (price['scope'],
+                                               price['price']))
+
+        # Default is effective out of the lifetime of the tenant price.
+        res = self._get_effective(TENANT1, '2016-08-01T00:00:00.000000')
+        price = jsonutils.loads(res.body)['catalog_price']
+        self.assertEqual(('Default', '100.000'), (price['scope'],
+                                                  price['price']))
+
+        # Non-admin users get the price of their own project.
+        res = self._get_effective('Default', '2016-05-01T00:00:00.000000',
+                                  role='__member__')
+        price = jsonutils.loads(res.body)['catalog_price']
+        self.assertEqual(TENANT1, price['scope'])
+
+    def test_effective_lifetime_end(self):
+        self._create_price('Default', 100,
+                           '2016-01-01T00:00:00.000000',
+                           '2016-12-31T00:00:00.000000')
+        self._create_price(TENANT1, 50,
+                           '2016-04-01T00:00:00.000000',
+                           '2016-07-01T00:00:00.000000')
+
+        # lifetime_end is included in the lifetime, as the price list.
+        res = self._get_effective('Default', '2016-12-31T00:00:00.000000')
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('100.000',
+                         jsonutils.loads(res.body)['catalog_price']['price'])
+
+        res = self._get_effective(TENANT1, '2016-07-01T00:00:00.000000')
+        price = jsonutils.loads(res.body)['catalog_price']
+        self.assertEqual((TENANT1, '50.000'), (price['scope'],
+                                               price['price']))
+
+        path = '/catalog/%s/price?scope=Default&lifetime=%s' % (
+            CT_UUID1, '2016-12-31T00:00:00.000000')
+        res = self._get_request(path).get_response(self.api)
+        self.assertEqual(['100.000'],
+                         [row['price'] for row in
+                          jsonutils.loads(res.body)['catalog_price']])
+
+        res = self._get_effective('Default', '2016-12-31T00:00:00.000001')
+        self.assertEqual(res.status_int, 404)
+
+    def test_effective_not_found(self):
+        self._create_price('Default', 100,
+                           '2016-01-01T00:00:00.000000',
+                           '2016-12-31T00:00:00.000000')
+
+        res = self._get_effective('Default', '2017-01-01T00:00:00.000000')
+        self.assertEqual(res.status_int, 404)
+
+        res = self._get_effective('Default', '2017-01-01')
+        self.assertEqual(res.status_int, 400)
+
+    def test_rebuild_all(self):
+        price_utils.create_testdata(
+            db_models, catalog_id=CT_UUID1, scope='Default', seq_no='1',
+            price=100, lifetime_start=None, lifetime_end=None,
+            date=datetime.datetime(2016, 1, 1), seq=1)
+
+        self.assertEqual([], self._timeline('Default'))
+        self.assertEqual(1, db_api.price_timeline_rebuild_all(self.context))
+        self.assertEqual([(db_api.TIMELINE_MIN, db_api.TIMELINE_MAX, '1')],
+                         self._timeline('Default'))
@@ -669,3 +669,29 @@ class TestPriceShowAPI(base.WorkflowUnitTest):
 
         # Examination of response
         self.assertEqual(res.status_int, 400)
+
+    def test_index_api_not_modified(self):
+        """Do a test of 'List Search of price'
+        Test a conditional request until a price of the catalog is changed.
+        """
+        def _get_response(catalog_id, etag=None):
+            path = '/catalog/%s/price' % catalog_id
+            req = unit_test_utils.get_fake_request(method='GET', path=path)
+            req.headers['x-auth-token'] = 'user:tenant:admin'
+            if etag:
+                req.headers['If-None-Match'] = etag
+            return req.get_response(self.api)
+
+        etag = _get_response(CT_UUID2).headers['ETag']
+
+        # Prices of other catalogs do not change the ETag.
+        db_api.price_update(self.context, CT_UUID1, SCOPE1, '1',
+                            price='999')
+        res = _get_response(CT_UUID2, etag)
+        self.assertEqual(res.status_int, 304)
+
+        db_api.price_update(self.context, CT_UUID2, SCOPE1, '7',
+                            price='999')
+        res = _get_response(CT_UUID2, etag)
+        self.assertEqual(res.status_int, 200)
+        self.assertNotEqual(etag, res.headers['ETag'])
@@ -14,12 +14,17 @@ import json
 import os
 
 from aflo.tests.unit import base
+from aflo.tickets.broker.utils import utils as broker_utils
 
 FILES_DIR = 'aflo/tests/unit/v1/tickets/broker/operation_definition_files'
 
 
 class BrokerTestBase(base.WorkflowUnitTest):
 
+    def setUp(self):
+        super(BrokerTestBase, self).setUp()
+        broker_utils.clear_name_cache()
+
     def _get_dict_contents(self, file_prefix, version=None):
         file_name = None
         if version:
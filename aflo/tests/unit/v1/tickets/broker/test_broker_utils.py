@@ -0,0 +1,330 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+
+import functools
+import time
+import uuid
+
+import eventlet
+
+from aflo.common import exception
+from aflo.db.sqlalchemy import api as db_api
+from aflo.tests.unit.utils import FakeObject
+from aflo.tests.unit.v1.tickets.broker import broker_test_base as base
+from aflo.tickets.broker.utils import concurrency_utils
+from aflo.tickets.broker.utils import contract_utils
+from aflo.tickets.broker.utils import utils as broker_utils
+
+TENANT_ID1 = str(uuid.uuid4())
+TENANT_ID2 = str(uuid.uuid4())
+USED_NAME = 'used-name'
+
+
+class Stubs(object):
+    @classmethod
+    def utils_stubout(cls, target):
+        """Stub out remote clients of 'aflo.tickets.broker.utils'.
+        :param target: Target process.
+        """
+        call_info = {'nova_get': [], 'nova_update': [],
+                     'cinder_get': [], 'cinder_update': []}
+
+        def fake_get_nova_client():
+            class Client(object):
+                def __init__(self):
+                    self.quotas = QuotaSetManager()
+
+            class QuotaSet(object):
+                def to_dict(self):
+                    return {'cores': 20, 'ram': 51200}
+
+            class QuotaSetManager(object):
+                def get(self, tenant_id):
+                    call_info['nova_get'].append(tenant_id)
+                    return QuotaSet()
+
+                def update(self, tenant_id, **update_val):
+                    call_info['nova_update'].append((tenant_id, update_val))
+
+            return Client()
+
+        def fake_get_cinder_client():
+            class Client(object):
+                def __init__(self):
+                    self.quotas = QuotaSetManager()
+
+            class QuotaSet(object):
+                gigabytes = 1000
+
+            class QuotaSetManager(object):
+                def get(self, tenant_id):
+                    call_info['cinder_get'].append(tenant_id)
+                    return QuotaSet()
+
+                def update(self, tenant_id, **update_val):
+                    call_info['cinder_update'].append((tenant_id, update_val))
+
+            return Client()
+
+        target.stubs.Set(broker_utils, 'get_nova_client',
+                         fake_get_nova_client)
+        target.stubs.Set(broker_utils, 'get_cinder_client',
+                         fake_get_cinder_client)
+
+        return call_info
+
+    @classmethod
+    def keystone_stubout(cls, target):
+        """Stub out keystone client of 'aflo.tickets.broker.utils'.
+        :param target: Target process.
+        """
+        call_info = {'users': [], 'projects': []}
+
+        def _list(kind, name=None):
+            call_info[kind].append(name)
+            item = FakeObject()
+            item.setattr('name', USED_NAME)
+            return [item] if name == USED_NAME else []
+
+        def fake_get_keystone_client():
+            class Manager(object):
+                def __init__(self, kind):
+                    self.kind = kind
+
+                def list(self, name=None):
+                    return _list(self.kind, name=name)
+
+            class Client(object):
+                def __init__(self):
+                    self.users = Manager('users')
+                    self.projects = Manager('projects')
+
+            return Client()
+
+        target.stubs.Set(broker_utils, 'get_keystone_client',
+                         fake_get_keystone_client)
+
+        return call_info
+
+
+class TestQuotaAggregator(base.BrokerTestBase):
+    """Test 'QuotaAggregator'"""
+
+    def test_flush_merges_deltas(self):
+        call_info = Stubs.utils_stubout(self)
+
+        quotas = broker_utils.QuotaAggregator()
+        quotas.add(TENANT_ID1, cores=10)
+        quotas.add(TENANT_ID1, ram=20480)
+        quotas.add(TENANT_ID1, cores=5, gigabytes=50)
+        quotas.flush()
+
+        self.assertEqual([TENANT_ID1], call_info['nova_get'])
+        self.assertEqual([TENANT_ID1], call_info['cinder_get'])
+        self.assertEqual([(TENANT_ID1, {'cores': 35, 'ram': 71680})],
+                         call_info['nova_update'])
+        self.assertEqual([(TENANT_ID1, {'gigabytes': 1050})],
+                         call_info['cinder_update'])
+
+    def test_flush_per_tenant(self):
+        call_info = Stubs.utils_stubout(self)
+
+        quotas = broker_utils.QuotaAggregator()
+        quotas.add(TENANT_ID1, cores=1)
+        quotas.add(TENANT_ID2, cores=2)
+        quotas.flush()
+
+        self.assertEqual(sorted([(TENANT_ID1, {'cores': 21}),
+                                 (TENANT_ID2, {'cores': 22})]),
+                         sorted(call_info['nova_update']))
+        self.assertEqual([], call_info['cinder_get'])
+        self.assertEqual([], call_info['cinder_update'])
+
+    def test_flush_set_values(self):
+        call_info = Stubs.utils_stubout(self)
+
+        quotas = broker_utils.QuotaAggregator()
+        quotas.add(TENANT_ID1, cores=10)
+        quotas.set(TENANT_ID1, cores=0, gigabytes=0)
+        quotas.flush()
+
+        self.assertEqual([], call_info['nova_get'])
+        self.assertEqual([], call_info['cinder_get'])
+        self.assertEqual([(TENANT_ID1, {'cores': 0})],
+                         call_info['nova_update'])
+        self.assertEqual([(TENANT_ID1, {'gigabytes': 0})],
+                         call_info['cinder_update'])
+
+    def test_flush_add_after_set(self):
+        call_info = Stubs.utils_stubout(self)
+
+        quotas = broker_utils.QuotaAggregator()
+        quotas.set(TENANT_ID1, cores=10)
+        quotas.add(TENANT_ID1, cores=2)
+        quotas.flush()
+
+        self.assertEqual([], call_info['nova_get'])
+        self.assertEqual([(TENANT_ID1, {'cores': 12})],
+                         call_info['nova_update'])
+
+    def test_flush_twice(self):
+        call_info = Stubs.utils_stubout(self)
+
+        quotas = broker_utils.QuotaAggregator()
+        quotas.add(TENANT_ID1, cores=10)
+        quotas.flush()
+        quotas.flush()
+
+        self.assertEqual(1, len(call_info['nova_update']))
+
+
+class TestCreateContracts(base.BrokerTestBase):
+    """Test 'create_contracts'"""
+
+    def _make_contract(self, contract_id):
+        return {'contract_id': contract_id,
+                'project_id': TENANT_ID1,
+                'lifetime_start': '2016-01-01T00:00:00.000000',
+                'lifetime_end': contract_utils.LIFETIME_END,
+                'expansion_key1': 'contract-flat-rate'}
+
+    def test_create_contracts(self):
+        contract_ids = [str(uuid.uuid4()) for i in range(3)]
+        contracts = contract_utils.create_contracts(
+            self.context, [self._make_contract(contract_id)
+                           for contract_id in contract_ids])
+
+        self.assertEqual(contract_ids,
+                         [contract['contract_id'] for contract in contracts])
+        self.assertEqual('contract-flat-rate',
+                         contracts[0]['expansions']['expansion_key1'])
+        self.assertEqual(3, len(db_api.contract_list(self.context,
+                                                     TENANT_ID1)))
+
+    def test_create_contracts_empty(self):
+        self.assertEqual([], contract_utils.create_contracts(self.context,
+                                                             []))
+
+    def test_create_contracts_duplicate_rollback(self):
+        contract_id = str(uuid.uuid4())
+        self.assertRaises(exception.Duplicate,
+                          contract_utils.create_contracts,
+                          self.context,
+                          [self._make_contract(str(uuid.uuid4())),
+                           self._make_contract(contract_id),
+                           self._make_contract(contract_id)])
+
+        self.assertEqual([], db_api.contract_list(self.context, TENANT_ID1))
+
+    def test_create_contracts_in_session(self):
+        session = db_api.get_session()
+
+        def _create_and_fail():
+            with session.begin():
+                contract_utils.create_contracts(
+                    self.context, [self._make_contract(str(uuid.uuid4()))],
+                    session=session)
+                raise exception.NotFound()
+
+        # The contracts are rolled back with the transaction.
+        self.assertRaises(exception.NotFound, _create_and_fail)
+        self.assertEqual([], db_api.contract_list(self.context, TENANT_ID1))
+
+
+class TestRemoteCalls(base.BrokerTestBase):
+    """Test 'concurrency_utils'"""
+
+    def _sleep_and_return(self, seconds, value):
+        eventlet.sleep(seconds)
+        return value
+
+    def _raise_error(self):
+        raise exception.NotFound('error')
+
+    def test_run_concurrently(self):
+        start = time.time()
+        results = concurrency_utils.run_concurrently(
+            functools.partial(self._sleep_and_return, 0.2, 'users'),
+            functools.partial(self._sleep_and_return, 0.2, 'projects'))
+
+        self.assertEqual(['users', 'projects'], results)
+        self.assertTrue(time.time() - start < 0.35)
+
+    def test_run_concurrently_no_call(self):
+        self.assertEqual([], concurrency_utils.run_concurrently())
+
+    def test_run_concurrently_raise_error(self):
+        self.assertRaises(exception.NotFound,
+                          concurrency_utils.run_concurrently,
+                          functools.partial(self._sleep_and_return, 0, 1),
+                          self._raise_error)
+
+    def test_run_concurrently_timeout(self):
+        self.assertRaises(exception.RemoteCallTimeout,
+                          concurrency_utils.run_concurrently,
+                          functools.partial(self._sleep_and_return, 0, 1),
+                          functools.partial(self._sleep_and_return, 5, 2),
+                          timeout=0.1)
+
+    def test_wait_each_call(self):
+        with concurrency_utils.RemoteCalls(timeout=0) as calls:
+            first = calls.spawn(self._sleep_and_return, 0.1, 'first')
+            error = calls.spawn(self._raise_error)
+
+            self.assertEqual('first', first.wait())
+            self.assertRaises(exception.NotFound, error.wait)
+
+
+class TestNameExists(base.BrokerTestBase):
+    """Test 'user_name_exists' and 'project_name_exists'"""
+
+    def test_name_exists(self):
+        call_info = Stubs.keystone_stubout(self)
+
+        self.assertTrue(broker_utils.user_name_exists(USED_NAME))
+        self.assertFalse(broker_utils.user_name_exists('new-name'))
+        self.assertTrue(broker_utils.project_name_exists(USED_NAME))
+        self.assertFalse(broker_utils.project_name_exists('new-name'))
+
+        self.assertEqual([USED_NAME, 'new-name'], call_info['users'])
+        self.assertEqual([USED_NAME, 'new-name'], call_info['projects'])
+
+    def test_name_exists_cached(self):
+        call_info = Stubs.keystone_stubout(self)
+
+        for i in range(3):
+            self.assertTrue(broker_utils.user_name_exists(USED_NAME))
+            self.assertFalse(broker_utils.user_name_exists('new-name'))
+
+        self.assertEqual([USED_NAME] + ['new-name'] * 3, call_info['users'])
+
+    def test_name_exists_cache_expired(self):
+        call_info = Stubs.keystone_stubout(self)
+        self.config(name_cache_ttl=1, group='broker')
+        now = time.time()
+
+        self.stubs.Set(time, 'time', lambda: now)
+        broker_utils.user_name_exists(USED_NAME)
+        self.stubs.Set(time, 'time', lambda: now + 2)
+        broker_utils.user_name_exists(USED_NAME)
+
+        self.assertEqual([USED_NAME, USED_NAME], call_info['users'])
+
+    def test_name_exists_without_cache(self):
+        call_info = Stubs.keystone_stubout(self)
+        self.config(name_cache_ttl=0, group='broker')
+
+        broker_utils.user_name_exists(USED_NAME)
+        broker_utils.user_name_exists(USED_NAME)
+
+        self.assertEqual([USED_NAME, USED_NAME], call_info['users'])
@@ -0,0 +1,182 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+
+from datetime import timedelta
+import uuid
+
+from oslo_utils import timeutils
+
+from aflo.common.broker_base import BrokerBase
+from aflo.common import mail
+from aflo.common import outbox
+from aflo.db.sqlalchemy import api as db_api
+from aflo.mail import mail_template
+from aflo.tests.unit.v1.tickets.broker import broker_test_base as base
+
+TICKET_ID = str(uuid.uuid4())
+TO_ADDRESS = 'user@example.com'
+
+
+class FakeBroker(BrokerBase):
+    """Broker which sends two mails in the after process."""
+
+    def _do_broker_action(self, timing, status, session, **values):
+        self._sendmail(TO_ADDRESS, mail_template, {'id': values['id']})
+        self._sendmail(TO_ADDRESS, mail_template, {'id': values['id']})
+
+
+class TestOutbox(base.BrokerTestBase):
+    """Test 'aflo.common.outbox'"""
+
+    def setUp(self):
+        super(TestOutbox, self).setUp()
+        self.config(max_attempts=2, retry_interval=30, group='outbox')
+
+    def _mail_stubout(self, error=None):
+        call_info = []
+
+        def fake_sendmail(to_address, template, data, **kwargs):
+            if error:
+                raise error
+            call_info.append((to_address, template, data))
+
+        self.stubs.Set(mail, 'sendmail', fake_sendmail)
+
+        return call_info
+
+    def _enqueue(self, idempotency_key):
+        session = db_api.get_session()
+        with session.begin():
+            return outbox.enqueue(session, 'sendmail', idempotency_key,
+                                  to_address=TO_ADDRESS,
+                                  template=mail_template.__name__,
+                                  data={'id': TICKET_ID})
+
+    def _make_broker(self):
+        template_contents = self._get_dict_contents(
+            'template_contents_RequestUserEntry', '20160627')
+        wf_pattern_contents = self._get_dict_contents(
+            'wf_pattern_RequestUserEntry')
+        return FakeBroker(self.context, template_contents,
+                          wf_pattern_contents,
+                          after_status_code='inquiring')
+
+    def test_enqueue_idempotent(self):
+        self.assertTrue(self._enqueue('key'))
+        self.assertFalse(self._enqueue('key'))
+
+        self.assertEqual(1, len(db_api.outbox_list(self.context)))
+
+    def test_enqueue_rollback(self):
+        session = db_api.get_session()
+        try:
+            with session.begin():
+                outbox.enqueue(session, 'sendmail', 'key',
+                               to_address=TO_ADDRESS,
+                               template=mail_template.__name__,
+                               data={})
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertEqual([], db_api.outbox_list(self.context))
+
+    def test_dispatch(self):
+        call_info = self._mail_stubout()
+        self._enqueue('key')
+
+        dispatcher = outbox.Dispatcher(self.context)
+        self.assertEqual(1, dispatcher.dispatch())
+        self.assertEqual(0, dispatcher.dispatch())
+
+        self.assertEqual([(TO_ADDRESS, mail_template, {'id': TICKET_ID})],
+                         call_info)
+        records = db_api.outbox_list(self.context)
+        self.assertEqual(outbox.STATUS_DONE, records[0]['status'])
+        self.assertEqual(1, records[0]['attempts'])
+
+    def test_dispatch_retry(self):
+        self._mail_stubout(error=IOError('SMTP server is down'))
+        self._enqueue('key')
+
+        dispatcher = outbox.Dispatcher(self.context)
+        self.assertEqual(1, dispatcher.dispatch())
+
+        record = db_api.outbox_list(self.context)[0]
+        self.assertEqual(outbox.STATUS_PENDING, record['status'])
+        self.assertTrue(record['next_run_at'] > timeutils.utcnow())
+        self.assertIn('SMTP server is down', record['last_error'])
+
+        # Not run until the next run time.
+        self.assertEqual(0, dispatcher.dispatch())
+
+        db_api.outbox_update(self.context, record['id'],
+                             next_run_at=timeutils.utcnow())
+        self.assertEqual(1, dispatcher.dispatch())
+
+        record = db_api.outbox_list(self.context)[0]
+        self.assertEqual(outbox.STATUS_FAILED, record['status'])
+        self.assertEqual(2, record['attempts'])
+
+    def test_claim_once(self):
+        self._enqueue('key')
+
+        self.assertEqual(1, len(db_api.outbox_claim(self.context, 10)))
+        self.assertEqual([], db_api.outbox_claim(self.context, 10, 600))
+
+    def test_claim_abandoned(self):
+        self._enqueue('key')
+        record = db_api.outbox_claim(self.context, 10)[0]
+
+        db_api.outbox_update(
+            self.context, record['id'],
+            updated_at=timeutils.utcnow() - timedelta(seconds=601))
+
+        records = db_api.outbox_claim(self.context, 10, 600)
+        self.assertEqual([record['id']], [r['id'] for r in records])
+        self.assertEqual(2, records[0]['attempts'])
+
+    def test_broker_without_outbox(self):
+        call_info = self._mail_stubout()
+        broker = self._make_broker()
+
+        session = db_api.get_session()
+        with session.begin():
+            broker._do_after('inquiring', session, id=TICKET_ID)
+
+        self.assertEqual(2, len(call_info))
+        self.assertEqual([], db_api.outbox_list(self.context))
+
+    def test_broker_with_outbox(self):
+        self.config(enabled=True, group='outbox')
+        call_info = self._mail_stubout()
+        broker = self._make_broker()
+
+        # The after process runs twice when a message is redelivered.
+        for i in range(2):
+            session = db_api.get_session()
+            with session.begin():
+                broker._do_after('inquiring', session, id=TICKET_ID)
+
+        self.assertEqual([], call_info)
+        records = db_api.outbox_list(self.context)
+        self.assertEqual(['%s:inquiring:sendmail:1' % TICKET_ID,
+                          '%s:inquiring:sendmail:2' % TICKET_ID],
+                         sorted([r['idempotency_key'] for r in records]))
+
+        # Out of the after process, a side effect runs at once.
+        broker._sendmail(TO_ADDRESS, mail_template, {})
+        self.assertEqual(1, len(call_info))
+
+        outbox.Dispatcher(self.context).dispatch()
+        self.assertEqual(3, len(call_info))
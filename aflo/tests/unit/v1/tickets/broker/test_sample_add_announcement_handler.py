@@ -13,7 +13,6 @@
 
 import copy
 import json
-import requests
 import six
 import six.moves.urllib.parse as urlparse
 import uuid
@@ -23,6 +22,7 @@ from oslo_serialization import jsonutils
 from requests.exceptions import ConnectionError
 from requests.exceptions import SSLError
 
+from aflo.common.exception import Forbidden
 from aflo.common.exception import NotFound
 from aflo.common import mail
 from aflo.db.sqlalchemy import api as db_api
@@ -33,6 +33,8 @@ import aflo.tests.unit.utils as unit_test_utils
 from aflo.tests.unit.utils import FakeObject
 from aflo.tests.unit.v1.tickets.broker import broker_test_base as base
 from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tickets.broker import sample_add_announcement_handler \
+    as announcement_handler
 from aflo.tickets.broker.utils import utils as broker_utils
 
 CONF = cfg.CONF
@@ -118,6 +120,10 @@ class FakeResponse(object):
         return self.json_data
 
 
+class FakeSession(object):
+    pass
+
+
 class Stubs(object):
     @classmethod
     def utils_stubout(cls, target, method):
@@ -604,8 +610,12 @@ class Stubs(object):
             'not_error_raise_exception_logout_post': {
                 'method': 'post',
                 'stub': fake_not_error_raise_exception_logout_post}}
-        target.stubs.Set(requests, fake_managers[method]['method'],
-                         fake_managers[method]['stub'])
+        session = FakeSession()
+        setattr(session, fake_managers[method]['method'],
+                fake_managers[method]['stub'])
+        target.stubs.Set(announcement_handler, '_get_http_session',
+                         lambda: session)
+        announcement_handler.clear_cache()
 
         return call_info
 
@@ -920,6 +930,109 @@ class TestAddAnnouncementHandler(base.BrokerTestBase):
         self._tickets_update_success(
             'PUT', 'not_error_raise_exception_logout_post')
 
+    def _get_handler(self):
+        return announcement_handler.AddAnnouncementHandler(
+            self.context, self.template_contents, self.wf_pattern_contents)
+
+    def _stub_counting_post(self, expired_once=False, status_code=401):
+        call_urls = []
+        expired = [expired_once]
+
+        def fake_post(url, data=None, headers=None, verify=None):
+            call_urls.append(url)
+            if expired[0] and 'node' in url:
+                expired[0] = False
+                return FakeResponse(text='Access denied.',
+                                    status_code=status_code)
+            json_data = RESPONSE_DATA['GET_TAXONOMY_TERM']
+            for key in ['LOGIN', 'CREATE_CONTENTS', 'LOGOUT',
+                        'GET_TAXONOMY_VOCABULARY']:
+                if url == URL[key]:
+                    json_data = RESPONSE_DATA[key]
+            return FakeResponse(text='', status_code=200,
+                                json_data=json_data)
+
+        session = FakeSession()
+        session.post = fake_post
+        self.stubs.Set(announcement_handler, '_get_http_session',
+                       lambda: session)
+        announcement_handler.clear_cache()
+
+        return call_urls
+
+    def test_login_reused(self):
+        call_urls = self._stub_counting_post()
+        handler = self._get_handler()
+
+        for i in range(3):
+            headers = handler._get_login_headers()
+            handler._release_login_headers(headers)
+
+        self.assertEqual([URL['LOGIN']], call_urls)
+
+    def test_login_not_reused_without_session_ttl(self):
+        self.config(session_ttl=0, group='announcement')
+        call_urls = self._stub_counting_post()
+        handler = self._get_handler()
+
+        for i in range(2):
+            headers = handler._get_login_headers()
+            handler._release_login_headers(headers)
+
+        self.assertEqual([URL['LOGIN'], URL['LOGOUT']] * 2, call_urls)
+
+    def test_login_again_when_expired(self):
+        call_urls = self._stub_counting_post(expired_once=True)
+        handler = self._get_handler()
+
+        headers = handler._get_login_headers()
+        handler._create_contents(
+            {'type': 'maintenance', 'scope': 'region', 'target_name': ''},
+            headers)
+
+        self.assertEqual([URL['LOGIN'], URL['CREATE_CONTENTS'],
+                          URL['LOGIN'], URL['CREATE_CONTENTS']], call_urls)
+
+    def test_not_login_again_when_forbidden(self):
+        call_urls = self._stub_counting_post(expired_once=True,
+                                             status_code=403)
+        handler = self._get_handler()
+
+        headers = handler._get_login_headers()
+        self.assertRaises(
+            Forbidden, handler._create_contents,
+            {'type': 'maintenance', 'scope': 'region', 'target_name': ''},
+            headers)
+
+        self.assertEqual([URL['LOGIN'], URL['CREATE_CONTENTS']], call_urls)
+
+    def test_expired_login_logout_after_release(self):
+        call_urls = self._stub_counting_post()
+        handler = self._get_handler()
+
+        headers = handler._get_login_headers()
+        announcement_handler._LOGINS[-1].expires = 0
+        new_headers = handler._get_login_headers()
+        self.assertEqual([URL['LOGIN'], URL['LOGIN']], call_urls)
+
+        handler._release_login_headers(headers)
+        handler._release_login_headers(new_headers)
+
+        self.assertEqual([URL['LOGIN'], URL['LOGIN'], URL['LOGOUT']],
+                         call_urls)
+
+    def test_taxonomy_id_cached(self):
+        call_urls = self._stub_counting_post()
+        handler = self._get_handler()
+
+        headers = handler._get_login_headers()
+        for i in range(3):
+            self.assertEqual('xxxxx', handler._get_taxonomy_id(
+                headers, 'category', 'xxxxx'))
+
+        self.assertEqual([URL['LOGIN'], URL['GET_TAXONOMY_VOCABULARY'],
+                          URL['GET_TAXONOMY_TERM']], call_urls)
+
     def _tickets_update_success(self, method, fake_stub_name):
         req, req.body = self._get_make_pre_approval_request(method)
 
@@ -72,7 +72,8 @@ ERROR_MESSAGE = {
     'RAISE_NOT_FOUND_CREATE_CONTRACT':
         'Failed to register the contract.',
     'RAISE_NOT_FOUND_UPDATE_QUOTAS':
-        'Failed to update the quotas.'
+        'An exception occurred in the processing of broker. '
+        'location: update_quotas cause: Failed to update the quotas.'
 }
 
 
@@ -88,7 +89,8 @@ class Stubs(object):
 
         def fake_error_create_contract_raise_exception(
                 ctxt, template, ticket, project_id, project_name,
-                application_name, contract_key, lifetime_start):
+                application_name, contract_key, lifetime_start=None,
+                batch=None):
             raise Exception()
 
         def fake_error_is_during_contract(
@@ -207,8 +209,8 @@ class Stubs(object):
             project.setattr('name', 'xxxxx')
             return project
 
-        def fake_error_update_quotas_raise_exception(user_id):
-            raise Exception()
+        def fake_error_update_quotas_raise_exception(tenant_id, **values):
+            raise Exception('Failed to update the quotas.')
 
         fake_managers = {
             'get_email_address':
@@ -624,6 +626,8 @@ def _tickets_update_error(
         Stubs.utils_stubout(self, 'get_user')
     Stubs.utils_stubout(self, 'get_nova_client')
     Stubs.utils_stubout(self, 'get_cinder_client')
+    Stubs.utils_stubout(self, 'get_email_address')
+    Stubs.mail_stubout(self, 'sendmail')
     if 'contract' == use_stubs:
         Stubs.contract_utils_stubout(self, fake_stub_name)
     elif 'base' == use_stubs:
@@ -19,6 +19,7 @@ from oslo_serialization import jsonutils
 
 from aflo.common.exception import NotFound
 from aflo.common import mail
+from aflo.common import outbox
 from aflo.db.sqlalchemy import api as db_api
 from aflo.db.sqlalchemy import models as db_models
 
@@ -289,6 +290,31 @@ class TestObjectStorageContractHandler(base.BrokerTestBase):
         ticket_id = ticket['id']
         self._update_to_final_approval(ticket_id)
 
+    def test_roles_in_outbox(self):
+        """Test that the role is granted through the outbox."""
+        self.config(enabled=True, group='outbox')
+        ticket = self._make_pre_approval()
+
+        path = '/tickets/%s' % ticket['id']
+        req = unit_test_utils.get_fake_request(method='PUT', path=path)
+        additional_data = {'message': 'xxxxx\nxxxxx\nxxxxx'}
+        req.body = _create_request_data(self, ticket['id'], req,
+                                        'pre-approval', 'final approval',
+                                        additional_data)
+        _set_stubs(self, 'tickets_update')
+        call_info = _set_utils_stubs(self, ['get_keystone_client', ])
+        Stubs.mail_stubout(self, 'sendmail')
+
+        _normal_system_check(self, req)
+
+        self.assertNotIn('roles_grant', call_info)
+        self.assertIn('add_roles', [record['action'] for record
+                                    in db_api.outbox_list(self.context)])
+
+        outbox.Dispatcher(self.context).dispatch()
+
+        self.assertEqual(OBJECT_STRAGE_ROLE, call_info['roles_grant'])
+
     def test_no_set_roles(self):
         """Test to set empty of object stratge roles."""
         self.config(ost_roles='', group='ost_contract')
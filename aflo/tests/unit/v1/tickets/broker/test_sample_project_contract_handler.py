@@ -107,7 +107,8 @@ class Stubs(object):
 
         def fake_error_create_contract_raise_exception(
                 ctxt, template, ticket, project_id, project_name,
-                application_name, contract_key, lifetime_start=None):
+                application_name, contract_key, lifetime_start=None,
+                batch=None):
             raise Exception(EXCEPTION_MESSAGE)
 
         fake_managers = {
@@ -148,28 +149,28 @@ class Stubs(object):
             call_info['roles'] = roles
             return None
 
-        def fake_get_user_list():
+        def fake_get_user_list(name=None):
             user = FakeObject()
             user.setattr('name', 'xxx')
             return [user]
 
-        def fake_error_get_user_list_raise_exception():
+        def fake_error_get_user_list_raise_exception(name=None):
             raise Exception(EXCEPTION_MESSAGE)
 
-        def fake_error_get_conflict_user_list():
+        def fake_error_get_conflict_user_list(name=None):
             user = FakeObject()
             user.setattr('name', INPUT_DATA)
             return [user]
 
-        def fake_get_project_list():
+        def fake_get_project_list(name=None):
             project = FakeObject()
             project.setattr('name', 'xxx')
             return [project]
 
-        def fake_error_get_project_list_raise_exception():
+        def fake_error_get_project_list_raise_exception(name=None):
             raise Exception(EXCEPTION_MESSAGE)
 
-        def fake_error_get_conflict_project_list():
+        def fake_error_get_conflict_project_list(name=None):
             project = FakeObject()
             project.setattr('name', INPUT_DATA)
             return [project]
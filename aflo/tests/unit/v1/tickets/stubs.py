@@ -37,6 +37,18 @@ class Ticket_RpcStubs(object):
             call_info['req_kwargs'] = kwargs
             return TicketsManager().tickets_create(ctxt.to_dict(), **kwargs)
 
+        def fake_tickets_create_batch(self, ctxt, method, **kwargs):
+            """Ticket batch craete fake function.
+            :param ctxt: Request context.
+            :param method: Call function.
+            :param kwargs: Input parametar from form.
+            """
+            call_info['req_ctxt'] = ctxt
+            call_info['req_method'] = method
+            call_info['req_kwargs'] = kwargs
+            return TicketsManager().tickets_create_batch(ctxt.to_dict(),
+                                                         **kwargs)
+
         def fake_tickets_update(self, ctxt, method, **kwargs):
             """Ticket update fake function.
             :param ctxt: Request context.
@@ -60,6 +72,7 @@ class Ticket_RpcStubs(object):
             return TicketsManager().tickets_delete(ctxt.to_dict(), **kwargs)
 
         fake_managers = {'tickets_create': fake_tickets_create,
+                         'tickets_create_batch': fake_tickets_create_batch,
                          'tickets_update': fake_tickets_update,
                          'tickets_delete': fake_tickets_delete}
         target.stubs.Set(rpc_client._CallContext, 'cast',
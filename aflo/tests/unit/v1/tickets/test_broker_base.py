@@ -13,6 +13,8 @@
 from oslo_config import cfg
 
 from aflo.common import exception
+from aflo.common import metrics
+from aflo.db.sqlalchemy import api as db_api
 from aflo.db.sqlalchemy import models as db_models
 from aflo.tests.unit import base
 from aflo.tests.unit import utils as unit_test_utils
@@ -21,6 +23,7 @@ from aflo.tests.unit.v1.tickets.broker_stubs.stubs \
     import BrokerStubs as broker_stubs
 from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
 from aflo.tests.unit.v1.tickets import utils as tickets_utils
+from aflo.tickets.broker.utils import utils as broker_utils
 
 CONF = cfg.CONF
 
@@ -39,24 +42,6 @@ class TestBrokerBase(base.WorkflowUnitTest):
         Check that the 'broker' in all of the timing called
         """
 
-        # Create a request data
-        path = '/tickets/%s' % self.tickets.id
-        req = unit_test_utils.get_fake_request(method='PUT',
-                                               path=path)
-        headers = {'x-auth-token': 'user:tenant:director',
-                   'x-user-name': 'user-name',
-                   'x-tenant-name': 'tenant-name'}
-        for k, v in headers.iteritems():
-            req.headers[k] = v
-        req.body = '{"ticket":{"additional_data": ' \
-                   '               {"description": "user applied"},' \
-                   '           "last_status_code": "%s",' \
-                   '           "last_workflow_id": "%s",' \
-                   '           "next_status_code": "%s",' \
-                   '           "next_workflow_id": "%s"}}' \
-                   % ('applied_1st', self.workflows['applied_1st'].id,
-                      'applied_2nd', self.workflows['applied_2nd'].id)
-
         # set stubs
         # "stub_fake_call" is a stub in order to omit the queue transmission
         # When you use the "call_info",
@@ -70,7 +55,7 @@ class TestBrokerBase(base.WorkflowUnitTest):
             broker_stubs.stub_fake_after_action(self)
 
         # Send request
-        req.get_response(self.api)
+        self._send_update_request()
 
         # Compare the updated data
         def assert_req_values(req_values):
@@ -80,6 +65,74 @@ class TestBrokerBase(base.WorkflowUnitTest):
         assert_req_values(before_action_call_info['req_values'])
         assert_req_values(after_action_call_info['req_values'])
 
+    def test_broker_spans(self):
+        """Do a test of 'broker_base'
+        Check that phases and broker methods are timed.
+        """
+        stubs.stub_fake_cast(self, 'tickets_update')
+        broker_stubs.stub_fake_param_check(self)
+        broker_stubs.stub_fake_before_action(self)
+        broker_stubs.stub_fake_after_action(self)
+        metrics.REGISTRY.reset()
+        self.addCleanup(metrics.REGISTRY.reset)
+
+        self._send_update_request()
+
+        spans = dict(((entry['name'], entry['tags'].get('method')), entry)
+                     for entry in metrics.REGISTRY.snapshot())
+        # The role is checked both in the API and the RPC process.
+        self.assertEqual(2, spans[('broker.role_check', None)]['count'])
+        for name in ['broker.role_check', 'broker.target_check',
+                     'broker.before', 'broker.workflow', 'broker.after']:
+            if name != 'broker.role_check':
+                self.assertEqual(1, spans[(name, None)]['count'], name)
+            self.assertEqual('FakeBroker',
+                             spans[(name, None)]['tags']['handler'])
+            self.assertEqual('applied_2nd',
+                             spans[(name, None)]['tags']['status'])
+        validation = spans[('broker.validation', 'param_check')]
+        self.assertEqual(1, validation['count'])
+        before = spans[('broker.broker_method', 'before_action')]
+        self.assertEqual('before', before['tags']['timing'])
+        after = spans[('broker.broker_method', 'after_action')]
+        self.assertEqual('after', after['tags']['timing'])
+        self.assertEqual(0, after['errors'])
+
+    def test_broker_batch_flushed_once(self):
+        """Do a test of 'broker_base'
+        Check that contracts and quotas added by the broker methods are
+        registered once at the end of the execution.
+        """
+        stubs.stub_fake_cast(self, 'tickets_update')
+        broker_stubs.stub_fake_param_check(self)
+        calls = {'contracts': [], 'quotas': []}
+
+        def fake_before_action(self, session, *args, **values):
+            self.quotas.add('tenant', cores=1)
+
+        def fake_after_action(self, session, *args, **values):
+            self.quotas.add('tenant', cores=2)
+            self.contracts.extend([{'contract_id': 'a'},
+                                   {'contract_id': 'b'}])
+
+        def fake_contract_create_many(ctxt, values_list, session=None):
+            calls['contracts'].append(
+                [values['contract_id'] for values in values_list])
+
+        def fake_flush(self):
+            calls['quotas'].append(self.deltas)
+
+        self.stubs.Set(FakeBroker, 'before_action', fake_before_action)
+        self.stubs.Set(FakeBroker, 'after_action', fake_after_action)
+        self.stubs.Set(db_api, 'contract_create_many',
+                       fake_contract_create_many)
+        self.stubs.Set(broker_utils.QuotaAggregator, 'flush', fake_flush)
+
+        self._send_update_request()
+
+        self.assertEqual([['a', 'b']], calls['contracts'])
+        self.assertEqual([{'tenant': {'cores': 3}}], calls['quotas'])
+
     def test_general_param_check(self):
         """Do a test of 'broker_base.general_param_check'
         Don't have input parameters.
@@ -254,6 +307,27 @@ class TestBrokerBase(base.WorkflowUnitTest):
                           handler.general_param_check,
                           **input_values)
 
+    def _send_update_request(self):
+        # Create a request data
+        path = '/tickets/%s' % self.tickets.id
+        req = unit_test_utils.get_fake_request(method='PUT',
+                                               path=path)
+        headers = {'x-auth-token': 'user:tenant:director',
+                   'x-user-name': 'user-name',
+                   'x-tenant-name': 'tenant-name'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+        req.body = '{"ticket":{"additional_data": ' \
+                   '               {"description": "user applied"},' \
+                   '           "last_status_code": "%s",' \
+                   '           "last_workflow_id": "%s",' \
+                   '           "next_status_code": "%s",' \
+                   '           "next_workflow_id": "%s"}}' \
+                   % ('applied_1st', self.workflows['applied_1st'].id,
+                      'applied_2nd', self.workflows['applied_2nd'].id)
+
+        return req.get_response(self.api)
+
     def _create_handler(self, contents=None):
         template_contents = self.ticket_teamplate.template_contents \
             if contents is None else contents
@@ -0,0 +1,172 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+from datetime import timedelta
+import json
+import uuid
+
+from oslo_utils import timeutils
+
+from aflo.common import datetime_codec
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+from aflo.tickets.broker import sample_project_contract_handler
+from aflo.tickets.broker.utils import utils as broker_utils
+
+
+class TestTicketsArchive(base.WorkflowUnitTest):
+    """Do a test of 'Archive and purge tickets'"""
+
+    def create_fixtures(self):
+        super(TestTicketsArchive, self).create_fixtures()
+        past = timeutils.utcnow() - timedelta(days=10)
+
+        # Ticket in progress.
+        self.ticket0, self.t0_workflows = \
+            tickets_utils.create_ticket_for_update(db_models, 'tenant', 0)
+
+        # Ticket which is approved.
+        self.ticket1, self.t1_workflows = \
+            tickets_utils.create_ticket_for_update(db_models, 'tenant', 1)
+        self._update(db_models.Workflow, self.t1_workflows['applied_1st'].id,
+                     status=2)
+        self._update(db_models.Workflow, self.t1_workflows['approved'].id,
+                     status=1, updated_at=past)
+        db_api.ticket_operation_create(self.context,
+                                       ticket_id=self.ticket1.id,
+                                       action='tickets_update')
+
+        # Ticket which is deleted.
+        self.ticket2, self.t2_workflows = \
+            tickets_utils.create_ticket_for_update(db_models, 'tenant', 2)
+        db_api.tickets_delete(self.context, self.ticket2.id)
+        self._update(db_models.Ticket, self.ticket2.id, deleted_at=past)
+
+        # Ticket which is deleted just now.
+        self.ticket3, self.t3_workflows = \
+            tickets_utils.create_ticket_for_update(db_models, 'tenant', 3)
+        db_api.tickets_delete(self.context, self.ticket3.id)
+
+    def _update(self, model, row_id, **values):
+        session = db_api.get_session()
+        with session.begin():
+            session.query(model).filter_by(id=row_id).update(values)
+
+    def _ticket_ids(self, model):
+        session = db_api.get_session()
+        return set(row.id for row in session.query(model.id))
+
+    def _ticket_ids_of(self, model):
+        session = db_api.get_session()
+        return set(row.ticket_id for row in session.query(model.ticket_id))
+
+    def test_archive(self):
+        before = timeutils.utcnow() - timedelta(days=1)
+
+        counts = db_api.tickets_archive(self.context, before, batch_size=1)
+
+        self.assertEqual({'deleted': 1, 'closed': 1}, counts)
+        archived = set([self.ticket1.id, self.ticket2.id])
+        self.assertEqual(archived, self._ticket_ids(db_models.ShadowTicket))
+        self.assertEqual(set([self.ticket0.id, self.ticket3.id]),
+                         self._ticket_ids(db_models.Ticket))
+        self.assertEqual(archived,
+                         self._ticket_ids_of(db_models.ShadowWorkflow))
+        self.assertEqual(set([self.ticket0.id, self.ticket3.id]),
+                         self._ticket_ids_of(db_models.Workflow))
+        self.assertEqual(set([self.ticket1.id]), self._ticket_ids_of(
+            db_models.ShadowTicketOperation))
+        self.assertEqual(set(), self._ticket_ids_of(
+            db_models.TicketOperation))
+
+        session = db_api.get_session()
+        workflow = session.query(db_models.ShadowWorkflow)\
+            .filter_by(id=self.t1_workflows['approved'].id).one()
+        self.assertEqual('approved', workflow.status_code)
+        self.assertEqual({'status_code': 'approved',
+                          'status_name': {'Default': 'approved',
+                                          'ja_JP': 'approved_jp'},
+                          'next_status': [{}]},
+                         workflow.status_detail)
+        self.assertIsNotNone(workflow.archived_at)
+
+        # Nothing is left to archive.
+        self.assertEqual({'deleted': 0, 'closed': 0},
+                         db_api.tickets_archive(self.context, before))
+
+    def _create_contract(self, application_id, lifetime_end):
+        return db_api.contract_create(
+            self.context,
+            contract_id=str(uuid.uuid4()),
+            project_id='project_id',
+            application_id=application_id,
+            lifetime_start=datetime_codec.strftime(
+                timeutils.utcnow() - timedelta(days=30)),
+            lifetime_end=datetime_codec.strftime(lifetime_end))
+
+    def test_archive_application_of_live_contract(self):
+        before = timeutils.utcnow() - timedelta(days=1)
+        contract = self._create_contract(
+            self.ticket1.id, timeutils.utcnow() + timedelta(days=30))
+        self._update(db_models.Workflow, self.t1_workflows['approved'].id,
+                     additional_data=json.dumps({'project_id': 'project_id'}),
+                     updated_at=timeutils.utcnow() - timedelta(days=10))
+
+        counts = db_api.tickets_archive(self.context, before)
+
+        self.assertEqual({'deleted': 1, 'closed': 0}, counts)
+        self.assertIn(self.ticket1.id, self._ticket_ids(db_models.Ticket))
+
+        # The project of the contract can be cancelled.
+        self.stubs.Set(broker_utils, 'get_child_project_list',
+                       lambda project_id: [])
+        handler = sample_project_contract_handler.ProjectContractHandler(
+            self.context,
+            tickets_utils.get_dict_contents('template_contents_002',
+                                            '20160627'),
+            tickets_utils.get_dict_contents('wf_pattern_contents_002'))
+        handler.check_has_child_project(self.context, contract)
+
+    def test_archive_application_of_ended_contract(self):
+        before = timeutils.utcnow() - timedelta(days=1)
+        self._create_contract(self.ticket1.id,
+                              timeutils.utcnow() - timedelta(days=2))
+
+        counts = db_api.tickets_archive(self.context, before)
+
+        self.assertEqual({'deleted': 1, 'closed': 1}, counts)
+        self.assertNotIn(self.ticket1.id, self._ticket_ids(db_models.Ticket))
+
+    def test_archive_nothing(self):
+        before = timeutils.utcnow() - timedelta(days=30)
+
+        counts = db_api.tickets_archive(self.context, before)
+
+        self.assertEqual({'deleted': 0, 'closed': 0}, counts)
+        self.assertEqual(set(), self._ticket_ids(db_models.ShadowTicket))
+
+    def test_purge(self):
+        db_api.tickets_archive(self.context,
+                               timeutils.utcnow() - timedelta(days=1))
+
+        self.assertEqual(0, db_api.shadow_purge(
+            self.context, timeutils.utcnow() - timedelta(days=1)))
+        self.assertEqual(2, db_api.shadow_purge(
+            self.context, timeutils.utcnow() + timedelta(seconds=1),
+            batch_size=1))
+
+        self.assertEqual(set(), self._ticket_ids(db_models.ShadowTicket))
+        self.assertEqual(set(), self._ticket_ids_of(db_models.ShadowWorkflow))
+        self.assertEqual(set(), self._ticket_ids_of(
+            db_models.ShadowTicketOperation))
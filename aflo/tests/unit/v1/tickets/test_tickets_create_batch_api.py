@@ -0,0 +1,170 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import uuid
+
+from oslo_serialization import jsonutils
+
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+from aflo.tests.unit import utils as unit_test_utils
+from aflo.tests.unit.v1.tickets.broker_stubs.stubs import \
+    BrokerStubs as broker_stubs
+from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+from aflo.tickettemplates import manager as templates_manager
+
+WF_UUID1 = str(uuid.uuid4())
+TT_UUID1 = str(uuid.uuid4())
+
+
+class TestTicketsCreateBatchAPI(base.WorkflowUnitTest):
+    """Do a test of 'Create tickets at once'"""
+
+    def create_fixtures(self):
+        super(TestTicketsCreateBatchAPI, self).create_fixtures()
+
+        w_pattern = db_models.WorkflowPattern()
+        w_pattern.id = WF_UUID1
+        w_pattern.code = 'wfp_01'
+        w_pattern.wf_pattern_contents = tickets_utils.get_dict_contents(
+            'wf_pattern_contents_001')
+        w_pattern.save()
+
+        t_template = db_models.TicketTemplate()
+        t_template.id = TT_UUID1
+        t_template.workflow_pattern_id = w_pattern.id
+        t_template.template_contents = tickets_utils.get_dict_contents(
+            'template_contents_001', '20160627')
+        t_template.ticket_type = t_template.template_contents['ticket_type']
+        t_template.save()
+
+    def _get_request(self, tickets):
+        req = unit_test_utils.get_fake_request(method='POST',
+                                               path='/tickets/batch')
+        headers = {'x-auth-token': 'user:tenant:__member__',
+                   'x-user-name': 'user-name',
+                   'x-tenant-name': 'tenant-name'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+        req.body = self.serializer.to_json({'tickets': tickets})
+        return req
+
+    def _make_ticket(self, description, ticket_template_id=TT_UUID1):
+        return {'ticket_template_id': ticket_template_id,
+                'ticket_detail': {'num': 2, 'description': description},
+                'status_code': 'applied_1st'}
+
+    def _stubout(self):
+        call_info = stubs.stub_fake_cast(self, 'tickets_create_batch')
+        broker_stubs.stub_fake_param_check(self)
+        broker_stubs.stub_fake_before_action(self)
+        broker_stubs.stub_fake_after_action(self)
+        return call_info
+
+    def test_create_batch(self):
+        call_info = self._stubout()
+        get_calls = []
+        org_get = templates_manager.TicketTemplatesManager.\
+            ticket_templates_get
+
+        def fake_ticket_templates_get(manager, ctxt, ticket_template_id):
+            get_calls.append(ticket_template_id)
+            return org_get(manager, ctxt, ticket_template_id)
+
+        self.stubs.Set(templates_manager.TicketTemplatesManager,
+                       'ticket_templates_get', fake_ticket_templates_get)
+
+        req = self._get_request([self._make_ticket('test%s' % i)
+                                 for i in range(3)])
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        results = jsonutils.loads(res.body)['tickets']
+        self.assertEqual([0, 1, 2], [result['index'] for result in results])
+
+        # Template is loaded once, and tickets are sent in one message.
+        self.assertEqual([TT_UUID1], get_calls)
+        self.assertEqual('tickets_create_batch', call_info['req_method'])
+        self.assertEqual(3, len(call_info['req_kwargs']['tickets']))
+
+        for result in results:
+            ticket_id = result['ticket']['id']
+            workflows = db_api.workflow_list(self.context, ticket_id)
+            self.assertEqual(2, len(workflows))
+
+            operation = db_api.ticket_operation_get(
+                self.context, result['operation']['id'])
+            self.assertEqual(ticket_id, operation['ticket_id'])
+            self.assertEqual('succeeded', operation['status'])
+
+    def test_create_batch_partial_error(self):
+        call_info = self._stubout()
+
+        req = self._get_request([self._make_ticket('test0'),
+                                 self._make_ticket('test1',
+                                                   str(uuid.uuid4())),
+                                 {'ticket_template_id': TT_UUID1}])
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        results = jsonutils.loads(res.body)['tickets']
+        self.assertIn('ticket', results[0])
+        self.assertEqual(404, results[1]['error']['code'])
+        self.assertEqual(400, results[2]['error']['code'])
+        self.assertEqual(1, len(call_info['req_kwargs']['tickets']))
+
+    def test_create_batch_all_error(self):
+        call_info = self._stubout()
+
+        req = self._get_request([self._make_ticket('test0',
+                                                   str(uuid.uuid4()))])
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        results = jsonutils.loads(res.body)['tickets']
+        self.assertEqual(404, results[0]['error']['code'])
+        self.assertEqual({}, call_info)
+
+    def test_create_batch_broker_error(self):
+        self._stubout()
+        broker_stubs.stub_fake_exception_before_action(self)
+
+        req = self._get_request([self._make_ticket('test0'),
+                                 self._make_ticket('test1')])
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        for result in jsonutils.loads(res.body)['tickets']:
+            operation = db_api.ticket_operation_get(
+                self.context, result['operation']['id'])
+            self.assertEqual('failed', operation['status'])
+
+            workflows = db_api.workflow_list(self.context,
+                                             result['ticket']['id'])
+            self.assertIn('error', [workflow['status_code']
+                                    for workflow in workflows])
+
+    def test_create_batch_empty(self):
+        res = self._get_request([]).get_response(self.api)
+
+        self.assertEqual(res.status_int, 400)
+
+    def test_create_batch_too_many(self):
+        self.config(ticket_batch_max=1)
+
+        req = self._get_request([self._make_ticket('test0'),
+                                 self._make_ticket('test1')])
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 400)
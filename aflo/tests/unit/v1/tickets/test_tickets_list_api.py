@@ -669,3 +669,69 @@ class TestTicketsListAPI(base.WorkflowUnitTest):
         self.assertEqual(res.status_int, 200)
         res_objs = jsonutils.loads(res.body)['tickets']
         self.assertEqual(len(res_objs), 0)
+
+    def _get_summary(self, path, role='admin'):
+        req = unit_test_utils.get_fake_request(method='GET', path=path)
+        req.headers['x-auth-token'] = 'user:tenant:%s' % role
+        return req.get_response(self.api)
+
+    def test_summary_api(self):
+        """Test 'Count tickets by groups'
+        Test with group_by of ticket type and last status code.
+        """
+        res = self._get_summary(
+            '/tickets/summary?group_by=ticket_type,status_code')
+
+        self.assertEqual(res.status_int, 200)
+        body = jsonutils.loads(res.body)
+        self.assertEqual(5, body['total'])
+        self.assertEqual([
+            {'ticket_type': 'contract', 'status_code': 'applied',
+             'count': 1},
+            {'ticket_type': 'goods', 'status_code': 'applied_1st',
+             'count': 1},
+            {'ticket_type': 'goods', 'status_code': 'applied_2nd',
+             'count': 2},
+            {'ticket_type': 'request', 'status_code': 'applied_1st',
+             'count': 1}], body['summary'])
+
+    def test_summary_api_with_filters(self):
+        """Test 'Count tickets by groups'
+        Test with group_by of tenant and filters of the list.
+        """
+        res = self._get_summary('/tickets/summary?group_by=tenant_id'
+                                '&last_status_code=applied_2nd')
+
+        self.assertEqual(res.status_int, 200)
+        body = jsonutils.loads(res.body)
+        self.assertEqual(2, body['total'])
+        self.assertEqual([{'tenant_id': TEN_UUID1, 'count': 1},
+                          {'tenant_id': TEN_UUID2, 'count': 1}],
+                         body['summary'])
+
+    def test_summary_api_without_group_by(self):
+        """Test 'Count tickets by groups'
+        Test without group_by.
+        """
+        res = self._get_summary('/tickets/summary?ticket_type=goods')
+
+        self.assertEqual(res.status_int, 200)
+        body = jsonutils.loads(res.body)
+        self.assertEqual(3, body['total'])
+        self.assertEqual([{'count': 3}], body['summary'])
+
+    def test_summary_api_not_supported_group_by(self):
+        """Test 'Count tickets by groups'
+        Test with group_by which is not supported.
+        """
+        res = self._get_summary('/tickets/summary?group_by=owner_id')
+
+        self.assertEqual(res.status_int, 400)
+
+    def test_summary_api_no_authority(self):
+        """Test 'Count tickets by groups'
+        Test with a role which can not list tickets.
+        """
+        res = self._get_summary('/tickets/summary', role='__member__')
+
+        self.assertEqual(res.status_int, 403)
@@ -0,0 +1,137 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import uuid
+
+import eventlet
+import mock
+
+from aflo.common import exception
+import aflo.context
+from aflo.db.sqlalchemy import api as db_api
+from aflo.tests.unit import base
+from aflo.tickets import manager as manager_module
+from aflo.tickets.manager import TicketsManager
+
+TICKET_ID1 = str(uuid.uuid4())
+TICKET_ID2 = str(uuid.uuid4())
+
+
+class TestTicketsManager(base.WorkflowUnitTest):
+    """Do a test of 'TicketsManager'"""
+
+    def _db_stubout(self):
+        """Stub out 'tickets_update' and 'tickets_create'
+        to record the order of the start and the end.
+        """
+        events = []
+
+        def fake_update(ctxt, ticket_id, **values):
+            events.append(('start', ticket_id, values['seq']))
+            eventlet.sleep(0.05)
+            events.append(('end', ticket_id, values['seq']))
+
+        def fake_create(ctxt, **values):
+            fake_update(ctxt, values['id'], **values)
+
+        self.stubs.Set(db_api, 'tickets_update', fake_update)
+        self.stubs.Set(db_api, 'tickets_create', fake_create)
+
+        return events
+
+    def test_same_ticket_serialized(self):
+        events = self._db_stubout()
+        manager = TicketsManager()
+        ctxt = aflo.context.RequestContext(is_admin=True).to_dict()
+
+        threads = [
+            eventlet.spawn(manager.tickets_create, ctxt,
+                           id=TICKET_ID1, seq=1),
+            eventlet.spawn(manager.tickets_update, ctxt,
+                           ticket_id=TICKET_ID1, seq=2),
+            eventlet.spawn(manager.tickets_update, ctxt,
+                           ticket_id=TICKET_ID1, seq=3)]
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual([('start', TICKET_ID1, 1), ('end', TICKET_ID1, 1),
+                          ('start', TICKET_ID1, 2), ('end', TICKET_ID1, 2),
+                          ('start', TICKET_ID1, 3), ('end', TICKET_ID1, 3)],
+                         events)
+
+    def test_other_tickets_concurrent(self):
+        events = self._db_stubout()
+        manager = TicketsManager()
+        ctxt = aflo.context.RequestContext(is_admin=True).to_dict()
+
+        threads = [
+            eventlet.spawn(manager.tickets_update, ctxt,
+                           ticket_id=TICKET_ID1, seq=1),
+            eventlet.spawn(manager.tickets_update, ctxt,
+                           ticket_id=TICKET_ID2, seq=1)]
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual([('start', TICKET_ID1, 1), ('start', TICKET_ID2, 1),
+                          ('end', TICKET_ID1, 1), ('end', TICKET_ID2, 1)],
+                         events)
+
+    def test_operation_failed(self):
+        def fake_update(ctxt, ticket_id, **values):
+            raise exception.BrokerError(location='after', cause='error')
+
+        self.stubs.Set(db_api, 'tickets_update', fake_update)
+        manager = TicketsManager()
+        ctxt = aflo.context.RequestContext(is_admin=True).to_dict()
+        operation = manager.operations_create(None, TICKET_ID1,
+                                              'tickets_update')
+
+        self.assertRaises(exception.BrokerError,
+                          manager.tickets_update, ctxt,
+                          ticket_id=TICKET_ID1,
+                          operation_id=operation['id'])
+
+        operation = manager.operations_get(None, operation['id'])
+        self.assertEqual('failed', operation['status'])
+        self.assertIn('error', operation['error_message'])
+        self.assertIsNotNone(operation['finished_at'])
+
+    def test_statements_counted(self):
+        def fake_update(ctxt, ticket_id, **values):
+            db_api.workflow_patterns_list(ctxt)
+
+        self.stubs.Set(db_api, 'tickets_update', fake_update)
+        manager = TicketsManager()
+        ctxt = aflo.context.RequestContext(is_admin=True).to_dict()
+
+        with mock.patch.object(manager_module.LOG, 'info') as info:
+            manager.tickets_update(ctxt, ticket_id=TICKET_ID1)
+
+        args = info.call_args[0][1]
+        self.assertEqual('tickets_update', args['method'])
+        self.assertTrue(args['statements'] >= 1)
+        self.assertIsNone(db_api.statement_stats_current())
+
+    def test_same_ticket_in_order(self):
+        events = self._db_stubout()
+        manager = TicketsManager()
+        ctxt = aflo.context.RequestContext(is_admin=True).to_dict()
+
+        threads = [eventlet.spawn(manager.tickets_update, ctxt,
+                                  ticket_id=TICKET_ID1, seq=seq)
+                   for seq in range(10)]
+        for thread in threads:
+            thread.wait()
+
+        self.assertEqual(range(10),
+                         [seq for event, ticket_id, seq in events
+                          if event == 'start'])
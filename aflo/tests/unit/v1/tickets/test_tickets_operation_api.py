@@ -0,0 +1,173 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import uuid
+
+from oslo_serialization import jsonutils
+
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+from aflo.tests.unit import utils as unit_test_utils
+from aflo.tests.unit.v1.tickets.broker_stubs.stubs import \
+    BrokerStubs as broker_stubs
+from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+
+WF_UUID1 = str(uuid.uuid4())
+TT_UUID1 = str(uuid.uuid4())
+TICKET_UUID1 = str(uuid.uuid4())
+
+
+class TestTicketsOperationAPI(base.WorkflowUnitTest):
+    """Do a test of 'Show an operation to a ticket'"""
+
+    def setUp(self):
+        """Establish a clean test environment"""
+        super(TestTicketsOperationAPI, self).setUp()
+        self.config(ticket_operation_poll_interval=0.01)
+
+    def create_fixtures(self):
+        super(TestTicketsOperationAPI, self).create_fixtures()
+
+        w_pattern = db_models.WorkflowPattern()
+        w_pattern.id = WF_UUID1
+        w_pattern.code = 'wfp_01'
+        w_pattern.wf_pattern_contents = tickets_utils.get_dict_contents(
+            'wf_pattern_contents_001')
+        w_pattern.save()
+
+        t_template = db_models.TicketTemplate()
+        t_template.id = TT_UUID1
+        t_template.workflow_pattern_id = w_pattern.id
+        t_template.template_contents = tickets_utils.get_dict_contents(
+            'template_contents_001', '20160627')
+        t_template.ticket_type = t_template.template_contents['ticket_type']
+        t_template.save()
+
+    def _get_request(self, path, method='GET', role='admin'):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        headers = {'x-auth-token': 'user:tenant:%s' % role,
+                   'x-user-name': 'user-name',
+                   'x-tenant-name': 'tenant-name'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+        return req
+
+    def _create_ticket(self):
+        req = self._get_request('/tickets', method='POST',
+                                role='__member__')
+        body = {'ticket': {'ticket_template_id': TT_UUID1,
+                           'ticket_detail': {'num': 2,
+                                             'description': 'test01'},
+                           'status_code': 'applied_1st'}}
+        req.body = self.serializer.to_json(body)
+
+        stubs.stub_fake_cast(self, 'tickets_create')
+        broker_stubs.stub_fake_param_check(self)
+        broker_stubs.stub_fake_before_action(self)
+        broker_stubs.stub_fake_after_action(self)
+
+        res = req.get_response(self.api)
+        self.assertEqual(res.status_int, 200)
+        return jsonutils.loads(res.body)
+
+    def _create_operation(self, status):
+        return db_api.ticket_operation_create(self.context,
+                                              ticket_id=TICKET_UUID1,
+                                              action='tickets_update',
+                                              status=status)
+
+    def test_create_returns_operation(self):
+        body = self._create_ticket()
+
+        operation = body['operation']
+        self.assertEqual(body['ticket']['id'], operation['ticket_id'])
+        self.assertEqual('tickets_create', operation['action'])
+        self.assertEqual('queued', operation['status'])
+
+        path = '/tickets/%s/operations/%s' % (operation['ticket_id'],
+                                              operation['id'])
+        res = self._get_request(path).get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('"succeeded"', res.headers['ETag'])
+        operation = jsonutils.loads(res.body)['operation']
+        self.assertEqual('succeeded', operation['status'])
+        self.assertIsNotNone(operation['started_at'])
+        self.assertIsNotNone(operation['finished_at'])
+
+    def test_show_not_modified(self):
+        operation = self._create_operation('running')
+
+        path = '/tickets/%s/operations/%s?wait=0.05' % (
+            TICKET_UUID1, operation['id'])
+        req = self._get_request(path)
+        req.headers['If-None-Match'] = '"running"'
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 304)
+
+    def test_show_wait_for_change(self):
+        operation = self._create_operation('running')
+        calls = []
+        org_get = db_api.ticket_operation_get
+
+        def fake_ticket_operation_get(ctxt, operation_id):
+            calls.append(operation_id)
+            if len(calls) == 3:
+                db_api.ticket_operation_update(ctxt, operation_id,
+                                               status='succeeded')
+            return org_get(ctxt, operation_id)
+
+        self.stubs.Set(db_api, 'ticket_operation_get',
+                       fake_ticket_operation_get)
+
+        path = '/tickets/%s/operations/%s?wait=10' % (
+            TICKET_UUID1, operation['id'])
+        req = self._get_request(path)
+        req.headers['If-None-Match'] = '"running"'
+        res = req.get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual(3, len(calls))
+        self.assertEqual('succeeded',
+                         jsonutils.loads(res.body)['operation']['status'])
+
+    def test_show_wait_until_finished(self):
+        operation = self._create_operation('queued')
+
+        path = '/tickets/%s/operations/%s?wait=0.05' % (
+            TICKET_UUID1, operation['id'])
+        res = self._get_request(path).get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual('queued',
+                         jsonutils.loads(res.body)['operation']['status'])
+
+    def test_show_other_ticket(self):
+        operation = self._create_operation('queued')
+
+        path = '/tickets/%s/operations/%s' % (str(uuid.uuid4()),
+                                              operation['id'])
+        res = self._get_request(path).get_response(self.api)
+
+        self.assertEqual(res.status_int, 404)
+
+    def test_show_invalid_wait(self):
+        operation = self._create_operation('queued')
+
+        path = '/tickets/%s/operations/%s?wait=x' % (
+            TICKET_UUID1, operation['id'])
+        res = self._get_request(path).get_response(self.api)
+
+        self.assertEqual(res.status_int, 400)
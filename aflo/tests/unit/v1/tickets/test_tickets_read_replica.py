@@ -0,0 +1,85 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import aflo.context
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+import aflo.tests.unit.utils as unit_test_utils
+from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+
+
+class TestTicketsReadReplica(base.WorkflowUnitTest):
+    """Do a test of routing read-only queries to the replica"""
+
+    def create_fixtures(self):
+        super(TestTicketsReadReplica, self).create_fixtures()
+
+        self.ticket, self.workflows = \
+            tickets_utils.create_ticket_for_update(db_models, 'tenant', 0)
+
+    def _session_stubout(self):
+        """Stub out 'get_session' to record 'use_slave'."""
+        calls = []
+        org_get_session = db_api.get_session
+
+        def fake_get_session(autocommit=True, expire_on_commit=False,
+                             use_slave=False):
+            calls.append(use_slave)
+            return org_get_session(autocommit, expire_on_commit)
+
+        self.stubs.Set(db_api, 'get_session', fake_get_session)
+
+        return calls
+
+    def _get_request(self, path, method='GET'):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        req.headers['x-auth-token'] = 'user:tenant:admin'
+        return req
+
+    def test_list_uses_replica(self):
+        calls = self._session_stubout()
+
+        res = self._get_request('/tickets').get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertEqual([True], calls)
+
+    def test_show_uses_replica(self):
+        calls = self._session_stubout()
+
+        res = self._get_request(
+            '/tickets/%s' % self.ticket.id).get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertIn(True, calls)
+
+    def test_read_primary(self):
+        calls = self._session_stubout()
+        ctxt = aflo.context.RequestContext(is_admin=True, read_primary=True)
+
+        db_api.tickets_get(ctxt, self.ticket.id)
+        db_api.tickets_list(ctxt, filters={})
+
+        self.assertEqual([False, False], calls)
+
+    def test_ticket_operation_reads_primary(self):
+        call_info = stubs.stub_fake_cast(self, 'tickets_delete')
+        calls = self._session_stubout()
+
+        res = self._get_request('/tickets/%s' % self.ticket.id,
+                                method='DELETE').get_response(self.api)
+
+        self.assertEqual(res.status_int, 200)
+        self.assertTrue(call_info['req_ctxt'].read_primary)
+        self.assertNotIn(True, calls)
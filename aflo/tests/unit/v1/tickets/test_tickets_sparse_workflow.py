@@ -0,0 +1,175 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import uuid
+
+from oslo_serialization import jsonutils
+
+from aflo.common import exception
+from aflo.db.sqlalchemy import api as db_api
+from aflo.db.sqlalchemy import models as db_models
+from aflo.tests.unit import base
+from aflo.tests.unit import utils as unit_test_utils
+from aflo.tests.unit.v1.tickets.broker_stubs.stubs import \
+    BrokerStubs as broker_stubs
+from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tests.unit.v1.tickets import utils as tickets_utils
+
+WF_UUID1 = str(uuid.uuid4())
+TT_UUID1 = str(uuid.uuid4())
+
+
+class TestTicketsSparseWorkflow(base.WorkflowUnitTest):
+    """Do a test of the sparse storage of workflows"""
+
+    def setUp(self):
+        super(TestTicketsSparseWorkflow, self).setUp()
+        self.config(workflow_storage='sparse')
+        broker_stubs.stub_fake_param_check(self)
+        broker_stubs.stub_fake_before_action(self)
+        broker_stubs.stub_fake_after_action(self)
+
+    def create_fixtures(self):
+        super(TestTicketsSparseWorkflow, self).create_fixtures()
+
+        w_pattern = db_models.WorkflowPattern()
+        w_pattern.id = WF_UUID1
+        w_pattern.code = 'wfp_01'
+        w_pattern.wf_pattern_contents = tickets_utils.get_dict_contents(
+            'wf_pattern_contents_001')
+        w_pattern.save()
+
+        t_template = db_models.TicketTemplate()
+        t_template.id = TT_UUID1
+        t_template.workflow_pattern_id = w_pattern.id
+        t_template.template_contents = tickets_utils.get_dict_contents(
+            'template_contents_001', '20160627')
+        t_template.ticket_type = t_template.template_contents['ticket_type']
+        t_template.save()
+
+    def _request(self, method, path, role, body):
+        req = unit_test_utils.get_fake_request(method=method, path=path)
+        headers = {'x-auth-token': 'user:tenant:%s' % role,
+                   'x-user-name': 'user-name',
+                   'x-tenant-name': 'tenant-name'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+        req.body = self.serializer.to_json(body)
+        res = req.get_response(self.api)
+        self.assertEqual(200, res.status_int)
+        return jsonutils.loads(res.body)
+
+    def _create(self):
+        body = {'ticket': {'ticket_template_id': TT_UUID1,
+                           'ticket_detail': {'num': 2,
+                                             'description': 'test01'},
+                           'status_code': 'applied_1st'}}
+        stubs.stub_fake_cast(self, 'tickets_create')
+        return self._request('POST', '/tickets', '__member__',
+                             body)['ticket']['id']
+
+    def _stored(self, ticket_id):
+        session = db_api.get_session()
+        return dict((wf.status_code, wf) for wf in
+                    session.query(db_models.Workflow).
+                    filter_by(ticket_id=ticket_id))
+
+    def _shown(self, ticket_id):
+        ticket = db_api.tickets_get(self.context, ticket_id)
+        return dict((wf.status_code, wf) for wf in ticket.workflow)
+
+    def test_create(self):
+        ticket_id = self._create()
+
+        stored = self._stored(ticket_id)
+        self.assertEqual(['applied_1st'], list(stored))
+        self.assertEqual(db_api._workflow_id(ticket_id, 'applied_1st'),
+                         stored['applied_1st'].id)
+        self.assertEqual(1, stored['applied_1st'].status)
+
+    def test_show_derives_unreached_statuses(self):
+        ticket_id = self._create()
+
+        shown = self._shown(ticket_id)
+        self.assertEqual(['applied_1st', 'applied_2nd'], sorted(shown))
+        unreached = shown['applied_2nd']
+        self.assertEqual(db_api._workflow_id(ticket_id, 'applied_2nd'),
+                         unreached.id)
+        self.assertEqual(0, unreached.status)
+        self.assertIsNone(unreached.confirmer_id)
+        self.assertEqual('applied_2nd',
+                         unreached.status_detail['status_code'])
+
+    def test_update_stores_reached_status(self):
+        ticket_id = self._create()
+        shown = self._shown(ticket_id)
+
+        body = {'ticket': {'additional_data': {'description': 'approved'},
+                           'last_status_code': 'applied_1st',
+                           'last_workflow_id': shown['applied_1st'].id,
+                           'next_status_code': 'applied_2nd',
+                           'next_workflow_id': shown['applied_2nd'].id}}
+        stubs.stub_fake_cast(self, 'tickets_update')
+        self._request('PUT', '/tickets/%s' % ticket_id, 'director', body)
+
+        stored = self._stored(ticket_id)
+        self.assertEqual(['applied_1st', 'applied_2nd'], sorted(stored))
+        self.assertEqual(2, stored['applied_1st'].status)
+        self.assertEqual(1, stored['applied_2nd'].status)
+        self.assertEqual(shown['applied_2nd'].id, stored['applied_2nd'].id)
+        self.assertEqual('user-name', stored['applied_2nd'].confirmer_name)
+
+    def test_update_after_switching_to_full(self):
+        ticket_id = self._create()
+        shown = self._shown(ticket_id)
+
+        self.config(workflow_storage='full')
+        self.assertEqual(['applied_1st', 'applied_2nd'],
+                         sorted(self._shown(ticket_id)))
+
+        body = {'ticket': {'additional_data': {'description': 'approved'},
+                           'last_status_code': 'applied_1st',
+                           'last_workflow_id': shown['applied_1st'].id,
+                           'next_status_code': 'applied_2nd',
+                           'next_workflow_id': shown['applied_2nd'].id}}
+        stubs.stub_fake_cast(self, 'tickets_update')
+        self._request('PUT', '/tickets/%s' % ticket_id, 'director', body)
+
+        stored = self._stored(ticket_id)
+        self.assertEqual(2, stored['applied_1st'].status)
+        self.assertEqual(1, stored['applied_2nd'].status)
+
+    def test_next_workflow_of_other_ticket(self):
+        ticket_id = self._create()
+        wf_pattern = tickets_utils.get_dict_contents(
+            'wf_pattern_contents_001')
+
+        self.assertRaises(
+            exception.NotFound,
+            db_api._next_workflow_get, self.context, db_api.get_session(),
+            wf_pattern, ticket_id=ticket_id,
+            after_status_code='applied_2nd',
+            next_workflow_id=db_api._workflow_id(str(uuid.uuid4()),
+                                                 'applied_2nd'))
+
+    def test_compact(self):
+        self.config(workflow_storage='full')
+        ticket_id = self._create()
+        self.assertEqual(2, len(self._stored(ticket_id)))
+
+        self.config(workflow_storage='sparse')
+        self.assertEqual(1, db_api.workflows_compact(self.context, 1))
+        self.assertEqual(0, db_api.workflows_compact(self.context))
+
+        self.assertEqual(['applied_1st'], list(self._stored(ticket_id)))
+        self.assertEqual(['applied_1st', 'applied_2nd'],
+                         sorted(self._shown(ticket_id)))
@@ -23,6 +23,7 @@ import aflo.tests.unit.utils as unit_test_utils
 from aflo.tests.unit.v1.tickets.broker_stubs.stubs import \
     BrokerStubs as broker_stubs
 from aflo.tests.unit.v1.tickets.stubs import Ticket_RpcStubs as stubs
+from aflo.tickets.manager import TicketsManager
 
 CONF = cfg.CONF
 
@@ -1262,3 +1263,46 @@ class TestTicketsUpdateAPI(base.WorkflowUnitTest):
 
         # Examination of response
         self.assertEqual(res.status_int, 404)
+
+    def test_update_rpc_replayed_irregular(self):
+        """Do a test of 'Update ticket'
+        A message of an update which is sent again does not update
+        the ticket again.
+        """
+        # Create a request data
+        path = '/tickets/%s' % self.tickets1.id
+        req = unit_test_utils.get_fake_request(method='PUT',
+                                               path=path)
+        headers = {'x-auth-token': 'user:tenant:director',
+                   'x-user-name': 'user-name',
+                   'x-tenant-name': 'tenant-name'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+        workflows = self.t1_workflows
+        body = {'ticket': {'additional_data': {'description': 'user applied'},
+                           'last_status_code': 'applied_1st',
+                           'last_workflow_id': workflows['applied_1st'].id,
+                           'next_status_code': 'applied_2nd',
+                           'next_workflow_id': workflows['applied_2nd'].id}}
+        req.body = self.serializer.to_json(body)
+
+        # set stubs
+        call_info = stubs.stub_fake_cast(self, 'tickets_update')
+        broker_stubs.stub_fake_param_check(self)
+        broker_stubs.stub_fake_before_action(self)
+        broker_stubs.stub_fake_after_action(self)
+
+        req.get_response(self.api)
+
+        # Send the message again
+        self.assertRaises(exception.InvalidStatus,
+                          TicketsManager().tickets_update,
+                          call_info['req_ctxt'].to_dict(),
+                          **call_info['req_kwargs'])
+
+        session = db_api.get_session()
+        active = session.query(db_models.Workflow).\
+            filter_by(ticket_id=self.tickets1.id).\
+            filter_by(status=1).all()
+        self.assertEqual([workflows['applied_2nd'].id],
+                         [wf.id for wf in active])
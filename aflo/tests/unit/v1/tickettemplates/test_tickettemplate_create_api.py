@@ -16,6 +16,7 @@ import uuid
 from oslo_config import cfg
 from oslo_serialization import jsonutils
 
+from aflo.db.sqlalchemy import api as db_api
 from aflo.db.sqlalchemy import models as db_models
 from aflo.tests.unit import base
 from aflo.tests.unit import utils as unit_test_utils
@@ -87,6 +88,17 @@ class TestTickettemplatesCreateAPI(base.WorkflowUnitTest):
         self.assertIsNotNone(tickettemplate['updated_at'])
         self.assertEqual(tickettemplate['deleted'], False)
 
+        # The grant roles of the workflow pattern are stored.
+        wf_pattern_contents = utils.get_dict_contents(
+            WORKFLOW_PATTERN_DIR, 'workflow_pattern_contents')
+        grant_roles = db_api.get_session()\
+            .query(db_models.TicketTemplateGrantRole)\
+            .filter_by(ticket_template_id=tickettemplate['id']).all()
+        self.assertEqual(
+            sorted(set(db_api.workflow_pattern_grant_roles(
+                wf_pattern_contents))),
+            sorted(grant_role.role for grant_role in grant_roles))
+
     def test_create_contents_no_data_irregular(self):
         """Test 'Create ticket template'
         Test the operation of the parameter without.
@@ -13,6 +13,7 @@
 from oslo_config import cfg
 from oslo_serialization import jsonutils
 
+from aflo.db.sqlalchemy import api as db_api
 from aflo.db.sqlalchemy import models as db_models
 from aflo.tests.unit import base
 from aflo.tests.unit import utils as unit_test_utils
@@ -72,6 +73,9 @@ class TestTicketTemplatesListAPI(base.WorkflowUnitTest):
                                      ticket_type="New Contract",
                                      target_id=target_id1)
 
+        # Make the grant roles of the templates created without the API.
+        db_api.ticket_template_grant_roles_rebuild_all(self.context)
+
     def test_index_api_non_params(self):
         """Do a test of 'List Search of tickettemplates'
         Test the operation of the parameter without.
@@ -584,6 +588,47 @@ class TestTicketTemplatesListAPI(base.WorkflowUnitTest):
         res_objs = jsonutils.loads(res.body)['tickettemplates']
         self.assertEqual(len(res_objs), 0)
 
+    def test_index_api_filter_fills_page(self):
+        """Test 'List Search of tickettemplates'
+        Test a page of 'limit' templates, when expansion filters
+        remove templates of the first query page.
+        """
+
+        # Create a request data
+        path = '/tickettemplates?ticket_type=%s' \
+            '&enable_expansion_filters=%s&limit=%d&sort_dir=%s' \
+            % ('New Contract,request', 'True', 2, 'asc')
+        req = unit_test_utils.get_fake_request(method='GET', path=path)
+        headers = {'x-auth-token': 'user:tenant:admin'}
+        for k, v in headers.iteritems():
+            req.headers[k] = v
+
+        # Send request
+        res = req.get_response(self.api)
+
+        # Examination of response
+        self.assertEqual(res.status_int, 200)
+        res_objs = jsonutils.loads(res.body)['tickettemplates']
+        self.assertEqual(len(res_objs), 2)
+        self.assertEqual(res_objs[0]['id'], TT_UUID3)
+        self.assertEqual(res_objs[1]['id'], TT_UUID6)
+
+    def test_list_filter_roles(self):
+        """Test filtering ticket templates by the grant roles in SQL"""
+        ticket_templates = db_api.ticket_templates_list(
+            self.context, roles=['admin'])
+        self.assertNotIn(TT_UUID_NO_ROLE,
+                         [template.id for template in ticket_templates])
+        self.assertEqual(6, len(ticket_templates))
+
+        ticket_templates = db_api.ticket_templates_list(
+            self.context, roles=['xxxx'])
+        self.assertEqual([TT_UUID_NO_ROLE],
+                         [template.id for template in ticket_templates])
+
+        self.assertEqual([], db_api.ticket_templates_list(self.context,
+                                                          roles=[]))
+
     def test_index_api_irregular_invalid_filter_config(self):
         """Test 'List Search of tickettemplates'
         Test the config of the value without.
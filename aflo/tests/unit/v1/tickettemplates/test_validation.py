@@ -0,0 +1,110 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+import testtools
+
+from aflo.common.broker_base import BrokerBase
+from aflo.common import exception
+from aflo.tickettemplates import templates
+
+TEMPLATE_CONTENTS = {
+    'ticket_template_version': '2016-06-27',
+    'create': {'parameters': [
+        {'key': 'num', 'label': {'Default': 'Num'}, 'type': 'number',
+         'constraints': {'required': True,
+                         'range': {'min': '1', 'max': 10}}},
+        {'key': 'name', 'label': {'Default': 'Name'}, 'type': 'string',
+         'constraints': {'length': {'min': 2, 'max': 5},
+                         'allowed_pattern': '^[a-z]+$'}},
+        {'key': 'size', 'label': {'Default': 'Size'}, 'type': 'string',
+         'constraints': {'allowed_values': [{'value': 'S'},
+                                            {'value': 'L'}]}},
+        {'key': 'mail', 'label': {'Default': 'Mail'}, 'type': 'email'},
+        {'key': 'flag', 'label': {'Default': 'Flag'}, 'type': 'boolean'},
+        {'key': 'date', 'label': {'Default': 'Date'}, 'type': 'date'}]},
+    'update': {'parameters': [
+        {'key': 'reason', 'label': {'Default': 'Reason'}, 'type': 'string',
+         'status': 'applied', 'constraints': {'required': True}},
+        {'key': 'memo', 'label': {'Default': 'Memo'}, 'type': 'string',
+         'constraints': {'length': {'min': 0, 'max': 3}}}]},
+}
+
+
+class TestValidationPlan(testtools.TestCase):
+    """Do a test of 'ValidationPlan'"""
+
+    def _validate(self, before_status_code=None, **data):
+        template = templates.TicketTemplate.load(TEMPLATE_CONTENTS)
+        return template.get_validation_plan(
+            before_status_code).validate(data)
+
+    def test_valid(self):
+        errors = self._validate(num='10', name=u'abc', size='L',
+                                mail='a@example.com', flag='True',
+                                date='2016-01-01T00:00')
+        self.assertEqual([], errors)
+
+    def test_errors_in_one_pass(self):
+        errors = self._validate(num='0', name='ABC', size='M',
+                                mail='mail', flag='yes', date='x')
+
+        self.assertEqual([('Num', 'is too small'),
+                          ('Name', 'is invalid pattern'),
+                          ('Size', 'is invalid value'),
+                          ('Mail', 'is invalid email'),
+                          ('Flag', 'is invalid value'),
+                          ('Date', 'is invalid value')],
+                         [(error['param'], error['extra_msg'])
+                          for error in errors])
+
+    def test_number(self):
+        self.assertEqual('is not number',
+                         self._validate(num='x')[0]['extra_msg'])
+        self.assertEqual('is too large',
+                         self._validate(num=11)[0]['extra_msg'])
+        self.assertEqual('is None but is required',
+                         self._validate(num='')[0]['extra_msg'])
+
+    def test_string_length(self):
+        self.assertEqual('is too short',
+                         self._validate(num=1, name='a')[0]['extra_msg'])
+        self.assertEqual('is too long',
+                         self._validate(num=1, name=u'abcdef')[0]['extra_msg'])
+
+    def test_update_status(self):
+        errors = self._validate('applied', memo='long')
+        self.assertEqual([('Reason', 'is None but is required'),
+                          ('Memo', 'is too long')],
+                         [(error['param'], error['extra_msg'])
+                          for error in errors])
+
+        errors = self._validate('approved', memo='ok')
+        self.assertEqual([], errors)
+
+    def test_plan_compiled_once(self):
+        template = templates.TicketTemplate.load(TEMPLATE_CONTENTS)
+
+        self.assertIs(template.get_validation_plan(None),
+                      template.get_validation_plan(None))
+        self.assertIsNot(template.get_validation_plan(None),
+                         template.get_validation_plan('applied'))
+
+    def test_general_param_check(self):
+        broker = BrokerBase(None, TEMPLATE_CONTENTS, {})
+
+        error = self.assertRaises(exception.InvalidParameterValue,
+                                  broker.general_param_check,
+                                  ticket_detail={'num': '0', 'size': 'M'})
+
+        self.assertEqual({'value': '0', 'param': 'Num',
+                          'extra_msg': 'is too small'}, error.msg)
+        self.assertEqual(2, len(error.errors))
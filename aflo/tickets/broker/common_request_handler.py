@@ -17,7 +17,6 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
-from aflo.common import mail
 from aflo.db.sqlalchemy import api as db_api
 from aflo.mail.common_request import mail_common_request_accepted
 from aflo.mail.common_request import mail_common_request_completed
@@ -64,9 +63,9 @@ class UserEntryRequestHandler(BrokerBase):
                 }
 
         if CONF.mail.smtp_server:
-            mail.sendmail(addresses,
-                          mail_user_registration_request,
-                          data)
+            self._sendmail(addresses,
+                           mail_user_registration_request,
+                           data)
 
     def mail_to_member(self, session, *args, **values):
         owner_mail = broker_utils.get_email_address(values.get('owner_id'))
@@ -99,14 +98,14 @@ class UserEntryRequestHandler(BrokerBase):
 
         if CONF.mail.smtp_server:
             if 'working' == self.after_status_code:
-                mail.sendmail(addresses,
-                              mail_user_registration_accepted,
-                              data)
+                self._sendmail(addresses,
+                               mail_user_registration_accepted,
+                               data)
 
             elif 'done' == self.after_status_code:
-                mail.sendmail(addresses,
-                              mail_user_registration_completed,
-                              data)
+                self._sendmail(addresses,
+                               mail_user_registration_completed,
+                               data)
 
 
 class CommonRequestHandler(BrokerBase):
@@ -156,9 +155,9 @@ class CommonRequestHandler(BrokerBase):
                 }
 
         if CONF.mail.smtp_server:
-            mail.sendmail(addresses,
-                          mail_common_request_request,
-                          data)
+            self._sendmail(addresses,
+                           mail_common_request_request,
+                           data)
 
     def mail_to_member(self, session, *args, **values):
         owner_mail = broker_utils.get_email_address(values.get('owner_id'))
@@ -188,11 +187,11 @@ class CommonRequestHandler(BrokerBase):
 
         if CONF.mail.smtp_server:
             if 'working' == self.after_status_code:
-                mail.sendmail(addresses,
-                              mail_common_request_accepted,
-                              data)
+                self._sendmail(addresses,
+                               mail_common_request_accepted,
+                               data)
 
             elif 'done' == self.after_status_code:
-                mail.sendmail(addresses,
-                              mail_common_request_completed,
-                              data)
+                self._sendmail(addresses,
+                               mail_common_request_completed,
+                               data)
@@ -18,6 +18,8 @@ import requests
 import six
 import six.moves.urllib.parse as urlparse
 import sys
+import threading
+import time
 
 from oslo_config import cfg
 from oslo_log import log as logging
@@ -25,10 +27,11 @@ from requests.exceptions import ConnectionError
 from requests.exceptions import SSLError
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import cache
+from aflo.common import datetime_codec
 from aflo.common.exception import Forbidden
 from aflo.common.exception import InvalidParameterValue
 from aflo.common.exception import NotFound
-from aflo.common import mail
 from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
 from aflo.mail.add_announcement import mail_add_announcement_registration
@@ -49,6 +52,61 @@ SCOPE_REGION = 'region'
 MACHINE_READABLE_NAME_CATEGORY = 'category'
 MACHINE_READABLE_NAME_PROJECT = 'tenantid'
 MACHINE_READABLE_NAME_REGION = 'region'
+SESSION_EXPIRED_STATUS_CODES = (401,)
+
+_HTTP_SESSION = None
+_LOGIN_LOCK = threading.Lock()
+_LOGINS = []
+_TAXONOMY_ID_CACHE = cache.Cache('announcement_taxonomy_ids')
+
+
+def _get_http_session():
+    """Get a HTTP session to the announcement system.
+    The connections are kept alive and pooled between tickets.
+    """
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=CONF.announcement.pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _HTTP_SESSION = session
+    return _HTTP_SESSION
+
+
+class _Login(object):
+    """A login to the announcement system shared by greenthreads."""
+
+    def __init__(self, headers, expires):
+        self.headers = headers
+        self.expires = expires
+        self.users = 1
+        self.retired = False
+
+
+def _find_login(headers):
+    for login in _LOGINS:
+        if login.headers is headers:
+            return login
+    return None
+
+
+def _retire_login(login):
+    """Stop sharing a login.
+    Return the headers to logout if nobody uses the login any more.
+    """
+    login.retired = True
+    if login.users == 0 and login in _LOGINS:
+        _LOGINS.remove(login)
+        return login.headers
+    return None
+
+
+def clear_cache():
+    """Forget a login and taxonomy ids of the announcement system."""
+    del _LOGINS[:]
+    _TAXONOMY_ID_CACHE.invalidate()
 
 
 class AddAnnouncementHandler(BrokerBase):
@@ -64,19 +122,16 @@ class AddAnnouncementHandler(BrokerBase):
             ticket_detail['publish_on'], ticket_detail['unpublish_on'])
 
         # Integrity check for announcement data.
-        login_response = self._login()
-        headers = self._get_headers(login_response)
+        headers = self._get_login_headers()
         self._integrity_check_for_announcement_data(
             headers, ticket_detail['field_category'], ticket_detail['scope'],
             ticket_detail['target_name'])
-        self._logout(headers)
+        self._release_login_headers(headers)
 
     def _check_for_public(self, publish_on, unpublish_on):
         now = datetime.datetime.utcnow()
-        datetime_publish_on = datetime.datetime.strptime(
-            publish_on, '%Y-%m-%dT%H:%M:%S.%f')
-        datetime_unpublish_on = datetime.datetime.strptime(
-            unpublish_on, '%Y-%m-%dT%H:%M:%S.%f') + \
+        datetime_publish_on = datetime_codec.strptime(publish_on)
+        datetime_unpublish_on = datetime_codec.strptime(unpublish_on) + \
             datetime.timedelta(hours=24) - datetime.timedelta(seconds=1)
 
         if now >= datetime_unpublish_on:
@@ -128,6 +183,23 @@ class AddAnnouncementHandler(BrokerBase):
         if not target_name:
             return ''
 
+        key = '%s:%s' % (machine_readable_name, target_name)
+        ttl = CONF.announcement.taxonomy_cache_ttl
+        if 0 < ttl:
+            cached = _TAXONOMY_ID_CACHE.get(key)
+            if cached is not None:
+                return cached
+
+        taxonomy_id = self._get_taxonomy_id_from_announcement(
+            headers, machine_readable_name, target_name)
+
+        if 0 < ttl:
+            _TAXONOMY_ID_CACHE.set(key, taxonomy_id, ttl)
+
+        return taxonomy_id
+
+    def _get_taxonomy_id_from_announcement(
+            self, headers, machine_readable_name, target_name):
         action_name = sys._getframe().f_code.co_name
         error_message = None
         taxonomy_id = ''
@@ -225,7 +297,7 @@ class AddAnnouncementHandler(BrokerBase):
         for (k, v) in six.iteritems(ticket_detail):
             data[k] = v
 
-        mail.sendmail(dest_addresses, mail_add_announcement_request, data)
+        self._sendmail(dest_addresses, mail_add_announcement_request, data)
 
     def data_registration_for_add_announcement(self, session, ctxt, **values):
         ticket = db_api.tickets_get(ctxt, values['id'])
@@ -240,13 +312,52 @@ class AddAnnouncementHandler(BrokerBase):
         self._mail_to_owner(session, **values)
 
     def _create_announcement(self, ticket_detail):
-        login_response = self._login()
-
-        headers = self._get_headers(login_response)
+        headers = self._get_login_headers()
 
         self._create_contents(ticket_detail, headers)
 
-        self._logout(headers)
+        self._release_login_headers(headers)
+
+    def _get_login_headers(self):
+        """Get headers of a login.
+        A login is reused until announcement session_ttl passes, and is
+        logged out when the last user releases it after that.
+        """
+        session_ttl = CONF.announcement.session_ttl
+        expired = None
+        with _LOGIN_LOCK:
+            if _LOGINS and not _LOGINS[-1].retired:
+                current = _LOGINS[-1]
+                if time.time() < current.expires:
+                    current.users += 1
+                    return current.headers
+                expired = _retire_login(current)
+        if expired:
+            self._logout(expired)
+
+        headers = self._get_headers(self._login())
+
+        if 0 < session_ttl:
+            expired = None
+            with _LOGIN_LOCK:
+                if _LOGINS and not _LOGINS[-1].retired:
+                    # Another greenthread logged in meanwhile.
+                    expired = _retire_login(_LOGINS[-1])
+                _LOGINS.append(
+                    _Login(headers, time.time() + session_ttl))
+            if expired:
+                self._logout(expired)
+
+        return headers
+
+    def _release_login_headers(self, headers):
+        with _LOGIN_LOCK:
+            login = _find_login(headers)
+            if login:
+                login.users -= 1
+                headers = _retire_login(login) if login.retired else None
+        if headers:
+            self._logout(headers)
 
     def _login(self):
         url = urlparse.urljoin(
@@ -291,7 +402,7 @@ class AddAnnouncementHandler(BrokerBase):
         try:
             url = urlparse.urljoin(CONF.announcement.announcement_url,
                                    CONF.announcement.logout_url)
-            logout_response = requests.post(
+            logout_response = _get_http_session().post(
                 url, headers=headers, verify=SSL_VERIFY)
         except Exception as e:
             # If you fail to logout, workflow is a success.
@@ -335,13 +446,13 @@ class AddAnnouncementHandler(BrokerBase):
                 continue
             data[k] = v
 
-        mail.sendmail(addresses, mail_add_announcement_registration, data)
+        self._sendmail(addresses, mail_add_announcement_registration, data)
 
     def _post(self, url, data, headers, action_name):
         error_message = None
         exception_message = None
         try:
-            response = requests.post(
+            response = _get_http_session().post(
                 url, data=json.dumps(data), headers=headers, verify=SSL_VERIFY)
         except SSLError as se:
             exception_message = se.args[0]
@@ -363,6 +474,24 @@ class AddAnnouncementHandler(BrokerBase):
                 'exception_message': exception_message})
             raise Forbidden(error_message)
 
+        if response.status_code in SESSION_EXPIRED_STATUS_CODES:
+            with _LOGIN_LOCK:
+                login = _find_login(headers)
+                if login:
+                    # Other users logout the login on release.
+                    login.retired = True
+            if login:
+                # The reused login has been expired on the announcement
+                # system, login again and retry with a copy of the headers.
+                LOG.info(_LI('Login to the announcement system has been '
+                             'expired, login again.'))
+                new_headers = self._get_login_headers()
+                try:
+                    return self._post(url, data, dict(new_headers),
+                                      action_name)
+                finally:
+                    self._release_login_headers(new_headers)
+
         if response.status_code is not 200:
             error_message = _LE('[%(status_code)d]%(name)s response info: '
                                 '%(error_message)s') % {
@@ -414,16 +543,17 @@ class AddAnnouncementHandler(BrokerBase):
         return return_data
 
     def _create_publish_on(self, publish_on):
-        return datetime.datetime.strptime(
-            publish_on, '%Y-%m-%dT%H:%M:%S.%f').strftime('%Y-%m-%d %H:%M:%S')
+        return datetime_codec.strftime(
+            datetime_codec.strptime(publish_on), '%Y-%m-%d %H:%M:%S')
 
     def _create_unpublish_on(self, unpublish_on):
-        datetime_unpublish_on = datetime.datetime.strptime(
-            unpublish_on, '%Y-%m-%dT%H:%M:%S.%f') + \
+        datetime_unpublish_on = datetime_codec.strptime(unpublish_on) + \
             datetime.timedelta(hours=24) - datetime.timedelta(seconds=1)
 
-        return datetime_unpublish_on.strftime('%Y-%m-%d %H:%M:%S')
+        return datetime_codec.strftime(datetime_unpublish_on,
+                                       '%Y-%m-%d %H:%M:%S')
 
     def _convert_datetime_to_date(self, string_datetime):
-        return datetime.datetime.strptime(
-            string_datetime, '%Y-%m-%dT%H:%M:%S.%f').strftime('%Y-%m-%d')
+        return datetime_codec.strftime(
+            datetime_codec.strptime(string_datetime),
+            datetime_codec.DATE_FORMAT)
@@ -14,7 +14,6 @@
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
-from aflo.common import mail
 from aflo.mail import mail_template
 
 LOG = logging.getLogger(__name__)
@@ -49,6 +48,6 @@ class SampleBroker(BrokerBase):
                     'body': 'Change status to [%s]' % self.after_status_code,
                     'url': url}
 
-        mail.sendmail(to_address, mail_template, data)
+        self._sendmail(to_address, mail_template, data)
 
         LOG.debug("sendmail End")
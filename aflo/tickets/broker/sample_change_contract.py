@@ -13,6 +13,7 @@
 #
 
 import datetime
+import functools
 import json
 import six
 
@@ -20,12 +21,14 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import datetime_codec
 from aflo.common.exception import DuringContract
 from aflo.common.exception import InvalidStatus
 from aflo.common.exception import NotFound
 from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
 from aflo.tickets.broker.utils import catalog_utils
+from aflo.tickets.broker.utils import concurrency_utils
 from aflo.tickets.broker.utils import contract_utils
 from aflo.tickets.broker.utils import INTERNAL_UTC_DATETIME_FORMAT
 from aflo.tickets.broker.utils import utils as broker_utils
@@ -80,10 +83,11 @@ class ChangeToFlatRateContractHandler(BrokerBase):
         catalog_data = self._get_catalog_data(ctxt, ticket_detail)
 
         nova = broker_utils.get_nova_client()
-        nova_limits = nova.limits.get(tenant_id=project_id)
-
         cinder = broker_utils.get_cinder_client()
-        cinder_quotas_usage = cinder.quotas.get(project_id, usage=True)
+        nova_limits, cinder_quotas_usage = \
+            concurrency_utils.run_concurrently(
+                functools.partial(nova.limits.get, tenant_id=project_id),
+                functools.partial(cinder.quotas.get, project_id, usage=True))
         cinder_in_use = long(cinder_quotas_usage.gigabytes['in_use'])
 
         for quota_key, catalog in six.iteritems(catalog_data):
@@ -147,7 +151,8 @@ class ChangeToFlatRateContractHandler(BrokerBase):
             # Create flat-rate contract.
             contract_utils.create_contract(
                 ctxt, self.template, ticket, ticket.tenant_id,
-                ticket.tenant_name, ticket.owner_name, CONTRACT_KEY_FLAT_RATE)
+                ticket.tenant_name, ticket.owner_name, CONTRACT_KEY_FLAT_RATE,
+                batch=self.contracts)
         except Exception:
             raise NotFound(_LE('Failed to register the contract.'))
 
@@ -165,37 +170,22 @@ class ChangeToFlatRateContractHandler(BrokerBase):
         # Get catalog data.
         catalog_data = self._get_catalog_data(ctxt, ticket_detail)
 
-        nova = broker_utils.get_nova_client()
-        cinder = broker_utils.get_cinder_client()
+        quotas = self.quotas
 
         for key, val in six.iteritems(ticket_detail):
-            nova_quotas = nova.quotas.get(tenant_id)
-            cinder_quotas = cinder.quotas.get(tenant_id)
-
-            update_val = {}
-
             if key == 'vcpu':
-                update_val[CORES] = (val * long(
-                    catalog_data[CORES]['goods_num'])) + long(
-                        nova_quotas.to_dict().get(CORES)) - long(
-                            CONTRACT_QUOTA_VALUE[CORES])
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                quotas.add(tenant_id, **{CORES: (val * long(
+                    catalog_data[CORES]['goods_num'])) - long(
+                        CONTRACT_QUOTA_VALUE[CORES])})
             elif key == 'ram':
-                update_val[RAM] = (val * long(
+                quotas.add(tenant_id, **{RAM: (val * long(
                     catalog_data[RAM]['goods_num']) * broker_utils.
-                    UNIT_CONVERSION[RAM][catalog_data[RAM]['unit']]) + \
-                    long(nova_quotas.to_dict().get(RAM)) - \
-                    long(CONTRACT_QUOTA_VALUE[RAM])
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                    UNIT_CONVERSION[RAM][catalog_data[RAM]['unit']]) -
+                    long(CONTRACT_QUOTA_VALUE[RAM])})
             elif key == 'volume_storage':
-                update_val[GIGABYTES] = (val * long(
-                    catalog_data[GIGABYTES]['goods_num'])) + long(
-                        cinder_quotas.gigabytes) - \
-                    long(CONTRACT_QUOTA_VALUE[GIGABYTES])
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                quotas.add(tenant_id, **{GIGABYTES: (val * long(
+                    catalog_data[GIGABYTES]['goods_num'])) - long(
+                        CONTRACT_QUOTA_VALUE[GIGABYTES])})
 
 
 class ChangeToPayForUseContractHandler(BrokerBase):
@@ -234,7 +224,7 @@ class ChangeToPayForUseContractHandler(BrokerBase):
             # Create pay-for-use contract.
             contract_utils.create_contract(
                 ctxt, self.template, ticket, project_id, project.name,
-                user.name, CONTRACT_KEY_PAY_FOR_USE)
+                user.name, CONTRACT_KEY_PAY_FOR_USE, batch=self.contracts)
         except Exception:
             raise NotFound(_LE('Failed to register the contract.'))
 
@@ -248,7 +238,7 @@ class ChangeToPayForUseContractHandler(BrokerBase):
         _send_email(self, ticket.owner_id, **values)
 
     def _update_quotas_value(self, tenant_id, update_val):
-        broker_utils.update_quotas(tenant_id, **update_val)
+        self.quotas.set(tenant_id, **update_val)
 
 
 def _update_contract(ctxt, contract_key, **values):
@@ -267,8 +257,8 @@ def _update_contract(ctxt, contract_key, **values):
         if contract_type in contract_key and utcnow < lifetime_end:
             # Update contract.
             if isinstance(values['confirmed_at'], datetime.datetime):
-                lifetime_end = values['confirmed_at'].strftime(
-                    INTERNAL_UTC_DATETIME_FORMAT)
+                lifetime_end = datetime_codec.strftime(
+                    values['confirmed_at'], INTERNAL_UTC_DATETIME_FORMAT)
             else:
                 lifetime_end = values['confirmed_at']
             contract_update_values = {'lifetime_end': lifetime_end}
@@ -19,6 +19,7 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import datetime_codec
 from aflo.common.exception import DuringContract
 from aflo.common.exception import NotFound
 from aflo.db.sqlalchemy import api as db_api
@@ -77,11 +78,12 @@ class ObjectStorageHandler(BrokerBase):
         # create contract
         contract_utils.create_contract(
             ctxt, self.template, ticket, project_id, project.name,
-            user.name, CONTRACT_KEY)
+            user.name, CONTRACT_KEY, batch=self.contracts)
 
         # add role
-        broker_utils.add_roles(CONTRACT_ROLES_VALUE,
-                               ticket.owner_id, ticket.tenant_id)
+        self.add_side_effect('add_roles', roles=CONTRACT_ROLES_VALUE,
+                             user_id=ticket.owner_id,
+                             project_id=ticket.tenant_id)
 
         # send mail
         if not CONF.mail.smtp_server:
@@ -112,13 +114,13 @@ class ObjectStorageHandler(BrokerBase):
         contract_id = str(ticket_detail['contract_id'])
 
         # remove role
-        broker_utils.revoke_roles(CONTRACT_ROLES_VALUE,
-                                  ticket.tenant_id)
+        self.add_side_effect('revoke_roles', roles=CONTRACT_ROLES_VALUE,
+                             project_id=ticket.tenant_id)
 
         # update contract
         if isinstance(values['confirmed_at'], datetime.datetime):
             lifetime_end = \
-                values['confirmed_at'].strftime('%Y-%m-%dT%H:%M:%S.%f')
+                datetime_codec.strftime(values['confirmed_at'])
         else:
             lifetime_end = values['confirmed_at']
         contract_update_vals = {'lifetime_end': lifetime_end}
@@ -19,15 +19,16 @@ from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import datetime_codec
 from aflo.common.exception import Conflict
 from aflo.common.exception import Invalid
 from aflo.common.exception import NotFound
-from aflo.common import mail
 from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
 from aflo.mail.project_contract \
     import mail_cancel_project_contract_final_approval
 from aflo.mail.project_contract import mail_project_contract_accept
+from aflo.tickets.broker.utils import concurrency_utils
 from aflo.tickets.broker.utils import contract_utils
 from aflo.tickets.broker.utils import utils as broker_utils
 
@@ -61,70 +62,77 @@ class ProjectContractHandler(BrokerBase):
             if not isinstance(ticket.ticket_detail, dict):
                 ticket.ticket_detail = json.loads(ticket.ticket_detail)
             ticket_detail = ticket.ticket_detail
-        try:
-            # Get user list.
-            user_name = ticket_detail.get('user_name')
-            users = broker_utils.get_user_list()
-        except Exception as e:
-            error_message = _LE(
-                'Unable to retrieve user list. %s') % e.args[0]
-            LOG.error(error_message)
-            raise NotFound(error_message)
+        user_name = ticket_detail.get('user_name')
+        project_name = ticket_detail.get('project_name')
+
+        with concurrency_utils.RemoteCalls() as calls:
+            # Look up the user name and the project name concurrently.
+            user_used = calls.spawn(broker_utils.user_name_exists, user_name)
+            project_used = calls.spawn(broker_utils.project_name_exists,
+                                       project_name)
+
+            try:
+                user_used = user_used.wait()
+            except Exception as e:
+                error_message = _LE(
+                    'Unable to retrieve user list. %s') % e.args[0]
+                LOG.error(error_message)
+                raise NotFound(error_message)
 
-        for user in users:
-            if user_name == user.name:
+            if user_used:
                 # User name is conflict.
                 error_message = _LE(
                     'User name %s is already used.') % user_name
                 LOG.error(error_message)
                 raise Conflict(error_message)
 
-        try:
-            # Get project list.
-            project_name = ticket_detail.get('project_name')
-            projects = broker_utils.get_project_list()
-        except Exception as e:
-            error_message = _LE(
-                'Unable to retrieve project list. %s') % e.args[0]
-            LOG.error(error_message)
-            raise NotFound(error_message)
-
-        for project in projects:
-            if project_name == project.name:
-                # Project name is conflict.
+            try:
+                project_used = project_used.wait()
+            except Exception as e:
                 error_message = _LE(
-                    'Project name %s is already used.') % project_name
+                    'Unable to retrieve project list. %s') % e.args[0]
                 LOG.error(error_message)
-                raise Conflict(error_message)
+                raise NotFound(error_message)
 
-    def check_presence(self, ctxt, **values):
-        try:
-            # Get user data.
-            ticket_detail = values['additional_data']
-            user_id = ticket_detail.get('user_id')
-            user = broker_utils.get_user(user_id)
-        except Exception as e:
+        if project_used:
+            # Project name is conflict.
             error_message = _LE(
-                'Unable to retrieve user data. %s') % e.args[0]
+                'Project name %s is already used.') % project_name
             LOG.error(error_message)
-            raise NotFound(error_message)
+            raise Conflict(error_message)
 
-        if not user:
-            # Update data is invalid.
-            error_message = _LE(
-                '%s of the user ID does not exist.') % user_id
-            LOG.error(error_message)
-            raise Invalid(error_message)
+    def check_presence(self, ctxt, **values):
+        ticket_detail = values['additional_data']
+        user_id = ticket_detail.get('user_id')
+        project_id = ticket_detail.get('project_id')
+
+        with concurrency_utils.RemoteCalls() as calls:
+            # Get user data and project data concurrently.
+            user = calls.spawn(broker_utils.get_user, user_id)
+            project = calls.spawn(broker_utils.get_project, project_id)
+
+            try:
+                user = user.wait()
+            except Exception as e:
+                error_message = _LE(
+                    'Unable to retrieve user data. %s') % e.args[0]
+                LOG.error(error_message)
+                raise NotFound(error_message)
 
-        try:
-            # Get project data.
-            project_id = ticket_detail.get('project_id')
-            project = broker_utils.get_project(project_id)
-        except Exception as e:
-            error_message = _LE(
-                'Unable to retrieve project data. %s') % e.args[0]
-            LOG.error(error_message)
-            raise NotFound(error_message)
+            if not user:
+                # Update data is invalid.
+                error_message = _LE(
+                    '%s of the user ID does not exist.') % user_id
+                LOG.error(error_message)
+                raise Invalid(error_message)
+
+            try:
+                project = project.wait()
+            except Exception as e:
+                error_message = _LE(
+                    'Unable to retrieve project data. %s') % e.args[0]
+                LOG.error(error_message)
+                raise NotFound(error_message)
 
         if not project:
             # Update data is invalid.
@@ -168,7 +176,7 @@ class ProjectContractHandler(BrokerBase):
                 'message': ticket_detail.get('message', ''),
                 'status': broker_utils.get_status_name(self, status_code)
                 }
-        mail.sendmail(dest_addresses, mail_project_contract_accept, data)
+        self._sendmail(dest_addresses, mail_project_contract_accept, data)
 
     def create_project_contract(self, session, ctxt, **values):
         try:
@@ -192,7 +200,8 @@ class ProjectContractHandler(BrokerBase):
 
         contract_utils.create_contract(
             ctxt, self.template, ticket, project_id, project.name,
-            user.name, CONTRACT_KEY, lifetime_start=join_date)
+            user.name, CONTRACT_KEY, lifetime_start=join_date,
+            batch=self.contracts)
 
     def integrity_check_for_cancel_project_contract(self, ctxt, **values):
         self.general_param_check(**values)
@@ -252,7 +261,8 @@ class ProjectContractHandler(BrokerBase):
             raise Conflict(error_message)
 
     def check_canceled(self, ctxt, contract, **values):
-        if NO_LIMIT_DATE not in contract['lifetime_end'].strftime('%Y-%m-%d'):
+        if NO_LIMIT_DATE not in datetime_codec.strftime(
+                contract['lifetime_end'], datetime_codec.DATE_FORMAT):
             # Project contract is already canceled.
             error_message = _LE('It is canceled of contract.')
             LOG.error(error_message)
@@ -266,13 +276,13 @@ class ProjectContractHandler(BrokerBase):
                 ticket_detail = json.loads(ticket_detail)
             contract_id = str(ticket_detail['contract_id'])
 
-            date_withdrawal_date = datetime.datetime.strptime(
+            date_withdrawal_date = datetime_codec.strptime(
                 values['additional_data'].get(
                     'withdrawal_date'), INTERNAL_UTC_DATETIME_FORMAT)
             date_withdrawal_date = date_withdrawal_date + datetime.timedelta(
                 hours=24) - datetime.timedelta(seconds=1)
-            withdrawal_date = date_withdrawal_date.strftime(
-                INTERNAL_UTC_DATETIME_FORMAT)
+            withdrawal_date = datetime_codec.strftime(
+                date_withdrawal_date, INTERNAL_UTC_DATETIME_FORMAT)
 
             contract_update_values = {
                 'lifetime_end': withdrawal_date}
@@ -299,5 +309,5 @@ class ProjectContractHandler(BrokerBase):
                 'status': broker_utils.get_status_name(
                     self, values['after_status_code'])
                 }
-        mail.sendmail(
+        self._sendmail(
             to_address, mail_cancel_project_contract_final_approval, data)
@@ -12,18 +12,21 @@
 #
 
 import datetime
+import functools
 import json
 
 from oslo_config import cfg
 from oslo_log import log as logging
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import datetime_codec
 from aflo.common.exception import BrokerError
 from aflo.common.exception import DuringContract
 from aflo.common.exception import InvalidStatus
 from aflo.common.exception import NotFound
 from aflo.db.sqlalchemy import api as db_api
 from aflo.tickets.broker.utils import catalog_utils
+from aflo.tickets.broker.utils import concurrency_utils
 from aflo.tickets.broker.utils import contract_utils
 from aflo.tickets.broker.utils import utils as broker_utils
 
@@ -109,7 +112,7 @@ class SampleSetCatalogBroker(BrokerBase):
         # create_contract
         contract_utils.create_contract(
             ctxt, self.template, ticket, ticket.tenant_id, ticket.tenant_name,
-            ticket.owner_name, CONTRACT_KEY)
+            ticket.owner_name, CONTRACT_KEY, batch=self.contracts)
 
         # update quotas
         self._update_quotas_create(tenant_id=ticket.tenant_id,
@@ -141,11 +144,12 @@ class SampleSetCatalogBroker(BrokerBase):
         catalog_data = self._get_catalog_data(ctxt, contract_id)
 
         nova = broker_utils.get_nova_client()
-        nova_quotas = nova.quotas.get(tenant_id)
-        nova_limits = nova.limits.get(tenant_id=tenant_id)
-
         cinder = broker_utils.get_cinder_client()
-        cinder_quotas_usage = cinder.quotas.get(tenant_id, usage=True)
+        nova_quotas, nova_limits, cinder_quotas_usage = \
+            concurrency_utils.run_concurrently(
+                functools.partial(nova.quotas.get, tenant_id),
+                functools.partial(nova.limits.get, tenant_id=tenant_id),
+                functools.partial(cinder.quotas.get, tenant_id, usage=True))
         cinder_limit = long(cinder_quotas_usage.gigabytes['limit'])
         cinder_in_use = long(cinder_quotas_usage.gigabytes['in_use'])
 
@@ -187,38 +191,23 @@ class SampleSetCatalogBroker(BrokerBase):
         catalog_data = self._get_catalog_data(ctxt, contract_id)
 
         # update quotas
-        nova = broker_utils.get_nova_client()
-        nova_quotas = nova.quotas.get(tenant_id)
-        cinder = broker_utils.get_cinder_client()
-        cinder_quotas = cinder.quotas.get(tenant_id)
-
-        update_val = {}
         for quota_key, info in catalog_data.iteritems():
+            if quota_key not in broker_utils.NOVA_QUOTAS and \
+                    'gigabytes' != quota_key:
+                continue
+
             cont_size = long(info['cont_num']) * long(info['goods_num'])
             if quota_key in broker_utils.UNIT_CONVERSION:
                 cont_size = cont_size * \
                     broker_utils.\
                     UNIT_CONVERSION[quota_key][info['unit']]
 
-            if quota_key in broker_utils.NOVA_QUOTAS:
-                after_size = \
-                    long(nova_quotas.to_dict().get(quota_key)) - cont_size
-
-            elif quota_key in broker_utils.CINDER_QUOTAS:
-                if 'gigabytes' == quota_key:
-                    after_size = \
-                        long(cinder_quotas.gigabytes) - cont_size
-            else:
-                continue
-
-            update_val[quota_key] = after_size
-
-        broker_utils.update_quotas(tenant_id, **update_val)
+            self.quotas.add(tenant_id, **{quota_key: -cont_size})
 
         # update contract
         if isinstance(values['confirmed_at'], datetime.datetime):
             lifetime_end = \
-                values['confirmed_at'].strftime('%Y-%m-%dT%H:%M:%S.%f')
+                datetime_codec.strftime(values['confirmed_at'])
         else:
             lifetime_end = values['confirmed_at']
         contract_update_vals = {'lifetime_end': lifetime_end}
@@ -268,7 +257,7 @@ class SampleSetCatalogBroker(BrokerBase):
             email = broker_utils.get_email_address(values["confirmer_id"])
             location = 'Presence check of contract'
             cause = 'Valid contract does not exist'
-            broker_utils.sendmail_for_contract_error(email, location,
+            broker_utils.sendmail_for_contract_error(self, email, location,
                                                      cause, **values)
             raise BrokerError({'location': location, 'cause': cause})
 
@@ -308,34 +297,12 @@ class SampleSetCatalogBroker(BrokerBase):
         return True
 
     def _update_quotas_create(self, tenant_id, ticket_detail):
-
-        nova = broker_utils.get_nova_client()
-        cinder = broker_utils.get_cinder_client()
-
         for key, val in ticket_detail.iteritems():
-
-            nova_quotas = nova.quotas.get(tenant_id)
-            cinder_quotas = cinder.quotas.get(tenant_id)
-
-            update_val = {}
-
             if key == 'vcpu':
-                update_val['cores'] = \
-                    (val * 10) + \
-                    long(nova_quotas.to_dict().get('cores'))
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                self.quotas.add(tenant_id, cores=(val * 10))
 
             elif key == 'ram':
-                update_val['ram'] = \
-                    (val * (20 * 1024)) + \
-                    long(nova_quotas.to_dict().get('ram'))
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                self.quotas.add(tenant_id, ram=(val * (20 * 1024)))
 
             elif key == 'volume_storage':
-                update_val['gigabytes'] = \
-                    (val * 50) + \
-                    long(cinder_quotas.gigabytes)
-
-                broker_utils.update_quotas(tenant_id, **update_val)
+                self.quotas.add(tenant_id, gigabytes=(val * 50))
@@ -19,6 +19,7 @@ import six
 from oslo_config import cfg
 
 from aflo.common.broker_base import BrokerBase
+from aflo.common import datetime_codec
 from aflo.common.exception import CancellationNGState
 from aflo.common.exception import DuringContract
 from aflo.common.exception import NotFound
@@ -63,7 +64,7 @@ class PayForUseHandler(BrokerBase):
         # create contract
         contract_utils.create_contract(
             ctxt, self.template, ticket, project_id, project.name,
-            user.name, CONTRACT_KEY)
+            user.name, CONTRACT_KEY, batch=self.contracts)
 
         # update quotas
         self._update_quotas_value(ticket.tenant_id,
@@ -132,7 +133,7 @@ class PayForUseHandler(BrokerBase):
             # update contract
             if isinstance(values['confirmed_at'], datetime.datetime):
                 lifetime_end = \
-                    values['confirmed_at'].strftime('%Y-%m-%dT%H:%M:%S.%f')
+                    datetime_codec.strftime(values['confirmed_at'])
             else:
                 lifetime_end = values['confirmed_at']
             contract_update_vals = {'lifetime_end': lifetime_end}
@@ -150,4 +151,4 @@ class PayForUseHandler(BrokerBase):
 
     def _update_quotas_value(self, tenant_id, update_val):
 
-        broker_utils.update_quotas(tenant_id, **update_val)
+        self.quotas.set(tenant_id, **update_val)
@@ -0,0 +1,126 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+#
+#
+
+import time
+
+import eventlet
+from oslo_config import cfg
+from oslo_log import log as logging
+
+from aflo.common.exception import RemoteCallTimeout
+from aflo import i18n
+
+CONF = cfg.CONF
+LOG = logging.getLogger(__name__)
+
+_LW = i18n._LW
+
+
+class RemoteCalls(object):
+    """Run independent remote calls concurrently.
+    All calls share one deadline which starts when this object is made.
+
+        with concurrency_utils.RemoteCalls() as calls:
+            users = calls.spawn(broker_utils.get_user_list)
+            projects = calls.spawn(broker_utils.get_project_list)
+            users = users.wait()
+            projects = projects.wait()
+    """
+
+    def __init__(self, timeout=None, pool_size=None):
+        """
+        :param timeout: optional, seconds all calls have to finish in
+        :param pool_size: optional, the number of concurrent calls
+        """
+        if timeout is None:
+            timeout = CONF.broker.remote_call_timeout
+        if pool_size is None:
+            pool_size = CONF.broker.remote_call_pool_size
+
+        self.timeout = timeout
+        self.deadline = time.time() + timeout if timeout else None
+        self.pool = eventlet.GreenPool(size=pool_size)
+        self.threads = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.cancel()
+
+    def spawn(self, func, *args, **kwargs):
+        """Start a call
+        :param func: function to call
+        :return RemoteCall, wait() returns the result of the function.
+        """
+        thread = self.pool.spawn(func, *args, **kwargs)
+        self.threads.append(thread)
+        return RemoteCall(self, thread)
+
+    def wait_all(self):
+        """Wait all calls
+        :return the results in the order of the spawn.
+        """
+        return [self._wait(thread) for thread in list(self.threads)]
+
+    def cancel(self):
+        """Kill calls which have not finished."""
+        for thread in self.threads:
+            if not thread.dead:
+                thread.kill()
+        self.threads = []
+
+    def _wait(self, thread):
+        if self.deadline is None:
+            return thread.wait()
+
+        remaining = max(self.deadline - time.time(), 0)
+        timer = eventlet.Timeout(remaining)
+        try:
+            return thread.wait()
+        except eventlet.Timeout as e:
+            if e is not timer:
+                raise
+            LOG.warning(_LW('Remote calls did not finish within '
+                            '%s seconds.'), self.timeout)
+            self.cancel()
+            raise RemoteCallTimeout(timeout=self.timeout)
+        finally:
+            timer.cancel()
+
+
+class RemoteCall(object):
+    """A call started by RemoteCalls."""
+
+    def __init__(self, calls, thread):
+        self.calls = calls
+        self.thread = thread
+
+    def wait(self):
+        """Wait the call
+        :return the result of the call, the exception of the call is raised.
+        """
+        return self.calls._wait(self.thread)
+
+
+def run_concurrently(*funcs, **kwargs):
+    """Call functions concurrently and wait all of them.
+    :param funcs: functions without arguments (use functools.partial)
+    :param timeout: optional, seconds all calls have to finish in
+    :return the results in the order of funcs.
+    """
+    with RemoteCalls(timeout=kwargs.get('timeout')) as calls:
+        for func in funcs:
+            calls.spawn(func)
+        return calls.wait_all()
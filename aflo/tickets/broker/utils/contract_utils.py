@@ -32,7 +32,8 @@ _LE = i18n._LE
 
 
 def create_contract(ctxt, template, ticket, project_id, project_name,
-                    application_name, contract_key, lifetime_start=None):
+                    application_name, contract_key, lifetime_start=None,
+                    batch=None):
     """Create a new contract data
     :param ctxt: request context
     :param template: ticket template data
@@ -42,6 +43,39 @@ def create_contract(ctxt, template, ticket, project_id, project_name,
     :param application_name: application_name of ticket template
     :param contract_key: contrct key which a handler has
     :param lifetime_start: optional param, set a contract lifetime end
+    :param batch: optional param, list which the contract is added to,
+        to be registered later by create_contracts
+    """
+    contract = get_contract_data(template, ticket, project_id, project_name,
+                                 application_name, contract_key,
+                                 lifetime_start=lifetime_start)
+
+    if batch is not None:
+        batch.append(contract)
+        return
+
+    db_api.contract_create(ctxt, **contract)
+
+
+def create_contracts(ctxt, contracts, session=None):
+    """Create new contracts data in one transaction
+    :param ctxt: request context
+    :param contracts: list of contract data made by get_contract_data
+    :param session: optional param, DB session in a transaction to join
+    """
+    return db_api.contract_create_many(ctxt, contracts, session=session)
+
+
+def get_contract_data(template, ticket, project_id, project_name,
+                      application_name, contract_key, lifetime_start=None):
+    """Make a new contract data without registering it
+    :param template: ticket template data
+    :param ticket: the ticket data makes contract
+    :param project_id: project id
+    :param project_name: project name
+    :param application_name: application_name of ticket template
+    :param contract_key: contrct key which a handler has
+    :param lifetime_start: optional param, set a contract lifetime end
     """
     if not lifetime_start:
         lifetime_start = broker_utils.get_now_string()
@@ -83,7 +117,7 @@ def create_contract(ctxt, template, ticket, project_id, project_name,
         'expansion_key1': contract_key,
     }
 
-    db_api.contract_create(ctxt, **contract)
+    return contract
 
 
 def is_during_contract(ctxt, contract_keys, project_id):
@@ -15,23 +15,27 @@ import functools
 from oslo_config import cfg
 from oslo_log import log as logging
 
-from cinderclient.v2 import client as cinder_client
-from keystoneclient.auth.identity import v3
-from keystoneclient import exceptions
-from keystoneclient import session as keystone_client_session
-from keystoneclient.v2_0 import client as keystone_client
-from keystoneclient.v3 import client as keystone_client_v3
-from novaclient import client as nova_client
-
-from aflo.common import mail
+from aflo.common import cache
+from aflo.common import datetime_codec
+from aflo.common import lazy_import
 from aflo.db.sqlalchemy import api as db_api
 from aflo import i18n
 from aflo.mail import mail_template_contract_error
 from aflo.mail import mail_template_contract_registration
+from aflo.tickets.broker.utils import concurrency_utils
 from aflo.tickets.broker.utils import INTERNAL_UTC_DATETIME_FORMAT
 
 CONF = cfg.CONF
 
+# Clients are imported on first use, as most workers never call them.
+cinder_client = lazy_import.LazyModule('cinderclient.v2.client')
+v3 = lazy_import.LazyModule('keystoneclient.auth.identity.v3')
+exceptions = lazy_import.LazyModule('keystoneclient.exceptions')
+keystone_client_session = lazy_import.LazyModule('keystoneclient.session')
+keystone_client = lazy_import.LazyModule('keystoneclient.v2_0.client')
+keystone_client_v3 = lazy_import.LazyModule('keystoneclient.v3.client')
+nova_client = lazy_import.LazyModule('novaclient.client')
+
 UNIT_CONVERSION = \
     {'ram': {'KB': float(1 / 1024),
              'MB': 1,
@@ -48,6 +52,8 @@ NOVA_LIMIT_USED_KEYS = {'cores': 'totalCoresUsed',
                         'ram': 'totalRAMUsed'}
 CINDER_LIMIT_USED_KEYS = {'gigabytes': 'totalGigabytesUsed'}
 
+_NAME_CACHE = cache.Cache('keystone_names')
+
 LOG = logging.getLogger(__name__)
 
 _LE = i18n._LE
@@ -278,30 +284,80 @@ def _get_can_change_status_list(invoker_self):
     return after_wf_status['next_status']
 
 
-def get_user_list(project_id=None, keystone=None):
+def get_user_list(project_id=None, keystone=None, name=None):
     """Get user list
     :param project_id: optional, target project
     :param keystone: optional, keystoneclient
+    :param name: optional, user name to filter on keystone
     """
     if not keystone:
         keystone = get_keystone_client()
     if int(CONF.keystone_client.auth_version) < 3:
         return keystone.tenants.list_users()
     else:
+        kwargs = {}
+        if name:
+            kwargs['name'] = name
         if project_id:
-            return keystone.users.list(project=project_id)
+            return keystone.users.list(project=project_id, **kwargs)
         else:
-            return keystone.users.list()
+            return keystone.users.list(**kwargs)
 
 
-def get_project_list():
+def get_project_list(name=None):
+    """Get project list
+    :param name: optional, project name to filter on keystone
+    """
     keystone = get_keystone_client()
     if int(CONF.keystone_client.auth_version) < 3:
         return keystone.tenants.list()
     else:
+        if name:
+            return keystone.projects.list(name=name)
         return keystone.projects.list()
 
 
+def user_name_exists(name):
+    """Check a user name is used
+    :param name: user name
+    """
+    return _name_exists('user', name, get_user_list)
+
+
+def project_name_exists(name):
+    """Check a project name is used
+    :param name: project name
+    """
+    return _name_exists('project', name, get_project_list)
+
+
+def clear_name_cache():
+    _NAME_CACHE.invalidate()
+
+
+def _name_exists(kind, name, list_func):
+    """Check a name is used on keystone.
+    Only used names are cached, because a name which is not used yet can
+    be taken on keystone any time, and then has to be found.
+    """
+    key = '%s:%s' % (kind, name)
+    ttl = CONF.broker.name_cache_ttl
+
+    if 0 < ttl:
+        exists = _NAME_CACHE.get(key)
+        if exists is not None:
+            return exists
+
+    # The name filter is not supported by keystone v2,
+    # so compare a name again.
+    exists = any(item.name == name for item in list_func(name=name))
+
+    if exists and 0 < ttl:
+        _NAME_CACHE.set(key, exists, ttl)
+
+    return exists
+
+
 @keystone_version_validator
 def get_group_list(project_id=None, keystone=None):
     """Get group list of project
@@ -359,8 +415,84 @@ def update_quotas(tenant_id, **values):
         elif key in CINDER_QUOTAS:
             update_val_cinder[key] = val
 
-    get_nova_client().quotas.update(tenant_id, **update_val_nova)
-    get_cinder_client().quotas.update(tenant_id, **update_val_cinder)
+    calls = []
+    if update_val_nova:
+        calls.append(functools.partial(get_nova_client().quotas.update,
+                                       tenant_id, **update_val_nova))
+    if update_val_cinder:
+        calls.append(functools.partial(get_cinder_client().quotas.update,
+                                       tenant_id, **update_val_cinder))
+
+    concurrency_utils.run_concurrently(*calls)
+
+
+class QuotaAggregator(object):
+    """Collect quota changes of tenants and update them at once.
+    A delta is added to the quota value at the time of flush,
+    a value replaces the quota value, and a delta added after a value
+    is added to the value.
+    """
+
+    def __init__(self):
+        self.deltas = {}
+        self.values = {}
+
+    def add(self, tenant_id, **deltas):
+        """Add quota deltas
+        :param tenant_id: target tenant
+        :param deltas: quota key and the value to add
+        """
+        tenant_deltas = self.deltas.setdefault(tenant_id, {})
+        tenant_values = self.values.get(tenant_id, {})
+        for key, val in deltas.iteritems():
+            if key in tenant_values:
+                tenant_values[key] += val
+            else:
+                tenant_deltas[key] = tenant_deltas.get(key, 0) + val
+
+    def set(self, tenant_id, **values):
+        """Set quota values
+        :param tenant_id: target tenant
+        :param values: quota key and the value to set
+        """
+        tenant_deltas = self.deltas.get(tenant_id, {})
+        for key in values:
+            tenant_deltas.pop(key, None)
+        self.values.setdefault(tenant_id, {}).update(values)
+
+    def flush(self):
+        """Update quotas, one nova and one cinder call per tenant."""
+        tenant_ids = set(self.deltas.keys()) | set(self.values.keys())
+
+        for tenant_id in tenant_ids:
+            update_val = dict(self.values.get(tenant_id, {}))
+            tenant_deltas = self.deltas.get(tenant_id, {})
+
+            nova_call = cinder_call = None
+            with concurrency_utils.RemoteCalls() as calls:
+                if [key for key in tenant_deltas if key in NOVA_QUOTAS]:
+                    nova_call = calls.spawn(
+                        get_nova_client().quotas.get, tenant_id)
+                if [key for key in tenant_deltas if key in CINDER_QUOTAS]:
+                    cinder_call = calls.spawn(
+                        get_cinder_client().quotas.get, tenant_id)
+                if nova_call:
+                    nova_quotas = nova_call.wait().to_dict()
+                if cinder_call:
+                    cinder_quotas = cinder_call.wait()
+
+            for key, val in tenant_deltas.iteritems():
+                if key in NOVA_QUOTAS:
+                    update_val[key] = long(nova_quotas.get(key)) + val
+                elif key in CINDER_QUOTAS:
+                    update_val[key] = \
+                        long(getattr(cinder_quotas, key)) + val
+
+            if update_val:
+                update_quotas(tenant_id, **update_val)
+
+        self.deltas = {}
+        self.values = {}
 
 
 def get_catalog_contents_data(ctxt, catalog_id):
@@ -399,9 +531,9 @@ def sendmail_for_contract_registration(self, to_address, **values):
             }
 
     if CONF.mail.smtp_server:
-        mail.sendmail(to_address,
-                      mail_template_contract_registration,
-                      data)
+        self._sendmail(to_address,
+                       mail_template_contract_registration,
+                       data)
 
 
 def sendmail_for_contract_error(self, to_address, location,
@@ -417,9 +549,9 @@ def sendmail_for_contract_error(self, to_address, location,
             'cause': cause}
 
     if CONF.mail.smtp_server:
-        mail.sendmail(to_address,
-                      mail_template_contract_error,
-                      data)
+        self._sendmail(to_address,
+                       mail_template_contract_error,
+                       data)
 
 
 def get_status_name(self, status_code):
@@ -441,4 +573,5 @@ def get_status_name(self, status_code):
 
 def get_now_string():
     """Get utc now string"""
-    return datetime.datetime.utcnow().strftime(INTERNAL_UTC_DATETIME_FORMAT)
+    return datetime_codec.strftime(datetime.datetime.utcnow(),
+                                   INTERNAL_UTC_DATETIME_FORMAT)
@@ -10,8 +10,132 @@
 #  License for the specific language governing permissions and limitations
 #  under the License.
 
+import collections
+import contextlib
+import functools
+import threading
+
+from oslo_concurrency import lockutils
+from oslo_log import log as logging
+from oslo_utils import timeutils
+
+from aflo.common import sampling_profiler
+from aflo.common import utils
 import aflo.context
 from aflo.db.sqlalchemy import api as db_api
+from aflo import i18n
+
+LOG = logging.getLogger(__name__)
+_LE = i18n._LE
+_LI = i18n._LI
+
+OPERATION_QUEUED = 'queued'
+OPERATION_RUNNING = 'running'
+OPERATION_SUCCEEDED = 'succeeded'
+OPERATION_FAILED = 'failed'
+OPERATION_FINISHED = (OPERATION_SUCCEEDED, OPERATION_FAILED)
+
+
+class TicketQueues(object):
+    """Locks of tickets in the process, which are given in the order of
+    the requests, unlike a semaphore.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Ticket ID: deque of events of messages, the running one first.
+        self._queues = {}
+
+    @contextlib.contextmanager
+    def hold(self, ticket_id):
+        event = threading.Event()
+        with self._lock:
+            queue = self._queues.setdefault(ticket_id, collections.deque())
+            queue.append(event)
+            if len(queue) == 1:
+                event.set()
+
+        event.wait()
+        try:
+            yield
+        finally:
+            with self._lock:
+                queue.popleft()
+                if queue:
+                    queue[0].set()
+                else:
+                    del self._queues[ticket_id]
+
+
+_ticket_queues = TicketQueues()
+
+
+def serialized_by_ticket(f):
+    """Process messages of the same ticket one by one.
+    Messages of different tickets run concurrently
+    when the RPC server uses a concurrent executor.
+    In a worker, messages of a ticket run in the order they arrive.
+    A file lock in [oslo_concurrency] lock_path serializes them among
+    the workers of the host, and db_api locks the ticket row among
+    hosts.
+    """
+    @functools.wraps(f)
+    def wrapper(self, ctxt, **values):
+        ticket_id = values.get('ticket_id', values.get('id'))
+        with _ticket_queues.hold(ticket_id):
+            with lockutils.lock('aflo-ticket-%s' % ticket_id,
+                                external=True):
+                return f(self, ctxt, **values)
+    return wrapper
+
+
+def tracked_operation(f):
+    """Record the status of the ticket operation in 'operation_id'."""
+    @functools.wraps(f)
+    def wrapper(self, ctxt, **values):
+        operation_id = values.pop('operation_id', None)
+        if operation_id is None:
+            return f(self, ctxt, **values)
+
+        db_api.ticket_operation_update(None, operation_id,
+                                       status=OPERATION_RUNNING,
+                                       started_at=timeutils.utcnow())
+        try:
+            result = f(self, ctxt, **values)
+        except Exception as e:
+            db_api.ticket_operation_update(
+                None, operation_id,
+                status=OPERATION_FAILED,
+                finished_at=timeutils.utcnow(),
+                error_message=utils.exception_to_str(e))
+            raise
+
+        db_api.ticket_operation_update(None, operation_id,
+                                       status=OPERATION_SUCCEEDED,
+                                       finished_at=timeutils.utcnow())
+        return result
+    return wrapper
+
+
+def statement_counted(f):
+    """Count SQL statements executed to process an RPC message."""
+    @functools.wraps(f)
+    def wrapper(self, ctxt, *args, **kwargs):
+        if db_api.statement_stats_current() is not None:
+            # Counted by the caller, e.g. a WSGI request.
+            return f(self, ctxt, *args, **kwargs)
+
+        stats = db_api.statement_stats_begin()
+        try:
+            return f(self, ctxt, *args, **kwargs)
+        finally:
+            db_api.statement_stats_end()
+            LOG.info(_LI('RPC %(method)s: DB statements: %(statements)d '
+                         'DB time: %(db_time).1fms'),
+                     {'method': f.__name__, 'statements': stats.count,
+                      'db_time': stats.time * 1000})
+            stats.warn_repeated('RPC %s' % f.__name__)
+    return wrapper
 
 
 class TicketsManager(object):
@@ -27,14 +151,90 @@ class TicketsManager(object):
     def tickets_get(self, ctxt, ticket_id):
         return db_api.tickets_get(ctxt, ticket_id)
 
+    def tickets_summary(self, ctxt, group_by, filters=None,
+                        force_show_deleted=False):
+        return db_api.tickets_summary(ctxt, group_by, filters,
+                                      force_show_deleted)
+
+    @sampling_profiler.profiled
+    @statement_counted
+    @serialized_by_ticket
+    @tracked_operation
     def tickets_create(self, ctxt, **values):
         ctxt = aflo.context.RequestContext.from_dict(ctxt)
         return db_api.tickets_create(ctxt, **values)
 
+    @sampling_profiler.profiled
+    @statement_counted
+    def tickets_create_batch(self, ctxt, tickets):
+        """Create tickets sent in one message.
+        Tickets are grouped by ticket template, and the template is
+        loaded once per group. An error of a ticket is recorded to
+        the ticket and does not stop the others.
+        Each ticket is committed in its own transactions, like a ticket
+        created alone, because brokers call other services between them
+        which a rollback of the group would not undo.
+        :param tickets: values of tickets.
+        """
+        request_ctxt = aflo.context.RequestContext.from_dict(ctxt)
+
+        groups = collections.OrderedDict()
+        for values in tickets:
+            groups.setdefault(values.get('ticket_template_id'),
+                              []).append(values)
+
+        for ticket_template_id, group in groups.iteritems():
+            try:
+                loaded_template = db_api.ticket_template_load(
+                    request_ctxt, ticket_template_id)
+            except Exception:
+                # Each ticket records the error.
+                loaded_template = None
+
+            for values in group:
+                try:
+                    self._tickets_create_in_batch(
+                        ctxt, loaded_template=loaded_template, **values)
+                except Exception:
+                    LOG.exception(_LE('Failed to create ticket %s.'),
+                                  values.get('id'))
+
+    @serialized_by_ticket
+    @tracked_operation
+    def _tickets_create_in_batch(self, ctxt, **values):
+        ctxt = aflo.context.RequestContext.from_dict(ctxt)
+        return db_api.tickets_create(ctxt, **values)
+
+    @sampling_profiler.profiled
+    @statement_counted
+    @serialized_by_ticket
+    @tracked_operation
     def tickets_update(self, ctxt, ticket_id, **values):
         ctxt = aflo.context.RequestContext.from_dict(ctxt)
         return db_api.tickets_update(ctxt, ticket_id, **values)
 
+    @sampling_profiler.profiled
+    @statement_counted
+    @serialized_by_ticket
+    @tracked_operation
     def tickets_delete(self, ctxt, ticket_id):
         ctxt = aflo.context.RequestContext.from_dict(ctxt)
         return db_api.tickets_delete(ctxt, ticket_id)
+
+    def operations_create(self, ctxt, ticket_id, action):
+        return db_api.ticket_operation_create(ctxt, ticket_id=ticket_id,
+                                              action=action,
+                                              status=OPERATION_QUEUED)
+
+    def operations_create_many(self, ctxt, ticket_ids, action):
+        return db_api.ticket_operation_create_many(
+            ctxt, [{'ticket_id': ticket_id,
+                    'action': action,
+                    'status': OPERATION_QUEUED}
+                   for ticket_id in ticket_ids])
+
+    def operations_get(self, ctxt, operation_id):
+        return db_api.ticket_operation_get(ctxt, operation_id)
+
+    def operations_update(self, ctxt, operation_id, **values):
+        return db_api.ticket_operation_update(ctxt, operation_id, **values)
@@ -31,10 +31,14 @@ class TicketRpcAPI(object):
         cctxt = self.client.prepare(version='1.0')
         cctxt.cast(ctxt, 'tickets_create', **values)
 
+    def tickets_create_batch(self, ctxt, tickets):
+        cctxt = self.client.prepare(version='1.0')
+        cctxt.cast(ctxt, 'tickets_create_batch', tickets=tickets)
+
     def tickets_update(self, ctxt, ticket_id, **values):
         cctxt = self.client.prepare(version='1.0')
         cctxt.cast(ctxt, 'tickets_update', ticket_id=ticket_id, **values)
 
-    def tickets_delete(self, ctxt, ticket_id):
+    def tickets_delete(self, ctxt, ticket_id, **values):
         cctxt = self.client.prepare(version='1.0')
-        cctxt.cast(ctxt, 'tickets_delete', ticket_id=ticket_id)
+        cctxt.cast(ctxt, 'tickets_delete', ticket_id=ticket_id, **values)
@@ -14,6 +14,7 @@
 
 import datetime
 
+from aflo.common import datetime_codec
 from aflo.common.tickettemplate_expansion_filter_base\
     import TicketTemplateExpansionFilterBase
 from aflo.db.sqlalchemy import api as db_api
@@ -68,4 +69,4 @@ class ValidCatalogExpansionFilter(TicketTemplateExpansionFilterBase):
 
     def _get_datetime_utcnow(self):
         utcnow = datetime.datetime.utcnow()
-        return utcnow.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        return datetime_codec.strftime(utcnow)
@@ -24,6 +24,12 @@ CONF = cfg.CONF
 class ValidRoleExpansionFilter(TicketTemplateExpansionFilterBase):
     """Valid Role Expansion Filter."""
 
+    def query_filters(self, req):
+        """Filter ticket templates by the grant roles in SQL.
+        :param req: HTTP request.
+        """
+        return {'roles': req.context.roles}
+
     def do_exec(self, req, ticket_templates):
         """Filtering ticket template.
         Remove the ticket template which does not have a valid role.
@@ -35,41 +41,13 @@ class ValidRoleExpansionFilter(TicketTemplateExpansionFilterBase):
 
         user_roles = req.context.roles
         # Get all worflow pattern list
-        workflow_list = db_api.workflow_patterns_list(req.context)
+        workflows = dict((workflow.id, workflow) for workflow in
+                         db_api.workflow_patterns_list(req.context))
 
         for template in ticket_templates[:]:
-            workflow = self._get_workflow(workflow_list,
-                                          template.workflow_pattern_id)
+            workflow = workflows.get(template.workflow_pattern_id)
+            grant_role = db_api.workflow_pattern_grant_roles(
+                workflow.wf_pattern_contents)
 
-            has_role = False
-            grant_role = self._get_grant_role(workflow)
-
-            for role in grant_role:
-                if role in user_roles:
-                    has_role = True
-                    break
-            if not has_role:
+            if not set(grant_role) & set(user_roles):
                 ticket_templates.remove(template)
-
-    def _get_workflow(self, workflow_list, workflow_id):
-        for workflow in workflow_list:
-            if workflow.id == workflow_id:
-                return workflow
-
-    def _get_grant_role(self, workflow):
-        all_status_list = workflow.wf_pattern_contents['status_list']
-        current_status = filter(
-            lambda status:
-            status['status_code'] == 'none',
-            all_status_list)[0]
-        next_status = current_status.get('next_status')
-        all_role = []
-
-        for status in next_status:
-            grant_role = status.get('grant_role', [])
-            if not isinstance(grant_role, list):
-                grant_role = [grant_role]
-
-            all_role.extend(grant_role)
-
-        return all_role
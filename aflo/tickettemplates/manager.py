@@ -24,12 +24,14 @@ class TicketTemplatesManager(object):
                               sort_key=None, sort_dir=None,
                               force_show_deleted=False,
                               ticket_type=None,
-                              filters=None):
+                              filters=None,
+                              roles=None):
         return db_api.ticket_templates_list(ctxt, marker, limit,
                                             sort_key, sort_dir,
                                             force_show_deleted,
                                             ticket_type,
-                                            filters)
+                                            filters,
+                                            roles)
 
     def ticket_templates_get(self, ctxt,
                              tickettemplate_id):
@@ -38,3 +40,17 @@ class TicketTemplatesManager(object):
     def ticket_templates_delete(self, ctxt,
                                 tickettemplate_id):
         return db_api.ticket_templates_delete(ctxt, tickettemplate_id)
+
+    def ticket_templates_fingerprint(self, ctxt, expansion_filters=False):
+        """Get a fingerprint of ticket templates.
+        :param ctxt: Request context.
+        :param expansion_filters: Include the tables which
+            expansion filters read.
+        """
+        model_names = ['TicketTemplate']
+        if expansion_filters:
+            model_names += ['WorkflowPattern', 'TicketTemplateGrantRole',
+                            'Catalog', 'CatalogScope', 'Price']
+
+        return [db_api.table_fingerprint(ctxt, model_name)
+                for model_name in model_names]
@@ -18,6 +18,7 @@ import webob.exc
 from oslo_log import log as logging
 
 from aflo import i18n
+from aflo.tickettemplates import validation
 
 LOG = logging.getLogger(__name__)
 _ = i18n._
@@ -55,6 +56,7 @@ class TicketTemplate(object):
     def __init__(self, ticket_template_contents):
         """Initialise the template with JSON object and set of parameters"""
         self.ticket_template_contents = ticket_template_contents
+        self._validation_plans = {}
 
     @classmethod
     def load(cls, ticket_template_contents):
@@ -63,6 +65,17 @@ class TicketTemplate(object):
         """
         return cls(ticket_template_contents)
 
+    def get_validation_plan(self, before_status_code):
+        """Get the compiled validation plan of parameters.
+        A plan is compiled once for a status of the template.
+        @param before_status_code: Status code, or None at creating.
+        """
+        plan = self._validation_plans.get(before_status_code)
+        if plan is None:
+            plan = validation.ValidationPlan(self, before_status_code)
+            self._validation_plans[before_status_code] = plan
+        return plan
+
     @abc.abstractmethod
     def validate(self):
         """Parse a ticket_template_contents query param
@@ -0,0 +1,154 @@
+#  Licensed under the Apache License, Version 2.0 (the "License"); you may
+#  not use this file except in compliance with the License. You may obtain
+#  a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#  WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#  License for the specific language governing permissions and limitations
+#  under the License.
+
+"""
+Validation plans of ticket template parameters.
+
+A plan is compiled once for the parameters of a template and a status.
+It has the keys, compiled regexes, sets of allowed values and integer
+bounds of the parameters, so that checking values of a ticket does not
+look up the template again.
+"""
+
+import re
+
+from aflo.common import utils
+
+EMAIL_PATTERN = re.compile('[A-Z0-9a-z._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,4}')
+
+
+def _to_int(value):
+    return None if value is None else int(value)
+
+
+def _to_str(value):
+    try:
+        return str(value)
+    except UnicodeEncodeError:
+        return value.encode('utf_8')
+
+
+class ParameterRule(object):
+    """Compiled checks of a parameter."""
+
+    def __init__(self, ticket_template, parameter):
+        self.key = ticket_template.get_parameter_key(parameter)
+        self.label = ticket_template.get_label(parameter)
+        self.required = ticket_template.get_required(parameter)
+
+        param_type = ticket_template.get_parameter_type(parameter)
+        allowed_values = ticket_template.get_allowed_values(parameter)
+        if param_type in ('number', 'date', 'boolean', 'email'):
+            self._check = getattr(self, '_check_%s' % param_type)
+        elif allowed_values:
+            self._check = self._check_select
+        else:
+            self._check = self._check_string
+
+        value_range = ticket_template.get_range(parameter) or {}
+        self.min_value = _to_int(value_range.get('min'))
+        self.max_value = _to_int(value_range.get('max'))
+
+        value_length = ticket_template.get_length(parameter) or {}
+        self.min_length = _to_int(value_length.get('min'))
+        self.max_length = _to_int(value_length.get('max'))
+
+        self.allowed_values = frozenset(
+            _to_str(allowed_value['value'])
+            for allowed_value in allowed_values or [])
+
+        pattern = ticket_template.get_allowed_pattern(parameter)
+        self.pattern = re.compile(pattern) if pattern else None
+
+    def check(self, value):
+        """Check a value of the parameter.
+        :param value: Inputted value.
+        :retval Error message, or None if the value is valid.
+        """
+        if value:
+            value = _to_str(value)
+
+        if value is None or value == '':
+            if self.required:
+                return self._error(value, 'is None but is required')
+            return None
+
+        return self._check(value)
+
+    def _error(self, value, message):
+        return {'value': value,
+                'param': self.label,
+                'extra_msg': message}
+
+    def _check_number(self, value):
+        if (not isinstance(value, int)) and (not value.isdigit()):
+            return self._error(value, 'is not number')
+
+        if self.min_value is not None and int(value) < self.min_value:
+            return self._error(value, 'is too small')
+
+        if self.max_value is not None and int(value) > self.max_value:
+            return self._error(value, 'is too large')
+
+    def _check_date(self, value):
+        if not utils.is_datetime_like(value):
+            return self._error(value, 'is invalid value')
+
+    def _check_boolean(self, value):
+        if value not in ('True', 'False', True, False):
+            return self._error(value, 'is invalid value')
+
+    def _check_select(self, value):
+        if str(value) not in self.allowed_values:
+            return self._error(value, 'is invalid value')
+
+    def _check_email(self, value):
+        if EMAIL_PATTERN.match(value) is None:
+            return self._error(value, 'is invalid email')
+
+    def _check_string(self, value):
+        try:
+            value_string = unicode(value, 'utf-8')
+        except TypeError:
+            value_string = value
+
+        if self.min_length is not None and \
+                len(value_string) < self.min_length:
+            return self._error(value, 'is too short')
+
+        if self.max_length is not None and \
+                len(value_string) > self.max_length:
+            return self._error(value, 'is too long')
+
+        if self.pattern and self.pattern.match(value_string) is None:
+            return self._error(value, 'is invalid pattern')
+
+
+class ValidationPlan(object):
+    """Compiled checks of the parameters of a template and a status."""
+
+    def __init__(self, ticket_template, before_status_code):
+        self.rules = [ParameterRule(ticket_template, parameter)
+                      for parameter in ticket_template.get_parameters(
+                          before_status_code)]
+
+    def validate(self, data):
+        """Check values of all parameters in one pass.
+        :param data: Dict of inputted values, e.g. ticket_detail.
+        :retval List of error messages in the order of parameters.
+        """
+        errors = []
+        for rule in self.rules:
+            error = rule.check(data.get(rule.key))
+            if error:
+                errors.append(error)
+        return errors
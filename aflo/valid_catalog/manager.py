@@ -23,3 +23,10 @@ class ValidCatalogManager(object):
         return db_api.valid_catalog_list(ctxt, marker, limit,
                                          sort_key, sort_dir,
                                          refine_flg, filters)
+
+    def valid_catalog_fingerprint(self, ctxt):
+        """Get a fingerprint of tables of valid catalogs.
+            :param ctxt: Request context.
+        """
+        return [db_api.table_fingerprint(ctxt, model_name)
+                for model_name in ('Catalog', 'CatalogScope', 'Price')]